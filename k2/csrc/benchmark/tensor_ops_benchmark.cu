@@ -16,7 +16,10 @@
  * limitations under the License.
  */
 
+#include <algorithm>
 #include <cstdlib>
+#include <string>
+#include <vector>
 
 #include "k2/csrc/benchmark/benchmark.h"
 #include "k2/csrc/tensor_ops.h"
@@ -24,15 +27,19 @@
 
 namespace k2 {
 
+static ContextPtr GetBenchmarkContext(DeviceType device_type) {
+  if (device_type == kCpu) return GetCpuContext();
+  K2_CHECK_EQ(device_type, kCuda);
+  return GetCudaContext();
+}
+
+// Number of columns of the 2-D tensors, e.g. the dimension of an
+// attribute of an Fsa that has one vector per arc.
+static constexpr int32_t kNumCols = 16;
+
 template <typename T>
 static BenchmarkStat BenchmarkIndexAdd1D(int32_t dim, DeviceType device_type) {
-  ContextPtr context;
-  if (device_type == kCpu) {
-    context = GetCpuContext();
-  } else {
-    K2_CHECK_EQ(device_type, kCuda);
-    context = GetCudaContext();
-  }
+  ContextPtr context = GetBenchmarkContext(device_type);
 
   int32_t num_iter = std::min(500, 10000000 / dim);
   int32_t src_dim = dim;
@@ -62,19 +69,108 @@ static BenchmarkStat BenchmarkIndexAdd1D(int32_t dim, DeviceType device_type) {
   return stat;
 }
 
+template <typename T>
+static BenchmarkStat BenchmarkIndexAdd2D(int32_t dim, DeviceType device_type) {
+  ContextPtr context = GetBenchmarkContext(device_type);
+
+  int32_t num_iter = std::min(500, 10000000 / dim);
+  int32_t src_dim = dim;
+  int32_t dest_dim = std::max(src_dim / 10, 1);
+
+  Tensor src(context, DtypeOf<T>::dtype, {src_dim, kNumCols});
+  Tensor dest(context, DtypeOf<T>::dtype, {dest_dim, kNumCols});
+  Array1<int32_t> indexes =
+      GenerateRandomIndexes(context, true, src_dim, dest_dim - 1);
+
+  BenchmarkStat stat;
+  stat.op_name = "IndexAdd2D";
+  stat.num_iter = num_iter;
+  stat.problem_size = dim;
+  stat.dtype_name = TraitsOf(DtypeOf<T>::dtype).Name();
+  stat.device_type = device_type;
+
+  stat.eplased_per_iter = BenchmarkOp(
+      num_iter, context,
+      (void (*)(Tensor &, Array1<int32_t> &, bool, Tensor *))(&IndexAdd), src,
+      indexes, true, &dest);
+  stat.eplased_per_iter *= 1e6;  // from seconds to microseconds
+  return stat;
+}
+
+// Benchmark Index() that writes to a pre-allocated output with default
+// values for -1 indexes, i.e., what `k2.index_select` does.
+template <typename T>
+static BenchmarkStat BenchmarkIndex(int32_t dim, int32_t num_cols,
+                                    DeviceType device_type) {
+  ContextPtr context = GetBenchmarkContext(device_type);
+
+  int32_t num_iter = std::min(500, 10000000 / dim);
+  int32_t src_dim = std::max(dim / 10, 1);
+
+  Tensor src = num_cols == 0
+                   ? Tensor(context, DtypeOf<T>::dtype, {src_dim})
+                   : Tensor(context, DtypeOf<T>::dtype, {src_dim, num_cols});
+  Tensor ans = num_cols == 0
+                   ? Tensor(context, DtypeOf<T>::dtype, {dim})
+                   : Tensor(context, DtypeOf<T>::dtype, {dim, num_cols});
+  Array1<int32_t> indexes =
+      GenerateRandomIndexes(context, true, dim, src_dim - 1);
+
+  BenchmarkStat stat;
+  stat.op_name = num_cols == 0 ? "Index1D" : "Index2D";
+  stat.num_iter = num_iter;
+  stat.problem_size = dim;
+  stat.dtype_name = TraitsOf(DtypeOf<T>::dtype).Name();
+  stat.device_type = device_type;
+
+  double default_value = -1;
+  stat.eplased_per_iter =
+      BenchmarkOp(num_iter, context,
+                  (void (*)(Tensor &, Array1<int32_t> &, bool, double,
+                            Tensor *))(&Index),
+                  src, indexes, true, default_value, &ans);
+  stat.eplased_per_iter *= 1e6;  // from seconds to microseconds
+  return stat;
+}
+
+static std::vector<int32_t> GetProblemSizes() {
+  return {10, 100, 500, 1000, 2000, 5000, 10000, 50000, 100000, 1000000};
+}
+
 template <typename T>
 static void RegisterBenchmarkIndexAdd1D(DeviceType device_type) {
-  std::vector<int32_t> problems_sizes = {10,   100,  500,   1000,
-                                         2000, 5000, 10000, 50000};
-  for (auto s : problems_sizes) {
-    std::string name =
-        GenerateBenchmarkName<int32_t>("IndexAdd1D", device_type);
+  for (auto s : GetProblemSizes()) {
+    std::string name = GenerateBenchmarkName<T>("IndexAdd1D", device_type);
     RegisterBenchmark(name, [s, device_type]() -> BenchmarkStat {
       return BenchmarkIndexAdd1D<T>(s, device_type);
     });
   }
 }
 
+template <typename T>
+static void RegisterBenchmarkIndexAdd2D(DeviceType device_type) {
+  for (auto s : GetProblemSizes()) {
+    std::string name = GenerateBenchmarkName<T>("IndexAdd2D", device_type);
+    RegisterBenchmark(name, [s, device_type]() -> BenchmarkStat {
+      return BenchmarkIndexAdd2D<T>(s, device_type);
+    });
+  }
+}
+
+template <typename T>
+static void RegisterBenchmarkIndex(DeviceType device_type) {
+  for (auto s : GetProblemSizes()) {
+    std::string name = GenerateBenchmarkName<T>("Index1D", device_type);
+    RegisterBenchmark(name, [s, device_type]() -> BenchmarkStat {
+      return BenchmarkIndex<T>(s, 0, device_type);
+    });
+    name = GenerateBenchmarkName<T>("Index2D", device_type);
+    RegisterBenchmark(name, [s, device_type]() -> BenchmarkStat {
+      return BenchmarkIndex<T>(s, kNumCols, device_type);
+    });
+  }
+}
+
 static void RunTensorOpsBenchmark() {
   PrintEnvironmentInfo();
 
@@ -84,6 +180,15 @@ static void RunTensorOpsBenchmark() {
   RegisterBenchmarkIndexAdd1D<float>(kCpu);
   RegisterBenchmarkIndexAdd1D<float>(kCuda);
 
+  RegisterBenchmarkIndexAdd2D<float>(kCpu);
+  RegisterBenchmarkIndexAdd2D<float>(kCuda);
+
+  RegisterBenchmarkIndex<float>(kCpu);
+  RegisterBenchmarkIndex<float>(kCuda);
+
+  RegisterBenchmarkIndex<int32_t>(kCpu);
+  RegisterBenchmarkIndex<int32_t>(kCuda);
+
   // Users can set a regular expression via environment
   // variable `K2_BENCHMARK_FILTER` such that only benchmarks
   // with name matching the pattern are candidates to run.
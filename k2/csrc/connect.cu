@@ -364,12 +364,17 @@ class Connector {
     dest_states_ = Ragged<int32_t>(fsas_.shape, dest_states_idx01);
     incoming_arcs_ = GetIncomingArcs(fsas_, dest_states_idx01);
 
-    ThreadPool* pool = GetThreadPool();
-    // Mark accessible states
-    pool->SubmitTask([this]() { ForwardPassStatic(this); });
-    // Mark coaccessible states
-    pool->SubmitTask([this]() { BackwardPassStatic(this); });
-    pool->WaitAllTasksFinished();
+    // Mark accessible states and coaccessible states in parallel.  We don't
+    // use ThreadPool::WaitAllTasksFinished() since it would also wait for
+    // the tasks of other users of the thread pool.
+    ParallelFor(2, 1, [this](int32_t begin, int32_t end) {
+      for (int32_t i = begin; i != end; ++i) {
+        if (i == 0)
+          ForwardPassStatic(this);
+        else
+          BackwardPassStatic(this);
+      }
+    });
 
     // Get remaining states and construct row_ids1/row_splits1
     int32_t num_states = fsas_.shape.TotSize(1);
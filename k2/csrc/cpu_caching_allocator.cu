@@ -0,0 +1,186 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <stdlib.h>  // posix_memalign
+
+#include <algorithm>
+#include <cstdlib>
+#include <sstream>
+#include <string>
+
+#include "k2/csrc/cpu_caching_allocator.h"
+#include "k2/csrc/log.h"
+#include "k2/csrc/nvtx.h"
+
+namespace k2 {
+
+// Return the index of the size class for `bytes`, i.e., the smallest i
+// such that (kMinBlockSize << i) >= bytes.
+// Requires bytes <= kMaxCachedBlockSize.
+static int32_t GetSizeClass(std::size_t bytes) {
+  int32_t i = 0;
+  std::size_t size = CpuCachingAllocator::kMinBlockSize;
+  while (size < bytes) {
+    size <<= 1;
+    ++i;
+  }
+  return i;
+}
+
+static void *AlignedAlloc(std::size_t bytes) {
+  void *p = nullptr;
+  int32_t ret = posix_memalign(&p, CpuCachingAllocator::kAlignment, bytes);
+  K2_CHECK_EQ(ret, 0) << "Failed to allocate " << bytes << " bytes";
+  return p;
+}
+
+std::string CpuAllocatorStats::ToString() const {
+  std::ostringstream os;
+  os << "num_allocs: " << num_allocs << ", num_frees: " << num_frees
+     << ", num_cache_hits: " << num_cache_hits
+     << ", total_allocated_bytes: " << total_allocated_bytes
+     << ", allocated_bytes: " << allocated_bytes
+     << ", peak_allocated_bytes: " << peak_allocated_bytes
+     << ", cached_bytes: " << cached_bytes
+     << ", cache_limit_bytes: " << cache_limit_bytes;
+  return os.str();
+}
+
+CpuCachingAllocator::CpuCachingAllocator(int64_t cache_limit_bytes)
+    : free_blocks_(GetSizeClass(kMaxCachedBlockSize) + 1) {
+  K2_CHECK_GE(cache_limit_bytes, 0);
+  stats_.cache_limit_bytes = cache_limit_bytes;
+}
+
+CpuCachingAllocator::~CpuCachingAllocator() { EmptyCache(); }
+
+void *CpuCachingAllocator::Allocate(std::size_t bytes) {
+  NVTX_RANGE(K2_FUNC);
+  if (bytes == 0) return nullptr;
+
+  std::size_t block_size = bytes;
+  int32_t size_class = -1;
+  if (bytes <= kMaxCachedBlockSize) {
+    size_class = GetSizeClass(bytes);
+    block_size = kMinBlockSize << size_class;
+  }
+
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    ++stats_.num_allocs;
+    stats_.total_allocated_bytes += block_size;
+    stats_.allocated_bytes += block_size;
+    stats_.peak_allocated_bytes =
+        std::max(stats_.peak_allocated_bytes, stats_.allocated_bytes);
+    if (size_class != -1 && !free_blocks_[size_class].empty()) {
+      void *p = free_blocks_[size_class].back();
+      free_blocks_[size_class].pop_back();
+      stats_.cached_bytes -= block_size;
+      ++stats_.num_cache_hits;
+      block_sizes_[p] = block_size;
+      return p;
+    }
+  }
+
+  // Allocate outside of the lock since it may be slow
+  void *p = AlignedAlloc(block_size);
+
+  std::lock_guard<std::mutex> lock(mutex_);
+  block_sizes_[p] = block_size;
+  return p;
+}
+
+void CpuCachingAllocator::Deallocate(void *ptr) {
+  NVTX_RANGE(K2_FUNC);
+  if (ptr == nullptr) return;
+
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto it = block_sizes_.find(ptr);
+    K2_CHECK(it != block_sizes_.end())
+        << "The passed pointer is not allocated by Allocate!";
+    std::size_t block_size = it->second;
+    block_sizes_.erase(it);
+
+    ++stats_.num_frees;
+    stats_.allocated_bytes -= block_size;
+
+    if (block_size <= kMaxCachedBlockSize &&
+        stats_.cached_bytes + static_cast<int64_t>(block_size) <=
+            stats_.cache_limit_bytes) {
+      free_blocks_[GetSizeClass(block_size)].push_back(ptr);
+      stats_.cached_bytes += block_size;
+      return;
+    }
+  }
+  free(ptr);
+}
+
+void CpuCachingAllocator::EmptyCache() {
+  std::lock_guard<std::mutex> lock(mutex_);
+  for (auto &blocks : free_blocks_) {
+    for (void *p : blocks) free(p);
+    blocks.clear();
+  }
+  stats_.cached_bytes = 0;
+}
+
+void CpuCachingAllocator::SetCacheLimit(int64_t cache_limit_bytes) {
+  K2_CHECK_GE(cache_limit_bytes, 0);
+  std::lock_guard<std::mutex> lock(mutex_);
+  stats_.cache_limit_bytes = cache_limit_bytes;
+  ReleaseCachedBlocks();
+}
+
+CpuAllocatorStats CpuCachingAllocator::GetStats() {
+  std::lock_guard<std::mutex> lock(mutex_);
+  return stats_;
+}
+
+void CpuCachingAllocator::ResetPeakStats() {
+  std::lock_guard<std::mutex> lock(mutex_);
+  stats_.peak_allocated_bytes = stats_.allocated_bytes;
+}
+
+void CpuCachingAllocator::ReleaseCachedBlocks() {
+  // Release the largest blocks first.
+  for (int32_t i = static_cast<int32_t>(free_blocks_.size()) - 1;
+       i >= 0 && stats_.cached_bytes > stats_.cache_limit_bytes; --i) {
+    auto &blocks = free_blocks_[i];
+    int64_t block_size = static_cast<int64_t>(kMinBlockSize << i);
+    while (!blocks.empty() && stats_.cached_bytes > stats_.cache_limit_bytes) {
+      free(blocks.back());
+      blocks.pop_back();
+      stats_.cached_bytes -= block_size;
+    }
+  }
+}
+
+CpuCachingAllocator *GetCpuCachingAllocator() {
+  // It is never freed since memory may still be deallocated
+  // during the destruction of other static objects.
+  static CpuCachingAllocator *allocator = []() {
+    int64_t cache_limit_bytes = 128 << 20;  // 128 MB
+    const char *env_str = std::getenv("K2_CPU_ALLOCATOR_CACHE_BYTES");
+    if (env_str != nullptr) cache_limit_bytes = std::atol(env_str);
+    return new CpuCachingAllocator(cache_limit_bytes);
+  }();
+  return allocator;
+}
+
+}  // namespace k2
@@ -0,0 +1,121 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#ifndef K2_CSRC_CPU_CACHING_ALLOCATOR_H_
+#define K2_CSRC_CPU_CACHING_ALLOCATOR_H_
+
+#include <cstddef>
+#include <cstdint>
+#include <mutex>  // NOLINT
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+namespace k2 {
+
+struct CpuAllocatorStats {
+  // Number of non-empty allocations, including those served from the cache.
+  int64_t num_allocs = 0;
+  // Number of non-empty deallocations.
+  int64_t num_frees = 0;
+  // Number of allocations served from the cache.
+  int64_t num_cache_hits = 0;
+  // Total bytes of all allocations so far, i.e., it is never decreased.
+  int64_t total_allocated_bytes = 0;
+  // Bytes currently allocated to users. Sizes are rounded up to the
+  // size class of the block.
+  int64_t allocated_bytes = 0;
+  // The maximum of `allocated_bytes` since the start of the program or
+  // the last call to ResetPeakStats().
+  int64_t peak_allocated_bytes = 0;
+  // Bytes kept in the cache, i.e., freed by users but not returned to
+  // the system.
+  int64_t cached_bytes = 0;
+  // Maximum number of bytes that can be kept in the cache.
+  int64_t cache_limit_bytes = 0;
+
+  std::string ToString() const;
+};
+
+/* A thread-safe caching allocator for CPU memory.
+
+   Requests up to kMaxCachedBlockSize bytes are rounded up to a power of
+   two (at least kMinBlockSize bytes). Freed blocks are kept in a free list
+   per size class as long as the total number of cached bytes does not
+   exceed the cache limit; otherwise they are returned to the system.
+   Larger requests are not cached.
+
+   All memory is aligned to kAlignment bytes.
+ */
+class CpuCachingAllocator {
+ public:
+  static constexpr std::size_t kAlignment = 64;
+  static constexpr std::size_t kMinBlockSize = 64;
+  static constexpr std::size_t kMaxCachedBlockSize = 16 << 20;  // 16 MB
+
+  /*
+    @param [in] cache_limit_bytes  Maximum number of bytes kept in the
+                                   cache. 0 disables caching.
+   */
+  explicit CpuCachingAllocator(int64_t cache_limit_bytes);
+  CpuCachingAllocator(const CpuCachingAllocator &) = delete;
+  CpuCachingAllocator &operator=(const CpuCachingAllocator &) = delete;
+  ~CpuCachingAllocator();
+
+  // Return nullptr if `bytes` is 0.
+  void *Allocate(std::size_t bytes);
+
+  // `ptr` must be returned by Allocate() of this object, or nullptr.
+  void Deallocate(void *ptr);
+
+  // Return all cached blocks to the system.
+  void EmptyCache();
+
+  // Set the maximum number of bytes kept in the cache. Cached blocks
+  // exceeding the new limit are returned to the system.
+  void SetCacheLimit(int64_t cache_limit_bytes);
+
+  CpuAllocatorStats GetStats();
+
+  // Set `peak_allocated_bytes` to the current `allocated_bytes`.
+  void ResetPeakStats();
+
+ private:
+  // Release cached blocks until cached_bytes <= cache_limit_bytes.
+  // The caller must hold mutex_.
+  void ReleaseCachedBlocks();
+
+  std::mutex mutex_;
+  CpuAllocatorStats stats_;
+  // free_blocks_[i] contains cached blocks of size (kMinBlockSize << i)
+  std::vector<std::vector<void *>> free_blocks_;
+  // map from a pointer returned by Allocate() to its block size
+  std::unordered_map<void *, std::size_t> block_sizes_;
+};
+
+/* Return the allocator used by CPU contexts.
+
+   Its cache limit is read from the environment variable
+   `K2_CPU_ALLOCATOR_CACHE_BYTES` at the first call; it defaults to 128 MB.
+   Set it to 0 to disable caching.
+ */
+CpuCachingAllocator *GetCpuCachingAllocator();
+
+}  // namespace k2
+
+#endif  // K2_CSRC_CPU_CACHING_ALLOCATOR_H_
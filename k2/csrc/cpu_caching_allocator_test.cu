@@ -0,0 +1,114 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <cstdint>
+#include <thread>  // NOLINT
+#include <vector>
+
+#include "gtest/gtest.h"
+#include "k2/csrc/array.h"
+#include "k2/csrc/context.h"
+#include "k2/csrc/cpu_caching_allocator.h"
+
+namespace k2 {
+
+TEST(CpuCachingAllocator, Cache) {
+  CpuCachingAllocator allocator(1024);
+  EXPECT_EQ(allocator.Allocate(0), nullptr);
+
+  void *p = allocator.Allocate(100);
+  EXPECT_EQ(reinterpret_cast<std::uintptr_t>(p) %
+                CpuCachingAllocator::kAlignment,
+            0u);
+  CpuAllocatorStats stats = allocator.GetStats();
+  EXPECT_EQ(stats.num_allocs, 1);
+  EXPECT_EQ(stats.allocated_bytes, 128);  // rounded up to a power of 2
+  EXPECT_EQ(stats.cached_bytes, 0);
+
+  allocator.Deallocate(p);
+  stats = allocator.GetStats();
+  EXPECT_EQ(stats.num_frees, 1);
+  EXPECT_EQ(stats.allocated_bytes, 0);
+  EXPECT_EQ(stats.peak_allocated_bytes, 128);
+  EXPECT_EQ(stats.cached_bytes, 128);
+
+  // the cached block is reused for requests of the same size class
+  void *q = allocator.Allocate(120);
+  EXPECT_EQ(p, q);
+  stats = allocator.GetStats();
+  EXPECT_EQ(stats.num_cache_hits, 1);
+  EXPECT_EQ(stats.cached_bytes, 0);
+  EXPECT_EQ(stats.total_allocated_bytes, 256);
+
+  // blocks exceeding the cache limit are returned to the system
+  void *r = allocator.Allocate(2000);
+  allocator.Deallocate(r);
+  allocator.Deallocate(q);
+  stats = allocator.GetStats();
+  EXPECT_EQ(stats.peak_allocated_bytes, 128 + 2048);
+  EXPECT_EQ(stats.cached_bytes, 128);
+
+  allocator.ResetPeakStats();
+  EXPECT_EQ(allocator.GetStats().peak_allocated_bytes, 0);
+
+  allocator.SetCacheLimit(0);
+  EXPECT_EQ(allocator.GetStats().cached_bytes, 0);
+
+  p = allocator.Allocate(100);
+  allocator.Deallocate(p);
+  stats = allocator.GetStats();
+  EXPECT_EQ(stats.num_cache_hits, 1);
+  EXPECT_EQ(stats.cached_bytes, 0);
+}
+
+TEST(CpuCachingAllocator, MultiThreads) {
+  CpuCachingAllocator allocator(1 << 20);
+  std::vector<std::thread> threads;
+  for (int32_t t = 0; t != 4; ++t) {
+    threads.emplace_back([&allocator, t]() {
+      for (int32_t i = 0; i != 1000; ++i) {
+        std::size_t bytes = (i * 37 + t) % 5000 + 1;
+        char *p = static_cast<char *>(allocator.Allocate(bytes));
+        p[0] = p[bytes - 1] = 1;
+        allocator.Deallocate(p);
+      }
+    });
+  }
+  for (auto &thread : threads) thread.join();
+
+  CpuAllocatorStats stats = allocator.GetStats();
+  EXPECT_EQ(stats.num_allocs, 4000);
+  EXPECT_EQ(stats.num_frees, 4000);
+  EXPECT_EQ(stats.allocated_bytes, 0);
+  EXPECT_GT(stats.num_cache_hits, 0);
+}
+
+TEST(CpuCachingAllocator, CpuContext) {
+  CpuAllocatorStats before = GetCpuCachingAllocator()->GetStats();
+  {
+    Array1<int32_t> a(GetCpuContext(), 1000);
+    CpuAllocatorStats stats = GetCpuCachingAllocator()->GetStats();
+    EXPECT_EQ(stats.num_allocs, before.num_allocs + 1);
+    EXPECT_GE(stats.allocated_bytes, before.allocated_bytes + 4000);
+  }
+  CpuAllocatorStats after = GetCpuCachingAllocator()->GetStats();
+  EXPECT_EQ(after.num_frees, before.num_frees + 1);
+  EXPECT_EQ(after.allocated_bytes, before.allocated_bytes);
+}
+
+}  // namespace k2
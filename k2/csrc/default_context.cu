@@ -21,13 +21,12 @@
 #include <mutex>  // NOLINT
 
 #include "k2/csrc/context.h"
+#include "k2/csrc/cpu_caching_allocator.h"
 #include "k2/csrc/log.h"
 #include "k2/csrc/nvtx.h"
 
 namespace k2 {
 
-static constexpr std::size_t kAlignment = 64;
-
 // TODO(haowen): most of implementations below should be updated later.
 class CpuContext : public Context {
  public:
@@ -36,11 +35,7 @@ class CpuContext : public Context {
   DeviceType GetDeviceType() const override { return kCpu; }
 
   void *Allocate(std::size_t bytes, void **deleter_context) override {
-    void *p = nullptr;
-    if (bytes) {
-      int32_t ret = posix_memalign(&p, kAlignment, bytes);
-      K2_CHECK_EQ(ret, 0);
-    }
+    void *p = GetCpuCachingAllocator()->Allocate(bytes);
     if (deleter_context != nullptr) *deleter_context = nullptr;
     return p;
   }
@@ -50,7 +45,7 @@ class CpuContext : public Context {
   }
 
   void Deallocate(void *data, void * /*deleter_context*/) override {
-    free(data);
+    GetCpuCachingAllocator()->Deallocate(data);
   }
 };
 
@@ -0,0 +1,217 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <cmath>
+#include <limits>
+#include <vector>
+
+#include "k2/csrc/dense_ctc.h"
+#include "k2/csrc/thread_pool.h"
+#include "k2/csrc/utils.h"
+
+// This is not really a CUDA file but for build-system reasons it has
+// the .cu extension.
+
+namespace k2 {
+
+namespace {
+
+/*
+  The states of the CTC graph of a sequence with S symbols are numbered as in
+  CtcGraphs(): state 2k is a blank state and state 2k+1 is the state of the
+  k-th symbol, for 0 <= k <= S. The final state is not represented; it is
+  entered on the last frame of `dense_fsas` from the last two states (or from
+  state 0 if S == 0).
+ */
+template <typename Real>
+class DenseCtc {
+ public:
+  DenseCtc(const int32_t *symbols, int32_t num_symbols, bool modified,
+           float delay_penalty)
+      : symbols_(symbols),
+        num_states_(2 * num_symbols + 1),
+        modified_(modified),
+        delay_penalty_(delay_penalty) {}
+
+  // Returns the column of `dense_fsas.scores` for state s.
+  int32_t Column(int32_t s) const {
+    return (s & 1) ? symbols_[s >> 1] + 1 : 1;
+  }
+
+  // Returns true if state s can be entered from state s - 2.
+  bool CanSkip(int32_t s) const {
+    return (s & 1) && s >= 2 &&
+           (modified_ || symbols_[s >> 1] != symbols_[(s >> 1) - 1]);
+  }
+
+  /*
+    Compute the total score of the sequence whose rows of dense_fsas.scores
+    start at `scores` with `row_stride`, for `num_frames` frames plus the final
+    frame, and the gradients if `grad` is not NULL.
+   */
+  Real Compute(const float *scores, int32_t row_stride, int32_t num_frames,
+               float *grad, int32_t grad_stride) {
+    const Real kNegInf = -std::numeric_limits<Real>::infinity();
+    int32_t S = num_states_, T = num_frames;
+    alpha_.assign(static_cast<size_t>(T + 1) * S, kNegInf);
+    alpha_[0] = 0;
+    for (int32_t t = 0; t != T; ++t) {
+      const float *row = scores + static_cast<int64_t>(t) * row_stride;
+      const Real *prev = alpha_.data() + static_cast<int64_t>(t) * S;
+      Real *cur = alpha_.data() + static_cast<int64_t>(t + 1) * S;
+      Real penalty = Penalty(t, T);
+      for (int32_t s = 0; s != S; ++s) {
+        Real p = (s & 1) ? penalty : 0;
+        Real v = prev[s];
+        if (s >= 1) v = LogAdd<Real>()(v, prev[s - 1] + p);
+        if (CanSkip(s)) v = LogAdd<Real>()(v, prev[s - 2] + p);
+        cur[s] = v + row[Column(s)];
+      }
+    }
+
+    const float *final_row = scores + static_cast<int64_t>(T) * row_stride;
+    Real final_score = final_row[0];
+    const Real *last = alpha_.data() + static_cast<int64_t>(T) * S;
+    Real tot = last[S - 1];
+    if (S > 1) tot = LogAdd<Real>()(tot, last[S - 2]);
+    tot += final_score;
+    if (grad == nullptr || tot == kNegInf) return tot;
+
+    // beta_[s] is the score from state s after frame t to the end.
+    beta_.assign(S, kNegInf);
+    new_beta_.resize(S);
+    beta_[S - 1] = final_score;
+    if (S > 1) beta_[S - 2] = final_score;
+    grad[static_cast<int64_t>(T) * grad_stride] = 1;
+    for (int32_t t = T - 1; t >= 0; --t) {
+      const float *row = scores + static_cast<int64_t>(t) * row_stride;
+      const Real *cur = alpha_.data() + static_cast<int64_t>(t + 1) * S;
+      float *grad_row = grad + static_cast<int64_t>(t) * grad_stride;
+      for (int32_t s = 0; s != S; ++s) {
+        Real occupation = cur[s] + beta_[s] - tot;
+        if (occupation != kNegInf) grad_row[Column(s)] += std::exp(occupation);
+      }
+      if (t == 0) break;
+      // new_beta_[s] is the score from state s after frame t-1 to the end.
+      Real penalty = Penalty(t, T);
+      for (int32_t s = 0; s != S; ++s) {
+        Real v = beta_[s] + row[Column(s)];
+        if (s + 1 < S) {
+          Real p = ((s + 1) & 1) ? penalty : 0;
+          v = LogAdd<Real>()(v, beta_[s + 1] + row[Column(s + 1)] + p);
+        }
+        if (s + 2 < S && CanSkip(s + 2))
+          v = LogAdd<Real>()(v, beta_[s + 2] + row[Column(s + 2)] + penalty);
+        new_beta_[s] = v;
+      }
+      beta_.swap(new_beta_);
+    }
+    return tot;
+  }
+
+ private:
+  // The score added when entering a symbol state on frame t.
+  Real Penalty(int32_t t, int32_t num_frames) const {
+    // As in the lattice path of k2.ctc_loss, only a positive delay_penalty is
+    // applied.
+    if (delay_penalty_ <= 0) return 0;
+    return -static_cast<Real>(delay_penalty_) * (t - (num_frames >> 1));
+  }
+
+  const int32_t *symbols_;
+  int32_t num_states_;
+  bool modified_;
+  float delay_penalty_;
+  std::vector<Real> alpha_;  // (num_frames + 1) * num_states_
+  std::vector<Real> beta_;
+  std::vector<Real> new_beta_;
+};
+
+}  // namespace
+
+template <typename Real>
+void DenseCtcForwardBackward(Ragged<int32_t> &symbols, DenseFsaVec &dense_fsas,
+                             bool modified, float delay_penalty,
+                             Array1<Real> *tot_scores,
+                             Array2<float> *grad /*= nullptr*/) {
+  ContextPtr c = GetCpuContext();
+  K2_CHECK(symbols.Context()->IsCompatible(*c) &&
+           dense_fsas.Context()->IsCompatible(*c))
+      << "DenseCtcForwardBackward supports only CPU";
+  K2_CHECK_EQ(symbols.NumAxes(), 2);
+  K2_CHECK_EQ(symbols.Dim0(), dense_fsas.shape.Dim0());
+  K2_CHECK(tot_scores != nullptr);
+
+  int32_t num_seqs = symbols.Dim0(),
+          num_cols = dense_fsas.scores.Dim1();
+  const int32_t *symbols_row_splits = symbols.RowSplits(1).Data(),
+                *symbols_data = symbols.values.Data(),
+                *dense_row_splits = dense_fsas.shape.RowSplits(1).Data();
+  for (int32_t i = 0; i != symbols.NumElements(); ++i) {
+    K2_CHECK(symbols_data[i] > 0 && symbols_data[i] + 1 < num_cols)
+        << "Invalid symbol " << symbols_data[i] << " for "
+        << num_cols - 1 << " output classes";
+  }
+  for (int32_t i = 0; i != num_seqs; ++i)
+    K2_CHECK_GT(dense_row_splits[i + 1], dense_row_splits[i]);
+
+  const float *scores_data = dense_fsas.scores.Data();
+  int32_t scores_stride = dense_fsas.scores.ElemStride0();
+
+  *tot_scores = Array1<Real>(c, num_seqs);
+  Real *tot_scores_data = tot_scores->Data();
+  float *grad_data = nullptr;
+  int32_t grad_stride = 0;
+  if (grad != nullptr) {
+    *grad = Array2<float>(c, dense_fsas.scores.Dim0(), num_cols, 0);
+    grad_data = grad->Data();
+    grad_stride = grad->ElemStride0();
+  }
+
+  ParallelFor(num_seqs, 1, [&](int32_t begin, int32_t end) {
+    for (int32_t i = begin; i != end; ++i) {
+      int32_t row_begin = dense_row_splits[i],
+              num_frames = dense_row_splits[i + 1] - row_begin - 1;
+      DenseCtc<Real> ctc(symbols_data + symbols_row_splits[i],
+                         symbols_row_splits[i + 1] - symbols_row_splits[i],
+                         modified, delay_penalty);
+      tot_scores_data[i] = ctc.Compute(
+          scores_data + static_cast<int64_t>(row_begin) * scores_stride,
+          scores_stride, num_frames,
+          grad_data == nullptr
+              ? nullptr
+              : grad_data + static_cast<int64_t>(row_begin) * grad_stride,
+          grad_stride);
+    }
+  });
+}
+
+template void DenseCtcForwardBackward<float>(Ragged<int32_t> &symbols,
+                                             DenseFsaVec &dense_fsas,
+                                             bool modified,
+                                             float delay_penalty,
+                                             Array1<float> *tot_scores,
+                                             Array2<float> *grad);
+template void DenseCtcForwardBackward<double>(Ragged<int32_t> &symbols,
+                                              DenseFsaVec &dense_fsas,
+                                              bool modified,
+                                              float delay_penalty,
+                                              Array1<double> *tot_scores,
+                                              Array2<float> *grad);
+
+}  // namespace k2
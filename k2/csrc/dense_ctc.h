@@ -0,0 +1,66 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#ifndef K2_CSRC_DENSE_CTC_H_
+#define K2_CSRC_DENSE_CTC_H_
+
+#include "k2/csrc/array.h"
+#include "k2/csrc/fsa.h"
+#include "k2/csrc/ragged.h"
+
+namespace k2 {
+
+/*
+  Compute the CTC total scores, and optionally their gradients, with the
+  alpha/beta recursion over the (T+1) x (2S+1) states of each sequence.
+
+  The result is the same as intersecting CtcGraphs(symbols, modified) with
+  `dense_fsas` without pruning and computing the total scores in log semiring,
+  but it needs neither the lattice nor the arc maps.
+
+  It runs on CPU only, with the sequences processed in parallel by the global
+  thread pool.
+
+     @param [in] symbols  The symbol sequences, with 2 axes [fsa][symbol]. They
+                          must not contain 0 or -1.
+     @param [in] dense_fsas  The neural-net output, with
+                          dense_fsas.shape.Dim0() == symbols.Dim0().
+     @param [in] modified  If true, use the modified CTC topology, i.e., the
+                          one that does not require a blank between identical
+                          consecutive symbols. See CtcGraphs().
+     @param [in] delay_penalty  If positive, add
+                          `-delay_penalty * (t - duration / 2)` to the score of
+                          entering a symbol state on frame t, where duration
+                          is the number of frames of the sequence. It is the
+                          same as the `delay_penalty` of k2.CtcLoss.
+     @param [out] tot_scores  On return, it contains the total score of each
+                          sequence; -infinity if there are too few frames.
+     @param [out] grad  If not NULL, on return it contains the gradients of the
+                          total scores w.r.t. dense_fsas.scores, with the same
+                          shape. Rows of sequences with -infinity total scores
+                          are zero.
+ */
+template <typename Real>
+void DenseCtcForwardBackward(Ragged<int32_t> &symbols, DenseFsaVec &dense_fsas,
+                             bool modified, float delay_penalty,
+                             Array1<Real> *tot_scores,
+                             Array2<float> *grad = nullptr);
+
+}  // namespace k2
+
+#endif  // K2_CSRC_DENSE_CTC_H_
@@ -0,0 +1,143 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <cmath>
+#include <limits>
+#include <vector>
+
+#include "gtest/gtest.h"
+#include "k2/csrc/dense_ctc.h"
+#include "k2/csrc/math.h"
+#include "k2/csrc/ragged_ops.h"
+#include "k2/csrc/test_utils.h"
+
+namespace k2 {
+
+// Sum the scores of all the paths through the CTC graph of `symbols` by
+// enumerating them.
+static double NaiveCtc(const std::vector<int32_t> &symbols,
+                       Array2<float> &scores, int32_t row_begin,
+                       int32_t num_frames, bool modified, float delay_penalty,
+                       int32_t t = 0, int32_t s = 0) {
+  int32_t num_states = 2 * symbols.size() + 1;
+  auto acc = scores.Accessor();
+  if (t == num_frames) {
+    if (s + 2 < num_states) return -std::numeric_limits<double>::infinity();
+    return acc(row_begin + num_frames, 0);
+  }
+  double ans = -std::numeric_limits<double>::infinity();
+  for (int32_t next = s; next <= s + 2 && next < num_states; ++next) {
+    bool is_symbol = next & 1;
+    if (next == s + 2 && !(is_symbol && (modified || symbols[next / 2] !=
+                                                      symbols[next / 2 - 1])))
+      continue;
+    int32_t col = is_symbol ? symbols[next / 2] + 1 : 1;
+    double score = acc(row_begin + t, col);
+    if (next != s && is_symbol)
+      score -= delay_penalty * (t - (num_frames >> 1));
+    double rest = NaiveCtc(symbols, scores, row_begin, num_frames, modified,
+                           delay_penalty, t + 1, next);
+    if (rest == -std::numeric_limits<double>::infinity()) continue;
+    double a = std::max(ans, score + rest), b = std::min(ans, score + rest);
+    ans = (b == -std::numeric_limits<double>::infinity())
+              ? a
+              : a + std::log1p(std::exp(b - a));
+  }
+  return ans;
+}
+
+TEST(DenseCtcForwardBackward, Random) {
+  ContextPtr c = GetCpuContext();
+  for (int32_t iter = 0; iter != 10; ++iter) {
+    int32_t num_seqs = RandInt(1, 4), num_classes = RandInt(2, 4);
+    bool modified = RandInt(0, 1);
+    float delay_penalty = RandInt(0, 1) * 0.5f;
+    std::vector<std::vector<int32_t>> symbol_vecs(num_seqs);
+    std::vector<int32_t> row_splits = {0};
+    for (auto &symbols : symbol_vecs) {
+      int32_t len = RandInt(0, 3);
+      for (int32_t i = 0; i != len; ++i)
+        symbols.push_back(RandInt(1, num_classes - 1));
+      row_splits.push_back(row_splits.back() + RandInt(0, 6) + 1);
+    }
+    Ragged<int32_t> symbols = CreateRagged2(symbol_vecs);
+    Array1<int32_t> row_splits_array(c, row_splits);
+    RaggedShape shape = RaggedShape2(&row_splits_array, nullptr, -1);
+
+    int32_t num_rows = row_splits.back();
+    Array2<float> scores(c, num_rows, num_classes + 1);
+    auto acc = scores.Accessor();
+    for (int32_t i = 0; i != num_seqs; ++i) {
+      for (int32_t r = row_splits[i]; r != row_splits[i + 1]; ++r) {
+        bool is_final = r + 1 == row_splits[i + 1];
+        acc(r, 0) = is_final ? 0 : -std::numeric_limits<float>::infinity();
+        for (int32_t col = 1; col <= num_classes; ++col) {
+          acc(r, col) = is_final ? -std::numeric_limits<float>::infinity()
+                                 : RandInt(-100, 0) / 20.0f;
+        }
+      }
+    }
+    DenseFsaVec dense_fsas(shape, scores);
+
+    Array1<double> tot_scores;
+    Array2<float> grad;
+    DenseCtcForwardBackward(symbols, dense_fsas, modified, delay_penalty,
+                            &tot_scores, &grad);
+    Array1<float> tot_scores_float;
+    DenseCtcForwardBackward(symbols, dense_fsas, modified, delay_penalty,
+                            &tot_scores_float);
+    auto grad_acc = grad.Accessor();
+
+    for (int32_t i = 0; i != num_seqs; ++i) {
+      int32_t num_frames = row_splits[i + 1] - row_splits[i] - 1;
+      double expected = NaiveCtc(symbol_vecs[i], scores, row_splits[i],
+                                 num_frames, modified, delay_penalty);
+      if (expected == -std::numeric_limits<double>::infinity()) {
+        EXPECT_EQ(tot_scores[i], expected);
+        for (int32_t r = row_splits[i]; r != row_splits[i + 1]; ++r)
+          for (int32_t col = 0; col <= num_classes; ++col)
+            EXPECT_EQ(grad_acc(r, col), 0);
+        continue;
+      }
+      EXPECT_NEAR(tot_scores[i], expected, 1e-6);
+      EXPECT_NEAR(tot_scores_float[i], expected, 1e-3);
+
+      // The gradients are the occupation probabilities, so each frame sums
+      // to 1.
+      for (int32_t r = row_splits[i]; r != row_splits[i + 1]; ++r) {
+        float sum = 0;
+        for (int32_t col = 0; col <= num_classes; ++col)
+          sum += grad_acc(r, col);
+        EXPECT_NEAR(sum, 1, 1e-5);
+      }
+
+      // Compare with finite differences
+      if (num_frames == 0) continue;
+      int32_t r = RandInt(row_splits[i], row_splits[i + 1] - 2),
+              col = RandInt(1, num_classes);
+      float saved = acc(r, col), delta = 0.01f;
+      acc(r, col) = saved + delta;
+      double perturbed = NaiveCtc(symbol_vecs[i], scores, row_splits[i],
+                                  num_frames, modified, delay_penalty);
+      acc(r, col) = saved;
+      EXPECT_NEAR((perturbed - expected) / delta, grad_acc(r, col), 1e-2);
+    }
+  }
+}
+
+}  // namespace k2
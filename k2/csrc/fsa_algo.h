@@ -192,12 +192,20 @@ void AddEpsilonSelfLoops(FsaOrVec &src, FsaOrVec *dest,
                          the number of arcs in `out`, whose elements contain
                          the corresponding arc-index in b_fsas; this arc-index
                          is the linear offset into b_fsas.scores.
+         @param[in] lattice_chunk_frames  If > 0, the output is formatted in
+                         pieces of at least this many frames as soon as the
+                         pruning can no longer change them, and the
+                         intermediate data of those frames is released.  This
+                         bounds the working memory for long sequences; the
+                         output is the same as with 0 (the default), which
+                         keeps all frames until the end.
 */
 void IntersectDensePruned(FsaVec &a_fsas, DenseFsaVec &b_fsas,
                           float search_beam, float output_beam,
                           int32_t min_active_states, int32_t max_active_states,
                           FsaVec *out, Array1<int32_t> *arc_map_a,
-                          Array1<int32_t> *arc_map_b);
+                          Array1<int32_t> *arc_map_b,
+                          int32_t lattice_chunk_frames = 0);
 
 /* IntersectDense is a version of IntersectDensePruned that does not
    do pruning in the 1st pass.
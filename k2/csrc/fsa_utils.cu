@@ -1342,11 +1342,23 @@ template void BackpropGetArcPost(FsaVec &fsas, Ragged<int32_t> &incoming_arcs,
                                  Array1<double> *forward_scores_deriv,
                                  Array1<double> *backward_scores_deriv);
 
+/*
+  Implementation of GetBackwardScores().  If `arc_deriv_data` is not NULL, it
+  also writes the derivative of the total scores (in log semiring) w.r.t. each
+  arc score to arc_deriv_data[arc_idx012], i.e.
+  `exp(arc_post) * tot_scores_deriv_data[fsa_idx0]`, when the arc is visited;
+  the backward score of its dest-state is final by then, so no further pass
+  over the arcs is needed.  `forward_scores_data` and
+  `fsa_neg_tot_scores_data` (minus the total score of each FSA, or -infinity)
+  are only used in that case.
+ */
 template <typename FloatType>
-Array1<FloatType> GetBackwardScores(FsaVec &fsas,
-                                    Ragged<int32_t> &state_batches,
-                                    Ragged<int32_t> &leaving_arc_batches,
-                                    bool log_semiring /*= true*/) {
+static Array1<FloatType> GetBackwardScoresImpl(
+    FsaVec &fsas, Ragged<int32_t> &state_batches,
+    Ragged<int32_t> &leaving_arc_batches, bool log_semiring,
+    const FloatType *forward_scores_data,
+    const FloatType *fsa_neg_tot_scores_data,
+    const FloatType *tot_scores_deriv_data, float *arc_deriv_data) {
   NVTX_RANGE(K2_FUNC);
   K2_CHECK(IsCompatible(fsas, state_batches));
   K2_CHECK(IsCompatible(fsas, leaving_arc_batches));
@@ -1413,6 +1425,14 @@ Array1<FloatType> GetBackwardScores(FsaVec &fsas,
                   dest_state_idx01 = idx0x + dest_state_idx1;
           this_arc_batch_scores_data[arc_idx] =
               state_scores_data[dest_state_idx01] + curr_arc_score;
+          if (arc_deriv_data != nullptr) {
+            int32_t fsa_idx0 = fsas_row_ids1_data[src_state_idx01];
+            FloatType arc_post = forward_scores_data[src_state_idx01] +
+                                 this_arc_batch_scores_data[arc_idx] +
+                                 fsa_neg_tot_scores_data[fsa_idx0];
+            arc_deriv_data[fsa_arc_idx012] =
+                exp(arc_post) * tot_scores_deriv_data[fsa_idx0];
+          }
         });
 
     Array1<FloatType> this_batch_state_scores(c, num_states_this_batch);
@@ -1453,6 +1473,60 @@ Array1<FloatType> GetBackwardScores(FsaVec &fsas,
   return state_scores;
 }
 
+template <typename FloatType>
+Array1<FloatType> GetBackwardScores(FsaVec &fsas,
+                                    Ragged<int32_t> &state_batches,
+                                    Ragged<int32_t> &leaving_arc_batches,
+                                    bool log_semiring /*= true*/) {
+  return GetBackwardScoresImpl<FloatType>(fsas, state_batches,
+                                          leaving_arc_batches, log_semiring,
+                                          nullptr, nullptr, nullptr, nullptr);
+}
+
+template <typename FloatType>
+Array1<float> GetTotScoresLogDeriv(
+    FsaVec &fsas, Ragged<int32_t> &state_batches,
+    Ragged<int32_t> &leaving_arc_batches,
+    const Array1<FloatType> &forward_scores,
+    const Array1<FloatType> &tot_scores_deriv,
+    Array1<FloatType> *backward_scores /*= nullptr*/) {
+  NVTX_RANGE(K2_FUNC);
+  K2_CHECK(IsCompatible(fsas, forward_scores));
+  K2_CHECK(IsCompatible(fsas, tot_scores_deriv));
+  K2_CHECK_EQ(fsas.NumAxes(), 3);
+  ContextPtr &c = fsas.Context();
+  int32_t num_fsas = fsas.Dim0(), num_arcs = fsas.TotSize(2);
+  K2_CHECK_EQ(forward_scores.Dim(), fsas.TotSize(1));
+  K2_CHECK_EQ(tot_scores_deriv.Dim(), num_fsas);
+
+  const int32_t *fsa_row_splits1 = fsas.RowSplits(1).Data();
+  const FloatType *forward_scores_data = forward_scores.Data();
+  const FloatType negative_infinity =
+      -std::numeric_limits<FloatType>::infinity();
+  // Minus the total score of each FSA, see GetArcPost().  The backward score
+  // of the start state is not known until the end, so only the forward score
+  // of the final state is used.
+  Array1<FloatType> fsa_neg_tot_scores(c, num_fsas);
+  FloatType *fsa_neg_tot_scores_data = fsa_neg_tot_scores.Data();
+  K2_EVAL(
+      c, num_fsas, lambda_set_fsa_scores, (int32_t fsa_idx0)->void {
+        int32_t begin = fsa_row_splits1[fsa_idx0],
+                end = fsa_row_splits1[fsa_idx0 + 1];
+        FloatType tot_score =
+            begin != end ? forward_scores_data[end - 1] : FloatType(0);
+        fsa_neg_tot_scores_data[fsa_idx0] =
+            tot_score != negative_infinity ? -tot_score : negative_infinity;
+      });
+
+  // Every arc is visited exactly once by GetBackwardScoresImpl().
+  Array1<float> ans(c, num_arcs);
+  Array1<FloatType> scores = GetBackwardScoresImpl<FloatType>(
+      fsas, state_batches, leaving_arc_batches, true, forward_scores_data,
+      fsa_neg_tot_scores_data, tot_scores_deriv.Data(), ans.Data());
+  if (backward_scores != nullptr) *backward_scores = scores;
+  return ans;
+}
+
 template <typename FloatType>
 Array1<FloatType> BackpropGetBackwardScores(
     FsaVec &fsas, Ragged<int32_t> &state_batches,
@@ -1921,6 +1995,15 @@ template Array1<double> GetBackwardScores(FsaVec &fsas,
                                           Ragged<int32_t> &leaving_arc_batches,
                                           bool log_semiring);
 
+template Array1<float> GetTotScoresLogDeriv(
+    FsaVec &fsas, Ragged<int32_t> &state_batches,
+    Ragged<int32_t> &leaving_arc_batches, const Array1<float> &forward_scores,
+    const Array1<float> &tot_scores_deriv, Array1<float> *backward_scores);
+template Array1<float> GetTotScoresLogDeriv(
+    FsaVec &fsas, Ragged<int32_t> &state_batches,
+    Ragged<int32_t> &leaving_arc_batches, const Array1<double> &forward_scores,
+    const Array1<double> &tot_scores_deriv, Array1<double> *backward_scores);
+
 template Array1<float> GetArcPost(FsaVec &fsas,
                                   const Array1<float> &forward_scores,
                                   const Array1<float> &backward_scores);
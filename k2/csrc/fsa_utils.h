@@ -403,6 +403,39 @@ Array1<FloatType> GetArcPost(FsaVec &fsas,
                              const Array1<FloatType> &forward_scores,
                              const Array1<FloatType> &backward_scores);
 
+/*
+  Compute the derivatives of a loss function w.r.t. the arc scores of `fsas`,
+  given its derivatives w.r.t. the total scores in log semiring.  The result
+  is `exp(arc_post) * tot_scores_deriv[fsa]`, where arc_post is as returned by
+  GetArcPost(), but it is computed during the backward pass of
+  GetBackwardScores(), without materializing the arc posteriors or making
+  another pass over the arcs.
+
+       @param [in] fsas  Input FsaVec (must have 3 axes), as given to
+                         GetForwardScores().
+       @param [in] state_batches  Batches of states, as given to
+                         GetBackwardScores().
+       @param [in] leaving_arc_batches  Arc-indexes of arcs leaving states in
+                         `state_batches`, as given to GetBackwardScores().
+       @param [in] forward_scores  The forward scores in log semiring, as
+                         returned by GetForwardScores().
+       @param [in] tot_scores_deriv  The derivative of the loss function
+                         w.r.t. the total scores; its dimension is
+                         fsas.Dim0().
+       @param [out] backward_scores  If not NULL, the backward scores in log
+                         semiring, the same as returned by
+                         GetBackwardScores(), will be written to here.
+       @return  Returns the derivative of the loss function w.r.t. the arc
+                scores, with ans.Dim() == fsas.NumElements().
+ */
+template <typename FloatType>
+Array1<float> GetTotScoresLogDeriv(
+    FsaVec &fsas, Ragged<int32_t> &state_batches,
+    Ragged<int32_t> &leaving_arc_batches,
+    const Array1<FloatType> &forward_scores,
+    const Array1<FloatType> &tot_scores_deriv,
+    Array1<FloatType> *backward_scores = nullptr);
+
 /*
   Does the backprop for GetArcPost(), outputting the deriv of the loss
   function w.r.t the `forward_scores` and `backward_scores` args to
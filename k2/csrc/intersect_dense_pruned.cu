@@ -19,6 +19,7 @@
 
 #include <algorithm>
 #include <limits>
+#include <thread>  // NOLINT
 #include <vector>
 
 #include "k2/csrc/array_ops.h"
@@ -28,6 +29,7 @@
 #include "k2/csrc/hash.h"
 #include "k2/csrc/intersect_dense_pruned.h"
 #include "k2/csrc/ragged_ops.h"
+#include "k2/csrc/serialize.h"
 #include "k2/csrc/thread_pool.h"
 
 namespace k2 {
@@ -71,11 +73,20 @@ class MultiGraphDenseIntersectPruned {
        @param [in] online_decoding  True for online decoding (i.e. chunk by
                                     chunk decoding), false for running in batch
                                     mode.
+       @param [in] lattice_chunk_frames  If > 0 (only supported if
+                           !online_decoding), once at least this many frames
+                           can no longer be changed by the backward pruning,
+                           they are formatted into a piece of the output
+                           lattice and their FrameInfo is released, so the
+                           working memory does not grow with the number of
+                           frames.  If 0, all the frames are kept until
+                           FormatOutput() is called.
    */
   MultiGraphDenseIntersectPruned(FsaVec &a_fsas, int32_t num_seqs,
                                  float search_beam, float output_beam,
                                  int32_t min_active, int32_t max_active,
-                                 bool online_decoding)
+                                 bool online_decoding,
+                                 int32_t lattice_chunk_frames = 0)
       : a_fsas_(a_fsas),
         num_seqs_(num_seqs),
         search_beam_(search_beam),
@@ -83,6 +94,8 @@ class MultiGraphDenseIntersectPruned {
         min_active_(min_active),
         max_active_(max_active),
         online_decoding_(online_decoding),
+        lattice_chunk_frames_(lattice_chunk_frames),
+        num_emitted_frames_(0),
         dynamic_beams_(a_fsas.Context(), num_seqs, search_beam),
         forward_semaphore_(1),
         final_t_(a_fsas.Context(), num_seqs, 0) {
@@ -93,6 +106,8 @@ class MultiGraphDenseIntersectPruned {
     K2_CHECK_GT(output_beam, 0);
     K2_CHECK_GE(min_active, 0);
     K2_CHECK_GT(max_active, min_active);
+    K2_CHECK_GE(lattice_chunk_frames, 0);
+    K2_CHECK(!online_decoding || lattice_chunk_frames == 0);
     K2_CHECK(a_fsas.shape.Dim0() == num_seqs || a_fsas.shape.Dim0() == 1);
     K2_CHECK_GE(num_seqs, 1);
 
@@ -197,8 +212,19 @@ class MultiGraphDenseIntersectPruned {
        << ",TotSize(1)=" << b_fsas_->shape.TotSize(1);
     NVTX_RANGE(os.str().c_str());
 
-    ThreadPool* pool = GetThreadPool();
-    pool->SubmitTask([this]() { BackwardPassStatic(this); });
+    if (lattice_chunk_frames_ > 0)
+      num_final_states_ = Array1<int32_t>(c_, num_seqs_, 0);
+
+    // The backward pass waits for the forward pass (and vice versa), so it
+    // can't be a task of the thread pool (see GetThreadPool()): the
+    // ParallelFor() calls of the forward pass wait for tasks of that pool,
+    // which could deadlock if the backward passes of concurrent calls
+    // occupied all its threads.  Each call has a thread of its own for it,
+    // which uses the same thread pool as this thread.
+    std::thread backward_thread([this, pool = GetThreadPool()]() {
+      ThreadPoolGuard guard(pool);
+      BackwardPassStatic(this);
+    });
 
     // we'll initially populate frames_[0.. T+1], but discard the one at T+1,
     // which has no arcs or states, the ones we use are from 0 to T.
@@ -229,7 +255,7 @@ class MultiGraphDenseIntersectPruned {
     // is set up (it has no arcs but we need the shape).
     frames_.pop_back();
 
-    pool->WaitAllTasksFinished();
+    backward_thread.join();
   }
 
   /* Does the main work of intersection/composition, but doesn't produce any
@@ -338,6 +364,12 @@ class MultiGraphDenseIntersectPruned {
       int32_t prune_t_begin = prune_t_begin_end_[i].first,
                 prune_t_end = prune_t_begin_end_[i].second;
       PruneTimeRange(prune_t_begin, prune_t_end);
+      // Frames before the start of the next pruning range will never be
+      // changed again.
+      if (lattice_chunk_frames_ > 0 && i + 1 < prune_t_begin_end_.size() &&
+          prune_t_begin_end_[i + 1].first - num_emitted_frames_ >=
+              lattice_chunk_frames_)
+        EmitLatticeChunk(prune_t_begin_end_[i + 1].first);
       forward_semaphore_.release();
     }
   }
@@ -404,23 +436,24 @@ class MultiGraphDenseIntersectPruned {
     }
 
     int32_t T = is_final ? T_ : T_ + 1;
+    // The frames before begin_t have already been formatted by
+    // EmitLatticeChunk().
+    int32_t begin_t = num_emitted_frames_;
     ContextPtr c_cpu = GetCpuContext();
-    Array1<ArcInfo *> arcs_data_ptrs(c_cpu, T + 1);
-    Array1<int32_t *> arcs_row_splits1_ptrs(c_cpu, T + 1);
-    for (int32_t t = 0; t < T; t++) {
-      arcs_data_ptrs.Data()[t] = frames_[t]->arcs.values.Data();
-      arcs_row_splits1_ptrs.Data()[t] = frames_[t]->arcs.RowSplits(1).Data();
+    std::vector<ArcInfo *> arcs_data(T + 2 - begin_t);
+    // each of these have 3 axes.
+    std::vector<RaggedShape *> arcs_shapes(T + 2 - begin_t);
+    Array1<int32_t *> arcs_row_splits1_ptrs(c_cpu, T + 1 - begin_t);
+    for (int32_t t = begin_t; t <= T; t++) {
+      FrameInfo *frame = (t < T || is_final) ? frames_[t].get()
+                                             : partial_final_frame_.get();
+      arcs_data[t - begin_t] = frame->arcs.values.Data();
+      arcs_shapes[t - begin_t] = &(frame->arcs.shape);
+      arcs_row_splits1_ptrs.Data()[t - begin_t] =
+          frame->arcs.RowSplits(1).Data();
     }
-    arcs_data_ptrs.Data()[T] = is_final
-                                   ? frames_[T]->arcs.values.Data()
-                                   : partial_final_frame_->arcs.values.Data();
-    arcs_row_splits1_ptrs.Data()[T] =
-        is_final ? frames_[T]->arcs.RowSplits(1).Data()
-                 : partial_final_frame_->arcs.RowSplits(1).Data();
 
     // transfer to GPU if we're using a GPU
-    arcs_data_ptrs = arcs_data_ptrs.To(c_);
-    ArcInfo **arcs_data_ptrs_data = arcs_data_ptrs.Data();
     arcs_row_splits1_ptrs = arcs_row_splits1_ptrs.To(c_);
     int32_t **arcs_row_splits1_ptrs_data = arcs_row_splits1_ptrs.Data();
     const int32_t *b_fsas_row_splits1 = b_fsas_->shape.RowSplits(1).Data();
@@ -428,6 +461,8 @@ class MultiGraphDenseIntersectPruned {
     int32_t a_fsas_stride = a_fsas_stride_;  // 0 or 1 depending if the decoding
                                              // graph is shared.
     int32_t *final_t_data = final_t_.Data();
+    const int32_t *num_final_states_data =
+        begin_t > 0 ? num_final_states_.Data() : nullptr;
     int32_t num_fsas = b_fsas_->shape.Dim0();
 
     RaggedShape final_arcs_shape;
@@ -449,9 +484,16 @@ class MultiGraphDenseIntersectPruned {
           else
             final_t = b_fsas_row_splits1[i+1] - b_fsas_row_splits1[i];
 
-          int32_t *arcs_row_splits1_data = arcs_row_splits1_ptrs_data[final_t];
-          int32_t num_states_final_t = arcs_row_splits1_data[i + 1] -
-                                       arcs_row_splits1_data[i];
+          int32_t num_states_final_t;
+          if (final_t < begin_t) {
+            // The final frame has been released by EmitLatticeChunk().
+            num_states_final_t = num_final_states_data[i];
+          } else {
+            int32_t *arcs_row_splits1_data =
+                arcs_row_splits1_ptrs_data[final_t - begin_t];
+            num_states_final_t = arcs_row_splits1_data[i + 1] -
+                                 arcs_row_splits1_data[i];
+          }
           K2_CHECK_LE(num_states_final_t, 1);
 
           // has_start_state is 1 if there is a start-state; note, we don't prune
@@ -469,7 +511,53 @@ class MultiGraphDenseIntersectPruned {
                bottom_shape = RegularRaggedShape(c_, top_shape.NumElements(), 0);
       final_arcs_shape = ComposeRaggedShapes(top_shape, bottom_shape);
     }
+    arcs_data[T + 1 - begin_t] = nullptr;  // it has no arcs.
+    arcs_shapes[T + 1 - begin_t] = &final_arcs_shape;
 
+    if (lattice_chunks_.empty()) {
+      FormatFrames(begin_t, arcs_shapes, arcs_data, ofsa, arc_map_a,
+                   online_decoding ? nullptr : arc_map_b);
+      return;
+    }
+    lattice_chunks_.emplace_back();
+    lattice_chunks_arc_map_a_.emplace_back();
+    lattice_chunks_arc_map_b_.emplace_back();
+    FormatFrames(begin_t, arcs_shapes, arcs_data, &lattice_chunks_.back(),
+                 &lattice_chunks_arc_map_a_.back(),
+                 &lattice_chunks_arc_map_b_.back());
+    CombineLatticeChunks(ofsa, arc_map_a, arc_map_b);
+  }
+
+  /*
+    Formats the arcs on a range of frames into (a piece of) the output lattice.
+
+      @param [in] begin_t  The frame index that arcs_shapes[0] corresponds to.
+      @param [in] arcs_shapes  arcs_shapes[i] is the shape of the arcs on
+                       frame begin_t + i, with 3 axes [fsa][state][arc].
+      @param [in] arcs_data  arcs_data[i] is the data of the arcs on frame
+                       begin_t + i; it may be nullptr if there are no arcs.
+      @param [out] arcs  The formatted arcs, with 3 axes [fsa][state][arc].
+                       The states of each FSA are numbered starting from its
+                       first state on frame begin_t; the arcs on the last frame
+                       that has arcs lead to the states that would follow
+                       those (i.e. those of the next range of frames).
+      @param [out] arc_map_a  Will be set to the arc_idx012 in a_fsas_ of
+                       each arc.
+      @param [out] arc_map_b  If not nullptr, will be set to the arc-index in
+                       b_fsas_ of each arc, i.e. the linear offset into
+                       b_fsas_->scores.
+   */
+  void FormatFrames(int32_t begin_t, std::vector<RaggedShape *> &arcs_shapes,
+                    const std::vector<ArcInfo *> &arcs_data,
+                    Ragged<Arc> *arcs, Array1<int32_t> *arc_map_a,
+                    Array1<int32_t> *arc_map_b) {
+    NVTX_RANGE(K2_FUNC);
+    int32_t num_frames = static_cast<int32_t>(arcs_shapes.size());
+    K2_CHECK_EQ(static_cast<int32_t>(arcs_data.size()), num_frames);
+    Array1<ArcInfo *> arcs_data_ptrs(GetCpuContext(), arcs_data);
+    // transfer to GPU if we're using a GPU
+    arcs_data_ptrs = arcs_data_ptrs.To(c_);
+    ArcInfo **arcs_data_ptrs_data = arcs_data_ptrs.Data();
 
     RaggedShape oshape;
     // see documentation of Stack() in ragged_ops.h for explanation.
@@ -477,40 +565,29 @@ class MultiGraphDenseIntersectPruned {
 
     {
       NVTX_RANGE("InitOshape");
-      // each of these have 3 axes.
-      std::vector<RaggedShape *> arcs_shapes(T + 2);
-      for (int32_t t = 0; t < T; t++)
-        arcs_shapes[t] = &(frames_[t]->arcs.shape);
-
-      arcs_shapes[T] = is_final ? &(frames_[T]->arcs.shape)
-                                : &(partial_final_frame_->arcs.shape);
-
-      arcs_shapes[T + 1] = &final_arcs_shape;
-
       // oshape is a 4-axis ragged tensor which is indexed:
-      //   oshape[fsa_index][t][state_idx][arc_idx]
+      //   oshape[fsa_index][t - begin_t][state_idx][arc_idx]
       int32_t axis = 1;
-      oshape = Stack(axis, T + 2, arcs_shapes.data(), &oshape_merge_map);
+      oshape = Stack(axis, num_frames, arcs_shapes.data(), &oshape_merge_map);
     }
 
     int32_t *oshape_row_ids3 = oshape.RowIds(3).Data(),
             *oshape_row_ids2 = oshape.RowIds(2).Data(),
             *oshape_row_ids1 = oshape.RowIds(1).Data(),
-            *oshape_row_splits3 = oshape.RowSplits(3).Data(),
             *oshape_row_splits2 = oshape.RowSplits(2).Data(),
             *oshape_row_splits1 = oshape.RowSplits(1).Data();
 
     int32_t num_arcs = oshape.NumElements();
     *arc_map_a = Array1<int32_t>(c_, num_arcs);
-    if (!online_decoding)
-      *arc_map_b = Array1<int32_t>(c_, num_arcs);
+    if (arc_map_b != nullptr) *arc_map_b = Array1<int32_t>(c_, num_arcs);
     int32_t *arc_map_a_data = arc_map_a->Data(),
-            *arc_map_b_data = online_decoding ? nullptr : arc_map_b->Data();
+            *arc_map_b_data =
+                arc_map_b != nullptr ? arc_map_b->Data() : nullptr;
     Array1<Arc> arcs_out(c_, num_arcs);
     Arc *arcs_out_data = arcs_out.Data();
     const Arc *a_fsas_arcs = a_fsas_.values.Data();
     int32_t b_fsas_num_cols = b_fsas_->scores.Dim1();
-    const int32_t *b_fsas_row_ids1 = b_fsas_->shape.RowIds(1).Data();
+    const int32_t *b_fsas_row_splits1 = b_fsas_->shape.RowSplits(1).Data();
 
     const uint32_t *oshape_merge_map_data = oshape_merge_map.Data();
 
@@ -526,10 +603,12 @@ class MultiGraphDenseIntersectPruned {
              oarc_idx01x_next = oshape_row_splits2[oarc_idx01 + 1];
 
           int32_t m = oshape_merge_map_data[oarc_idx0123],
-                  t = m % (T + 2),  // actually we won't get t == T or t == T + 1
-                                    // here since those frames have no arcs.
-        arcs_idx012 = m / (T + 2);  // arc_idx012 into FrameInfo::arcs on time t,
-                                    // index of the arc on that frame.
+                  t = m % num_frames,  // t - begin_t really; we won't get the
+                                       // last frames here since those have no
+                                       // arcs.
+        arcs_idx012 = m / num_frames;  // arc_idx012 into FrameInfo::arcs on
+                                       // time t, index of the arc on that
+                                       // frame.
 
           K2_CHECK_EQ(t, oarc_idx1);
 
@@ -548,10 +627,10 @@ class MultiGraphDenseIntersectPruned {
 
           // We won't preduce arc_map_b (for nnet_output) for online_decoding,
           // in this case, b_fsas_ is only a part of the whole sequence.
-          if (!online_decoding) {
+          if (arc_map_b_data != nullptr) {
             int32_t fsa_id = oarc_idx0,
               b_fsas_idx0x = b_fsas_row_splits1[fsa_id],
-              b_fsas_idx01 = b_fsas_idx0x + t,
+              b_fsas_idx01 = b_fsas_idx0x + begin_t + t,
               b_fsas_idx2 = (arc.label + 1),
               b_fsas_arc_idx012 = b_fsas_idx01 * b_fsas_num_cols + b_fsas_idx2;
               arc_map_b_data[oarc_idx0123] = b_fsas_arc_idx012;
@@ -560,7 +639,129 @@ class MultiGraphDenseIntersectPruned {
         });
 
     // Remove axis 1, which corresponds to time.
+    *arcs = Ragged<Arc>(RemoveAxis(oshape, 1), arcs_out);
+  }
+
+  /*
+    Formats the arcs on frames num_emitted_frames_ <= t < end_t into a piece of
+    the output lattice (see FormatFrames()), which is appended to
+    lattice_chunks_, and releases those frames.  Requires that the arcs on
+    those frames and the states on frame end_t will not be changed by any
+    later pruning.  This is called from the backward pass.
+   */
+  void EmitLatticeChunk(int32_t end_t) {
+    NVTX_RANGE(K2_FUNC);
+    int32_t begin_t = num_emitted_frames_,
+           num_fsas = b_fsas_->shape.Dim0();
+    K2_CHECK_LT(begin_t, end_t);
+
+    std::vector<ArcInfo *> arcs_data(end_t - begin_t);
+    std::vector<RaggedShape *> arcs_shapes(end_t - begin_t);
+    Array1<int32_t *> arcs_row_splits1_ptrs(GetCpuContext(), end_t - begin_t);
+    for (int32_t t = begin_t; t < end_t; t++) {
+      arcs_data[t - begin_t] = frames_[t]->arcs.values.Data();
+      arcs_shapes[t - begin_t] = &(frames_[t]->arcs.shape);
+      arcs_row_splits1_ptrs.Data()[t - begin_t] =
+          frames_[t]->arcs.RowSplits(1).Data();
+    }
+
+    { // FormatOutput() needs to know the number of states on the final frame
+      // of each sequence, so record it for the sequences that end here.
+      arcs_row_splits1_ptrs = arcs_row_splits1_ptrs.To(c_);
+      int32_t **arcs_row_splits1_ptrs_data = arcs_row_splits1_ptrs.Data();
+      const int32_t *b_fsas_row_splits1 = b_fsas_->shape.RowSplits(1).Data();
+      int32_t *num_final_states_data = num_final_states_.Data();
+      K2_EVAL(c_, num_fsas, lambda_set_num_final_states, (int32_t i) -> void {
+          int32_t final_t = b_fsas_row_splits1[i + 1] - b_fsas_row_splits1[i];
+          if (final_t >= begin_t && final_t < end_t) {
+            int32_t *arcs_row_splits1_data =
+                arcs_row_splits1_ptrs_data[final_t - begin_t];
+            num_final_states_data[i] = arcs_row_splits1_data[i + 1] -
+                                       arcs_row_splits1_data[i];
+          }
+        });
+    }
+
+    lattice_chunks_.emplace_back();
+    lattice_chunks_arc_map_a_.emplace_back();
+    lattice_chunks_arc_map_b_.emplace_back();
+    FormatFrames(begin_t, arcs_shapes, arcs_data, &lattice_chunks_.back(),
+                 &lattice_chunks_arc_map_a_.back(),
+                 &lattice_chunks_arc_map_b_.back());
+    for (int32_t t = begin_t; t < end_t; t++)
+      frames_[t].reset();
+    num_emitted_frames_ = end_t;
+  }
+
+  /*
+    Concatenates the pieces of the output lattice in lattice_chunks_ (in
+    order of time) into the output lattice, and clears them.  See
+    FormatOutput() for the meaning of the args.
+   */
+  void CombineLatticeChunks(FsaVec *ofsa, Array1<int32_t> *arc_map_a,
+                            Array1<int32_t> *arc_map_b) {
+    NVTX_RANGE(K2_FUNC);
+    int32_t num_chunks = static_cast<int32_t>(lattice_chunks_.size());
+    ContextPtr c_cpu = GetCpuContext();
+    std::vector<RaggedShape *> chunks_shapes(num_chunks);
+    Array1<Arc *> arcs_ptrs(c_cpu, num_chunks);
+    Array1<int32_t *> arc_map_a_ptrs(c_cpu, num_chunks),
+        arc_map_b_ptrs(c_cpu, num_chunks);
+    for (int32_t i = 0; i < num_chunks; i++) {
+      chunks_shapes[i] = &(lattice_chunks_[i].shape);
+      arcs_ptrs.Data()[i] = lattice_chunks_[i].values.Data();
+      arc_map_a_ptrs.Data()[i] = lattice_chunks_arc_map_a_[i].Data();
+      arc_map_b_ptrs.Data()[i] = lattice_chunks_arc_map_b_[i].Data();
+    }
+    arcs_ptrs = arcs_ptrs.To(c_);
+    arc_map_a_ptrs = arc_map_a_ptrs.To(c_);
+    arc_map_b_ptrs = arc_map_b_ptrs.To(c_);
+    Arc **arcs_ptrs_data = arcs_ptrs.Data();
+    int32_t **arc_map_a_ptrs_data = arc_map_a_ptrs.Data(),
+            **arc_map_b_ptrs_data = arc_map_b_ptrs.Data();
+
+    Array1<uint32_t> merge_map;
+    // oshape is indexed [fsa_index][chunk_index][state_idx][arc_idx].
+    RaggedShape oshape = Stack(1, num_chunks, chunks_shapes.data(),
+                               &merge_map);
+    const int32_t *oshape_row_ids3 = oshape.RowIds(3).Data(),
+                  *oshape_row_ids2 = oshape.RowIds(2).Data(),
+                  *oshape_row_ids1 = oshape.RowIds(1).Data(),
+                  *oshape_row_splits2 = oshape.RowSplits(2).Data(),
+                  *oshape_row_splits1 = oshape.RowSplits(1).Data();
+    const uint32_t *merge_map_data = merge_map.Data();
+
+    int32_t num_arcs = oshape.NumElements();
+    Array1<Arc> arcs_out(c_, num_arcs);
+    *arc_map_a = Array1<int32_t>(c_, num_arcs);
+    *arc_map_b = Array1<int32_t>(c_, num_arcs);
+    Arc *arcs_out_data = arcs_out.Data();
+    int32_t *arc_map_a_data = arc_map_a->Data(),
+            *arc_map_b_data = arc_map_b->Data();
+    K2_EVAL(
+        c_, num_arcs, lambda_combine_chunks, (int32_t oarc_idx0123)->void {
+          int32_t oarc_idx01 = oshape_row_ids2[oshape_row_ids3[oarc_idx0123]],
+                  oarc_idx0 = oshape_row_ids1[oarc_idx01],
+                  oarc_idx0x = oshape_row_splits1[oarc_idx0],
+                  // the number of states of this FSA in the earlier chunks.
+                  state_offset = oshape_row_splits2[oarc_idx01] -
+                                 oshape_row_splits2[oarc_idx0x];
+          uint32_t m = merge_map_data[oarc_idx0123];
+          int32_t chunk = m % num_chunks,
+                  arc_idx012 = m / num_chunks;
+          Arc arc = arcs_ptrs_data[chunk][arc_idx012];
+          arc.src_state += state_offset;
+          arc.dest_state += state_offset;
+          arcs_out_data[oarc_idx0123] = arc;
+          arc_map_a_data[oarc_idx0123] = arc_map_a_ptrs_data[chunk][arc_idx012];
+          arc_map_b_data[oarc_idx0123] = arc_map_b_ptrs_data[chunk][arc_idx012];
+        });
+
+    // Remove axis 1, which corresponds to the chunks.
     *ofsa = FsaVec(RemoveAxis(oshape, 1), arcs_out);
+    lattice_chunks_.clear();
+    lattice_chunks_arc_map_a_.clear();
+    lattice_chunks_arc_map_b_.clear();
   }
 
   /*
@@ -726,8 +927,9 @@ class MultiGraphDenseIntersectPruned {
     Ragged<ArcInfo> ai(ai_shape);
     ArcInfo *ai_data = ai.values.Data();  // uninitialized
 
-    K2_EVAL(
-        c_, ai.values.Dim(), ai_lambda, (int32_t ai_arc_idx012)->void {
+    K2_PARALLEL_EVAL(
+        c_, ai.values.Dim(), internal::kMinElementsPerTask, ai_lambda,
+        (int32_t ai_arc_idx012)->void {
           int32_t ai_state_idx01 = ai_row_ids2[ai_arc_idx012],
                   ai_fsa_idx0 = ai_row_ids1[ai_state_idx01],
                   ai_arc_idx01x = ai_row_splits2[ai_state_idx01],
@@ -1136,8 +1338,9 @@ class MultiGraphDenseIntersectPruned {
     StateInfo *next_states_data = next_frame->states.values.Data();
     StateInfo *cur_states_data = cur_frame->states.values.Data();
 
-    K2_EVAL(c_, num_arcs, lambda_set_arc_backward_prob_and_keep,
-            (int32_t arcs_idx012) -> void {
+    K2_PARALLEL_EVAL(c_, num_arcs, internal::kMinElementsPerTask,
+                     lambda_set_arc_backward_prob_and_keep,
+                     (int32_t arcs_idx012) -> void {
       ArcInfo *arc = ai_data + arcs_idx012;
       int32_t state_idx01 = arcs_rowids2[arcs_idx012],
                  seq_idx0 = arcs_rowids1[state_idx01],  // 'seq' == fsa-idx in b
@@ -1520,6 +1723,21 @@ class MultiGraphDenseIntersectPruned {
   bool online_decoding_;         // true for online decoding.
   Array1<int32_t> final_t_;      // record the final frame id of each DenseFsa.
 
+  int32_t lattice_chunk_frames_;  // see documentation of the constructor.
+  int32_t num_emitted_frames_;    // frames_[t] for t < num_emitted_frames_
+                                  // have been released by EmitLatticeChunk(),
+                                  // their arcs are in lattice_chunks_.
+  // Pieces of the output lattice produced by EmitLatticeChunk(), see its
+  // documentation; each one covers the arcs on a range of frames.
+  std::vector<Ragged<Arc>> lattice_chunks_;
+  std::vector<Array1<int32_t>> lattice_chunks_arc_map_a_;
+  std::vector<Array1<int32_t>> lattice_chunks_arc_map_b_;
+  // num_final_states_[i] is the number of states (0 or 1) on the final frame
+  // of the i-th sequence if that frame has been released by
+  // EmitLatticeChunk(), else undefined.  Only set up if
+  // lattice_chunk_frames_ > 0.
+  Array1<int32_t> num_final_states_;
+
   std::unique_ptr<FrameInfo> partial_final_frame_;  // store the final frame for
                                                     // partial results
 
@@ -1582,7 +1800,8 @@ void IntersectDensePruned(FsaVec &a_fsas, DenseFsaVec &b_fsas,
                           float search_beam, float output_beam,
                           int32_t min_active_states, int32_t max_active_states,
                           FsaVec *out, Array1<int32_t> *arc_map_a,
-                          Array1<int32_t> *arc_map_b) {
+                          Array1<int32_t> *arc_map_b,
+                          int32_t lattice_chunk_frames /*= 0*/) {
   NVTX_RANGE("IntersectDensePruned");
   FsaVec a_vec = FsaToFsaVec(a_fsas);
   bool online_decoding = false;
@@ -1590,7 +1809,8 @@ void IntersectDensePruned(FsaVec &a_fsas, DenseFsaVec &b_fsas,
                                              search_beam, output_beam,
                                              min_active_states,
                                              max_active_states,
-                                             online_decoding);
+                                             online_decoding,
+                                             lattice_chunk_frames);
 
   auto b_fsas_p = std::make_shared<DenseFsaVec>(b_fsas);
   intersector.Intersect(b_fsas_p);
@@ -1653,6 +1873,12 @@ void OnlineDenseIntersecter::Decode(DenseFsaVec &b_fsas,
 
       info.beam = search_beam_;
       decode_states->at(i) = std::make_shared<DecodeStateInfo>(info);
+    } else if (!decode_states->at(i)->states.Context()->IsCompatible(*c_)) {
+      // e.g., restored from DeserializeDecodeStateInfo() on another device
+      DecodeStateInfo info = *decode_states->at(i);
+      info.states = info.states.To(c_);
+      info.arcs = info.arcs.To(c_);
+      decode_states->at(i) = std::make_shared<DecodeStateInfo>(info);
     }
     seq_states_ptr_vec[i] = &(decode_states->at(i)->states);
     seq_arcs_ptr_vec[i] = &(decode_states->at(i)->arcs);
@@ -1685,7 +1911,8 @@ void OnlineDenseIntersecter::Decode(DenseFsaVec &b_fsas,
   }
 
   const auto new_frames = impl_->OnlineIntersect(b_fsas_p, frames, beams);
-  impl_->FormatOutput(ofsa, arc_map_a, nullptr/*arc_map_b*/, false);
+  if (ofsa != nullptr)
+    impl_->FormatOutput(ofsa, arc_map_a, nullptr/*arc_map_b*/, false);
 
   int32_t frames_num = new_frames->size();
   std::vector<Ragged<StateInfo> *> frame_states_ptr_vec(frames_num);
@@ -1710,8 +1937,183 @@ void OnlineDenseIntersecter::Decode(DenseFsaVec &b_fsas,
     info.states = seq_states_vec[i];
     info.arcs = seq_arcs_vec[i];
     info.beam = beams_data[i];
+    info.stable_arcs = decode_states->at(i)->stable_arcs;
+    info.stable_frame = decode_states->at(i)->stable_frame;
     decode_states->at(i) = std::make_shared<DecodeStateInfo>(info);
   }
 }
 
+Array1<int32_t> PartialBestPath(DecodeStateInfo *state,
+                                int32_t *num_stable_arcs /*= nullptr*/) {
+  NVTX_RANGE(K2_FUNC);
+  K2_CHECK_NE(state, nullptr);
+  ContextPtr c = GetCpuContext();
+  std::vector<int32_t> &stable_arcs = state->stable_arcs;
+  std::vector<int32_t> ans(stable_arcs);
+  if (num_stable_arcs != nullptr) *num_stable_arcs = stable_arcs.size();
+
+  // The frame axis of `state->states` may contain empty lists before and after
+  // the frames of this sequence, see OnlineDenseIntersecter::Decode().
+  Array1<int32_t> frame_row_splits = state->states.RowSplits(1).To(c);
+  const int32_t *frame_row_splits_data = frame_row_splits.Data();
+  std::vector<int32_t> frames;  // indexes of the non-empty frames
+  for (int32_t t = 0; t != state->states.Dim0(); ++t) {
+    if (frame_row_splits_data[t + 1] > frame_row_splits_data[t])
+      frames.push_back(t);
+  }
+  int32_t num_frames = frames.size();
+  if (num_frames <= state->stable_frame + 1) return Array1<int32_t>(c, ans);
+
+  // Only the frames from the stable frame on are needed.
+  int32_t begin = frames[state->stable_frame], end = frames.back() + 1,
+          last = end - begin - 1;
+  Ragged<StateInfo> states = Arange(state->states, 0, begin, end).To(c);
+  Ragged<ArcInfo> arcs = Arange(state->arcs, 0, begin, end).To(c);
+  const int32_t *states_row_splits1 = states.RowSplits(1).Data(),
+                *arcs_row_splits2 = arcs.RowSplits(2).Data(),
+                *arcs_row_ids2 = arcs.RowIds(2).Data();
+  const StateInfo *states_data = states.values.Data();
+  const ArcInfo *arcs_data = arcs.values.Data();
+
+  // Start from the best state on the last frame.
+  int32_t best_state_idx1 = -1;
+  float best_score = -std::numeric_limits<float>::infinity();
+  for (int32_t s = states_row_splits1[last]; s != states_row_splits1[last + 1];
+       ++s) {
+    float score = OrderedIntToFloat(states_data[s].forward_loglike);
+    if (best_state_idx1 < 0 || score > best_score) {
+      best_state_idx1 = s - states_row_splits1[last];
+      best_score = score;
+    }
+  }
+
+  // `cur_states` contains the idx1's of the states on frame t + 1 that are
+  // on the best path to any state on the last frame.  When it has only one
+  // element, all those paths meet at frame t + 1.
+  std::vector<int32_t> cur_states(states_row_splits1[last + 1] -
+                                  states_row_splits1[last]);
+  for (size_t i = 0; i != cur_states.size(); ++i) cur_states[i] = i;
+  int32_t converged_t = cur_states.size() == 1 ? last : -1;
+
+  std::vector<int32_t> reversed_arcs;
+  size_t num_unstable = 0;  // number of reversed_arcs after converged_t
+  std::vector<int32_t> best_arcs;
+  std::vector<float> best_arc_scores;
+  std::vector<char> seen;
+  for (int32_t t = last - 1; t >= 0; --t) {
+    // Find the best incoming arc of each state on frame t + 1.
+    int32_t num_next_states =
+        states_row_splits1[t + 2] - states_row_splits1[t + 1];
+    best_arcs.assign(num_next_states, -1);
+    best_arc_scores.assign(num_next_states,
+                           -std::numeric_limits<float>::infinity());
+    for (int32_t s = states_row_splits1[t]; s != states_row_splits1[t + 1];
+         ++s) {
+      float forward_loglike = OrderedIntToFloat(states_data[s].forward_loglike);
+      for (int32_t a = arcs_row_splits2[s]; a != arcs_row_splits2[s + 1];
+           ++a) {
+        int32_t dest = arcs_data[a].u.dest_info_state_idx1;
+        float score = forward_loglike + arcs_data[a].arc_loglike;
+        if (best_arcs[dest] < 0 || score > best_arc_scores[dest]) {
+          best_arcs[dest] = a;
+          best_arc_scores[dest] = score;
+        }
+      }
+    }
+    int32_t best_arc = best_arcs[best_state_idx1];
+    // It can only happen if all states of the sequence were pruned away on
+    // some frame.
+    if (best_arc < 0) return Array1<int32_t>(c, ans);
+    reversed_arcs.push_back(arcs_data[best_arc].a_fsas_arc_idx012);
+    best_state_idx1 = arcs_row_ids2[best_arc] - states_row_splits1[t];
+
+    if (converged_t < 0) {
+      seen.assign(states_row_splits1[t + 1] - states_row_splits1[t], 0);
+      std::vector<int32_t> prev_states;
+      for (int32_t s : cur_states) {
+        if (best_arcs[s] < 0) continue;
+        int32_t prev = arcs_row_ids2[best_arcs[s]] - states_row_splits1[t];
+        if (!seen[prev]) {
+          seen[prev] = 1;
+          prev_states.push_back(prev);
+        }
+      }
+      cur_states.swap(prev_states);
+      if (cur_states.size() == 1) {
+        converged_t = t;
+        num_unstable = reversed_arcs.size();
+      }
+    }
+  }
+
+  ans.insert(ans.end(), reversed_arcs.rbegin(), reversed_arcs.rend());
+  if (converged_t > 0) {
+    // The arcs before frame `converged_t` are stable now.
+    stable_arcs.insert(stable_arcs.end(), reversed_arcs.rbegin(),
+                       reversed_arcs.rend() - num_unstable);
+    state->stable_frame += converged_t;
+  }
+  if (num_stable_arcs != nullptr) *num_stable_arcs = stable_arcs.size();
+  return Array1<int32_t>(c, ans);
+}
+
+// "K2DI" + version, see SerializeDecodeStateInfo() for the format.
+static constexpr const char *kDecodeStateInfoMagic = "K2DI";
+static constexpr uint8_t kDecodeStateInfoVersion = 1;
+
+std::string SerializeDecodeStateInfo(DecodeStateInfo &state) {
+  NVTX_RANGE(K2_FUNC);
+  ContextPtr c = GetCpuContext();
+  ByteWriter writer(kDecodeStateInfoMagic, kDecodeStateInfoVersion);
+  writer.PutRaw(&state.beam, 1);
+  writer.PutVarint(state.stable_frame);
+  writer.PutVarint(state.stable_arcs.size());
+  for (int32_t arc : state.stable_arcs) writer.PutVarint(arc);
+
+  Ragged<StateInfo> states = state.states.To(c);
+  Ragged<ArcInfo> arcs = state.arcs.To(c);
+  // The shape [frame][state][arc] without empty frames; empty frames contain
+  // no states, so all the states and arcs are kept.
+  const int32_t *row_splits1 = arcs.RowSplits(1).Data(),
+                *row_splits2 = arcs.RowSplits(2).Data();
+  int32_t num_frames = arcs.Dim0(), num_nonempty_frames = 0;
+  for (int32_t t = 0; t != num_frames; ++t)
+    num_nonempty_frames += row_splits1[t + 1] > row_splits1[t];
+  writer.PutVarint(num_nonempty_frames);
+  for (int32_t t = 0; t != num_frames; ++t) {
+    if (row_splits1[t + 1] > row_splits1[t])
+      writer.PutVarint(row_splits1[t + 1] - row_splits1[t]);
+  }
+  int32_t num_states = arcs.TotSize(1);
+  for (int32_t s = 0; s != num_states; ++s)
+    writer.PutVarint(row_splits2[s + 1] - row_splits2[s]);
+  writer.PutRaw(states.values.Data(), states.values.Dim());
+  writer.PutRaw(arcs.values.Data(), arcs.values.Dim());
+  return writer.Buffer();
+}
+
+std::shared_ptr<DecodeStateInfo> DeserializeDecodeStateInfo(
+    const std::string &data, ContextPtr c) {
+  NVTX_RANGE(K2_FUNC);
+  ByteReader reader(data, kDecodeStateInfoMagic);
+  K2_CHECK_EQ(reader.Version(), kDecodeStateInfoVersion)
+      << "Unsupported version of DecodeStateInfo";
+  auto ans = std::make_shared<DecodeStateInfo>();
+  reader.GetRaw(&ans->beam, 1);
+  ans->stable_frame = reader.GetVarint();
+  ans->stable_arcs.resize(reader.GetVarint());
+  for (auto &arc : ans->stable_arcs) arc = reader.GetVarint();
+
+  ContextPtr cpu = GetCpuContext();
+  RaggedShape shape = reader.GetShape(3);
+  Array1<StateInfo> states(cpu, shape.TotSize(1));
+  Array1<ArcInfo> arcs(cpu, shape.NumElements());
+  reader.GetRaw(states.Data(), states.Dim());
+  reader.GetRaw(arcs.Data(), arcs.Dim());
+  reader.CheckEnd();
+  ans->states = Ragged<StateInfo>(GetLayer(shape, 0), states).To(c);
+  ans->arcs = Ragged<ArcInfo>(shape, arcs).To(c);
+  return ans;
+}
+
 }  // namespace k2
@@ -20,6 +20,7 @@
 #define K2_CSRC_INTERSECT_DENSE_PRUNED_H_
 
 #include <memory>
+#include <string>
 #include <vector>
 
 #include "k2/csrc/fsa.h"
@@ -135,8 +136,57 @@ struct DecodeStateInfo {
 
   // current search beam for this sequence
   float beam;
+
+  // The following two members are used by PartialBestPath() for incremental
+  // traceback, and are carried over to the next chunk by
+  // OnlineDenseIntersecter::Decode().
+  //
+  // The arcs (as arc_idx012's into the decoding graph) on the best path before
+  // the `stable_frame`-th non-empty frame in `states`.  All the surviving
+  // partial paths share them, so they won't change when more frames are
+  // decoded.
+  std::vector<int32_t> stable_arcs;
+  int32_t stable_frame = 0;
 };
 
+/*
+  Get the best partial path of a sequence decoded by OnlineDenseIntersecter
+  so far, i.e., the best path ending at any state active on its most recent
+  frame, without generating the lattice.
+
+  Only the frames after `state->stable_frame` are traced back, so the cost
+  does not grow with the length of the sequence; `state->stable_arcs` and
+  `state->stable_frame` are then advanced to the latest frame at which all the
+  surviving partial paths meet.
+
+     @param [in,out] state  The decoding state of the sequence, as output by
+                            OnlineDenseIntersecter::Decode().
+     @param [out] num_stable_arcs  If not NULL, on return it will contain the
+                            number of leading arcs of the returned path that
+                            will not change when more frames are decoded.
+     @return  Return the arcs on the best partial path, as arc_idx012's into
+              the decoding graph, on CPU.
+ */
+Array1<int32_t> PartialBestPath(DecodeStateInfo *state,
+                                int32_t *num_stable_arcs = nullptr);
+
+/*
+  Serialize a DecodeStateInfo into a compact, versioned binary string, e.g.,
+  to continue decoding the sequence in another process.  Empty frames are
+  not stored.  It can be restored bit-exactly with DeserializeDecodeStateInfo().
+ */
+std::string SerializeDecodeStateInfo(DecodeStateInfo &state);
+
+/*
+  Restore a DecodeStateInfo serialized by SerializeDecodeStateInfo().
+     @param [in] data  The output of SerializeDecodeStateInfo().
+     @param [in] c  The context that the returned decoding state is on.
+                    OnlineDenseIntersecter::Decode() also accepts decoding
+                    states on a different device from the decoding graph.
+ */
+std::shared_ptr<DecodeStateInfo> DeserializeDecodeStateInfo(
+    const std::string &data, ContextPtr c);
+
 
 /**
      Pruned intersection (a.k.a. composition) that corresponds to decoding for
@@ -188,10 +238,13 @@ class OnlineDenseIntersecter {
                            so you can use them in the following chunks.
          @param [out] ofsa  An FsaVec where the output lattice would write to,
                         will be re-allocated. The output lattice has 3 axes
-                        [seqs][states][arcs].
+                        [seqs][states][arcs]. If it is NULL, the lattice is
+                        not generated; use PartialBestPath() to get the partial
+                        results in that case.
          @param [out] arc_map_a  At exit a map from arc-indexes in `ofsa` to
                         their source arc-indexes in `a_fsa_`(the decoding graph)
-                        will have been assigned to this location.
+                        will have been assigned to this location. Unused if
+                        `ofsa` is NULL.
      */
     void Decode(DenseFsaVec &b_fsas,
                 std::vector<std::shared_ptr<DecodeStateInfo>> *decode_states,
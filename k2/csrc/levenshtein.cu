@@ -0,0 +1,244 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <algorithm>
+#include <cstdlib>
+#include <limits>
+#include <vector>
+
+#include "k2/csrc/levenshtein.h"
+#include "k2/csrc/ragged_ops.h"
+#include "k2/csrc/thread_pool.h"
+
+// This is not really a CUDA file but for build-system reasons it has
+// the .cu extension.
+
+namespace k2 {
+
+namespace {
+
+enum EditOp : int8_t {
+  kMatch = 0,
+  kSubstitution = 1,
+  kDeletion = 2,   // a ref symbol is not in the hyp
+  kInsertion = 3,  // a hyp symbol is not in the ref
+};
+
+// Minimum number of hyps processed by each task of ParallelFor()
+constexpr int32_t kGrainSize = 16;
+
+constexpr int64_t kInfCost = std::numeric_limits<int64_t>::max() / 4;
+
+// Buffers for the dynamic programming, reused across hyps.
+struct LevenshteinBuffers {
+  // cost[row_begin[i] + j - Lo(i)] is the cost of aligning the first i
+  // symbols of the ref with the first j symbols of the hyp.
+  std::vector<int64_t> cost;
+  std::vector<int64_t> row_begin;
+};
+
+/*
+  Compute the levenshtein distance between `ref` of length `m` and `hyp`
+  of length `n`, and optionally the edit operations of the alignment.
+
+  The cost of an alignment is num_errors * kError + num_ins_del, where kError
+  is larger than any possible num_ins_del, so that alignments are compared by
+  the number of errors first and the number of insertions and deletions next.
+ */
+int32_t ComputeLevenshtein(const int32_t *ref, int32_t m, const int32_t *hyp,
+                           int32_t n, int32_t band, LevenshteinBuffers *buf,
+                           std::vector<int8_t> *ops) {
+  // The end cell (m, n) has to be within the band
+  int32_t b = band > 0 ? std::max(band, std::abs(m - n)) : std::max(m, n);
+  const int64_t kError = static_cast<int64_t>(m) + n + 1;
+  auto lo = [b](int32_t i) { return std::max(0, i - b); };
+  auto hi = [n, b](int32_t i) { return std::min(n, i + b); };
+
+  std::vector<int64_t> &row_begin = buf->row_begin;
+  row_begin.resize(m + 2);
+  row_begin[0] = 0;
+  for (int32_t i = 0; i <= m; ++i)
+    row_begin[i + 1] = row_begin[i] + hi(i) - lo(i) + 1;
+
+  std::vector<int64_t> &cost = buf->cost;
+  cost.resize(row_begin[m + 1]);
+  auto get = [&](int32_t i, int32_t j) -> int64_t {
+    if (j < lo(i) || j > hi(i)) return kInfCost;
+    return cost[row_begin[i] + j - lo(i)];
+  };
+
+  for (int32_t i = 0; i <= m; ++i) {
+    int64_t *row = cost.data() + row_begin[i] - lo(i);
+    for (int32_t j = lo(i); j <= hi(i); ++j) {
+      int64_t c = (i == 0 && j == 0) ? 0 : kInfCost;
+      if (i > 0 && j > 0)
+        c = get(i - 1, j - 1) + (ref[i - 1] == hyp[j - 1] ? 0 : kError);
+      if (i > 0) c = std::min(c, get(i - 1, j) + kError + 1);
+      if (j > 0) c = std::min(c, get(i, j - 1) + kError + 1);
+      row[j] = c;
+    }
+  }
+
+  int64_t total_cost = get(m, n);
+  if (ops != nullptr) {
+    ops->clear();
+    int32_t i = m, j = n;
+    while (i > 0 || j > 0) {
+      int64_t c = get(i, j);
+      if (j > 0 && c == get(i, j - 1) + kError + 1) {
+        ops->push_back(kInsertion);
+        --j;
+      } else if (i > 0 && c == get(i - 1, j) + kError + 1) {
+        ops->push_back(kDeletion);
+        --i;
+      } else {
+        ops->push_back(ref[i - 1] == hyp[j - 1] ? kMatch : kSubstitution);
+        --i;
+        --j;
+      }
+    }
+    std::reverse(ops->begin(), ops->end());
+  }
+  return static_cast<int32_t>(total_cost / kError);
+}
+
+}  // namespace
+
+void LevenshteinAlignment(Ragged<int32_t> &refs, Ragged<int32_t> &hyps,
+                          const Array1<int32_t> &hyp_to_ref_map, int32_t band,
+                          Array1<int32_t> *distances,
+                          FsaVec *alignment /*= nullptr*/,
+                          Array1<int32_t> *ref_labels /*= nullptr*/,
+                          Array1<int32_t> *hyp_labels /*= nullptr*/) {
+  ContextPtr c = GetCpuContext();
+  K2_CHECK(refs.Context()->IsCompatible(*c) &&
+           hyps.Context()->IsCompatible(*c) &&
+           hyp_to_ref_map.Context()->IsCompatible(*c))
+      << "LevenshteinAlignment supports only CPU";
+  K2_CHECK_EQ(refs.NumAxes(), 2);
+  K2_CHECK_EQ(hyps.NumAxes(), 2);
+  K2_CHECK_EQ(hyp_to_ref_map.Dim(), hyps.Dim0());
+  K2_CHECK(distances != nullptr);
+  if (alignment != nullptr) {
+    K2_CHECK(ref_labels != nullptr);
+    K2_CHECK(hyp_labels != nullptr);
+  }
+
+  int32_t num_refs = refs.Dim0(), num_hyps = hyps.Dim0();
+  const int32_t *hyp_to_ref_map_data = hyp_to_ref_map.Data();
+  for (int32_t h = 0; h != num_hyps; ++h) {
+    K2_CHECK(hyp_to_ref_map_data[h] >= 0 &&
+             hyp_to_ref_map_data[h] < num_refs)
+        << "Invalid hyp_to_ref_map[" << h
+        << "]: " << hyp_to_ref_map_data[h];
+  }
+
+  const int32_t *refs_row_splits = refs.RowSplits(1).Data(),
+                *refs_data = refs.values.Data(),
+                *hyps_row_splits = hyps.RowSplits(1).Data(),
+                *hyps_data = hyps.values.Data();
+
+  *distances = Array1<int32_t>(c, num_hyps);
+  int32_t *distances_data = distances->Data();
+  std::vector<std::vector<int8_t>> ops(alignment != nullptr ? num_hyps : 0);
+  ParallelFor(num_hyps, kGrainSize, [&](int32_t begin, int32_t end) {
+    LevenshteinBuffers buf;
+    for (int32_t h = begin; h != end; ++h) {
+      int32_t r = hyp_to_ref_map_data[h];
+      distances_data[h] = ComputeLevenshtein(
+          refs_data + refs_row_splits[r],
+          refs_row_splits[r + 1] - refs_row_splits[r],
+          hyps_data + hyps_row_splits[h],
+          hyps_row_splits[h + 1] - hyps_row_splits[h], band, &buf,
+          alignment != nullptr ? &ops[h] : nullptr);
+    }
+  });
+  if (alignment == nullptr) return;
+
+  // The alignment of each hyp is a linear FSA with one arc per edit
+  // operation, plus the arc to the final state.
+  Array1<int32_t> row_splits1(c, num_hyps + 1);
+  int32_t *row_splits1_data = row_splits1.Data();
+  row_splits1_data[0] = 0;
+  for (int32_t h = 0; h != num_hyps; ++h) {
+    row_splits1_data[h + 1] =
+        row_splits1_data[h] + static_cast<int32_t>(ops[h].size()) + 2;
+  }
+  int32_t num_states = row_splits1_data[num_hyps],
+          num_arcs = num_states - num_hyps;
+
+  // Every state except the final state has exactly one arc
+  Array1<int32_t> row_splits2(c, num_states + 1);
+  int32_t *row_splits2_data = row_splits2.Data();
+  row_splits2_data[0] = 0;
+  for (int32_t h = 0; h != num_hyps; ++h) {
+    for (int32_t s = row_splits1_data[h]; s != row_splits1_data[h + 1]; ++s) {
+      row_splits2_data[s + 1] =
+          row_splits2_data[s] + (s + 1 != row_splits1_data[h + 1]);
+    }
+  }
+
+  Array1<Arc> arcs(c, num_arcs);
+  *ref_labels = Array1<int32_t>(c, num_arcs);
+  *hyp_labels = Array1<int32_t>(c, num_arcs);
+  Arc *arcs_data = arcs.Data();
+  int32_t *ref_labels_data = ref_labels->Data(),
+          *hyp_labels_data = hyp_labels->Data();
+  ParallelFor(num_hyps, kGrainSize, [&](int32_t begin, int32_t end) {
+    for (int32_t h = begin; h != end; ++h) {
+      int32_t r = hyp_to_ref_map_data[h],
+              arc_idx01x = row_splits1_data[h] - h;
+      const int32_t *ref = refs_data + refs_row_splits[r],
+                    *hyp = hyps_data + hyps_row_splits[h];
+      int32_t i = 0, j = 0, num_ops = static_cast<int32_t>(ops[h].size());
+      for (int32_t k = 0; k != num_ops; ++k) {
+        int32_t label = 0, ref_label = 0, hyp_label = 0;
+        float score = -1;
+        switch (ops[h][k]) {
+          case kMatch:
+            label = ref_label = hyp_label = ref[i++];
+            ++j;
+            score = 0;
+            break;
+          case kSubstitution:
+            ref_label = ref[i++];
+            hyp_label = hyp[j++];
+            break;
+          case kDeletion:
+            ref_label = ref[i++];
+            break;
+          default:  // kInsertion
+            hyp_label = hyp[j++];
+            break;
+        }
+        arcs_data[arc_idx01x + k] = Arc(k, k + 1, label, score);
+        ref_labels_data[arc_idx01x + k] = ref_label;
+        hyp_labels_data[arc_idx01x + k] = hyp_label;
+      }
+      arcs_data[arc_idx01x + num_ops] = Arc(num_ops, num_ops + 1, -1, 0);
+      ref_labels_data[arc_idx01x + num_ops] = -1;
+      hyp_labels_data[arc_idx01x + num_ops] = -1;
+    }
+  });
+
+  RaggedShape shape = RaggedShape3(&row_splits1, nullptr, num_states,
+                                   &row_splits2, nullptr, num_arcs);
+  *alignment = FsaVec(shape, arcs);
+}
+
+}  // namespace k2
@@ -0,0 +1,78 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#ifndef K2_CSRC_LEVENSHTEIN_H_
+#define K2_CSRC_LEVENSHTEIN_H_
+
+#include "k2/csrc/array.h"
+#include "k2/csrc/fsa.h"
+#include "k2/csrc/ragged.h"
+
+namespace k2 {
+
+/*
+  Compute the levenshtein distance, and optionally the alignment, between
+  each hyp and its corresponding ref with dynamic programming. It is a faster
+  alternative to intersecting the levenshtein graphs of refs and hyps (see
+  LevenshteinGraphs() in fsa_algo.h) and finding the shortest path, as done by
+  k2.levenshtein_alignment() in Python, and gives the same distances.
+
+  Among the alignments with the minimum number of errors, the one with the
+  fewest insertions and deletions is chosen, as with the default
+  `ins_del_score` of LevenshteinGraphs().
+
+  It runs on CPU only, with the hyps processed in parallel by the global
+  thread pool.
+
+     @param [in] refs  The reference sequences, with 2 axes [ref][symbol].
+     @param [in] hyps  The hypothesis sequences, with 2 axes [hyp][symbol].
+     @param [in] hyp_to_ref_map  Map from the index of a hyp to the index of
+                       the ref it is compared with. Its dimension is
+                       hyps.Dim0().
+     @param [in] band  If positive, only alignments where the difference
+                       between the number of ref and hyp symbols consumed
+                       stays within max(band, |len(ref) - len(hyp)|) are
+                       considered. The result is exact if the distance does
+                       not exceed `band`, and an upper bound otherwise.
+                       Time and memory are O(band * len(ref)) instead of
+                       O(len(ref) * len(hyp)).
+     @param [out] distances  On return, contains the levenshtein distance of
+                       each hyp. Its dimension is hyps.Dim0().
+     @param [out] alignment  If not null, on return it will contain an
+                       FsaVec of linear FSAs with one arc per edit operation
+                       plus the final arc, in the same format as the output of
+                       k2.levenshtein_alignment() in Python: the labels are
+                       the symbols of matches and 0 for errors; the scores are
+                       0 for matches and -1 for errors.
+     @param [out] ref_labels  If `alignment` is not null, on return it will
+                       contain the ref symbols of the arcs of `alignment`, 0
+                       for insertions.
+     @param [out] hyp_labels  If `alignment` is not null, on return it will
+                       contain the hyp symbols of the arcs of `alignment`, 0
+                       for deletions.
+ */
+void LevenshteinAlignment(Ragged<int32_t> &refs, Ragged<int32_t> &hyps,
+                          const Array1<int32_t> &hyp_to_ref_map, int32_t band,
+                          Array1<int32_t> *distances,
+                          FsaVec *alignment = nullptr,
+                          Array1<int32_t> *ref_labels = nullptr,
+                          Array1<int32_t> *hyp_labels = nullptr);
+
+}  // namespace k2
+
+#endif  // K2_CSRC_LEVENSHTEIN_H_
@@ -0,0 +1,142 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <algorithm>
+#include <vector>
+
+#include "gtest/gtest.h"
+#include "k2/csrc/fsa_utils.h"
+#include "k2/csrc/levenshtein.h"
+#include "k2/csrc/math.h"
+#include "k2/csrc/ragged_ops.h"
+#include "k2/csrc/test_utils.h"
+
+namespace k2 {
+
+// The textbook O(m * n) dynamic programming.
+static int32_t NaiveLevenshtein(const std::vector<int32_t> &ref,
+                                const std::vector<int32_t> &hyp) {
+  int32_t m = ref.size(), n = hyp.size();
+  std::vector<std::vector<int32_t>> d(m + 1, std::vector<int32_t>(n + 1));
+  for (int32_t i = 0; i <= m; ++i) d[i][0] = i;
+  for (int32_t j = 0; j <= n; ++j) d[0][j] = j;
+  for (int32_t i = 1; i <= m; ++i)
+    for (int32_t j = 1; j <= n; ++j)
+      d[i][j] = std::min({d[i - 1][j] + 1, d[i][j - 1] + 1,
+                          d[i - 1][j - 1] + (ref[i - 1] != hyp[j - 1])});
+  return d[m][n];
+}
+
+TEST(LevenshteinAlignment, Simple) {
+  Ragged<int32_t> refs("[ [1 2 4] ]");
+  Ragged<int32_t> hyps("[ [1 2 3] [1 3 3 2] [] ]");
+  Array1<int32_t> hyp_to_ref_map(GetCpuContext(),
+                                 std::vector<int32_t>{0, 0, 0});
+
+  Array1<int32_t> distances, ref_labels, hyp_labels;
+  FsaVec alignment;
+  LevenshteinAlignment(refs, hyps, hyp_to_ref_map, 0, &distances, &alignment,
+                       &ref_labels, &hyp_labels);
+  CheckArrayData(distances, std::vector<int32_t>{1, 3, 3});
+
+  ASSERT_EQ(alignment.NumAxes(), 3);
+  ASSERT_EQ(alignment.Dim0(), 3);
+  CheckArrayData(alignment.RowSplits(1), std::vector<int32_t>{0, 5, 11, 16});
+  CheckArrayData(ref_labels, std::vector<int32_t>{1, 2, 4, -1, 1, 2, 4, 0, -1,
+                                                  1, 2, 4, -1});
+  CheckArrayData(hyp_labels, std::vector<int32_t>{1, 2, 3, -1, 1, 3, 3, 2, -1,
+                                                  0, 0, 0, -1});
+  std::vector<int32_t> labels;
+  std::vector<float> scores;
+  for (int32_t i = 0; i != alignment.NumElements(); ++i) {
+    Arc arc = alignment.values[i];
+    labels.push_back(arc.label);
+    scores.push_back(arc.score);
+  }
+  EXPECT_EQ(labels, (std::vector<int32_t>{1, 2, 0, -1, 1, 0, 0, 0, -1, 0, 0,
+                                          0, -1}));
+  EXPECT_EQ(scores, (std::vector<float>{0, 0, -1, 0, 0, -1, -1, -1, 0, -1,
+                                        -1, -1, 0}));
+
+  // Without the alignment
+  Array1<int32_t> distances2;
+  LevenshteinAlignment(refs, hyps, hyp_to_ref_map, 0, &distances2);
+  CheckArrayData(distances2, distances);
+}
+
+TEST(LevenshteinAlignment, Random) {
+  for (int32_t iter = 0; iter != 10; ++iter) {
+    int32_t num_refs = RandInt(1, 10), num_hyps = RandInt(0, 100),
+            band = RandInt(0, 5);
+    std::vector<std::vector<int32_t>> ref_vecs(num_refs), hyp_vecs(num_hyps);
+    for (auto &ref : ref_vecs) {
+      int32_t len = RandInt(0, 30);
+      for (int32_t i = 0; i != len; ++i) ref.push_back(RandInt(1, 5));
+    }
+    std::vector<int32_t> hyp_to_ref(num_hyps);
+    for (int32_t h = 0; h != num_hyps; ++h) {
+      hyp_to_ref[h] = RandInt(0, num_refs - 1);
+      // Make the hyps similar to the refs
+      for (int32_t s : ref_vecs[hyp_to_ref[h]]) {
+        int32_t r = RandInt(0, 9);
+        if (r == 0) continue;  // deletion
+        hyp_vecs[h].push_back(r == 1 ? RandInt(1, 5) : s);
+        if (r == 2) hyp_vecs[h].push_back(RandInt(1, 5));  // insertion
+      }
+    }
+    Ragged<int32_t> refs = CreateRagged2(ref_vecs),
+                    hyps = CreateRagged2(hyp_vecs);
+    Array1<int32_t> hyp_to_ref_map(GetCpuContext(), hyp_to_ref);
+
+    Array1<int32_t> distances, banded_distances, ref_labels, hyp_labels;
+    FsaVec alignment;
+    LevenshteinAlignment(refs, hyps, hyp_to_ref_map, 0, &distances, &alignment,
+                         &ref_labels, &hyp_labels);
+    LevenshteinAlignment(refs, hyps, hyp_to_ref_map, band, &banded_distances);
+    ASSERT_EQ(alignment.Dim0(), num_hyps);
+
+    const int32_t *row_splits1 = alignment.RowSplits(1).Data();
+    for (int32_t h = 0; h != num_hyps; ++h) {
+      const auto &ref = ref_vecs[hyp_to_ref[h]];
+      const auto &hyp = hyp_vecs[h];
+      int32_t expected = NaiveLevenshtein(ref, hyp);
+      EXPECT_EQ(distances[h], expected);
+      // The banded distance is an upper bound, which is exact if it is
+      // within the band.
+      EXPECT_GE(banded_distances[h], expected);
+      if (expected <= band) EXPECT_EQ(banded_distances[h], expected);
+
+      // The alignment spells out the ref and the hyp, and its score is
+      // the negative distance.
+      std::vector<int32_t> aligned_ref, aligned_hyp;
+      float score = 0;
+      int32_t arc_begin = row_splits1[h] - h,
+              arc_end = row_splits1[h + 1] - h - 1;
+      for (int32_t a = arc_begin; a != arc_end; ++a) {
+        if (ref_labels[a] > 0) aligned_ref.push_back(ref_labels[a]);
+        if (hyp_labels[a] > 0) aligned_hyp.push_back(hyp_labels[a]);
+        score += alignment.values[a].score;
+      }
+      EXPECT_EQ(aligned_ref, ref);
+      EXPECT_EQ(aligned_hyp, hyp);
+      EXPECT_EQ(score, -expected);
+    }
+  }
+}
+
+}  // namespace k2
@@ -26,6 +26,7 @@
 #endif
 
 #include "k2/csrc/context.h"
+#include "k2/csrc/cpu_caching_allocator.h"
 #include "k2/csrc/device_guard.h"
 #include "k2/csrc/log.h"
 #include "k2/csrc/pytorch_context.h"
@@ -84,10 +85,11 @@ static void InitHasCuda() {
 
 class PytorchCpuContext : public Context {
  public:
-  PytorchCpuContext() {
-    allocator_ = torch::GetAllocator(torch::kCPU);
-    K2_CHECK(allocator_->raw_deleter() != nullptr);
-  }
+  // We use our own caching allocator instead of PyTorch's CPU allocator,
+  // which does not cache, since many k2 algorithms do lots of short-lived
+  // allocations. Memory from `torch::Tensor`s is still freed by
+  // `ManagedTensor`.
+  PytorchCpuContext() : allocator_(GetCpuCachingAllocator()) {}
 
   DeviceType GetDeviceType() const override { return kCpu; }
 
@@ -95,7 +97,7 @@ class PytorchCpuContext : public Context {
     int64_t max_bytes = internal::MaxCpuMemAllocate();
     if (max_bytes != -1) K2_CHECK_LE(static_cast<int64_t>(bytes), max_bytes);
 
-    void *p = allocator_->raw_allocate(bytes);
+    void *p = allocator_->Allocate(bytes);
     if (deleter_context != nullptr) *deleter_context = nullptr;
     return p;
   }
@@ -106,7 +108,7 @@ class PytorchCpuContext : public Context {
       // the memory is passed from a `torch::Tensor`
       delete reinterpret_cast<ManagedTensor *>(deleter_context);
     } else {
-      allocator_->raw_deallocate(data);
+      allocator_->Deallocate(data);
     }
   }
 
@@ -137,7 +139,7 @@ class PytorchCpuContext : public Context {
   }
 
  private:
-  torch::Allocator *allocator_;  // NOT owned here
+  CpuCachingAllocator *allocator_;  // NOT owned here
 };
 
 class PytorchCudaContext : public Context {
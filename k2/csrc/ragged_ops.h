@@ -114,6 +114,54 @@ template <typename T>
 void ArgMaxPerSublist(const Ragged<T> &src, T initial_value,
                       Array1<int32_t> *argmax);
 
+/*
+  Same with `ArgMaxPerSublist`, but output the arg-min within each sub-list,
+  or -1 if the sub-list was empty or all values in the sub-list are greater
+  than `initial_value`.
+ */
+template <typename T>
+void ArgMinPerSublist(Ragged<T> &src, T initial_value,
+                      Array1<int32_t> *argmin);
+
+/*
+  Compute the inclusive sum per sub-list along the last axis of `src`,
+  i.e., the cumulative sum of each sub-list.
+
+     @param [in] src  Input ragged array; must have src.NumAxes() >= 2.
+                      src.values is allowed to be empty.
+     @param [out] dst The dest array. It satisfies
+                      `dst->Dim() == src.NumElements()`.
+                      Supports `dst == &src.values`.
+
+  See also SegmentedExclusiveSum().
+ */
+template <typename T>
+void CumSumPerSublist(Ragged<T> &src, Array1<T> *dst);
+
+/*
+  Select the `k` largest elements of each sub-list along the last axis of
+  `src`.
+
+     @param [in] src  Input ragged array; must have src.NumAxes() >= 2.
+                      src.values is allowed to be empty.
+     @param [in] k    The number of elements to select from each sub-list;
+                      must be > 0. All elements of sub-lists with fewer than
+                      `k` elements are selected.
+     @param [out] indexes  If not NULL, it is set to the indexes into
+                      `src.values` of the selected elements, i.e.,
+                      `ans.values[i] == src.values[(*indexes)[i]]`.
+
+     @return  Return a ragged array with the same number of axes as `src`.
+              All of its axes except the last one are the same as `src`;
+              the i-th sub-list of its last axis contains the
+              min(k, n_i) largest elements of the i-th sub-list of `src`,
+              where n_i is the size of that sub-list, in descending order.
+              Equal elements are ordered by their indexes.
+ */
+template <typename T>
+Ragged<T> TopkPerSublist(Ragged<T> &src, int32_t k,
+                         Array1<int32_t> *indexes = nullptr);
+
 /* Normalize per sublist.
 
    @param [in] src  The source ragged tensor. The normalization
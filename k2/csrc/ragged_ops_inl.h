@@ -40,9 +40,24 @@
 #endif
 #include "k2/csrc/macros.h"
 #include "k2/csrc/moderngpu_allocator.h"
+#include "k2/csrc/thread_pool.h"
 
 namespace k2 {
 
+namespace internal {
+// The minimum number of elements processed by each task when per-sublist
+// operations are parallelized with ParallelFor() on CPU.
+constexpr int32_t kMinElementsPerTask = 8192;
+
+// Return the grain size of ParallelFor() over the `num_rows` rows of a
+// ragged tensor with `num_elements` elements.
+inline int32_t GetRowGrainSize(int32_t num_rows, int32_t num_elements) {
+  if (num_elements <= kMinElementsPerTask) return std::max(num_rows, 1);
+  return std::max<int64_t>(
+      1, static_cast<int64_t>(num_rows) * kMinElementsPerTask / num_elements);
+}
+}  // namespace internal
+
 template <typename T, typename Op>
 void SegmentedReduce(const Ragged<T> &src, T initial_value, Array1<T> *dst) {
   NVTX_RANGE(K2_FUNC);
@@ -61,16 +76,21 @@ void SegmentedReduce(const Ragged<T> &src, T initial_value, Array1<T> *dst) {
   Op op;
 
   if (c->GetDeviceType() == kCpu) {
-    int32_t j = row_splits[0];
-    for (int32_t i = 0; i < num_rows; ++i) {
-      T val = initial_value;
-      int32_t row_end = row_splits[i + 1];
-      for (; j < row_end; ++j) {
-        T elem = values_data[j];
-        val = op(elem, val);
-      }
-      output_data[i] = val;
-    }
+    ParallelFor(
+        num_rows,
+        internal::GetRowGrainSize(num_rows, src.values.Dim()),
+        [=](int32_t begin, int32_t end) {
+          int32_t j = row_splits[begin];
+          for (int32_t i = begin; i < end; ++i) {
+            T val = initial_value;
+            int32_t row_end = row_splits[i + 1];
+            for (; j < row_end; ++j) {
+              T elem = values_data[j];
+              val = op(elem, val);
+            }
+            output_data[i] = val;
+          }
+        });
   } else {
     K2_CHECK_EQ(c->GetDeviceType(), kCuda);
 
@@ -600,6 +620,15 @@ struct PairMaxOp {
   }
 };
 
+template <typename T>
+struct PairMinOp {
+  __device__ __forceinline__ Pair<T> operator()(const Pair<T> &a,
+                                                const Pair<T> &b) const {
+    if (a.t < b.t || (a.t == b.t && a.idx > b.idx)) return a;
+    return b;
+  }
+};
+
 }  // namespace argmax_internal
 }  // namespace k2
 
@@ -634,21 +663,26 @@ void ArgMaxPerSublist(Ragged<T> &src, T initial_value, Array1<int32_t> *dst) {
   int32_t *output_data = dst->Data();
 
   if (c->GetDeviceType() == kCpu) {
-    int32_t j = row_splits[0];
-    for (int32_t i = 0; i < num_rows; ++i) {
-      T val = initial_value;
-      int32_t idx = -1;
-
-      int32_t row_end = row_splits[i + 1];
-      for (; j < row_end; ++j) {
-        T elem = values_data[j];
-        if (elem >= val) {
-          val = elem;
-          idx = j;
-        }
-      }
-      output_data[i] = idx;
-    }
+    ParallelFor(
+        num_rows,
+        internal::GetRowGrainSize(num_rows, src.values.Dim()),
+        [=](int32_t begin, int32_t end) {
+          int32_t j = row_splits[begin];
+          for (int32_t i = begin; i < end; ++i) {
+            T val = initial_value;
+            int32_t idx = -1;
+
+            int32_t row_end = row_splits[i + 1];
+            for (; j < row_end; ++j) {
+              T elem = values_data[j];
+              if (elem >= val) {
+                val = elem;
+                idx = j;
+              }
+            }
+            output_data[i] = idx;
+          }
+        });
   } else {
     K2_CHECK_EQ(c->GetDeviceType(), kCuda);
     argmax_internal::PairInputIterator<T> input_iter(values_data);
@@ -705,6 +739,181 @@ void ArgMaxPerSublist(Ragged<T> &src, T initial_value, Array1<int32_t> *dst) {
   }
 }
 
+template <typename T>
+void ArgMinPerSublist(Ragged<T> &src, T initial_value, Array1<int32_t> *dst) {
+  NVTX_RANGE(K2_FUNC);
+  K2_CHECK_GE(src.NumAxes(), 2);
+  K2_CHECK(IsCompatible(src.shape, *dst));
+
+  int32_t last_axis = src.NumAxes() - 1;
+  const Array1<int32_t> &row_splits_array = src.RowSplits(last_axis);
+  int32_t num_rows = row_splits_array.Dim() - 1;
+  K2_CHECK_EQ(num_rows, dst->Dim());
+
+  ContextPtr &c = src.Context();
+  const int32_t *row_splits = row_splits_array.Data();
+  const T *values_data = src.values.Data();
+  int32_t *output_data = dst->Data();
+
+  if (c->GetDeviceType() == kCpu) {
+    ParallelFor(
+        num_rows,
+        internal::GetRowGrainSize(num_rows, src.values.Dim()),
+        [=](int32_t begin, int32_t end) {
+          int32_t j = row_splits[begin];
+          for (int32_t i = begin; i < end; ++i) {
+            T val = initial_value;
+            int32_t idx = -1;
+
+            int32_t row_end = row_splits[i + 1];
+            for (; j < row_end; ++j) {
+              T elem = values_data[j];
+              if (elem <= val) {
+                val = elem;
+                idx = j;
+              }
+            }
+            output_data[i] = idx;
+          }
+        });
+  } else {
+    K2_CHECK_EQ(c->GetDeviceType(), kCuda);
+    argmax_internal::PairInputIterator<T> input_iter(values_data);
+    argmax_internal::PairOutputIterator<T> output_iter(output_data);
+    argmax_internal::PairMinOp<T> op;
+    argmax_internal::Pair<T> initial_pair{initial_value, -1};
+
+    std::size_t temp_storage_bytes = 0;
+    K2_CUDA_SAFE_CALL(cub::DeviceSegmentedReduce::Reduce(
+        nullptr, temp_storage_bytes, input_iter, output_iter, num_rows,
+        row_splits, row_splits + 1, op, initial_pair, c->GetCudaStream()));
+    Array1<int8_t> d_temp_storage(c, temp_storage_bytes);
+    K2_CUDA_SAFE_CALL(cub::DeviceSegmentedReduce::Reduce(
+        d_temp_storage.Data(), temp_storage_bytes, input_iter, output_iter,
+        num_rows, row_splits, row_splits + 1, op, initial_pair,
+        c->GetCudaStream()));
+  }
+}
+
+template <typename T>
+void CumSumPerSublist(Ragged<T> &src, Array1<T> *dst) {
+  NVTX_RANGE(K2_FUNC);
+  K2_CHECK_GE(src.NumAxes(), 2);
+  ContextPtr c = GetContext(src, *dst);
+  int32_t dim = dst->Dim();
+  K2_CHECK_EQ(src.NumElements(), dim);
+
+  int32_t last_axis = src.NumAxes() - 1;
+  const int32_t *row_splits_data = src.RowSplits(last_axis).Data();
+  int32_t num_rows = src.TotSize(last_axis - 1);
+  const T *src_values_data = src.values.Data();
+  T *dst_data = dst->Data();
+
+  if (c->GetDeviceType() == kCpu) {
+    ParallelFor(num_rows, internal::GetRowGrainSize(num_rows, dim),
+                [=](int32_t begin, int32_t end) {
+                  for (int32_t i = begin; i != end; ++i) {
+                    T sum = 0;
+                    int32_t row_end = row_splits_data[i + 1];
+                    for (int32_t n = row_splits_data[i]; n != row_end; ++n) {
+                      sum += src_values_data[n];
+                      dst_data[n] = sum;
+                    }
+                  }
+                });
+  } else {
+    // The inclusive sum is the exclusive sum plus the element itself.
+    Array1<T> exclusive_sum(c, dim);
+    SegmentedExclusiveSum(src, &exclusive_sum);
+    const T *exclusive_sum_data = exclusive_sum.Data();
+    K2_EVAL(
+        c, dim, lambda_add_values, (int32_t i)->void {
+          dst_data[i] = exclusive_sum_data[i] + src_values_data[i];
+        });
+  }
+}
+
+template <typename T>
+Ragged<T> TopkPerSublist(Ragged<T> &src, int32_t k,
+                         Array1<int32_t> *indexes /*= nullptr*/) {
+  NVTX_RANGE(K2_FUNC);
+  K2_CHECK_GE(src.NumAxes(), 2);
+  K2_CHECK_GT(k, 0);
+
+  ContextPtr &c = src.Context();
+  int32_t last_axis = src.NumAxes() - 1;
+  int32_t num_rows = src.TotSize(last_axis - 1);
+  const int32_t *row_splits_data = src.RowSplits(last_axis).Data();
+
+  Array1<int32_t> ans_row_splits(c, num_rows + 1);
+  int32_t *ans_row_splits_data = ans_row_splits.Data();
+  K2_EVAL(
+      c, num_rows, lambda_set_sizes, (int32_t i)->void {
+        int32_t size = row_splits_data[i + 1] - row_splits_data[i];
+        ans_row_splits_data[i] = size < k ? size : k;
+      });
+  ExclusiveSum(ans_row_splits, &ans_row_splits);
+
+  RaggedShape ans_shape = RaggedShape2(&ans_row_splits, nullptr, -1);
+  if (src.NumAxes() > 2) {
+    RaggedShape prefix = RemoveAxis(src.shape, last_axis);
+    ans_shape = ComposeRaggedShapes(prefix, ans_shape);
+  }
+
+  int32_t num_elements = ans_shape.NumElements();
+  Array1<T> ans_values(c, num_elements);
+  Array1<int32_t> ans_indexes(c, num_elements);
+  T *ans_values_data = ans_values.Data();
+  int32_t *ans_indexes_data = ans_indexes.Data();
+
+  if (c->GetDeviceType() == kCpu) {
+    const T *values_data = src.values.Data();
+    ParallelFor(
+        num_rows, internal::GetRowGrainSize(num_rows, src.NumElements()),
+        [=](int32_t begin, int32_t end) {
+          std::vector<int32_t> order;
+          for (int32_t i = begin; i != end; ++i) {
+            int32_t row_begin = row_splits_data[i];
+            int32_t row_end = row_splits_data[i + 1];
+            int32_t ans_begin = ans_row_splits_data[i];
+            int32_t num_selected = ans_row_splits_data[i + 1] - ans_begin;
+
+            order.resize(row_end - row_begin);
+            std::iota(order.begin(), order.end(), row_begin);
+            std::partial_sort(order.begin(), order.begin() + num_selected,
+                              order.end(), [values_data](int32_t a, int32_t b) {
+                                return values_data[a] > values_data[b] ||
+                                       (values_data[a] == values_data[b] &&
+                                        a < b);
+                              });
+            for (int32_t j = 0; j != num_selected; ++j) {
+              ans_indexes_data[ans_begin + j] = order[j];
+              ans_values_data[ans_begin + j] = values_data[order[j]];
+            }
+          }
+        });
+  } else {
+    // Sort each sub-list in descending order and keep the first k elements.
+    Ragged<T> sorted(src.shape, src.values.Clone());
+    Array1<int32_t> order(c, sorted.NumElements());
+    SortSublists<T, GreaterThan<T>>(&sorted, &order);
+    const T *sorted_data = sorted.values.Data();
+    const int32_t *order_data = order.Data();
+    const int32_t *ans_row_ids_data = ans_shape.RowIds(last_axis).Data();
+    K2_EVAL(
+        c, num_elements, lambda_set_values, (int32_t idx01)->void {
+          int32_t idx0 = ans_row_ids_data[idx01];
+          int32_t src_idx01 =
+              row_splits_data[idx0] + idx01 - ans_row_splits_data[idx0];
+          ans_values_data[idx01] = sorted_data[src_idx01];
+          ans_indexes_data[idx01] = order_data[src_idx01];
+        });
+  }
+
+  if (indexes != nullptr) *indexes = ans_indexes;
+  return Ragged<T>(ans_shape, ans_values);
+}
+
 template <typename T>
 void SegmentedExclusiveSum(Ragged<T> &src, Array1<T> *dst) {
   NVTX_RANGE(K2_FUNC);
@@ -616,6 +616,138 @@ TEST(RaggedShapeOpsTest, MinPerSubListTest) {
   TestMinPerSubListTest<int32_t>();
 }
 
+template <typename T>
+void TestArgMinPerSubList() {
+  ContextPtr cpu = GetCpuContext();
+  for (auto &context : {GetCpuContext(), GetCudaContext()}) {
+    {
+      Ragged<T> ragged(context, "[ [ 3 1 1 2 ] [ ] [ 5 4 ] [ 0 ] ]");
+      Array1<int32_t> argmin_values(context, ragged.Dim0());
+      ArgMinPerSublist<T>(ragged, 4, &argmin_values);
+      CheckArrayData(argmin_values, std::vector<int32_t>{2, -1, 5, 6});
+    }
+    for (int32_t i = 0; i != 10; ++i) {
+      Ragged<T> ragged = RandomRagged<T>(0, 1000, 2, 4, 0, 50000).To(context);
+      int32_t last_axis = ragged.NumAxes() - 1;
+      Array1<int32_t> argmin_values(context,
+                                    ragged.RowSplits(last_axis).Dim() - 1);
+      ArgMinPerSublist<T>(ragged, 500, &argmin_values);
+
+      ragged = ragged.To(cpu);
+      argmin_values = argmin_values.To(cpu);
+      Array1<int32_t> row_splits = ragged.RowSplits(last_axis);
+      for (int32_t row = 0; row + 1 < row_splits.Dim(); ++row) {
+        T min_val = 500;
+        int32_t best_pos = -1;
+        for (int32_t pos = row_splits[row]; pos < row_splits[row + 1]; ++pos) {
+          if (ragged.values[pos] <= min_val) {
+            min_val = ragged.values[pos];
+            best_pos = pos;
+          }
+        }
+        EXPECT_EQ(argmin_values[row], best_pos);
+      }
+    }
+  }
+}
+
+TEST(RaggedShapeOpsTest, ArgMinPerSubList) {
+  TestArgMinPerSubList<int32_t>();
+  TestArgMinPerSubList<float>();
+}
+
+template <typename T>
+void TestCumSumPerSublist() {
+  ContextPtr cpu = GetCpuContext();
+  for (auto &context : {GetCpuContext(), GetCudaContext()}) {
+    {
+      Ragged<T> ragged(context, "[ [ [ 1 2 3 ] [ ] ] [ [ 4 ] [ 5 6 ] ] ]");
+      Array1<T> dst(context, ragged.NumElements());
+      CumSumPerSublist<T>(ragged, &dst);
+      CheckArrayData(dst, std::vector<T>{1, 3, 6, 4, 5, 11});
+
+      // in-place
+      CumSumPerSublist<T>(ragged, &ragged.values);
+      CheckArrayData(ragged.values, std::vector<T>{1, 3, 6, 4, 5, 11});
+    }
+    for (int32_t i = 0; i != 10; ++i) {
+      Ragged<T> ragged = RandomRagged<T>(0, 100, 2, 4, 0, 50000).To(context);
+      Array1<T> dst(context, ragged.NumElements());
+      CumSumPerSublist<T>(ragged, &dst);
+
+      ragged = ragged.To(cpu);
+      dst = dst.To(cpu);
+      Array1<int32_t> row_splits = ragged.RowSplits(ragged.NumAxes() - 1);
+      for (int32_t row = 0; row + 1 < row_splits.Dim(); ++row) {
+        T sum = 0;
+        for (int32_t pos = row_splits[row]; pos < row_splits[row + 1]; ++pos) {
+          sum += ragged.values[pos];
+          EXPECT_EQ(dst[pos], sum);
+        }
+      }
+    }
+  }
+}
+
+TEST(RaggedShapeOpsTest, CumSumPerSublist) {
+  TestCumSumPerSublist<int32_t>();
+  TestCumSumPerSublist<double>();
+}
+
+template <typename T>
+void TestTopkPerSublist() {
+  ContextPtr cpu = GetCpuContext();
+  for (auto &context : {GetCpuContext(), GetCudaContext()}) {
+    {
+      Ragged<T> ragged(context, "[ [ [ 1 5 3 5 ] [ ] ] [ [ 4 ] [ 2 6 ] ] ]");
+      Array1<int32_t> indexes;
+      Ragged<T> ans = TopkPerSublist<T>(ragged, 2, &indexes);
+      EXPECT_TRUE(
+          Equal(ans, Ragged<T>(context, "[ [ [ 5 5 ] [ ] ] [ [ 4 ] [ 6 2 ] ] ]")));
+      CheckArrayData(indexes, std::vector<int32_t>{1, 3, 4, 6, 5});
+    }
+    for (int32_t i = 0; i != 10; ++i) {
+      Ragged<T> ragged = RandomRagged<T>(0, 1000, 2, 4, 0, 50000).To(context);
+      int32_t k = RandInt(1, 10);
+      Array1<int32_t> indexes;
+      Ragged<T> ans = TopkPerSublist<T>(ragged, k, &indexes);
+
+      ragged = ragged.To(cpu);
+      ans = ans.To(cpu);
+      indexes = indexes.To(cpu);
+      int32_t last_axis = ragged.NumAxes() - 1;
+      ASSERT_EQ(ans.NumAxes(), ragged.NumAxes());
+      for (int32_t axis = 1; axis < last_axis; ++axis) {
+        EXPECT_TRUE(Equal(ans.RowSplits(axis), ragged.RowSplits(axis)));
+      }
+      Array1<int32_t> row_splits = ragged.RowSplits(last_axis);
+      Array1<int32_t> ans_row_splits = ans.RowSplits(last_axis);
+      ASSERT_EQ(row_splits.Dim(), ans_row_splits.Dim());
+      for (int32_t row = 0; row + 1 < row_splits.Dim(); ++row) {
+        std::vector<std::pair<T, int32_t>> expected;
+        for (int32_t pos = row_splits[row]; pos < row_splits[row + 1]; ++pos) {
+          // sort by value descending, then by index ascending
+          expected.emplace_back(-ragged.values[pos], pos);
+        }
+        std::sort(expected.begin(), expected.end());
+        expected.resize(std::min<int32_t>(k, expected.size()));
+        int32_t begin = ans_row_splits[row];
+        ASSERT_EQ(ans_row_splits[row + 1] - begin,
+                  static_cast<int32_t>(expected.size()));
+        for (size_t j = 0; j != expected.size(); ++j) {
+          EXPECT_EQ(ans.values[begin + j], -expected[j].first);
+          EXPECT_EQ(indexes[begin + j], expected[j].second);
+        }
+      }
+    }
+  }
+}
+
+TEST(RaggedShapeOpsTest, TopkPerSublist) {
+  TestTopkPerSublist<int32_t>();
+  TestTopkPerSublist<float>();
+}
+
 template <typename T>
 void TestAndOrPerSubListTest() {
   ContextPtr cpu = GetCpuContext();  // will be used to copy data
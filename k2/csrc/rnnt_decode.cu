@@ -26,6 +26,7 @@
 #include "k2/csrc/macros.h"
 #include "k2/csrc/ragged_ops.h"
 #include "k2/csrc/rnnt_decode.h"
+#include "k2/csrc/serialize.h"
 
 namespace k2 {
 namespace rnnt_decoding {
@@ -45,6 +46,53 @@ std::shared_ptr<RnntDecodingStream> CreateStream(
   return std::make_shared<RnntDecodingStream>(stream);
 }
 
+// "K2RS" + version, see SerializeStream() for the format.
+static constexpr const char *kStreamMagic = "K2RS";
+static constexpr uint8_t kStreamVersion = 1;
+
+std::string SerializeStream(RnntDecodingStream &stream) {
+  ByteWriter writer(kStreamMagic, kStreamVersion);
+  // For checking that the same graph is used when deserializing.
+  writer.PutVarint(stream.num_graph_states);
+  writer.PutVarint(stream.graph->NumElements());
+  writer.PutRagged(stream.states);
+  // `scores` has the same shape as `states`.
+  Array1<double> scores = stream.scores.values.To(GetCpuContext());
+  writer.PutRaw(scores.Data(), scores.Dim());
+  writer.PutVarint(stream.prev_frames.size());
+  for (auto &frame : stream.prev_frames) writer.PutRagged(*frame);
+  return writer.Buffer();
+}
+
+std::shared_ptr<RnntDecodingStream> DeserializeStream(
+    const std::string &data, const std::shared_ptr<Fsa> &graph) {
+  K2_CHECK_EQ(graph->shape.NumAxes(), 2);
+  ContextPtr &c = graph->shape.Context();
+  ByteReader reader(data, kStreamMagic);
+  K2_CHECK_EQ(reader.Version(), kStreamVersion)
+      << "Unsupported version of RnntDecodingStream";
+  auto stream = std::make_shared<RnntDecodingStream>();
+  stream->graph = graph;
+  stream->num_graph_states = graph->shape.Dim0();
+  int32_t num_graph_states = reader.GetVarint(),
+          num_graph_arcs = reader.GetVarint();
+  K2_CHECK(num_graph_states == stream->num_graph_states &&
+           num_graph_arcs == graph->NumElements())
+      << "The stream was decoded with a different graph";
+
+  stream->states = reader.GetRagged<int64_t>(2, c);
+  Array1<double> scores(GetCpuContext(), stream->states.NumElements());
+  reader.GetRaw(scores.Data(), scores.Dim());
+  stream->scores = Ragged<double>(stream->states.shape, scores.To(c));
+  int32_t num_frames = reader.GetVarint();
+  for (int32_t t = 0; t != num_frames; ++t) {
+    stream->prev_frames.push_back(std::make_shared<Ragged<ArcInfo>>(
+        reader.GetRagged<ArcInfo>(2, c)));
+  }
+  reader.CheckEnd();
+  return stream;
+}
+
 RnntDecodingStreams::RnntDecodingStreams(
     std::vector<std::shared_ptr<RnntDecodingStream>> &srcs,
     const RnntDecodingConfig &config)
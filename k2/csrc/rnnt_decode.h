@@ -21,6 +21,7 @@
 
 #include <algorithm>
 #include <memory>
+#include <string>
 #include <vector>
 
 #include "k2/csrc/array.h"
@@ -395,6 +396,21 @@ class RnntDecodingStreams {
 std::shared_ptr<RnntDecodingStream> CreateStream(
     const std::shared_ptr<Fsa> &graph);
 
+/* Serialize a decoding stream into a compact, versioned binary string, e.g.,
+   to continue decoding the sequence in another process.  The decoding graph
+   is not included; it has to be passed to DeserializeStream().
+ */
+std::string SerializeStream(RnntDecodingStream &stream);
+
+/* Restore a decoding stream serialized by SerializeStream() bit-exactly.
+
+   @param [in] data  The output of SerializeStream().
+   @param [in] graph  The decoding graph that the stream was decoded with.
+                      The returned stream is on the same device as it.
+ */
+std::shared_ptr<RnntDecodingStream> DeserializeStream(
+    const std::string &data, const std::shared_ptr<Fsa> &graph);
+
 }  // namespace rnnt_decoding
 }  // namespace k2
 
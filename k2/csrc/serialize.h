@@ -0,0 +1,166 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#ifndef K2_CSRC_SERIALIZE_H_
+#define K2_CSRC_SERIALIZE_H_
+
+#include <cstdint>
+#include <cstring>
+#include <string>
+#include <type_traits>
+#include <vector>
+
+#include "k2/csrc/array.h"
+#include "k2/csrc/log.h"
+#include "k2/csrc/ragged.h"
+#include "k2/csrc/ragged_ops.h"
+
+// Utilities for the compact binary encoding of decoding states, see
+// SerializeDecodeStateInfo() in intersect_dense_pruned.h and
+// SerializeStream() in rnnt_decode.h.
+//
+// Sizes are written as varints (7 bits per byte); values are written as raw
+// bytes in native byte order, which is little-endian on all platforms we
+// support, so floating-point values are restored bit-exactly.
+
+namespace k2 {
+
+class ByteWriter {
+ public:
+  // `magic` identifies the type of the object, it must have 4 characters.
+  ByteWriter(const char *magic, uint8_t version) {
+    K2_CHECK_EQ(std::strlen(magic), 4);
+    buf_.append(magic, 4);
+    buf_.push_back(static_cast<char>(version));
+  }
+
+  void PutVarint(uint64_t v) {
+    while (v >= 0x80) {
+      buf_.push_back(static_cast<char>((v & 0x7f) | 0x80));
+      v >>= 7;
+    }
+    buf_.push_back(static_cast<char>(v));
+  }
+
+  template <typename T>
+  void PutRaw(const T *data, int64_t n) {
+    static_assert(std::is_trivially_copyable<T>::value, "");
+    buf_.append(reinterpret_cast<const char *>(data), n * sizeof(T));
+  }
+
+  // Write the row lengths of each axis of `shape`, which must be on CPU.
+  void PutShape(RaggedShape &shape) {
+    PutVarint(shape.Dim0());
+    for (int32_t axis = 1; axis < shape.NumAxes(); ++axis) {
+      const int32_t *row_splits = shape.RowSplits(axis).Data();
+      int32_t num_rows = shape.TotSize(axis - 1);
+      for (int32_t i = 0; i != num_rows; ++i)
+        PutVarint(row_splits[i + 1] - row_splits[i]);
+    }
+  }
+
+  // Write a ragged tensor, which may be on any device.
+  template <typename T>
+  void PutRagged(Ragged<T> &src) {
+    Ragged<T> cpu_src = src.To(GetCpuContext());
+    PutShape(cpu_src.shape);
+    PutRaw(cpu_src.values.Data(), cpu_src.values.Dim());
+  }
+
+  const std::string &Buffer() const { return buf_; }
+
+ private:
+  std::string buf_;
+};
+
+class ByteReader {
+ public:
+  // Checks the magic and returns the version with `version()`.
+  ByteReader(const std::string &buf, const char *magic)
+      : buf_(buf), pos_(0) {
+    K2_CHECK_EQ(std::strlen(magic), 4);
+    K2_CHECK(buf_.size() >= 5 && buf_.compare(0, 4, magic) == 0)
+        << "Not a serialized " << magic << " object";
+    version_ = static_cast<uint8_t>(buf_[4]);
+    pos_ = 5;
+  }
+
+  uint8_t Version() const { return version_; }
+
+  uint64_t GetVarint() {
+    uint64_t ans = 0;
+    for (int32_t shift = 0;; shift += 7) {
+      K2_CHECK(pos_ < buf_.size() && shift < 64) << "Corrupted data";
+      uint8_t b = static_cast<uint8_t>(buf_[pos_++]);
+      ans |= static_cast<uint64_t>(b & 0x7f) << shift;
+      if (!(b & 0x80)) break;
+    }
+    return ans;
+  }
+
+  template <typename T>
+  void GetRaw(T *data, int64_t n) {
+    static_assert(std::is_trivially_copyable<T>::value, "");
+    size_t num_bytes = n * sizeof(T);
+    K2_CHECK_LE(pos_ + num_bytes, buf_.size()) << "Corrupted data";
+    std::memcpy(data, buf_.data() + pos_, num_bytes);
+    pos_ += num_bytes;
+  }
+
+  // Read a shape with `num_axes` axes on CPU, written by PutShape().
+  RaggedShape GetShape(int32_t num_axes) {
+    K2_CHECK_GE(num_axes, 2);
+    ContextPtr c = GetCpuContext();
+    int32_t num_rows = GetVarint();
+    RaggedShape ans;
+    for (int32_t axis = 1; axis < num_axes; ++axis) {
+      Array1<int32_t> row_splits(c, num_rows + 1);
+      int32_t *row_splits_data = row_splits.Data();
+      row_splits_data[0] = 0;
+      for (int32_t i = 0; i != num_rows; ++i)
+        row_splits_data[i + 1] = row_splits_data[i] + GetVarint();
+      num_rows = row_splits_data[num_rows];
+      RaggedShape layer = RaggedShape2(&row_splits, nullptr, num_rows);
+      ans = axis == 1 ? layer : ComposeRaggedShapes(ans, layer);
+    }
+    return ans;
+  }
+
+  // Read a ragged tensor written by PutRagged() to the device `c`.
+  template <typename T>
+  Ragged<T> GetRagged(int32_t num_axes, ContextPtr c) {
+    RaggedShape shape = GetShape(num_axes);
+    Array1<T> values(GetCpuContext(), shape.NumElements());
+    GetRaw(values.Data(), values.Dim());
+    return Ragged<T>(shape, values).To(c);
+  }
+
+  // Check that all the data has been read.
+  void CheckEnd() const {
+    K2_CHECK_EQ(pos_, buf_.size()) << "Trailing data after the object";
+  }
+
+ private:
+  const std::string &buf_;
+  size_t pos_;
+  uint8_t version_;
+};
+
+}  // namespace k2
+
+#endif  // K2_CSRC_SERIALIZE_H_
@@ -0,0 +1,238 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <algorithm>
+#include <utility>
+#include <vector>
+
+#include "k2/csrc/nbest.h"
+#include "k2/csrc/ragged_ops.h"
+#include "k2/csrc/suffix_index.h"
+#include "k2/csrc/thread_pool.h"
+
+// This is not really a CUDA file but for build-system reasons it has
+// the .cu extension.
+
+namespace k2 {
+
+// Minimum number of n-grams/queries processed by each task of ParallelFor()
+static constexpr int32_t kGrainSize = 64;
+
+SuffixIndex::SuffixIndex(Ragged<int32_t> &corpus) : corpus_(corpus) {
+  Init();
+  int32_t seq_len = text_.Dim() - 3,
+          max_symbol = static_cast<int32_t>(vocab_.Dim()) + 2;
+  suffix_array_ = Array1<int32_t>(GetCpuContext(), seq_len);
+  CreateSuffixArray(text_.Data(), seq_len, max_symbol, suffix_array_.Data());
+}
+
+SuffixIndex::SuffixIndex(Ragged<int32_t> &corpus,
+                         Array1<int32_t> &suffix_array)
+    : corpus_(corpus), suffix_array_(suffix_array) {
+  Init();
+  K2_CHECK(suffix_array_.Context()->IsCompatible(*GetCpuContext()));
+  K2_CHECK_EQ(suffix_array_.Dim(), text_.Dim() - 3)
+      << "The suffix array does not match the corpus";
+}
+
+void SuffixIndex::Init() {
+  K2_CHECK(corpus_.Context()->IsCompatible(*GetCpuContext()))
+      << "SuffixIndex supports only CPU";
+  K2_CHECK_EQ(corpus_.NumAxes(), 2);
+
+  const int32_t *tokens = corpus_.values.Data();
+  int32_t num_tokens = corpus_.NumElements();
+  std::vector<int32_t> vocab(tokens, tokens + num_tokens);
+  std::sort(vocab.begin(), vocab.end());
+  vocab.erase(std::unique(vocab.begin(), vocab.end()), vocab.end());
+  vocab_ = Array1<int32_t>(GetCpuContext(), vocab);
+
+  // Each sequence is followed by a separator (1), and the whole text is
+  // followed by the terminator and 3 zeros.
+  int32_t num_seqs = corpus_.Dim0(), seq_len = num_tokens + num_seqs + 1;
+  text_ = Array1<int32_t>(GetCpuContext(), seq_len + 3, 0);
+  int32_t *text = text_.Data();
+  const int32_t *row_splits = corpus_.RowSplits(1).Data();
+  for (int32_t s = 0; s != num_seqs; ++s) {
+    for (int32_t i = row_splits[s]; i != row_splits[s + 1]; ++i) {
+      text[i + s] = static_cast<int32_t>(
+          std::lower_bound(vocab.begin(), vocab.end(), tokens[i]) -
+          vocab.begin()) + 2;
+    }
+    text[row_splits[s + 1] + s] = 1;
+  }
+  text[seq_len - 1] = static_cast<int32_t>(vocab.size()) + 2;
+}
+
+Array1<int32_t> SuffixIndex::MapTokens(Ragged<int32_t> &ngrams) const {
+  K2_CHECK(ngrams.Context()->IsCompatible(*GetCpuContext()))
+      << "SuffixIndex supports only CPU";
+  K2_CHECK_EQ(ngrams.NumAxes(), 2);
+
+  const int32_t *vocab_begin = vocab_.Data(),
+                *vocab_end = vocab_begin + vocab_.Dim();
+  const int32_t *tokens = ngrams.values.Data();
+  int32_t num_tokens = ngrams.NumElements();
+  Array1<int32_t> ans(GetCpuContext(), num_tokens);
+  int32_t *ans_data = ans.Data();
+  for (int32_t i = 0; i != num_tokens; ++i) {
+    const int32_t *p = std::lower_bound(vocab_begin, vocab_end, tokens[i]);
+    ans_data[i] = (p != vocab_end && *p == tokens[i])
+                      ? static_cast<int32_t>(p - vocab_begin) + 2
+                      : 0;
+  }
+  return ans;
+}
+
+void SuffixIndex::Narrow(int32_t offset, int32_t symbol, int32_t *begin,
+                         int32_t *end) const {
+  // Within [*begin, *end), suffixes are sorted by the symbol at `offset`.
+  // Reading text[sa + offset] is safe since every suffix in the range has a
+  // prefix of length `offset` that does not contain the terminator.
+  const int32_t *sa = suffix_array_.Data(), *text = text_.Data();
+  const int32_t *lower = std::lower_bound(
+      sa + *begin, sa + *end, symbol, [text, offset](int32_t pos, int32_t s) {
+        return text[pos + offset] < s;
+      });
+  const int32_t *upper = std::upper_bound(
+      lower, sa + *end, symbol, [text, offset](int32_t s, int32_t pos) {
+        return s < text[pos + offset];
+      });
+  *begin = static_cast<int32_t>(lower - sa);
+  *end = static_cast<int32_t>(upper - sa);
+}
+
+std::pair<int32_t, int32_t> SuffixIndex::Search(const int32_t *symbols,
+                                                int32_t n) const {
+  int32_t begin = 0, end = suffix_array_.Dim();
+  for (int32_t i = 0; i != n && begin != end; ++i) {
+    if (symbols[i] == 0) return {0, 0};  // not in the corpus
+    Narrow(i, symbols[i], &begin, &end);
+  }
+  return {begin, end};
+}
+
+Array1<int32_t> SuffixIndex::Count(Ragged<int32_t> &ngrams) {
+  Array1<int32_t> symbols = MapTokens(ngrams);
+  const int32_t *symbols_data = symbols.Data(),
+                *row_splits = ngrams.RowSplits(1).Data();
+  int32_t num_ngrams = ngrams.Dim0(), num_tokens = corpus_.NumElements();
+  Array1<int32_t> ans(GetCpuContext(), num_ngrams);
+  int32_t *ans_data = ans.Data();
+  ParallelFor(num_ngrams, kGrainSize, [&](int32_t begin, int32_t end) {
+    for (int32_t i = begin; i != end; ++i) {
+      int32_t n = row_splits[i + 1] - row_splits[i];
+      if (n == 0) {
+        ans_data[i] = num_tokens;
+        continue;
+      }
+      auto range = Search(symbols_data + row_splits[i], n);
+      ans_data[i] = range.second - range.first;
+    }
+  });
+  return ans;
+}
+
+Ragged<int32_t> SuffixIndex::Find(Ragged<int32_t> &ngrams) {
+  Array1<int32_t> symbols = MapTokens(ngrams);
+  const int32_t *symbols_data = symbols.Data(),
+                *row_splits = ngrams.RowSplits(1).Data();
+  int32_t num_ngrams = ngrams.Dim0();
+
+  for (int32_t i = 0; i != num_ngrams; ++i) {
+    K2_CHECK_GT(row_splits[i + 1], row_splits[i])
+        << "Empty n-grams are not allowed";
+  }
+
+  std::vector<std::pair<int32_t, int32_t>> ranges(num_ngrams);
+  ParallelFor(num_ngrams, kGrainSize, [&](int32_t begin, int32_t end) {
+    for (int32_t i = begin; i != end; ++i) {
+      ranges[i] = Search(symbols_data + row_splits[i],
+                         row_splits[i + 1] - row_splits[i]);
+    }
+  });
+
+  Array1<int32_t> ans_row_splits(GetCpuContext(), num_ngrams + 1);
+  int32_t *ans_row_splits_data = ans_row_splits.Data();
+  ans_row_splits_data[0] = 0;
+  for (int32_t i = 0; i != num_ngrams; ++i) {
+    ans_row_splits_data[i + 1] =
+        ans_row_splits_data[i] + ranges[i].second - ranges[i].first;
+  }
+
+  Array1<int32_t> positions(GetCpuContext(), ans_row_splits_data[num_ngrams]);
+  int32_t *positions_data = positions.Data();
+  const int32_t *sa = suffix_array_.Data(),
+                *corpus_row_splits = corpus_.RowSplits(1).Data();
+  int32_t num_seqs = corpus_.Dim0();
+  ParallelFor(num_ngrams, kGrainSize, [&](int32_t begin, int32_t end) {
+    for (int32_t i = begin; i != end; ++i) {
+      int32_t *p = positions_data + ans_row_splits_data[i];
+      for (int32_t j = ranges[i].first; j != ranges[i].second; ++j, ++p) {
+        // Sequence s starts at corpus_row_splits[s] + s in text_, since
+        // each of the previous sequences is followed by a separator.
+        int32_t pos = sa[j];
+        int32_t lo = 0, hi = num_seqs;  // find the last s with start <= pos
+        while (hi - lo > 1) {
+          int32_t mid = (lo + hi) / 2;
+          if (corpus_row_splits[mid] + mid <= pos)
+            lo = mid;
+          else
+            hi = mid;
+        }
+        *p = pos - lo;
+      }
+      std::sort(positions_data + ans_row_splits_data[i], p);
+    }
+  });
+  return Ragged<int32_t>(RaggedShape2(&ans_row_splits, nullptr, -1),
+                         positions);
+}
+
+std::pair<Array1<int32_t>, Array1<int32_t>> SuffixIndex::LongestMatch(
+    Ragged<int32_t> &queries, int32_t max_order /*= 0*/) {
+  Array1<int32_t> symbols = MapTokens(queries);
+  const int32_t *symbols_data = symbols.Data(),
+                *row_splits = queries.RowSplits(1).Data();
+  int32_t num_queries = queries.Dim0();
+
+  Array1<int32_t> lengths(GetCpuContext(), symbols.Dim()),
+      counts(GetCpuContext(), symbols.Dim());
+  int32_t *lengths_data = lengths.Data(), *counts_data = counts.Data();
+  ParallelFor(num_queries, kGrainSize, [&](int32_t begin, int32_t end) {
+    for (int32_t q = begin; q != end; ++q) {
+      // If [start, j] occurs in the corpus, so do [start + 1, j] and
+      // [start, j - 1]; so the start of the longest match ending at j is
+      // non-decreasing in j.
+      int32_t start = row_splits[q];
+      for (int32_t j = row_splits[q]; j != row_splits[q + 1]; ++j) {
+        if (max_order > 0) start = std::max(start, j - max_order + 1);
+        std::pair<int32_t, int32_t> range(0, 0);
+        for (; start <= j; ++start) {
+          range = Search(symbols_data + start, j - start + 1);
+          if (range.first != range.second) break;
+        }
+        lengths_data[j] = j - start + 1;
+        counts_data[j] = range.second - range.first;
+      }
+    }
+  });
+  return {lengths, counts};
+}
+
+}  // namespace k2
@@ -0,0 +1,139 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#ifndef K2_CSRC_SUFFIX_INDEX_H_
+#define K2_CSRC_SUFFIX_INDEX_H_
+
+#include <utility>
+
+#include "k2/csrc/array.h"
+#include "k2/csrc/ragged.h"
+
+namespace k2 {
+
+/*
+  An index over a corpus of token sequences (e.g., sentences) that answers
+  n-gram queries. It is built once with CreateSuffixArray() (see nbest.h)
+  and can be queried many times; it runs on CPU only.
+
+  Unlike GetBestMatchingStats(), tokens are mapped to a compact vocabulary
+  containing only the tokens that occur in the corpus, so the memory used
+  does not depend on the range of token values. N-grams never match across
+  the boundaries of sequences.
+ */
+class SuffixIndex {
+ public:
+  /*
+    Build the index.
+
+      @param [in] corpus  A ragged tensor with 2 axes [seq][token] on CPU.
+                          Tokens may have any value.
+   */
+  explicit SuffixIndex(Ragged<int32_t> &corpus);
+
+  /*
+    Construct the index from a previously computed suffix array, i.e.,
+    `SuffixArray()` of an index built from the same corpus. It is used for
+    deserialization.
+   */
+  SuffixIndex(Ragged<int32_t> &corpus, Array1<int32_t> &suffix_array);
+
+  // The corpus that this index was built from.
+  Ragged<int32_t> &Corpus() { return corpus_; }
+
+  /* The suffix array of the internal representation of the corpus, in which
+     every sequence is followed by a separator and the last one is followed
+     by a terminator. Its dimension is corpus.NumElements() +
+     corpus.Dim0() + 1.
+   */
+  Array1<int32_t> &SuffixArray() { return suffix_array_; }
+
+  /*
+    Count the number of occurrences of n-grams in the corpus.
+
+      @param [in] ngrams  A ragged tensor with 2 axes [ngram][token] on CPU.
+      @return Return an array of dimension ngrams.Dim0(); ans[i] is the
+              number of occurrences of the i-th n-gram. For empty n-grams,
+              it is the number of tokens in the corpus.
+   */
+  Array1<int32_t> Count(Ragged<int32_t> &ngrams);
+
+  /*
+    Find the occurrences of n-grams in the corpus.
+
+      @param [in] ngrams  A ragged tensor with 2 axes [ngram][token] on CPU.
+                          Empty n-grams are not allowed.
+      @return Return a ragged tensor with 2 axes [ngram][occurrence]
+              containing the positions where the n-grams start, in
+              increasing order. Positions are indexes into
+              `Corpus().values`, i.e., idx01's of the corpus.
+   */
+  Ragged<int32_t> Find(Ragged<int32_t> &ngrams);
+
+  /*
+    For each position of each query, find the longest n-gram ending at it
+    that occurs in the corpus. It is intended for estimating how familiar
+    each token of a hypothesis is given its left context.
+
+      @param [in] queries  A ragged tensor with 2 axes [query][token] on CPU.
+      @param [in] max_order  If positive, the returned lengths are at most
+                             `max_order`.
+      @return Return a pair (lengths, counts) of arrays of dimension
+              queries.NumElements(). For the token at queries.values[i],
+              lengths[i] is the length of the longest n-gram ending at it
+              that occurs in the corpus, and counts[i] is the number of
+              its occurrences. Both are 0 if the token does not occur in
+              the corpus.
+   */
+  std::pair<Array1<int32_t>, Array1<int32_t>> LongestMatch(
+      Ragged<int32_t> &queries, int32_t max_order = 0);
+
+ private:
+  void Init();
+
+  /* Map the tokens of `ngrams` to symbols in text_. Tokens that are not in
+     the corpus are mapped to 0, which never matches anything. */
+  Array1<int32_t> MapTokens(Ragged<int32_t> &ngrams) const;
+
+  /* Given the range [*begin, *end) of suffix_array_ whose suffixes share a
+     prefix of length `offset`, narrow it to the suffixes whose next symbol is
+     `symbol`. */
+  void Narrow(int32_t offset, int32_t symbol, int32_t *begin,
+              int32_t *end) const;
+
+  /* Return the range of suffix_array_ whose suffixes start with the
+     symbols [symbols, symbols + n). */
+  std::pair<int32_t, int32_t> Search(const int32_t *symbols,
+                                     int32_t n) const;
+
+  Ragged<int32_t> corpus_;
+
+  // Sorted unique tokens of the corpus. Token vocab_[i] is mapped to
+  // symbol i + 2 in text_; 1 is the separator.
+  Array1<int32_t> vocab_;
+
+  // The mapped corpus followed by a terminator and 3 zeros,
+  // as required by CreateSuffixArray().
+  Array1<int32_t> text_;
+
+  Array1<int32_t> suffix_array_;
+};
+
+}  // namespace k2
+
+#endif  // K2_CSRC_SUFFIX_INDEX_H_
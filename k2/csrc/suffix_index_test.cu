@@ -0,0 +1,135 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <vector>
+
+#include "gtest/gtest.h"
+#include "k2/csrc/math.h"
+#include "k2/csrc/ragged.h"
+#include "k2/csrc/ragged_ops.h"
+#include "k2/csrc/suffix_index.h"
+#include "k2/csrc/test_utils.h"
+
+namespace k2 {
+
+// Return the positions (idx01) where `ngram` starts in `corpus`, computed
+// by brute force.
+static std::vector<int32_t> FindNgram(
+    const std::vector<std::vector<int32_t>> &corpus,
+    const std::vector<int32_t> &ngram) {
+  std::vector<int32_t> ans;
+  int32_t offset = 0;
+  for (const auto &seq : corpus) {
+    int32_t seq_len = seq.size(), n = ngram.size();
+    for (int32_t i = 0; i + n <= seq_len; ++i) {
+      bool match = true;
+      for (int32_t k = 0; k != n && match; ++k) match = seq[i + k] == ngram[k];
+      if (match) ans.push_back(offset + i);
+    }
+    offset += seq_len;
+  }
+  return ans;
+}
+
+static std::vector<std::vector<int32_t>> RandomSeqs(int32_t num_seqs,
+                                                    int32_t max_len,
+                                                    int32_t min_token,
+                                                    int32_t max_token) {
+  std::vector<std::vector<int32_t>> ans(num_seqs);
+  for (auto &seq : ans) {
+    int32_t len = RandInt(0, max_len);
+    for (int32_t i = 0; i != len; ++i)
+      seq.push_back(RandInt(min_token, max_token));
+  }
+  return ans;
+}
+
+TEST(SuffixIndex, Simple) {
+  // Token values far apart do not matter
+  Ragged<int32_t> corpus("[ [1 2 3 -1] [2 3 1000000 -1] [] [3] ]");
+  SuffixIndex index(corpus);
+  EXPECT_EQ(index.SuffixArray().Dim(), 9 + 4 + 1);
+
+  Ragged<int32_t> ngrams("[ [2 3] [3] [1 2 3 -1 2] [5] [] [-1] ]");
+  Array1<int32_t> counts = index.Count(ngrams);
+  CheckArrayData(counts, std::vector<int32_t>{2, 3, 0, 0, 9, 2});
+
+  Ragged<int32_t> ngrams2("[ [2 3] [3] [1 2 3 -1 2] [5] [-1] ]");
+  Ragged<int32_t> positions = index.Find(ngrams2);
+  EXPECT_TRUE(
+      Equal(positions, Ragged<int32_t>("[ [1 4] [2 5 8] [] [] [3 7] ]")));
+
+  Ragged<int32_t> queries("[ [5 2 3 1000000] [3 -1 2 3] [] ]");
+  auto p = index.LongestMatch(queries);
+  CheckArrayData(p.first, std::vector<int32_t>{0, 1, 2, 3, 1, 2, 1, 2});
+  CheckArrayData(p.second, std::vector<int32_t>{0, 2, 2, 1, 3, 1, 2, 2});
+
+  p = index.LongestMatch(queries, 2);
+  CheckArrayData(p.first, std::vector<int32_t>{0, 1, 2, 2, 1, 2, 1, 2});
+  CheckArrayData(p.second, std::vector<int32_t>{0, 2, 2, 1, 3, 1, 2, 2});
+
+  // Construct from the suffix array
+  SuffixIndex index2(corpus, index.SuffixArray());
+  CheckArrayData(index2.Count(ngrams), counts);
+}
+
+TEST(SuffixIndex, Random) {
+  for (int32_t iter = 0; iter != 10; ++iter) {
+    auto seqs = RandomSeqs(RandInt(0, 50), 20, -1, 5);
+    Ragged<int32_t> corpus = CreateRagged2(seqs);
+    SuffixIndex index(corpus);
+
+    auto ngram_vecs = RandomSeqs(RandInt(0, 200), 4, -2, 6);
+    for (auto &ngram : ngram_vecs)
+      if (ngram.empty()) ngram.push_back(0);
+    Ragged<int32_t> ngrams = CreateRagged2(ngram_vecs);
+
+    Array1<int32_t> counts = index.Count(ngrams);
+    Ragged<int32_t> positions = index.Find(ngrams);
+    ASSERT_EQ(positions.Dim0(), ngrams.Dim0());
+    for (int32_t i = 0; i != ngrams.Dim0(); ++i) {
+      std::vector<int32_t> expected = FindNgram(seqs, ngram_vecs[i]);
+      EXPECT_EQ(counts[i], static_cast<int32_t>(expected.size()));
+      std::vector<int32_t> found(
+          positions.values.Data() + positions.RowSplits(1)[i],
+          positions.values.Data() + positions.RowSplits(1)[i + 1]);
+      EXPECT_EQ(found, expected);
+    }
+
+    auto p = index.LongestMatch(ngrams);
+    const int32_t *lengths = p.first.Data(), *lm_counts = p.second.Data();
+    int32_t k = 0;
+    for (const auto &query : ngram_vecs) {
+      for (int32_t j = 0; j != static_cast<int32_t>(query.size()); ++j, ++k) {
+        int32_t len = 0, count = 0;
+        for (int32_t start = j; start >= 0; --start) {
+          std::vector<int32_t> ngram(query.begin() + start,
+                                     query.begin() + j + 1);
+          int32_t c = FindNgram(seqs, ngram).size();
+          if (c == 0) break;
+          len = j - start + 1;
+          count = c;
+        }
+        EXPECT_EQ(lengths[k], len);
+        EXPECT_EQ(lm_counts[k], count);
+      }
+    }
+  }
+}
+
+}  // namespace k2
@@ -15,7 +15,9 @@
 #include "k2/csrc/dtype.h"
 #include "k2/csrc/macros.h"
 #include "k2/csrc/nvtx.h"
+#include "k2/csrc/ragged_ops.h"
 #include "k2/csrc/tensor_ops.h"
+#include "k2/csrc/thread_pool.h"
 
 namespace k2 {
 
@@ -144,8 +146,9 @@ template <typename T>
 
   NVTX_RANGE(K2_FUNC);
   if (allow_minus_one) {
-    K2_EVAL(
-        context, ans_dim, lambda_set_values, (int32_t i)->void {
+    K2_PARALLEL_EVAL(
+        context, ans_dim, internal::kMinElementsPerTask, lambda_set_values,
+        (int32_t i)->void {
           int32_t index = indexes_data[i];
           K2_DCHECK_LT(index, src_dim);
           K2_DCHECK(index >= 0 || index == -1);
@@ -157,8 +160,9 @@ template <typename T>
   }
 
   // now handle the case allow_minus_one == false
-  K2_EVAL(
-      context, ans_dim, lambda_set_values, (int32_t i)->void {
+  K2_PARALLEL_EVAL(
+      context, ans_dim, internal::kMinElementsPerTask, lambda_set_values,
+      (int32_t i)->void {
         int32_t index = indexes_data[i];
         K2_DCHECK_LT(index, src_dim);
         K2_DCHECK_GE(index, 0);
@@ -172,26 +176,39 @@ template <typename T>
                             int32_t src_stride, int32_t src_dim0,
                             int32_t src_dim1, const int32_t *indexes_data,
                             bool allow_minus_one, int32_t ans_dim,
-                            int32_t ans_stride, T *ans_data) {
+                            int32_t ans_stride, T *ans_data,
+                            double default_value) {
   NVTX_RANGE(K2_FUNC);
-  if (allow_minus_one) {
-    if (context->GetDeviceType() == kCpu) {
-      for (int32_t i = 0; i != ans_dim; ++i) {
+  if (std::is_integral<T>::value) {
+    K2_CHECK_EQ(static_cast<T>(default_value), default_value);
+  }
+  T value = static_cast<T>(default_value);
+
+  if (context->GetDeviceType() == kCpu) {
+    // Each task copies whole rows; make each of them handle at least
+    // kMinElementsPerTask elements.
+    int32_t grain_size =
+        std::max(1, internal::kMinElementsPerTask / std::max(src_dim1, 1));
+    ParallelFor(ans_dim, grain_size, [=](int32_t begin, int32_t end) {
+      for (int32_t i = begin; i != end; ++i) {
         int32_t index = indexes_data[i];
         K2_DCHECK_LT(index, src_dim0);
-        K2_DCHECK_GE(index, -1);
-        T *cur_ans_data = ans_data + i * ans_stride;
-        const T *cur_src_data = src_data + index * src_stride;
+        K2_DCHECK_GE(index, allow_minus_one ? -1 : 0);
+        T *cur_ans_data = ans_data + static_cast<int64_t>(i) * ans_stride;
         if (index == -1) {
-          memset(cur_ans_data, 0, src_dim1 * sizeof(T));
+          std::fill_n(cur_ans_data, src_dim1, value);
         } else {
-          memcpy(cur_ans_data, cur_src_data, src_dim1 * sizeof(T));
+          memcpy(cur_ans_data,
+                 src_data + static_cast<int64_t>(index) * src_stride,
+                 src_dim1 * sizeof(T));
         }
       }
-      return;
-    }
+    });
+    return;
+  }
 
-    // now for CUDA
+  // now for CUDA
+  if (allow_minus_one) {
     auto lambda_set = [=] __device__(int32_t i, int32_t j) -> void {
       int32_t index = indexes_data[i];
       K2_DCHECK_LT(index, src_dim0);
@@ -199,7 +216,7 @@ template <typename T>
       T *cur_ans_data = ans_data + i * ans_stride;
       const T *cur_src_data = src_data + index * src_stride;
       if (index == -1)
-        cur_ans_data[j] = 0;
+        cur_ans_data[j] = value;
       else
         cur_ans_data[j] = cur_src_data[j];
     };
@@ -207,21 +224,6 @@ template <typename T>
     return;
   }
 
-  // now handle the case when allow_minus_one is false
-
-  if (context->GetDeviceType() == kCpu) {
-    for (int32_t i = 0; i != ans_dim; ++i) {
-      int32_t index = indexes_data[i];
-      K2_DCHECK_LT(index, src_dim0);
-      K2_DCHECK_GE(index, 0);
-      T *cur_ans_data = ans_data + i * ans_stride;
-      const T *cur_src_data = src_data + index * src_stride;
-      memcpy(cur_ans_data, cur_src_data, src_dim1 * sizeof(T));
-    }
-    return;
-  }
-
-  // now for CUDA
   auto lambda_set = [=] __device__(int32_t i, int32_t j) -> void {
     int32_t index = indexes_data[i];
     K2_DCHECK_LT(index, src_dim0);
@@ -235,70 +237,176 @@ template <typename T>
 
 // See the documentation for `Index`.
 // This function is for 1-D tensors.
-static Tensor Index1D(Tensor &src, Array1<int32_t> &indexes,
-                      bool allow_minus_one, double default_value) {
+static void Index1D(Tensor &src, Array1<int32_t> &indexes,
+                    bool allow_minus_one, double default_value, Tensor *ans) {
   NVTX_RANGE(K2_FUNC);
   K2_CHECK_EQ(src.NumAxes(), 1);
-  K2_CHECK(IsCompatible(src, indexes));
+  K2_CHECK_EQ(ans->NumAxes(), 1);
+  K2_CHECK_EQ(ans->Dim(0), indexes.Dim());
+  K2_CHECK_EQ(ans->GetDtype(), src.GetDtype());
+  K2_CHECK(ans->IsContiguous());
+  ContextPtr context = GetContext(src, indexes, *ans);
 
   Dtype dtype = src.GetDtype();
-  ContextPtr &context = src.Context();
-  Tensor ans(context, dtype, {indexes.Dim()});
-  K2_CHECK(ans.IsContiguous());
-
   int32_t src_stride = src.Stride(0);
   const int32_t *indexes_data = indexes.Data();
   int32_t src_dim = src.Dim(0);
-  int32_t ans_dim = ans.Dim(0);
+  int32_t ans_dim = ans->Dim(0);
   FOR_ALL_DTYPES(
       dtype, T,
       Index1DImpl<T>(context, src.Data<T>(), src_stride, src_dim, indexes_data,
-                     allow_minus_one, ans_dim, ans.Data<T>(), default_value));
-
-  return ans;
+                     allow_minus_one, ans_dim, ans->Data<T>(), default_value));
 }
 
 // See the documentation for `Index`.
 // This function is for 2-D tensors.
-static Tensor Index2D(Tensor &src, Array1<int32_t> &indexes,
-                      bool allow_minus_one) {
+static void Index2D(Tensor &src, Array1<int32_t> &indexes,
+                    bool allow_minus_one, double default_value, Tensor *ans) {
   NVTX_RANGE(K2_FUNC);
   K2_CHECK_EQ(src.NumAxes(), 2);
-  K2_CHECK(IsCompatible(src, indexes));
-
-  Dtype dtype = src.GetDtype();
-  ContextPtr &context = src.Context();
-  Tensor ans(context, dtype, {indexes.Dim(), src.Dim(1)});
-  K2_CHECK(ans.IsContiguous());
+  K2_CHECK_EQ(ans->NumAxes(), 2);
+  K2_CHECK_EQ(ans->Dim(0), indexes.Dim());
+  K2_CHECK_EQ(ans->Dim(1), src.Dim(1));
+  K2_CHECK_EQ(ans->GetDtype(), src.GetDtype());
+  ContextPtr context = GetContext(src, indexes, *ans);
 
   int32_t src_stride = src.Stride(0);
   K2_CHECK_EQ(src.Stride(1), 1);
+  K2_CHECK_EQ(ans->Stride(1), 1);
 
+  Dtype dtype = src.GetDtype();
   const int32_t *indexes_data = indexes.Data();
   int32_t src_dim0 = src.Dim(0);
   int32_t src_dim1 = src.Dim(1);
-  int32_t ans_dim = ans.Dim(0);
-  int32_t ans_stride = ans.Stride(0);
+  int32_t ans_dim = ans->Dim(0);
+  int32_t ans_stride = ans->Stride(0);
 
   FOR_ALL_DTYPES(dtype, T,
                  Index2DImpl<T>(context, src.Data<T>(), src_stride, src_dim0,
                                 src_dim1, indexes_data, allow_minus_one,
-                                ans_dim, ans_stride, ans.Data<T>()));
-  return ans;
+                                ans_dim, ans_stride, ans->Data<T>(),
+                                default_value));
 }
 
 Tensor Index(Tensor &src, Array1<int32_t> &indexes, bool allow_minus_one,
              double default_value) {
+  K2_CHECK(src.NumAxes() == 1 || src.NumAxes() == 2)
+      << "Unsupported number of axes: " << src.NumAxes()
+      << "\n. Only 1-D and 2-D tensors are supported.";
+  std::vector<int32_t> dims = src.Dims();
+  dims[0] = indexes.Dim();
+  Tensor ans(src.Context(), src.GetDtype(), dims);
+  Index(src, indexes, allow_minus_one, default_value, &ans);
+  return ans;
+}
+
+void Index(Tensor &src, Array1<int32_t> &indexes, bool allow_minus_one,
+           double default_value, Tensor *ans) {
+  K2_CHECK_NE(ans, nullptr);
   switch (src.NumAxes()) {
     case 1:
-      return Index1D(src, indexes, allow_minus_one, default_value);
+      Index1D(src, indexes, allow_minus_one, default_value, ans);
+      break;
     case 2:
-      return Index2D(src, indexes, allow_minus_one);
+      Index2D(src, indexes, allow_minus_one, default_value, ans);
+      break;
     default:
       K2_LOG(FATAL) << "Unsupported number of axes: " << src.NumAxes()
                     << "\n. Only 1-D and 2-D tensors are supported.";
-      return src;  // prevent compiler warnings
+      break;
+  }
+}
+
+/* The CPU version of IndexAdd1DImpl() and IndexAdd2DImpl(); a 1-D tensor is
+   treated as a 2-D tensor with one column.
+
+   The rows of `src` are split into chunks that are processed in parallel.
+   The first chunk is added to `dest` directly, and each of the others to a
+   zeroed buffer of its own with the shape of `dest`; the buffers are then
+   added to `dest` in the order of the chunks, in parallel over the rows of
+   `dest`.  So each row of `src` is read once however many threads there are,
+   but floating point sums may differ in the last bits from those of a serial
+   loop, depending on the number of threads.  The buffers together are no
+   larger than `src`; if `dest` is too large for that, a serial loop is used.
+ */
+template <typename T>
+static void IndexAddCpu(const T *src_data, int32_t src_dim0, int32_t src_dim1,
+                        int32_t src_stride0, int32_t src_stride1,
+                        const int32_t *indexes_data, bool allow_minus_one,
+                        int32_t dest_dim, int32_t dest_stride0,
+                        int32_t dest_stride1, T *dest_data) {
+  NVTX_RANGE(K2_FUNC);
+  // Add rows [begin, end) of `src` to `out`, which has the shape of `dest`.
+  auto lambda_add_rows = [=](int32_t begin, int32_t end, T *out,
+                             int64_t out_stride0,
+                             int32_t out_stride1) -> void {
+    for (int32_t i = begin; i != end; ++i) {
+      int32_t index = indexes_data[i];
+      K2_DCHECK_LT(index, dest_dim);
+      K2_DCHECK_GE(index, allow_minus_one ? -1 : 0);
+      if (index == -1) continue;
+      const T *cur_src_data = src_data + static_cast<int64_t>(i) * src_stride0;
+      T *cur_out_data = out + index * out_stride0;
+      if (src_stride1 == 1 && out_stride1 == 1) {
+        for (int32_t j = 0; j != src_dim1; ++j)
+          cur_out_data[j] += cur_src_data[j];
+      } else {
+        for (int32_t j = 0; j != src_dim1; ++j)
+          cur_out_data[j * out_stride1] += cur_src_data[j * src_stride1];
+      }
+    }
+  };
+
+  int64_t num_src_elements = static_cast<int64_t>(src_dim0) * src_dim1;
+  int64_t num_dest_elements = static_cast<int64_t>(dest_dim) * src_dim1;
+  int32_t num_chunks = 1;
+  if (num_dest_elements != 0) {
+    num_chunks = static_cast<int32_t>(std::min<int64_t>(
+        {GetNumThreads() + 1,
+         num_src_elements / internal::kMinElementsPerTask,
+         1 + num_src_elements / num_dest_elements}));
+  }
+  if (num_chunks < 2) {
+    lambda_add_rows(0, src_dim0, dest_data, dest_stride0, dest_stride1);
+    return;
   }
+
+  // buffers + (c - 1) * num_dest_elements is the buffer of chunk c > 0; it
+  // is zeroed by the task that processes the chunk.
+  std::unique_ptr<T[]> buffers(new T[(num_chunks - 1) * num_dest_elements]);
+  auto lambda_add_chunks = [&](int32_t begin, int32_t end) -> void {
+    for (int32_t c = begin; c != end; ++c) {
+      auto row_begin =
+          static_cast<int32_t>(static_cast<int64_t>(c) * src_dim0 / num_chunks);
+      auto row_end = static_cast<int32_t>(static_cast<int64_t>(c + 1) *
+                                          src_dim0 / num_chunks);
+      if (c == 0) {
+        lambda_add_rows(row_begin, row_end, dest_data, dest_stride0,
+                        dest_stride1);
+      } else {
+        T *buffer = buffers.get() + (c - 1) * num_dest_elements;
+        std::fill_n(buffer, num_dest_elements, T(0));
+        lambda_add_rows(row_begin, row_end, buffer, src_dim1, 1);
+      }
+    }
+  };
+  ParallelFor(num_chunks, 1, lambda_add_chunks);
+
+  auto lambda_add_buffers = [&](int32_t begin, int32_t end) -> void {
+    for (int32_t r = begin; r != end; ++r) {
+      T *cur_dest_data = dest_data + static_cast<int64_t>(r) * dest_stride0;
+      for (int32_t c = 1; c != num_chunks; ++c) {
+        const T *buffer = buffers.get() + (c - 1) * num_dest_elements +
+                          static_cast<int64_t>(r) * src_dim1;
+        for (int32_t j = 0; j != src_dim1; ++j)
+          cur_dest_data[j * dest_stride1] += buffer[j];
+      }
+    }
+  };
+  ParallelFor(dest_dim,
+              std::max<int32_t>(
+                  1, internal::kMinElementsPerTask / (src_dim1 * num_chunks)),
+              lambda_add_buffers);
 }
 
 template <typename T>
@@ -308,6 +416,12 @@ template <typename T>
                                bool allow_minus_one, int32_t dest_dim,
                                int32_t dest_stride, T *dest_data) {
   NVTX_RANGE(K2_FUNC);
+  if (context->GetDeviceType() == kCpu) {
+    IndexAddCpu(src_data, src_dim, 1, src_stride, 1, indexes_data,
+                allow_minus_one, dest_dim, dest_stride, 1, dest_data);
+    return;
+  }
+
   if (allow_minus_one) {
     K2_EVAL(
         context, src_dim, lambda_add, (int32_t i)->void {
@@ -341,6 +455,13 @@ template <typename T>
                                int32_t dest_stride0, int32_t dest_stride1,
                                T *dest_data) {
   NVTX_RANGE(K2_FUNC);
+  if (context->GetDeviceType() == kCpu) {
+    IndexAddCpu(src_data, src_dim0, src_dim1, src_stride0, src_stride1,
+                indexes_data, allow_minus_one, dest_dim, dest_stride0,
+                dest_stride1, dest_data);
+    return;
+  }
+
   if (allow_minus_one) {
     K2_EVAL2(
         context, src_dim0, src_dim1, lambda_add, (int32_t i, int32_t j)->void {
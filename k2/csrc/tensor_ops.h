@@ -50,12 +50,12 @@ Tensor Cast(Tensor src, Dtype new_dtype);
                      must satisfy 0 <= indexes[i] < src.Dim(0);
                      if allow_minus_one == true, -1 is also allowed
                      and the corresponding output values will be
-                     set to zero.
+                     set to `default_value`.
      @param [in] allow_minus_one  If true, -1 is allowed as a member
                      of `indexes` and the corresponding output elements
-                     will be zero.
-     @param [in] default_value  Used only when `src` is a 1-D tensor.
-                     ans[i] is set to default_value if indexes[i] is -1.
+                     will be `default_value`.
+     @param [in] default_value  All elements of ans[i] are set to
+                     default_value if indexes[i] is -1.
      @return   Returns a Tensor with the same dtype as `src`, and
                      shape (indexes.Dim(), src.Dim(1), src.Dim(2), ...),
                      i.e. with the same num-axes as `src` and
@@ -66,6 +66,15 @@ Tensor Cast(Tensor src, Dtype new_dtype);
 Tensor Index(Tensor &src, Array1<int32_t> &indexes, bool allow_minus_one,
              double default_value = 0);
 
+/*
+  Version of Index() that does not allocate the result, but writes it to
+  `ans`, which must already be allocated with the same dtype as `src` and
+  shape (indexes.Dim(), src.Dim(1), ...). If `ans` is 1-D, it has to be
+  contiguous; if it is 2-D, its Stride(1) has to be 1.
+ */
+void Index(Tensor &src, Array1<int32_t> &indexes, bool allow_minus_one,
+           double default_value, Tensor *ans);
+
 /*
   IndexAdd() is the function you would use when doing backprop for Index().
   (Note: this is the non-in-place version, see also the other version of this
@@ -148,13 +148,14 @@ static void TestIndex2D() {
     stride = RandInt(0, 10) + num_cols;
     indexes_dim = RandInt(1, 10000);
     allow_minus_one = RandInt(-1000, 1000) & 1;
+    T default_value = 1 - i;
 
     ContextPtr context = (i & 1) ? GetCpuContext() : GetCudaContext();
     Array1<int32_t> indexes = GenerateRandomIndexes(context, allow_minus_one,
                                                     indexes_dim, num_rows - 1);
 
     Tensor src = GenerateRandTensor2D<T>(context, num_rows, num_cols, stride);
-    Tensor ans = Index(src, indexes, allow_minus_one);
+    Tensor ans = Index(src, indexes, allow_minus_one, default_value);
 
     ASSERT_TRUE(ans.IsContiguous());
     ASSERT_EQ(ans.NumAxes(), 2);
@@ -179,12 +180,48 @@ static void TestIndex2D() {
         }
       } else {
         for (int32_t j = 0; j != ans_dim1; ++j)
-          EXPECT_EQ(ans_data[i * ans_dim1 + j], 0);
+          EXPECT_EQ(ans_data[i * ans_dim1 + j], default_value);
       }
     }
   }
 }
 
+template <typename T>
+static void TestIndexWithOutput() {
+  for (int32_t i = 0; i != 8; ++i) {
+    int32_t num_rows = RandInt(1, 100);
+    int32_t num_cols = (i & 2) ? RandInt(1, 100) : 0;
+    int32_t indexes_dim = RandInt(1, 20000);
+    bool allow_minus_one = RandInt(-1000, 1000) & 1;
+    T default_value = 2 - i;
+
+    ContextPtr context = (i & 1) ? GetCpuContext() : GetCudaContext();
+    Array1<int32_t> indexes = GenerateRandomIndexes(context, allow_minus_one,
+                                                    indexes_dim, num_rows - 1);
+    Tensor src = num_cols == 0
+                     ? GenerateRandTensor1D<T>(context, num_rows, 1)
+                     : GenerateRandTensor2D<T>(context, num_rows, num_cols,
+                                               num_cols + RandInt(0, 10));
+    Tensor expected = Index(src, indexes, allow_minus_one, default_value);
+
+    // The output may be a sub-tensor of a larger tensor if it is 2-D.
+    int32_t ans_stride = num_cols + (num_cols == 0 ? 0 : RandInt(0, 10));
+    Tensor ans = num_cols == 0 ? GenerateRandTensor1D<T>(context,
+                                                         indexes_dim, 1)
+                               : GenerateRandTensor2D<T>(context, indexes_dim,
+                                                         num_cols, ans_stride);
+    Index(src, indexes, allow_minus_one, default_value, &ans);
+
+    ans = ToContiguous(ans).To(GetCpuContext());
+    expected = expected.To(GetCpuContext());
+    ASSERT_EQ(ans.Dims(), expected.Dims());
+    const T *ans_data = ans.Data<T>();
+    const T *expected_data = expected.Data<T>();
+    int32_t n = ans.NumElements();
+    for (int32_t j = 0; j != n; ++j) EXPECT_EQ(ans_data[j], expected_data[j]);
+  }
+}
+
 TEST(Index, Index1D) {
   TestIndex1D<float>();
   TestIndex1D<int32_t>();
@@ -195,6 +232,12 @@ TEST(Index, Index2D) {
   TestIndex2D<int32_t>();
 }
 
+TEST(Index, IndexWithOutput) {
+  TestIndexWithOutput<float>();
+  TestIndexWithOutput<double>();
+  TestIndexWithOutput<int64_t>();
+}
+
 template <typename T>
 static void TestIndexAdd1D() {
   bool allow_minus_one;
@@ -248,7 +291,8 @@ static void TestIndexAdd2D() {
   int32_t num_dest_rows;
   int32_t num_cols;
   for (int32_t i = 0; i != 8; ++i) {
-    num_src_rows = RandInt(1, 100);
+    // Large enough to use multiple threads on CPU sometimes.
+    num_src_rows = RandInt(1, 1000);
     num_dest_rows = RandInt(1, 100);
     num_cols = RandInt(1, 100);
     src_stride = RandInt(0, 10) + num_cols;
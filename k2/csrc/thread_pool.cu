@@ -16,12 +16,17 @@
  * limitations under the License.
  */
 
+#include <algorithm>
+#include <cstdlib>
 #include <utility>
 
 #include "k2/csrc/thread_pool.h"
 
 namespace k2 {
 
+// True for the threads of a ThreadPool.
+static thread_local bool in_thread_pool = false;
+
 static int32_t GetDefaultNumThreads() {
   int num_threads = std::thread::hardware_concurrency();
   if (num_threads == 0) num_threads = 1;
@@ -53,6 +58,7 @@ void ThreadPool::WaitAllTasksFinished() {
 }
 
 void ThreadPool::ProcessTasks() {
+  in_thread_pool = true;
   std::unique_lock<std::mutex> lock(mutex_);
   while (keep_running_) {
     while (tasks_.empty() && keep_running_) {
@@ -86,19 +92,87 @@ void ThreadPool::ProcessTasks() {
   }
 }
 
-ThreadPool *GetThreadPool() {
-  static ThreadPool *pool = nullptr;
-  static std::once_flag init_flag;
-
-  std::call_once(init_flag, []() {
-    // TODO(fangjun): how to determine the number
-    // of threads in the pool?
-    //
-    // It is never freed
-    pool = new ThreadPool(2);
-  });
-  K2_CHECK_NE(pool, nullptr);
-  return pool;
+// The global thread pool; it is created on first use and replaced by
+// SetNumThreads().
+static std::mutex global_pool_mutex;
+static std::shared_ptr<ThreadPool> global_pool;
+
+// The pool set by ThreadPoolGuard in the current thread, if any.
+static thread_local std::shared_ptr<ThreadPool> current_pool;
+
+std::shared_ptr<ThreadPool> GetThreadPool() {
+  if (current_pool != nullptr) return current_pool;
+  std::lock_guard<std::mutex> lock(global_pool_mutex);
+  if (global_pool == nullptr) {
+    int32_t num_threads = 2;
+    const char *env_str = std::getenv("K2_NUM_THREADS");
+    if (env_str != nullptr) num_threads = std::atoi(env_str);
+    global_pool = std::make_shared<ThreadPool>(num_threads);
+  }
+  return global_pool;
+}
+
+void SetNumThreads(int32_t num_threads) {
+  K2_CHECK(!in_thread_pool)
+      << "SetNumThreads() cannot be called from a thread of the pool";
+  auto new_pool = std::make_shared<ThreadPool>(num_threads);
+  std::shared_ptr<ThreadPool> old_pool;
+  {
+    std::lock_guard<std::mutex> lock(global_pool_mutex);
+    old_pool = std::move(global_pool);
+    global_pool = std::move(new_pool);
+  }
+  // If no one else uses the old pool, it is destroyed here, after the tasks
+  // that are still in it are finished.
+}
+
+ThreadPoolGuard::ThreadPoolGuard(std::shared_ptr<ThreadPool> pool)
+    : old_pool_(std::move(current_pool)) {
+  current_pool = std::move(pool);
+}
+
+ThreadPoolGuard::~ThreadPoolGuard() { current_pool = std::move(old_pool_); }
+
+int32_t GetNumThreads() { return GetThreadPool()->GetNumThreads(); }
+
+void ParallelFor(int32_t n, int32_t grain_size,
+                 const std::function<void(int32_t, int32_t)> &f) {
+  if (n <= 0) return;
+  grain_size = std::max(grain_size, 1);
+  // Tasks running in the pool must not wait for other tasks of the pool,
+  // which may deadlock.
+  if (n < 2 * grain_size || in_thread_pool) {
+    f(0, n);
+    return;
+  }
+
+  std::shared_ptr<ThreadPool> pool = GetThreadPool();
+  int32_t num_ranges = std::min<int64_t>(pool->GetNumThreads() + 1,
+                                         n / grain_size);
+  int32_t range_size = (n + num_ranges - 1) / num_ranges;
+
+  std::mutex mutex;
+  std::condition_variable cond;
+  int32_t num_pending = 0;
+  for (int32_t begin = range_size; begin < n; begin += range_size) {
+    int32_t end = std::min(n, begin + range_size);
+    {
+      std::lock_guard<std::mutex> lock(mutex);
+      ++num_pending;
+    }
+    pool->SubmitTask([&mutex, &cond, &num_pending, &f, begin, end]() {
+      f(begin, end);
+      // Notify while holding the lock since `cond` is destroyed once the
+      // caller sees num_pending == 0.
+      std::lock_guard<std::mutex> lock(mutex);
+      if (--num_pending == 0) cond.notify_one();
+    });
+  }
+
+  f(0, range_size);
+
+  std::unique_lock<std::mutex> lock(mutex);
+  cond.wait(lock, [&num_pending]() { return num_pending == 0; });
 }
 
 }  // namespace k2
@@ -20,6 +20,7 @@
 
 #include <condition_variable>  // NOLINT
 #include <functional>
+#include <memory>
 #include <mutex>  // NOLINT
 #include <queue>
 #include <thread>  // NOLINT
@@ -115,12 +116,86 @@ class ThreadPool {
   int32_t running_counter_ = 0;
 };
 
-/* Get a pointer to global thread pool.
+/* Get the thread pool of the calling thread.
  *
- * The returned pointer is NOT owned by the caller and
- * it must not be freed by the caller.
+ * It is the pool set by a ThreadPoolGuard in the calling thread, if any, and
+ * the global thread pool otherwise.  The caller shares the ownership of the
+ * pool, so it stays valid even if SetNumThreads() replaces the global pool
+ * in the meantime.
+ *
+ * The global pool has 2 threads by default; this can be changed by the
+ * environment variable `K2_NUM_THREADS` (a value <= 0 means
+ * `std::thread::hardware_concurrency()`), or by SetNumThreads().
+ *
+ * Caution: Tasks submitted to the pool must not wait for work done by
+ * other threads (e.g. for another task of the pool), since all the threads
+ * of the pool may be busy, which would deadlock.
+ */
+std::shared_ptr<ThreadPool> GetThreadPool();
+
+/* Replace the global thread pool with one that has the given number of
+ * threads (if <= 0, `std::thread::hardware_concurrency()`).
+ *
+ * It can be called while other threads are running k2 operations: those
+ * already using the old pool keep using it, and the old pool is destroyed
+ * (after finishing its tasks) when the last of them is done with it.
+ */
+void SetNumThreads(int32_t num_threads);
+
+/* Select the thread pool used by the k2 operations (GetThreadPool()) of the
+ * calling thread while the guard is alive, e.g. to give a decoding request
+ * a pool of its own instead of sharing the global one.  Guards can be
+ * nested; the destructor restores the previous pool.
+ *
+ * Threads that k2 operations create internally (e.g. for the backward pass
+ * of intersect_dense_pruned) use the pool of the thread that created them.
+ */
+class ThreadPoolGuard {
+ public:
+  // If `pool` is nullptr, the calling thread uses the global thread pool.
+  explicit ThreadPoolGuard(std::shared_ptr<ThreadPool> pool);
+  ~ThreadPoolGuard();
+
+ private:
+  std::shared_ptr<ThreadPool> old_pool_;
+};
+
+// Return the number of threads in the thread pool of the calling thread
+// (see GetThreadPool()).
+int32_t GetNumThreads();
+
+/* Invoke `f(begin, end)` for disjoint ranges [begin, end) that cover [0, n),
+ * in parallel with the thread pool of the calling thread (see GetThreadPool()).
+ * The calling thread also processes one of the ranges, and it returns after
+ * all ranges are processed.
+ *
+ * It is invoked as `f(0, n)` in the calling thread if `n` is less than
+ * 2 * `grain_size`, or if it is called from a thread of the pool.
+ *
+ * @param [in] n  The number of items to process.
+ * @param [in] grain_size  The minimum number of items of each range.
+ * @param [in] f  The function to process the items in [begin, end).
+ */
+void ParallelFor(int32_t n, int32_t grain_size,
+                 const std::function<void(int32_t, int32_t)> &f);
+
+/* Like K2_EVAL() (see macros.h), but on CPU the lambda is invoked with
+ * ParallelFor() using the given `grain_size`, so it must be safe to invoke
+ * it concurrently for different `i` (e.g. it must not use the atomic
+ * operations of k2, which are not atomic on CPU).
  */
-ThreadPool *GetThreadPool();
+#define K2_PARALLEL_EVAL(context, dim, grain_size, lambda_name, ...)  \
+  do {                                                                \
+    if (context->GetDeviceType() == kCpu) {                           \
+      auto lambda_name = [=] __VA_ARGS__;                             \
+      ParallelFor(dim, grain_size, [&](int32_t begin, int32_t end) {  \
+        for (int32_t i = begin; i != end; ++i) lambda_name(i);        \
+      });                                                             \
+    } else {                                                          \
+      auto lambda_name = [=] __device__ __VA_ARGS__;                  \
+      EvalDevice(context, dim, lambda_name);                          \
+    }                                                                 \
+  } while (0)
 
 }  // namespace k2
 
@@ -21,6 +21,7 @@
 #include <string>
 #include <unordered_set>
 #include <utility>
+#include <vector>
 
 #include "gtest/gtest.h"
 #include "k2/csrc/math.h"
@@ -94,4 +95,52 @@ TEST(ThreadPool, TestThreadPool) {
   for (int32_t i = 0; i != num_tasks; ++i) EXPECT_EQ(i, data[i]);
 }
 
+TEST(ThreadPool, TestParallelFor) {
+  for (int32_t n : {0, 1, 10, 1000, RandInt(1, 100000)}) {
+    for (int32_t grain_size : {1, 7, 100000}) {
+      std::vector<int32_t> counts(n, 0);
+      ParallelFor(n, grain_size, [&counts](int32_t begin, int32_t end) {
+        for (int32_t i = begin; i != end; ++i) ++counts[i];
+      });
+      for (int32_t i = 0; i != n; ++i) EXPECT_EQ(counts[i], 1);
+    }
+  }
+
+  // ParallelFor() invoked within ParallelFor()
+  int32_t n = 100;
+  std::vector<int32_t> counts(n * n, 0);
+  ParallelFor(n, 1, [&counts, n](int32_t begin, int32_t end) {
+    for (int32_t i = begin; i != end; ++i) {
+      ParallelFor(n, 1, [&counts, n, i](int32_t begin, int32_t end) {
+        for (int32_t j = begin; j != end; ++j) ++counts[i * n + j];
+      });
+    }
+  });
+  for (int32_t i = 0; i != n * n; ++i) EXPECT_EQ(counts[i], 1);
+}
+
+TEST(ThreadPool, TestSetNumThreads) {
+  int32_t num_threads = GetNumThreads();
+  for (int32_t n : {1, 3}) {
+    SetNumThreads(n);
+    EXPECT_EQ(GetNumThreads(), n);
+    EXPECT_EQ(GetThreadPool()->GetNumThreads(), n);
+
+    std::mutex mutex;
+    std::unordered_set<std::string> ids;
+    std::vector<int32_t> counts(1000, 0);
+    ParallelFor(1000, 1, [&](int32_t begin, int32_t end) {
+      {
+        std::lock_guard<std::mutex> lock(mutex);
+        ids.insert(GetThreadId());
+      }
+      for (int32_t i = begin; i != end; ++i) ++counts[i];
+    });
+    // The calling thread also processes one of the ranges.
+    EXPECT_LE(ids.size(), n + 1);
+    for (int32_t i = 0; i != 1000; ++i) EXPECT_EQ(counts[i], 1);
+  }
+  SetNumThreads(num_threads);
+}
+
 }  // namespace k2
@@ -25,6 +25,7 @@
 #if defined(K2_USE_PYTORCH)
 
 #include "k2/python/csrc/torch/arc.h"
+#include "k2/python/csrc/torch/cpu_allocator.h"
 #include "k2/python/csrc/torch/fsa.h"
 #include "k2/python/csrc/torch/fsa_algo.h"
 #include "k2/python/csrc/torch/index_add.h"
@@ -34,10 +35,12 @@
 #include "k2/python/csrc/torch/ragged.h"
 #include "k2/python/csrc/torch/ragged_ops.h"
 #include "k2/python/csrc/torch/rnnt_decode.h"
+#include "k2/python/csrc/torch/thread_pool.h"
 #include "k2/python/csrc/torch/v2/k2.h"
 
 void PybindTorch(py::module &m) {
   PybindArc(m);
+  PybindCpuAllocator(m);
   PybindFsa(m);
   PybindFsaAlgo(m);
   PybindIndexAdd(m);
@@ -47,6 +50,7 @@ void PybindTorch(py::module &m) {
   PybindRagged(m);
   PybindRaggedOps(m);
   PybindRnntDecode(m);
+  PybindThreadPool(m);
 
   k2::PybindV2(m);
 }
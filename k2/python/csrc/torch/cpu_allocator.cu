@@ -0,0 +1,70 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include "k2/csrc/cpu_caching_allocator.h"
+#include "k2/python/csrc/torch/cpu_allocator.h"
+
+void PybindCpuAllocator(py::module &m) {
+  using PyClass = k2::CpuAllocatorStats;
+  py::class_<PyClass> stats(m, "CpuAllocatorStats");
+  stats.def_readonly("num_allocs", &PyClass::num_allocs)
+      .def_readonly("num_frees", &PyClass::num_frees)
+      .def_readonly("num_cache_hits", &PyClass::num_cache_hits)
+      .def_readonly("total_allocated_bytes", &PyClass::total_allocated_bytes)
+      .def_readonly("allocated_bytes", &PyClass::allocated_bytes)
+      .def_readonly("peak_allocated_bytes", &PyClass::peak_allocated_bytes)
+      .def_readonly("cached_bytes", &PyClass::cached_bytes)
+      .def_readonly("cache_limit_bytes", &PyClass::cache_limit_bytes)
+      .def("__str__", &PyClass::ToString)
+      .def("__repr__", &PyClass::ToString);
+
+  m.def(
+      "get_cpu_allocator_stats",
+      []() -> PyClass { return k2::GetCpuCachingAllocator()->GetStats(); },
+      R"(
+      Return the statistics of the caching allocator that k2 uses
+      for CPU memory.
+
+      Note:
+        Memory of tensors created by PyTorch is not managed by this allocator.
+        Sizes are rounded up to the size class of the allocated blocks.
+      )");
+
+  m.def(
+      "reset_cpu_allocator_peak_stats",
+      []() { k2::GetCpuCachingAllocator()->ResetPeakStats(); },
+      "Reset `peak_allocated_bytes` of the CPU allocator to the current "
+      "`allocated_bytes`.");
+
+  m.def(
+      "empty_cpu_allocator_cache",
+      []() { k2::GetCpuCachingAllocator()->EmptyCache(); },
+      "Return all memory cached by the CPU allocator to the system.");
+
+  m.def(
+      "set_cpu_allocator_cache_limit",
+      [](int64_t cache_limit_bytes) {
+        k2::GetCpuCachingAllocator()->SetCacheLimit(cache_limit_bytes);
+      },
+      py::arg("cache_limit_bytes"),
+      R"(
+      Set the maximum number of bytes that the CPU allocator keeps in its
+      cache. 0 disables caching. The default value is 128 MB; it can also be
+      changed by the environment variable `K2_CPU_ALLOCATOR_CACHE_BYTES`.
+      )");
+}
@@ -34,12 +34,50 @@
 #include "k2/csrc/fsa.h"
 #include "k2/csrc/fsa_utils.h"
 #include "k2/csrc/host_shim.h"
+#include "k2/csrc/ragged_ops.h"
 #include "k2/csrc/torch_util.h"
 #include "k2/python/csrc/torch/fsa.h"
 #include "k2/python/csrc/torch/v2/ragged_any.h"
 
 namespace k2 {
 
+/* Concatenate the attributes of a list of FSAs (or FsaVecs) along axis 0.
+
+   @param [in] tensor_attrs  tensor_attrs[i][j] is the value of the i-th
+                             tensor attribute of the j-th FSA.
+   @param [in] ragged_attrs  ragged_attrs[i][j] is the value of the i-th
+                             ragged attribute of the j-th FSA.
+   @param [out] tensor_ans   On return, tensor_ans[i] is the concatenation
+                             of tensor_attrs[i]. Autograd is supported.
+   @param [out] ragged_ans   On return, ragged_ans[i] is the concatenation
+                             of ragged_attrs[i].
+
+   Each attribute is concatenated on its own: the attributes are returned as
+   separate tensors with their own dtypes, shapes and autograd graphs, so
+   each output needs its own allocation anyway, and torch::cat()/
+   RaggedAny::Cat() already size it once from all the inputs and fill it in
+   a single pass.  What this function saves is the per-attribute round trips
+   through Python.
+ */
+static void CatFsaAttrs(
+    const std::vector<std::vector<torch::Tensor>> &tensor_attrs,
+    const std::vector<std::vector<RaggedAny>> &ragged_attrs,
+    std::vector<torch::Tensor> *tensor_ans,
+    std::vector<RaggedAny> *ragged_ans) {
+  tensor_ans->reserve(tensor_attrs.size());
+  for (const auto &values : tensor_attrs) {
+    K2_CHECK(!values.empty());
+    // torch::cat allocates the output once and records the autograd graph.
+    tensor_ans->emplace_back(torch::cat(values, 0));
+  }
+
+  ragged_ans->reserve(ragged_attrs.size());
+  for (const auto &values : ragged_attrs) {
+    K2_CHECK(!values.empty());
+    ragged_ans->emplace_back(RaggedAny::Cat(values, 0));
+  }
+}
+
 static void PybindFsaBasicProperties(py::module &m) {
   m.def("fsa_properties_as_str", &FsaPropertiesAsString, py::arg("properties"));
 
@@ -187,6 +225,44 @@ static void PybindFsaUtil(py::module &m) {
       },
       py::arg("fsas"));
 
+  m.def(
+      "create_fsa_vec_with_attrs",
+      [](std::vector<Fsa *> &fsas,
+         const std::vector<std::vector<torch::Tensor>> &tensor_attrs,
+         const std::vector<std::vector<RaggedAny>> &ragged_attrs)
+          -> std::tuple<FsaVec, std::vector<torch::Tensor>,
+                        std::vector<RaggedAny>> {
+        DeviceGuard guard(fsas[0]->Context());
+        FsaVec fsa_vec = CreateFsaVec(fsas.size(), fsas.data());
+        std::vector<torch::Tensor> tensor_ans;
+        std::vector<RaggedAny> ragged_ans;
+        CatFsaAttrs(tensor_attrs, ragged_attrs, &tensor_ans, &ragged_ans);
+        return std::make_tuple(fsa_vec, tensor_ans, ragged_ans);
+      },
+      py::arg("fsas"), py::arg("tensor_attrs"), py::arg("ragged_attrs"),
+      "Create an FsaVec from a list of FSAs and concatenate their attributes "
+      "in the same call. `tensor_attrs[i][j]` (resp. `ragged_attrs[i][j]`) is "
+      "the value of the i-th tensor (resp. ragged) attribute of the j-th FSA. "
+      "It returns a 3-tuple (fsa_vec, tensor_values, ragged_values).");
+
+  m.def(
+      "cat_fsa_vec_with_attrs",
+      [](std::vector<FsaVec> &fsa_vecs,
+         const std::vector<std::vector<torch::Tensor>> &tensor_attrs,
+         const std::vector<std::vector<RaggedAny>> &ragged_attrs)
+          -> std::tuple<FsaVec, std::vector<torch::Tensor>,
+                        std::vector<RaggedAny>> {
+        DeviceGuard guard(fsa_vecs[0].Context());
+        FsaVec fsa_vec = Cat(0, fsa_vecs.size(), fsa_vecs.data());
+        std::vector<torch::Tensor> tensor_ans;
+        std::vector<RaggedAny> ragged_ans;
+        CatFsaAttrs(tensor_attrs, ragged_attrs, &tensor_ans, &ragged_ans);
+        return std::make_tuple(fsa_vec, tensor_ans, ragged_ans);
+      },
+      py::arg("fsa_vecs"), py::arg("tensor_attrs"), py::arg("ragged_attrs"),
+      "Like `create_fsa_vec_with_attrs`, but it concatenates a list of "
+      "FsaVecs along axis 0.");
+
   // returns RaggedAny with dtype torch.int32
   m.def(
       "get_state_batches",
@@ -604,6 +680,31 @@ static void PybindGetTotScoresLogBackward(py::module &m, const char *name) {
         py::arg("tot_scores_grad"));
 }
 
+template <typename T>
+static void PybindGetTotScoresLogDeriv(py::module &m, const char *name) {
+  // Returns a tuple (scores_grad, backward_scores). It computes the same
+  // scores_grad as GetTotScoresLogBackward() given the arc posteriors, but
+  // in one pass together with the backward scores.
+  m.def(
+      name,
+      [](FsaVec &fsas, RaggedAny &state_batches, RaggedAny &leaving_arc_batches,
+         torch::Tensor forward_scores, torch::Tensor tot_scores_grad)
+          -> std::pair<torch::Tensor, torch::Tensor> {
+        DeviceGuard guard(fsas.Context());
+        Array1<T> forward_scores_array = FromTorch<T>(forward_scores);
+        Array1<T> tot_scores_grad_array =
+            FromTorch<T>(tot_scores_grad.contiguous());
+        Array1<T> backward_scores;
+        Array1<float> scores_grad = GetTotScoresLogDeriv<T>(
+            fsas, state_batches.any.Specialize<int32_t>(),
+            leaving_arc_batches.any.Specialize<int32_t>(),
+            forward_scores_array, tot_scores_grad_array, &backward_scores);
+        return std::make_pair(ToTorch(scores_grad), ToTorch(backward_scores));
+      },
+      py::arg("fsas"), py::arg("state_batches"), py::arg("leaving_arc_batches"),
+      py::arg("forward_scores"), py::arg("tot_scores_grad"));
+}
+
 template <typename T>
 static void PybindGetArcCdf(py::module &m, const char *name) {
   m.def(
@@ -711,6 +812,9 @@ void PybindFsa(py::module &m) {
                                            "get_tot_scores_float_log_backward");
   k2::PybindGetTotScoresLogBackward<double>(
       m, "get_tot_scores_double_log_backward");
+  k2::PybindGetTotScoresLogDeriv<float>(m, "get_tot_scores_float_log_deriv");
+  k2::PybindGetTotScoresLogDeriv<double>(m,
+                                         "get_tot_scores_double_log_deriv");
 
   k2::PybindGetArcCdf<float>(m, "get_arc_cdf_float");
   k2::PybindGetArcCdf<double>(m, "get_arc_cdf_double");
@@ -25,12 +25,14 @@
 #include <utility>
 #include <vector>
 
+#include "k2/csrc/dense_ctc.h"
 #include "k2/csrc/device_guard.h"
 #include "k2/csrc/fsa.h"
 #include "k2/csrc/fsa_algo.h"
 #include "k2/csrc/fsa_utils.h"
 #include "k2/csrc/host_shim.h"
 #include "k2/csrc/intersect_dense_pruned.h"
+#include "k2/csrc/levenshtein.h"
 #include "k2/csrc/rm_epsilon.h"
 #include "k2/csrc/torch_util.h"
 #include "k2/python/csrc/torch/fsa_algo.h"
@@ -202,7 +204,7 @@ static void PybindIntersectDensePruned(py::module &m) {
       "intersect_dense_pruned",
       [](FsaVec &a_fsas, DenseFsaVec &b_fsas, float search_beam,
          float output_beam, int32_t min_active_states,
-         int32_t max_active_states)
+         int32_t max_active_states, int32_t lattice_chunk_frames)
           -> std::tuple<FsaVec, torch::Tensor, torch::Tensor> {
         DeviceGuard guard(a_fsas.Context());
         Array1<int32_t> arc_map_a;
@@ -211,12 +213,12 @@ static void PybindIntersectDensePruned(py::module &m) {
 
         IntersectDensePruned(a_fsas, b_fsas, search_beam, output_beam,
                              min_active_states, max_active_states, &out,
-                             &arc_map_a, &arc_map_b);
+                             &arc_map_a, &arc_map_b, lattice_chunk_frames);
         return std::make_tuple(out, ToTorch(arc_map_a), ToTorch(arc_map_b));
       },
       py::arg("a_fsas"), py::arg("b_fsas"), py::arg("search_beam"),
       py::arg("output_beam"), py::arg("min_active_states"),
-      py::arg("max_active_states"));
+      py::arg("max_active_states"), py::arg("lattice_chunk_frames") = 0);
 }
 
 static void PybindIntersectDense(py::module &m) {
@@ -749,10 +751,94 @@ static void PybindLevenshteinGraph(py::module &m) {
       py::arg("need_score_offset") = true);
 }
 
+static void PybindLevenshteinDistance(py::module &m) {
+  m.def(
+      "levenshtein_distance",
+      [](RaggedAny &refs, RaggedAny &hyps, torch::Tensor hyp_to_ref_map,
+         int32_t band, bool need_alignment)
+          -> std::tuple<torch::Tensor, torch::optional<FsaVec>,
+                        torch::optional<torch::Tensor>,
+                        torch::optional<torch::Tensor>> {
+        Ragged<int32_t> refs_ragged = refs.any.Specialize<int32_t>(),
+                        hyps_ragged = hyps.any.Specialize<int32_t>();
+        Array1<int32_t> hyp_to_ref_map_array =
+            FromTorch<int32_t>(hyp_to_ref_map);
+        Array1<int32_t> distances, ref_labels, hyp_labels;
+        FsaVec alignment;
+        LevenshteinAlignment(refs_ragged, hyps_ragged, hyp_to_ref_map_array,
+                             band, &distances,
+                             need_alignment ? &alignment : nullptr,
+                             &ref_labels, &hyp_labels);
+        torch::Tensor distances_tensor = ToTorch(distances);
+        if (!need_alignment)
+          return std::make_tuple(distances_tensor, torch::nullopt,
+                                 torch::nullopt, torch::nullopt);
+        return std::make_tuple(distances_tensor, alignment,
+                               ToTorch(ref_labels), ToTorch(hyp_labels));
+      },
+      py::arg("refs"), py::arg("hyps"), py::arg("hyp_to_ref_map"),
+      py::arg("band") = 0, py::arg("need_alignment") = false);
+}
+
+static void PybindDenseCtcForwardBackward(py::module &m) {
+  // Returns a tuple (tot_scores, grad), where grad is None if need_grad is
+  // false. tot_scores is of dtype torch.float64 if use_double_scores is true,
+  // torch.float32 otherwise.
+  m.def(
+      "dense_ctc_forward_backward",
+      [](RaggedAny &symbols, DenseFsaVec &dense_fsas, bool modified,
+         float delay_penalty, bool use_double_scores, bool need_grad)
+          -> std::pair<torch::Tensor, torch::optional<torch::Tensor>> {
+        Ragged<int32_t> symbols_ragged = symbols.any.Specialize<int32_t>();
+        Array2<float> grad;
+        Array2<float> *grad_ptr = need_grad ? &grad : nullptr;
+        torch::Tensor tot_scores;
+        if (use_double_scores) {
+          Array1<double> tot_scores_array;
+          DenseCtcForwardBackward(symbols_ragged, dense_fsas, modified,
+                                  delay_penalty, &tot_scores_array, grad_ptr);
+          tot_scores = ToTorch(tot_scores_array);
+        } else {
+          Array1<float> tot_scores_array;
+          DenseCtcForwardBackward(symbols_ragged, dense_fsas, modified,
+                                  delay_penalty, &tot_scores_array, grad_ptr);
+          tot_scores = ToTorch(tot_scores_array);
+        }
+        torch::optional<torch::Tensor> grad_tensor;
+        if (need_grad) grad_tensor = ToTorch(grad);
+        return std::make_pair(tot_scores, grad_tensor);
+      },
+      py::arg("symbols"), py::arg("dense_fsas"), py::arg("modified") = false,
+      py::arg("delay_penalty") = 0.0f, py::arg("use_double_scores") = true,
+      py::arg("need_grad") = true);
+}
+
 static void PybindDecodeStateInfo(py::module &m) {
   using PyClass = DecodeStateInfo;
   py::class_<PyClass, std::shared_ptr<PyClass>> state_info(m,
                                                            "DecodeStateInfo");
+
+  // Returns a tuple (arcs, num_stable_arcs), where arcs is a 1-D CPU tensor
+  // containing the arc indexes into the decoding graph on the best partial
+  // path.
+  state_info.def(
+      "partial_best_path",
+      [](PyClass &self) -> std::pair<torch::Tensor, int32_t> {
+        int32_t num_stable_arcs;
+        Array1<int32_t> arcs = PartialBestPath(&self, &num_stable_arcs);
+        return std::make_pair(ToTorch(arcs), num_stable_arcs);
+      });
+
+  // The state is restored on CPU; OnlineDenseIntersecter.decode() moves it
+  // to the device of the decoding graph.
+  state_info.def(py::pickle(
+      [](PyClass &self) -> py::bytes {
+        DeviceGuard guard(self.states.Context());
+        return py::bytes(SerializeDecodeStateInfo(self));
+      },
+      [](const py::bytes &data) -> std::shared_ptr<PyClass> {
+        return DeserializeDecodeStateInfo(data, GetCpuContext());
+      }));
 }
 
 static void PybindOnlineDenseIntersecter(py::module &m) {
@@ -776,17 +862,25 @@ static void PybindOnlineDenseIntersecter(py::module &m) {
   intersecter.def(
       "decode",
       [](PyClass &self, DenseFsaVec &dense_fsa_vec,
-         std::vector<std::shared_ptr<DecodeStateInfo>> &decode_states)
-          -> std::tuple<FsaVec, torch::Tensor,
+         std::vector<std::shared_ptr<DecodeStateInfo>> &decode_states,
+         bool need_lattice = true)
+          -> std::tuple<torch::optional<FsaVec>,
+                        torch::optional<torch::Tensor>,
                         std::vector<std::shared_ptr<DecodeStateInfo>>> {
         DeviceGuard guard(self.Context());
+        if (!need_lattice) {
+          self.Decode(dense_fsa_vec, &decode_states, nullptr, nullptr);
+          return std::make_tuple(torch::nullopt, torch::nullopt,
+                                 decode_states);
+        }
         FsaVec ofsa;
         Array1<int32_t> arc_map;
         self.Decode(dense_fsa_vec, &decode_states, &ofsa, &arc_map);
         torch::Tensor arc_map_tensor = ToTorch(arc_map);
         return std::make_tuple(ofsa, arc_map_tensor, decode_states);
       },
-      py::arg("dense_fsa_vec"), py::arg("decode_states"));
+      py::arg("dense_fsa_vec"), py::arg("decode_states"),
+      py::arg("need_lattice") = true);
 }
 
 static void PybindReverse(py::module &m) {
@@ -826,6 +920,8 @@ void PybindFsaAlgo(py::module &m) {
   k2::PybindIntersectDevice(m);
   k2::PybindInvert(m);
   k2::PybindLevenshteinGraph(m);
+  k2::PybindLevenshteinDistance(m);
+  k2::PybindDenseCtcForwardBackward(m);
   k2::PybindLinearFsa(m);
   k2::PybindOnlineDenseIntersecter(m);
   k2::PybindRemoveEpsilon(m);
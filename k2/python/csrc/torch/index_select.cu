@@ -23,6 +23,7 @@
  * See the License for the specific language governing permissions and
  * limitations under the License.
  */
+#include <type_traits>
 #include <vector>
 
 #include "k2/csrc/context.h"
@@ -38,30 +39,30 @@
 
 namespace k2 {
 
-/* Returns a 1-D tensor which indexes the src tensor using entries
-   from `index`.
+/* Indexes the src tensor along axis 0 using entries from `index` and
+   writes the result to `out`.
 
-   @param  [in]  src    A 1-D tensor.
+   @param  [in]  src    A 1-D or 2-D tensor.
    @param  [in]  index  A 1-D tensor with dtype torch.int32.
                         It has to satisfy:
-                            -1 <= index[i] < src.numel()
+                            -1 <= index[i] < src.size(0)
                             for i in [0, index.numel())
                         CAUTION: We require that index.is_contiguous() is true.
-   @param [in] default_value  The value for ans[i] when index[i] is -1.
-   @return
-      Returns a 1-D contiguous tensor such that:
-          ans[i] = src[index[i]] if index[i] > 0
-          ans[i] = default_value if index[i] is -1
+   @param [in] default_value  The value for all elements of out[i] when
+                        index[i] is -1.
+   @param [out] out     A tensor with the same dtype and device as `src` and
+                        shape (index.numel(), *src.sizes()[1:]). If it is
+                        1-D, it has to be contiguous; if it is 2-D, then
+                        out.strides()[1] has to be 1. On return:
+                          out[i] = src[index[i]] if index[i] != -1
+                          out[i] = default_value if index[i] is -1
  */
-template <typename T>
-static torch::Tensor IndexSelect1D(torch::Tensor src, torch::Tensor index,
-                                   T default_value) {
+static void IndexSelectOut(torch::Tensor src, torch::Tensor index,
+                           double default_value, torch::Tensor out) {
   NVTX_RANGE(K2_FUNC);
-  K2_CHECK_EQ(src.dim(), 1) << "Expected dim: 1. Given: " << src.dim();
-  K2_CHECK_EQ(src.scalar_type(), ToScalarType<T>::value)
-      << "Expected equal type"
-      << " Given : " << src.scalar_type() << ", " << ToScalarType<T>::value;
-
+  K2_CHECK(src.dim() == 1 || src.dim() == 2)
+      << "Unsupported dim: " << src.dim()
+      << ".\nIt supports only 1-D and 2-D tensors.";
   K2_CHECK_EQ(index.dim(), 1)
       << "Expected index dim: 1. Given : " << index.dim();
   K2_CHECK_EQ(index.scalar_type(), ToScalarType<int32_t>::value)
@@ -70,116 +71,212 @@ static torch::Tensor IndexSelect1D(torch::Tensor src, torch::Tensor index,
   K2_CHECK_EQ(src.device(), index.device())
       << "Expected in the same device"
       << " Given : " << src.device() << ", " << index.device();
+  K2_CHECK_EQ(out.device(), src.device());
+  K2_CHECK_EQ(out.scalar_type(), src.scalar_type())
+      << "Expected equal type"
+      << " Given : " << out.scalar_type() << ", " << src.scalar_type();
+  K2_CHECK_EQ(out.dim(), src.dim());
+  K2_CHECK_EQ(out.size(0), index.numel());
+  if (src.dim() == 2) K2_CHECK_EQ(out.size(1), src.size(1));
 
-  bool allow_minus_one = true;
+  // If index.numel() is zero, there is nothing to do.
+  // If src is empty, all entries of `index` have to be -1.
+  if (index.numel() == 0) return;
+  if (src.numel() == 0) {
+    out.fill_(default_value);
+    return;
+  }
+
+  if (src.scalar_type() == torch::kBool) {
+    // k2::Tensor has no bool dtype, so we index an int32 copy of `src`.
+    torch::Tensor ans = torch::empty(out.sizes(), out.options().dtype(
+                                                      torch::kInt));
+    IndexSelectOut(src.to(torch::kInt), index, default_value, ans);
+    out.copy_(ans);
+    return;
+  }
+  K2_CHECK(src.scalar_type() == torch::kInt ||
+           src.scalar_type() == torch::kLong ||
+           src.scalar_type() == torch::kFloat ||
+           src.scalar_type() == torch::kDouble)
+      << "Unsupported scalar type: " << src.scalar_type();
+  if (src.dim() == 2 && src.stride(1) != 1) src = src.contiguous();
+
+  Tensor src_tensor = FromTorch(src, TensorTag{});
+  Tensor out_tensor = FromTorch(out, TensorTag{});
   Array1<int32_t> index_array = FromTorch<int32_t>(index);
-  // If index_array.Dim() equals to zero, the `Index` below would produce an
-  // ans with `ans.Data()` be a nullptr, which will cause crash when calling
-  // `torch::from_blob`. Just return an empty tensor here.
-  // If src is an empty tensor, we should return an empty torch.
-  if (index_array.Dim() == 0 || src.numel() == 0)
-    return torch::empty({0}, src.options());
-  if (src.is_contiguous()) {
-    Array1<T> src_array = FromTorch<T>(src);
-    Array1<T> ans_array =
-        Index(src_array, index_array, allow_minus_one, default_value);
-    return ToTorch(ans_array);
+  bool allow_minus_one = true;
+  Index(src_tensor, index_array, allow_minus_one, default_value, &out_tensor);
+}
+
+static torch::Tensor IndexSelectWrapper(
+    torch::Tensor src, torch::Tensor index, double default_value = 0,
+    torch::optional<torch::Tensor> out = torch::nullopt) {
+  NVTX_RANGE(K2_FUNC);
+  DeviceGuard guard(GetContext(src));
+  torch::Tensor ans;
+  if (out.has_value()) {
+    ans = out.value();
+  } else {
+    std::vector<int64_t> sizes = src.sizes().vec();
+    if (!sizes.empty()) sizes[0] = index.numel();
+    ans = torch::empty(sizes, src.options());
   }
-  Tensor tensor = FromTorch(src, TensorTag{});
-  Tensor ans = Index(tensor, index_array, allow_minus_one, default_value);
-  return ToTorch(ans);
+  IndexSelectOut(src, index, default_value, ans);
+  return ans;
 }
 
-/* Returns a 2-D tensor which indexes the src tensor using entries
-   from `index`.
+/* Index a list of 1-D tensors with the same dtype using the same `index`.
 
-   @param  [in]  src    A 2-D tensor. If it is non-contiguous, then it
-                        has to satisfy src.strides()[1] == 1.
+   It is equivalent to calling IndexSelect1D() for each of them, but all
+   tensors are handled in a single pass over `index` on CPU (and in a single
+   kernel launch on CUDA).
 
-   @param  [in]  index  A 1-D tensor with dtype torch.int32.
-                        It has to satisfy:
-                            -1 <= index[i] < src.shape()[0]
-                            for i in [0, index.numel())
-                        CAUTION: We require that index.is_contiguous() is true.
+   @param  [in]  srcs   A list of 1-D contiguous tensors with dtype T. They
+                        may have different numel()s, but each of them has to
+                        satisfy -1 <= index[i] < srcs[k].numel()
+                        for i in [0, index.numel()).
+   @param  [in]  index  A 1-D contiguous tensor with dtype torch.int32.
+   @param  [in] default_values  default_values[k] is the value for ans[k][i]
+                        when index[i] is -1. It satisfies
+                        default_values.size() == srcs.size().
    @return
-      Returns a 2-D contiguous tensor such that:
-          ans[i] = src[index[i]] if index[i] > 0
-          ans[i] = zero tensor whose numel() is src.shape()[1],
-                   if index[i] is -1
+      Returns a list of 1-D contiguous tensors with ans.size() == srcs.size()
+      such that:
+          ans[k][i] = srcs[k][index[i]] if index[i] != -1
+          ans[k][i] = default_values[k] if index[i] is -1
  */
 template <typename T>
-static torch::Tensor IndexSelect2D(torch::Tensor src, torch::Tensor index) {
+static std::vector<torch::Tensor> IndexSelectMulti1D(
+    const std::vector<torch::Tensor> &srcs, torch::Tensor index,
+    const std::vector<T> &default_values) {
   NVTX_RANGE(K2_FUNC);
-  K2_CHECK_EQ(src.dim(), 2) << "Expected dim: 2. Given: " << src.dim();
-  K2_CHECK_EQ(src.scalar_type(), ToScalarType<T>::value);
+  int32_t num_srcs = static_cast<int32_t>(srcs.size());
+  K2_CHECK_EQ(static_cast<int32_t>(default_values.size()), num_srcs);
 
-  K2_CHECK_EQ(index.dim(), 1);
-  K2_CHECK_EQ(index.scalar_type(), ToScalarType<int32_t>::value);
-  K2_CHECK(index.is_contiguous());
-  K2_CHECK_EQ(src.device(), index.device());
+  int32_t num_indexes = index.numel();
+  std::vector<torch::Tensor> ans(num_srcs);
+  std::vector<const T *> src_ptrs_vec(num_srcs);
+  std::vector<T *> ans_ptrs_vec(num_srcs);
+  for (int32_t k = 0; k != num_srcs; ++k) {
+    const torch::Tensor &src = srcs[k];
+    K2_CHECK_EQ(src.dim(), 1) << "Expected dim: 1. Given: " << src.dim();
+    K2_CHECK_EQ(src.scalar_type(), ToScalarType<T>::value)
+        << "Expected equal type"
+        << " Given : " << src.scalar_type() << ", " << ToScalarType<T>::value;
+    K2_CHECK(src.is_contiguous()) << "Expected contiguous";
+    K2_CHECK_EQ(src.device(), index.device())
+        << "Expected in the same device"
+        << " Given : " << src.device() << ", " << index.device();
 
-  Array2<T> src_array = FromTorch<T>(src, Array2Tag{});
-  Array1<int32_t> index_array = FromTorch<int32_t>(index);
-  // If index_array.Dim() equals to zero, the `IndexRows` below would produce
-  // an ans with `ans.Data()` be a nullptr, which will cause crash when calling
-  // `torch::from_blob`. Just return an empty tensor here.
-  // If src is an empty tensor, we should return an empty torch.
-  if (index_array.Dim() == 0 || src.sizes()[0] == 0)
-    return torch::empty({0, src.sizes()[1]}, src.options());
-  bool allow_minus_one = true;
-  Array2<T> ans_array = IndexRows(src_array, index_array, allow_minus_one);
+    ans[k] = torch::empty({num_indexes}, src.options());
+    src_ptrs_vec[k] = src.data_ptr<T>();
+    ans_ptrs_vec[k] = ans[k].data_ptr<T>();
+  }
+  if (num_indexes == 0 || num_srcs == 0) return ans;
 
-  return ToTorch(ans_array);
-}
+  ContextPtr c = GetContext(index);
+  const int32_t *index_data = index.data_ptr<int32_t>();
 
-static torch::Tensor IndexSelectWrapper(torch::Tensor src, torch::Tensor index,
-                                        double default_value = 0) {
-  NVTX_RANGE(K2_FUNC);
-  DeviceGuard guard(GetContext(src));
-  auto scalar_type = src.scalar_type();
-  if (src.dim() == 1) {
-    switch (scalar_type) {
-      case ToScalarType<int32_t>::value: {
-        int32_t i = static_cast<int32_t>(default_value);
-        K2_CHECK_EQ(static_cast<double>(i), default_value);
-        return IndexSelect1D<int32_t>(src, index, i);
-      }
-      case ToScalarType<int64_t>::value: {
-        int64_t i = static_cast<int64_t>(default_value);
-        K2_CHECK_EQ(static_cast<double>(i), default_value);
-        return IndexSelect1D<int64_t>(src, index, i);
+  if (c->GetDeviceType() == kCpu) {
+    for (int32_t i = 0; i != num_indexes; ++i) {
+      int32_t idx = index_data[i];
+      if (idx < 0) {
+        for (int32_t k = 0; k != num_srcs; ++k)
+          ans_ptrs_vec[k][i] = default_values[k];
+      } else {
+        for (int32_t k = 0; k != num_srcs; ++k)
+          ans_ptrs_vec[k][i] = src_ptrs_vec[k][idx];
       }
-      case ToScalarType<float>::value:
-        return IndexSelect1D<float>(src, index, default_value);
-      case ToScalarType<double>::value:
-        return IndexSelect1D<double>(src, index, default_value);
-      case ToScalarType<bool>::value:
-        return IndexSelect1D<bool>(src, index, default_value);
-      default:
-        K2_LOG(FATAL) << "Unsupported scalar type: " << scalar_type;
-        return {};
     }
-  } else if (src.dim() == 2) {
+    return ans;
+  }
+
+  Array1<const T *> src_ptrs(c, src_ptrs_vec);
+  Array1<T *> ans_ptrs(c, ans_ptrs_vec);
+  Array1<T> default_values_array(c, default_values);
+  const T **src_ptrs_data = src_ptrs.Data();
+  T **ans_ptrs_data = ans_ptrs.Data();
+  const T *default_values_data = default_values_array.Data();
+  K2_EVAL2(
+      c, num_srcs, num_indexes, lambda_index_select_multi,
+      (int32_t k, int32_t i)->void {
+        int32_t idx = index_data[i];
+        ans_ptrs_data[k][i] =
+            (idx < 0 ? default_values_data[k] : src_ptrs_data[k][idx]);
+      });
+  return ans;
+}
+
+template <typename T>
+static void IndexSelectMultiGroup(const std::vector<torch::Tensor> &srcs,
+                                  torch::Tensor index,
+                                  const std::vector<double> &default_values,
+                                  const std::vector<int32_t> &group,
+                                  std::vector<torch::Tensor> *ans) {
+  if (group.empty()) return;
+  std::vector<torch::Tensor> group_srcs;
+  std::vector<T> group_default_values;
+  group_srcs.reserve(group.size());
+  group_default_values.reserve(group.size());
+  for (int32_t k : group) {
+    group_srcs.push_back(srcs[k].contiguous());
+    T value = static_cast<T>(default_values[k]);
+    if (std::is_integral<T>::value) {
+      K2_CHECK_EQ(static_cast<double>(value), default_values[k]);
+    }
+    group_default_values.push_back(value);
+  }
+  std::vector<torch::Tensor> group_ans =
+      IndexSelectMulti1D<T>(group_srcs, index, group_default_values);
+  for (size_t i = 0; i != group.size(); ++i) (*ans)[group[i]] = group_ans[i];
+}
+
+static std::vector<torch::Tensor> IndexSelectMultiWrapper(
+    const std::vector<torch::Tensor> &srcs, torch::Tensor index,
+    const std::vector<double> &default_values) {
+  NVTX_RANGE(K2_FUNC);
+  K2_CHECK_EQ(srcs.size(), default_values.size());
+  K2_CHECK_EQ(index.dim(), 1)
+      << "Expected index dim: 1. Given : " << index.dim();
+  K2_CHECK_EQ(index.scalar_type(), ToScalarType<int32_t>::value)
+      << "Expected type int32_t Given : " << index.scalar_type();
+  K2_CHECK(index.is_contiguous()) << "Expected contiguous";
+  DeviceGuard guard(GetContext(index));
+
+  // Group the tensors by dtype; tensors in the same group are
+  // handled together.
+  std::vector<int32_t> int32_group, int64_group, float_group, double_group;
+  for (int32_t k = 0; k != static_cast<int32_t>(srcs.size()); ++k) {
+    auto scalar_type = srcs[k].scalar_type();
     switch (scalar_type) {
       case ToScalarType<int32_t>::value:
-        return IndexSelect2D<int32_t>(src, index);
+        int32_group.push_back(k);
+        break;
       case ToScalarType<int64_t>::value:
-        return IndexSelect2D<int64_t>(src, index);
+        int64_group.push_back(k);
+        break;
       case ToScalarType<float>::value:
-        return IndexSelect2D<float>(src, index);
+        float_group.push_back(k);
+        break;
       case ToScalarType<double>::value:
-        return IndexSelect2D<double>(src, index);
-      case ToScalarType<bool>::value:
-        return IndexSelect2D<bool>(src, index);
+        double_group.push_back(k);
+        break;
       default:
         K2_LOG(FATAL) << "Unsupported scalar type: " << scalar_type;
-        return {};
     }
-  } else {
-    K2_LOG(FATAL) << "Unsupported dim: " << src.dim()
-                  << ".\nIt supports only 1-D and 2-D tensors.";
-    return {};
   }
+
+  std::vector<torch::Tensor> ans(srcs.size());
+  IndexSelectMultiGroup<int32_t>(srcs, index, default_values, int32_group,
+                                 &ans);
+  IndexSelectMultiGroup<int64_t>(srcs, index, default_values, int64_group,
+                                 &ans);
+  IndexSelectMultiGroup<float>(srcs, index, default_values, float_group,
+                               &ans);
+  IndexSelectMultiGroup<double>(srcs, index, default_values, double_group,
+                                &ans);
+  return ans;
 }
 
 /*
@@ -240,7 +337,7 @@ static torch::Tensor SimpleRaggedIndexSelectWrapper(torch::Tensor src,
 
 static void IndexSelect(py::module &m) {
   m.def("index_select", &IndexSelectWrapper, py::arg("src"), py::arg("index"),
-        py::arg("default_value") = 0,
+        py::arg("default_value") = 0, py::arg("out") = py::none(),
         R"(
       Args:
         src:
@@ -250,8 +347,13 @@ static void IndexSelect(py::module &m) {
           It has to be a 1-D **contiguous** tensor with dtype `torch.int32`.
           Must satisfy `-1 <= index[i] < src.shape[0]`.
         default_value:
-          It is the default value for ans[i] if index[i] is -1.
-          Used only when `src` is a 1-D tensor.
+          It is the default value for all elements of ans[i] if index[i]
+          is -1.
+        out:
+          Optional. If not None, the result is written to it instead of
+          to a newly allocated tensor, and it is returned. It must have
+          the same dtype and device as `src` and shape
+          `(index.shape[0], *src.shape[1:])`.
       Returns:
         Return a tensor:
           - `ans.ndim == src.ndim`
@@ -260,6 +362,30 @@ static void IndexSelect(py::module &m) {
           - `ans[i] = src[index[i]]` if `index[i] != -1`.
           - `ans[i] = default_value` if `index[i] == -1`
       )");
+  m.def("index_select_multi", &IndexSelectMultiWrapper, py::arg("srcs"),
+        py::arg("index"), py::arg("default_values"),
+        R"(
+      Like calling :func:`index_select` for each tensor in `srcs`, but all
+      tensors are indexed in a single pass over `index`.
+
+      Args:
+        srcs:
+          A list of 1-D tensors. Supported dtypes are: `torch.int32`,
+          `torch.int64`, `torch.float32`, and `torch.float64`. They can
+          have different dtypes.
+        index:
+          It has to be a 1-D **contiguous** tensor with dtype `torch.int32`.
+          Must satisfy `-1 <= index[i] < srcs[k].shape[0]`.
+        default_values:
+          default_values[k] is the default value for ans[k][i] if index[i]
+          is -1. Must satisfy `len(default_values) == len(srcs)`.
+      Returns:
+        Return a list of 1-D tensors with `len(ans) == len(srcs)`:
+          - `ans[k].dtype == srcs[k].dtype`
+          - `ans[k].shape[0] == index.shape[0]`
+          - `ans[k][i] = srcs[k][index[i]]` if `index[i] != -1`.
+          - `ans[k][i] = default_values[k]` if `index[i] == -1`
+      )");
   m.def("simple_ragged_index_select", &SimpleRaggedIndexSelectWrapper,
         py::arg("src"), py::arg("indexes"));
 }
@@ -20,13 +20,16 @@
  * limitations under the License.
  */
 
+#include <memory>
 #include <tuple>
+#include <utility>
 
 #include "k2/csrc/context.h"
 #include "k2/csrc/device_guard.h"
 #include "k2/csrc/macros.h"
 #include "k2/csrc/nbest.h"
 #include "k2/csrc/nvtx.h"
+#include "k2/csrc/suffix_index.h"
 #include "k2/csrc/tensor_ops.h"
 #include "k2/csrc/torch_util.h"
 #include "k2/python/csrc/torch/nbest.h"
@@ -57,6 +60,62 @@ static void PybindGetBestMatchingStats(py::module &m) {
       py::arg("min_token"), py::arg("max_token"), py::arg("max_order"));
 }
 
+static void PybindSuffixIndex(py::module &m) {
+  using PyClass = SuffixIndex;
+  py::class_<PyClass> pyclass(m, "SuffixIndex");
+  pyclass.def(py::init([](RaggedAny &corpus) {
+                Ragged<int32_t> r = corpus.any.Specialize<int32_t>();
+                return std::make_unique<PyClass>(r);
+              }),
+              py::arg("corpus"));
+
+  pyclass.def(py::init([](RaggedAny &corpus, torch::Tensor suffix_array) {
+                Ragged<int32_t> r = corpus.any.Specialize<int32_t>();
+                Array1<int32_t> array = FromTorch<int32_t>(suffix_array);
+                return std::make_unique<PyClass>(r, array);
+              }),
+              py::arg("corpus"), py::arg("suffix_array"));
+
+  pyclass.def_property_readonly("corpus", [](PyClass &self) -> RaggedAny {
+    return RaggedAny(self.Corpus().Generic());
+  });
+
+  pyclass.def_property_readonly("suffix_array",
+                                [](PyClass &self) -> torch::Tensor {
+                                  return ToTorch(self.SuffixArray());
+                                });
+
+  pyclass.def(
+      "count",
+      [](PyClass &self, RaggedAny &ngrams) -> torch::Tensor {
+        Ragged<int32_t> r = ngrams.any.Specialize<int32_t>();
+        Array1<int32_t> counts = self.Count(r);
+        return ToTorch(counts);
+      },
+      py::arg("ngrams"));
+
+  pyclass.def(
+      "find",
+      [](PyClass &self, RaggedAny &ngrams) -> RaggedAny {
+        Ragged<int32_t> r = ngrams.any.Specialize<int32_t>();
+        return RaggedAny(self.Find(r).Generic());
+      },
+      py::arg("ngrams"));
+
+  pyclass.def(
+      "longest_match",
+      [](PyClass &self, RaggedAny &queries,
+         int32_t max_order) -> std::pair<torch::Tensor, torch::Tensor> {
+        Ragged<int32_t> r = queries.any.Specialize<int32_t>();
+        auto ans = self.LongestMatch(r, max_order);
+        return std::make_pair(ToTorch(ans.first), ToTorch(ans.second));
+      },
+      py::arg("queries"), py::arg("max_order") = 0);
+}
+
 }  // namespace k2
 
-void PybindNbest(py::module &m) { k2::PybindGetBestMatchingStats(m); }
+void PybindNbest(py::module &m) {
+  k2::PybindGetBestMatchingStats(m);
+  k2::PybindSuffixIndex(m);
+}
@@ -105,6 +105,20 @@ static void PybindRnntDecodingStream(py::module &m) {
           DeviceGuard guard(graph.Context());
           return rnnt_decoding::CreateStream(std::make_shared<Fsa>(graph));
         });
+
+  stream.def("serialize", [](PyClass &self) -> py::bytes {
+    DeviceGuard guard(self.graph->Context());
+    return py::bytes(rnnt_decoding::SerializeStream(self));
+  });
+
+  m.def(
+      "deserialize_rnnt_decoding_stream",
+      [](Fsa &graph, const py::bytes &data) -> std::shared_ptr<PyClass> {
+        DeviceGuard guard(graph.Context());
+        return rnnt_decoding::DeserializeStream(data,
+                                                std::make_shared<Fsa>(graph));
+      },
+      py::arg("graph"), py::arg("data"));
 }
 
 static void PybindRnntDecodingStreams(py::module &m) {
@@ -0,0 +1,82 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <memory>
+#include <vector>
+
+#include "k2/csrc/thread_pool.h"
+#include "k2/python/csrc/torch/thread_pool.h"
+
+// The guards of the `with k2.ThreadPool(...)` blocks that the current thread
+// is in, innermost last.
+static thread_local std::vector<std::unique_ptr<k2::ThreadPoolGuard>>
+    thread_pool_guards;
+
+void PybindThreadPool(py::module &m) {
+  using PyClass = k2::ThreadPool;
+  py::class_<PyClass, std::shared_ptr<PyClass>> pool(m, "ThreadPool", R"(
+      A thread pool that k2 operations on CPU can use instead of the global
+      one, e.g. to give each of several concurrent decoding requests its own
+      threads. It is used by the k2 operations that run in the current thread
+      within a ``with`` block:
+
+        >>> pool = k2.ThreadPool(4)
+        >>> with pool:
+        ...     lattice = k2.intersect_dense_pruned(...)
+
+      Operations run in other threads (e.g. by an executor) use the global
+      pool unless they enter the ``with`` block themselves.
+      )");
+  pool.def(py::init<int32_t>(), py::arg("num_threads"),
+           R"(
+      Args:
+        num_threads:
+          The number of threads of the pool. If it is <= 0, the number of CPU
+          cores is used.
+      )");
+  pool.def_property_readonly("num_threads", &PyClass::GetNumThreads,
+                             "The number of threads of the pool.");
+  pool.def("__enter__", [](std::shared_ptr<PyClass> self) {
+    thread_pool_guards.emplace_back(new k2::ThreadPoolGuard(self));
+    return self;
+  });
+  pool.def("__exit__", [](PyClass &, py::object, py::object, py::object) {
+    K2_CHECK(!thread_pool_guards.empty());
+    thread_pool_guards.pop_back();
+  });
+
+  m.def(
+      "set_num_threads",
+      [](int32_t num_threads) { k2::SetNumThreads(num_threads); },
+      py::arg("num_threads"),
+      R"(
+      Set the number of threads of the global thread pool that k2 uses on
+      CPU, e.g. for the per-arc operations of
+      :func:`k2.intersect_dense_pruned`. If it is <= 0, the number of CPU
+      cores is used. The default value is 2; it can also be changed by the
+      environment variable `K2_NUM_THREADS`.
+
+      k2 operations that are running in other threads finish with the
+      previous pool. See :class:`k2.ThreadPool` for a pool that is used only
+      by some operations.
+      )");
+
+  m.def("get_num_threads", []() -> int32_t { return k2::GetNumThreads(); },
+        "Return the number of threads of the thread pool that k2 uses on "
+        "CPU in the current thread.");
+}
@@ -346,6 +346,16 @@ void PybindRaggedAny(py::module &m) {
   any.def("min", &RaggedAny::Min, py::arg("initial_value") = py::none(),
           kRaggedAnyMinDoc);
 
+  any.def("argmin", &RaggedAny::ArgMin, py::arg("initial_value") = py::none(),
+          kRaggedAnyArgMinDoc);
+
+  any.def("mean", &RaggedAny::Mean, kRaggedAnyMeanDoc);
+
+  any.def("cumsum", &RaggedAny::CumSum, kRaggedAnyCumSumDoc);
+
+  any.def("topk", &RaggedAny::TopK, py::arg("k"), py::arg("axis") = -1,
+          kRaggedAnyTopKDoc);
+
   any.def_static("cat", &RaggedAny::Cat, py::arg("srcs"), py::arg("axis"),
                  kRaggedCatDoc);
   m.attr("cat") = any.attr("cat");
@@ -364,6 +374,27 @@ void PybindRaggedAny(py::module &m) {
 
   any.def("tolist", &RaggedAny::ToList, kRaggedAnyToListDoc);
 
+  any.def("to_numpy", &RaggedAny::ToNumpy, kRaggedAnyToNumpyDoc);
+
+  // The iterator keeps a reference to the NumPy array of the values,
+  // which in turn keeps the memory of self alive.
+  any.def("iter_numpy", &RaggedAny::IterNumpy, kRaggedAnyIterNumpyDoc);
+
+  // Export the values via DLPack. No data is copied.
+  any.def(
+      "__dlpack__",
+      [](RaggedAny &self, py::object stream) -> py::object {
+        return py::cast(self.Data().detach()).attr("__dlpack__")(stream);
+      },
+      py::arg("stream") = py::none(), kRaggedAnyDlpackDoc);
+
+  any.def(
+      "__dlpack_device__",
+      [](RaggedAny &self) -> py::object {
+        return py::cast(self.Data()).attr("__dlpack_device__")();
+      },
+      kRaggedAnyDlpackDeviceDoc);
+
   any.def("sort_", &RaggedAny::Sort, py::arg("descending") = false,
           py::arg("need_new2old_indexes") = false, kRaggedAnySortDoc);
 
@@ -500,6 +531,9 @@ void PybindRaggedAny(py::module &m) {
       "create_ragged_tensor",
       [](torch::Tensor tensor) -> RaggedAny { return RaggedAny(tensor); },
       py::arg("tensor"), kCreateRaggedTensorTensorDoc);
+
+  m.def("from_numpy", &RaggedAny::FromNumpy, py::arg("values"),
+        py::arg("row_splits"), kRaggedAnyFromNumpyDoc);
 }
 
 }  // namespace k2
@@ -18,8 +18,12 @@
  * limitations under the License.
  */
 
-#include <type_traits>
+#include <algorithm>
+#include <cmath>
+#include <limits>
 
+#include "k2/csrc/thread_pool.h"
+#include "k2/csrc/utils.h"
 #include "k2/python/csrc/torch/v2/autograd/swoosh.h"
 
 namespace k2 {
@@ -34,7 +38,8 @@ If x.requires_grad is False, it returns ``swoosh_l(x)``.
 
 Args:
   x:
-    A Tensor.
+    A Tensor. If it is float16 or bfloat16, the result has the same dtype;
+    otherwise, the result is float32.
   dropout_prob:
     A float number. The default value is 0.
 )doc";
@@ -49,7 +54,8 @@ If x.requires_grad is False, it returns ``swoosh_r(x)``.
 
 Args:
   x:
-    A Tensor.
+    A Tensor. If it is float16 or bfloat16, the result has the same dtype;
+    otherwise, the result is float32.
   dropout_prob:
     A float number. The default value is 0.
 )doc";
@@ -59,7 +65,8 @@ Compute ``swoosh_l(x) = log(1 + exp(x-4)) - 0.08x - 0.035``.
 
 Args:
   x:
-    A Tensor.
+    A Tensor. If it is float16 or bfloat16, the result has the same dtype;
+    otherwise, the result is float32.
 )doc";
 
 static constexpr const char *kSwooshRForwardDoc = R"doc(
@@ -67,7 +74,8 @@ Compute ``swoosh_r(x) = log(1 + exp(x-1)) - 0.08x - 0.313261687``.
 
 Args:
   x:
-    A Tensor.
+    A Tensor. If it is float16 or bfloat16, the result has the same dtype;
+    otherwise, the result is float32.
 )doc";
 
 static constexpr const char *kSwooshLForwardAndDerivDoc = R"doc(
@@ -88,7 +96,8 @@ Note:
 
 Args:
   x:
-    A Tensor.
+    A Tensor. If it is float16 or bfloat16, the result has the same dtype;
+    otherwise, the result is float32.
 )doc";
 
 static constexpr const char *kSwooshRForwardAndDerivDoc = R"doc(
@@ -109,7 +118,8 @@ Note:
 
 Args:
   x:
-    A Tensor.
+    A Tensor. If it is float16 or bfloat16, the result has the same dtype;
+    otherwise, the result is float32.
 )doc";
 
 struct SwooshLConstants {
@@ -124,6 +134,236 @@ struct SwooshRConstants {
   static constexpr float kOffset = 0.313261687;
 };
 
+// Number of elements per task of the CPU kernels below, which run with
+// ParallelFor().  Each element of the forward pass costs as much as a few
+// tens of simple ops, so it is smaller than internal::kMinElementsPerTask.
+static constexpr int32_t kSwooshCpuGrainSize = 2048;
+
+// Inside each task, the elements are converted to float and processed in
+// blocks of this size; see SwooshBlockCpu().
+static constexpr int32_t kSwooshCpuBlockSize = 256;
+
+/* Return exp(-|x|).
+
+   Unlike expf(), it has no function calls and no branches, so that loops
+   calling it can be vectorized by the compiler.  It uses the range reduction
+   and the polynomial of expf() from Cephes; the relative error is below 2e-7.
+   |x| is clamped to 87 so that the result is a normal float.  The clamping
+   is done with integer arithmetic on the bits, since gcc turns a float
+   comparison here into a branch, which prevents the vectorization.
+ */
+static inline float ExpNegAbs(float x) {
+  constexpr int32_t kMaxAbsBits = 0x42ae0000;  // 87.0f
+  int32_t d = (FloatAsInt(x) & 0x7fffffff) - kMaxAbsBits;
+  float v = -IntAsFloat(kMaxAbsBits + (d & (d >> 31)));  // -min(|x|, 87)
+
+  // v = n * log(2) + r, with |r| <= log(2) / 2
+  int32_t n = static_cast<int32_t>(v * 1.44269504f - 0.5f);
+  float fn = static_cast<float>(n);
+  float r = v - fn * 0.693359375f + fn * 2.12194440e-4f;
+
+  float p = 1.9875691500e-4f;
+  p = p * r + 1.3981999507e-3f;
+  p = p * r + 8.3334519073e-3f;
+  p = p * r + 4.1665795894e-2f;
+  p = p * r + 1.6666665459e-1f;
+  p = p * r + 5.0000001201e-1f;
+  p = p * r * r + r + 1.0f;  // exp(r)
+  return p * IntAsFloat((n + 127) << 23);  // exp(r) * 2^n
+}
+
+/* Return log(1 + x) for 0 <= x <= 1, with no branches.
+
+   With s = x / (2 + x) <= 1/3, log(1 + x) = 2 * atanh(s)
+   = 2 * (s + s^3/3 + s^5/5 + ...); the series is truncated after s^13.
+ */
+static inline float Log1pUnit(float x) {
+  float s = x / (2.0f + x);
+  float s2 = s * s;
+  float p = 1.0f / 13;
+  p = p * s2 + 1.0f / 11;
+  p = p * s2 + 1.0f / 9;
+  p = p * s2 + 1.0f / 7;
+  p = p * s2 + 1.0f / 5;
+  p = p * s2 + 1.0f / 3;
+  p = p * s2 + 1.0f;
+  return 2.0f * s * p;
+}
+
+/* Compute softplus(x) = log(1 + exp(x)) and its derivative
+   sigmoid(x) = 1 / (1 + exp(-x)), without branches.  With t = exp(-|x|),
+   which does not overflow:
+
+     softplus(x) = max(x, 0) + log(1 + t)
+     sigmoid(x) = 1/2 + sign(x) * (1 - t) / (2 * (1 + t))
+ */
+static inline void SoftplusAndSigmoid(float x, float *softplus,
+                                      float *sigmoid) {
+  float t = ExpNegAbs(x);
+  int32_t i = FloatAsInt(x);
+  float relu = IntAsFloat(i & ~(i >> 31));  // max(x, 0) from the sign bit
+  *softplus = relu + Log1pUnit(t);
+  *sigmoid = 0.5f + std::copysign(0.5f * (1.0f - t) / (1.0f + t), x);
+}
+
+/* Return the dtype of the output of the swoosh functions for `x`:
+   float16 and bfloat16 are kept, and other dtypes give float32.
+ */
+static torch::ScalarType SwooshDtype(const torch::Tensor &x) {
+  torch::ScalarType t = x.scalar_type();
+  if (t == torch::kHalf || t == torch::kBFloat16) return t;
+  return torch::kFloat32;
+}
+
+/* Return the dtype of the tensors the kernels read and write for `x`.
+
+   The CPU kernels work on bfloat16 tensors directly (they compute in float),
+   since the conversion between bfloat16 and float can be vectorized.  Other
+   dtypes are converted to float32 by PyTorch; for float16, this is faster
+   than the conversion of at::Half in the kernels.
+ */
+static torch::ScalarType SwooshKernelDtype(const torch::Tensor &x) {
+  if (x.is_cpu() && x.scalar_type() == torch::kBFloat16)
+    return torch::kBFloat16;
+  return torch::kFloat32;
+}
+
+/* Return a pseudo-random number in [0, 1) for the counter `i`.
+
+   It hashes the counter (with the integer hash "lowbias32"), so that the
+   result does not depend on how the elements are split into tasks, and loops
+   calling it can be vectorized.  It is used by the CPU kernels instead of
+   torch::rand(), which takes about as long as the swoosh function itself.
+ */
+static inline float UniformCpu(uint32_t seed, uint32_t i) {
+  uint32_t h = seed + i * 0x9e3779b9u;
+  h ^= h >> 16;
+  h *= 0x7feb352du;
+  h ^= h >> 15;
+  h *= 0x846ca68bu;
+  h ^= h >> 16;
+  return static_cast<int32_t>(h >> 8) * (1.0f / (1 << 24));
+}
+
+/* Compute swoosh(x) and sigmoid(x - kShift) = swoosh'(x) + kCoeff for the
+   `n` elements of `x`, which is a block of at most kSwooshCpuBlockSize
+   elements.  The loop has no branches and no type conversions so that it can
+   be vectorized by the compiler.
+ */
+template <typename SwooshConstants>
+static void SwooshBlockCpu(const float *x, int32_t n, float *y, float *s) {
+  constexpr float kShift = SwooshConstants::kShift;
+  constexpr float kCoeff = SwooshConstants::kCoeff;
+  constexpr float kOffset = SwooshConstants::kOffset;
+  for (int32_t i = 0; i != n; ++i) {
+    float l;
+    SoftplusAndSigmoid(x[i] - kShift, &l, &s[i]);
+    y[i] = l - kCoeff * x[i] - kOffset;
+  }
+}
+
+/* CPU version of SwooshForward() and SwooshForwardAndDeriv() below.
+   T is float or at::BFloat16.
+
+     @param [in] x_data  The input, with `n` elements.
+     @param [in] n  The number of elements.
+     @param [out] y_data  The output swoosh(x), with `n` elements.
+     @param [out] d_data  If not nullptr, the derivative swoosh'(x) is
+                          written to it.
+ */
+template <typename SwooshConstants, typename T>
+static void SwooshForwardCpu(const T *x_data, int32_t n, T *y_data,
+                             T *d_data) {
+  constexpr float kCoeff = SwooshConstants::kCoeff;
+  ParallelFor(n, kSwooshCpuGrainSize, [=](int32_t begin, int32_t end) {
+    float x[kSwooshCpuBlockSize], y[kSwooshCpuBlockSize],
+        s[kSwooshCpuBlockSize];
+    for (int32_t b = begin; b < end; b += kSwooshCpuBlockSize) {
+      int32_t m = std::min(end - b, kSwooshCpuBlockSize);
+      for (int32_t i = 0; i != m; ++i) x[i] = static_cast<float>(x_data[b + i]);
+      SwooshBlockCpu<SwooshConstants>(x, m, y, s);
+      for (int32_t i = 0; i != m; ++i) y_data[b + i] = static_cast<T>(y[i]);
+      if (d_data == nullptr) continue;
+      for (int32_t i = 0; i != m; ++i)
+        d_data[b + i] = static_cast<T>(s[i] - kCoeff);
+    }
+  });
+}
+
+/* CPU version of the forward pass of SwooshFunction, which also computes
+   swoosh'(x) + kCoeff (with dropout applied) quantized to 8 bits.
+   T is float or at::BFloat16.
+
+     @param [in] x_data  The input, with `n` elements.
+     @param [in] dropout_seed  Seed of the random numbers for dropout.
+     @param [in] quantize_seed  Seed of the random numbers for the
+                                quantization.
+     @param [in] dropout_prob  The dropout probability.
+     @param [in] n  The number of elements.
+     @param [out] y_data  The output dropout(swoosh(x)).
+     @param [out] g_data  The quantized derivative.
+ */
+template <typename SwooshConstants, typename T>
+static void SwooshForwardWithGradCpu(const T *x_data, uint32_t dropout_seed,
+                                     uint32_t quantize_seed,
+                                     float dropout_prob, int32_t n, T *y_data,
+                                     uint8_t *g_data) {
+  constexpr float kCoeff = SwooshConstants::kCoeff;
+  float scale = 1.0f / (1.0f - dropout_prob);
+  int32_t prob_bits = FloatAsInt(dropout_prob);
+  int32_t coeff_bits = FloatAsInt(kCoeff);
+  ParallelFor(n, kSwooshCpuGrainSize, [=](int32_t begin, int32_t end) {
+    float x[kSwooshCpuBlockSize], y[kSwooshCpuBlockSize],
+        s[kSwooshCpuBlockSize];
+    for (int32_t b = begin; b < end; b += kSwooshCpuBlockSize) {
+      int32_t m = std::min(end - b, kSwooshCpuBlockSize);
+      for (int32_t i = 0; i != m; ++i) x[i] = static_cast<float>(x_data[b + i]);
+      SwooshBlockCpu<SwooshConstants>(x, m, y, s);
+      if (dropout_prob != 0.0f) {
+        for (int32_t i = 0; i != m; ++i) {
+          float r = UniformCpu(dropout_seed, b + i);
+          // All ones if r >= dropout_prob, else 0.  As in ExpNegAbs(), it
+          // compares the bits (the floats are not negative) to avoid a
+          // branch.
+          int32_t keep = ~((FloatAsInt(r) - prob_bits) >> 31);
+          y[i] = IntAsFloat(FloatAsInt(y[i] * scale) & keep);
+          // For dropped elements, s = kCoeff corresponds to swoosh'(x) = 0
+          s[i] = IntAsFloat((FloatAsInt(s[i]) & keep) | (coeff_bits & ~keep));
+        }
+      }
+      for (int32_t i = 0; i != m; ++i) y_data[b + i] = static_cast<T>(y[i]);
+      // Use a local pointer, since the stores to uint8_t might alias the
+      // captured variables, which would prevent the vectorization.
+      uint8_t *g = g_data + b;
+      for (int32_t i = 0; i != m; ++i) {
+        float r = UniformCpu(quantize_seed, b + i);
+        g[i] = static_cast<int32_t>(s[i] * (255.0f / 1.005f) + r);
+      }
+    }
+  });
+}
+
+/* CPU version of the backward pass of SwooshFunction.
+   T is float or at::BFloat16.
+ */
+template <typename T>
+static void SwooshBackwardCpu(const uint8_t *g_data, const T *out_grad_data,
+                              float coeff, float dropout_prob, int32_t n,
+                              T *in_grad_data) {
+  float scale = 1.0f / (1.0f - dropout_prob);
+  ParallelFor(n, kSwooshCpuGrainSize, [=](int32_t begin, int32_t end) {
+    for (int32_t i = begin; i != end; ++i) {
+      float oi = static_cast<float>(out_grad_data[i]);
+      float fi = (g_data[i] * (1.005f / 255.0f) - coeff) * scale;
+      in_grad_data[i] = static_cast<T>(oi * fi);
+    }
+  });
+}
+
+// Defined below; used when x does not require grad.
+template <typename SwooshConstants>
+torch::Tensor SwooshForward(torch::Tensor x);
+
 /**
 
 swoosh(x) = log(1 + exp(x - kShift)) - kCoeff * x - kOffset
@@ -149,38 +389,55 @@ class SwooshFunction
     auto context = GetContext(x);
     DeviceGuard guard(context);
 
-    bool requires_grad = x.requires_grad();
+    if (!x.requires_grad()) return SwooshForward<SwooshConstants>(x);
 
-    x = x.to(torch::kFloat32);
+    torch::ScalarType dtype = SwooshDtype(x);
+    x = x.to(SwooshKernelDtype(x)).contiguous();
 
-    if (!requires_grad) {
-      torch::Tensor zero = torch::zeros({1}, x.options());
-      return torch::logaddexp(zero, x - kShift) - kCoeff * x - kOffset;
-    }
+    torch::Tensor y = torch::empty_like(x).contiguous();
+
+    auto opts = torch::TensorOptions().dtype(torch::kByte).device(x.device());
+    torch::Tensor g = torch::empty(x.sizes(), opts).contiguous();
+    uint8_t *g_data = g.data_ptr<uint8_t>();
+
+    ctx->saved_data["dropout_prob"] = dropout_prob;
+    ctx->save_for_backward({g});
 
-    x = x.contiguous();
+    if (context->GetDeviceType() == kCpu) {
+      // Seeds of the random numbers for dropout and the uint8 quantization.
+      // They are drawn from the default generator of PyTorch, so that
+      // torch.manual_seed() makes the results reproducible.
+      torch::Tensor seeds =
+          torch::randint(std::numeric_limits<int32_t>::max(), {2},
+                         torch::TensorOptions().dtype(torch::kInt64));
+      auto seeds_acc = seeds.accessor<int64_t, 1>();
+      uint32_t dropout_seed = static_cast<uint32_t>(seeds_acc[0]);
+      uint32_t quantize_seed = static_cast<uint32_t>(seeds_acc[1]);
+      AT_DISPATCH_FLOATING_TYPES_AND(
+          torch::kBFloat16, x.scalar_type(), "swoosh_forward", ([&] {
+            SwooshForwardWithGradCpu<SwooshConstants>(
+                x.data_ptr<scalar_t>(), dropout_seed, quantize_seed,
+                dropout_prob, x.numel(), y.data_ptr<scalar_t>(), g_data);
+          }));
+      return y.to(dtype);
+    }
 
-    torch::Tensor y = torch::empty_like(x).contiguous();
+    auto float_opts = x.options().dtype(torch::kFloat32);
 
     // for dropout
     torch::Tensor r;
     const float *r_data = nullptr;
     if (dropout_prob != 0.0f) {
-      r = torch::rand_like(x).contiguous();
+      r = torch::rand(x.sizes(), float_opts).contiguous();
       r_data = r.data_ptr<float>();
     }
 
     // for uint8 quantization
-    torch::Tensor r2 = torch::rand(x.numel(), x.options()).contiguous();
+    torch::Tensor r2 = torch::rand(x.numel(), float_opts).contiguous();
     const float *r2_data = r2.data_ptr<float>();
 
     const float *x_data = x.data_ptr<float>();
-
-    auto opts = torch::TensorOptions().dtype(torch::kByte).device(x.device());
-    torch::Tensor g = torch::empty(x.sizes(), opts).contiguous();
-
     float *y_data = y.data_ptr<float>();
-    uint8_t *g_data = g.data_ptr<uint8_t>();
 
     float shift = kShift;
     float coeff = kCoeff;
@@ -216,10 +473,7 @@ class SwooshFunction
           g_data[i] = g_int;
         });
 
-    ctx->saved_data["dropout_prob"] = dropout_prob;
-    ctx->save_for_backward({g});
-
-    return y;
+    return y.to(dtype);
   }
 
   static torch::autograd::tensor_list backward(
@@ -232,14 +486,31 @@ class SwooshFunction
     const uint8_t *g_data = g.data_ptr<uint8_t>();
 
     torch::Tensor out_grad = y_grad[0];
-    out_grad = out_grad.contiguous();
-
-    int32_t stride = out_grad.stride(-1);
-    const float *out_grad_data = out_grad.data_ptr<float>();
 
     auto context = GetContext(out_grad);
     DeviceGuard guard(context);
 
+    if (context->GetDeviceType() == kCpu) {
+      torch::ScalarType dtype = SwooshDtype(out_grad);
+      out_grad = out_grad.to(SwooshKernelDtype(out_grad)).contiguous();
+      torch::Tensor in_grad = torch::empty_like(out_grad);
+      AT_DISPATCH_FLOATING_TYPES_AND(
+          torch::kBFloat16, out_grad.scalar_type(), "swoosh_backward", ([&] {
+            SwooshBackwardCpu(g_data, out_grad.data_ptr<scalar_t>(), kCoeff,
+                              dropout_prob, g.numel(),
+                              in_grad.data_ptr<scalar_t>());
+          }));
+      return {
+          in_grad.to(dtype),  // x
+          torch::Tensor()     //  dropout_prob
+      };
+    }
+
+    out_grad = out_grad.to(torch::kFloat32).contiguous();
+
+    int32_t stride = out_grad.stride(-1);
+    const float *out_grad_data = out_grad.data_ptr<float>();
+
     auto opts =
         torch::TensorOptions().dtype(torch::kFloat32).device(g.device());
     torch::Tensor in_grad = torch::empty(g.sizes(), opts).contiguous();
@@ -282,6 +553,19 @@ torch::Tensor SwooshForward(torch::Tensor x) {
   static constexpr float kCoeff = SwooshConstants::kCoeff;
   static constexpr float kOffset = SwooshConstants::kOffset;
 
+  torch::ScalarType dtype = SwooshDtype(x);
+  if (context->GetDeviceType() == kCpu) {
+    x = x.to(SwooshKernelDtype(x)).contiguous();
+    torch::Tensor y = torch::empty_like(x);
+    AT_DISPATCH_FLOATING_TYPES_AND(
+        torch::kBFloat16, x.scalar_type(), "swoosh_forward", ([&] {
+          SwooshForwardCpu<SwooshConstants>(x.data_ptr<scalar_t>(), x.numel(),
+                                            y.data_ptr<scalar_t>(),
+                                            static_cast<scalar_t *>(nullptr));
+        }));
+    return y.to(dtype);
+  }
+
   x = x.to(torch::kFloat32).contiguous();
   const float *x_data = x.data_ptr<float>();
 
@@ -306,7 +590,7 @@ torch::Tensor SwooshForward(torch::Tensor x) {
         y_data[i] = yi;
       });
 
-  return y;
+  return y.to(dtype);
 }
 
 // swooshl(x) = log(1 + exp(x-4)) - 0.08 * x - 0.035
@@ -326,6 +610,20 @@ std::pair<torch::Tensor, torch::Tensor> SwooshForwardAndDeriv(
   static constexpr float kCoeff = SwooshConstants::kCoeff;
   static constexpr float kOffset = SwooshConstants::kOffset;
 
+  torch::ScalarType dtype = SwooshDtype(x);
+  if (context->GetDeviceType() == kCpu) {
+    x = x.to(SwooshKernelDtype(x)).contiguous();
+    torch::Tensor y = torch::empty_like(x);
+    torch::Tensor deriv = torch::empty_like(x);
+    AT_DISPATCH_FLOATING_TYPES_AND(
+        torch::kBFloat16, x.scalar_type(), "swoosh_forward_and_deriv", ([&] {
+          SwooshForwardCpu<SwooshConstants>(x.data_ptr<scalar_t>(), x.numel(),
+                                            y.data_ptr<scalar_t>(),
+                                            deriv.data_ptr<scalar_t>());
+        }));
+    return {y.to(dtype), deriv.to(dtype)};
+  }
+
   x = x.to(torch::kFloat32).contiguous();
   const float *x_data = x.data_ptr<float>();
 
@@ -356,7 +654,7 @@ std::pair<torch::Tensor, torch::Tensor> SwooshForwardAndDeriv(
         d_data[i] = di;
       });
 
-  return {y, deriv};
+  return {y.to(dtype), deriv.to(dtype)};
 }
 
 void PybindSwoosh(py::module &m) {
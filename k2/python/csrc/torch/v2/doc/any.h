@@ -1578,6 +1578,111 @@ Returns:
   It shares the same dtype and device with ``self``.
 )doc";
 
+static constexpr const char *kRaggedAnyArgMinDoc = R"doc(
+Return a tensor containing minimum value indexes within each sub-list along the
+last axis of ``self``, i.e. the min taken over the last axis. The index is -1
+if the sub-list was empty or all values in the sub-list are greater
+than ``initial_value``.
+
+>>> import k2.ragged as k2r
+>>> c = k2r.RaggedTensor([ [3, 0, 2, 5, 1], [], [1, 3, 8, 2, 0] ])
+>>> c.argmin()
+tensor([ 1, -1,  9], dtype=torch.int32)
+>>> c.argmin(initial_value=-1)
+tensor([-1, -1, -1], dtype=torch.int32)
+>>> c.values[1], c.values[9]
+(tensor(0, dtype=torch.int32), tensor(0, dtype=torch.int32))
+
+Args:
+  initial_value:
+    A base value to compare. If values in a sublist are all greater
+    than this value, then the ``argmin`` of this sublist is -1.
+    If a sublist is empty, the ``argmin`` of it is also -1.
+    If it is ``None``, the highest value of ``self.dtype`` is used.
+
+Returns:
+  Return a 1-D ``torch.int32`` tensor. It is on the same device
+  as ``self``.
+)doc";
+
+static constexpr const char *kRaggedAnyMeanDoc = R"doc(
+Compute the mean of sublists over the last axis of this tensor.
+
+Note:
+  It supports autograd. It only supports input with dtype
+  torch.float32 or torch.float64.
+
+Note:
+  If a sublist is empty, the mean of it is ``nan``.
+
+>>> import torch
+>>> import k2.ragged as k2r
+>>> a = k2r.RaggedTensor([[1, 2, 3], [], [4, 6]], dtype=torch.float32)
+>>> a.mean()
+tensor([2., nan, 5.])
+
+Returns:
+  Return a 1-D tensor containing the mean of each sublist.
+  It shares the same dtype and device with ``self``.
+)doc";
+
+static constexpr const char *kRaggedAnyCumSumDoc = R"doc(
+Compute the cumulative sum of sublists over the last axis of this tensor.
+
+Note:
+  It does not support autograd.
+
+>>> import k2.ragged as k2r
+>>> a = k2r.RaggedTensor([ [[1, 2, 3], []], [[4], [5, 6]] ])
+>>> a.cumsum()
+RaggedTensor([[[1, 3, 6],
+               []],
+              [[4],
+               [5, 11]]], dtype=torch.int32)
+
+Returns:
+  Return a ragged tensor with the same shape, dtype and device
+  as ``self``.
+)doc";
+
+static constexpr const char *kRaggedAnyTopKDoc = R"doc(
+Return the ``k`` largest elements of each sublist along the last axis of
+``self``, in descending order. Sublists with fewer than ``k`` elements keep
+all of their elements. Equal elements are ordered by their indexes.
+
+Note:
+  It supports autograd for the returned values.
+
+>>> import k2.ragged as k2r
+>>> a = k2r.RaggedTensor([[1, 5, 3, 5], [], [4], [2, 6]])
+>>> values, indexes = a.topk(2)
+>>> values
+RaggedTensor([[5, 5],
+              [],
+              [4],
+              [6, 2]], dtype=torch.int32)
+>>> indexes
+RaggedTensor([[1, 3],
+              [],
+              [4],
+              [6, 5]], dtype=torch.int32)
+
+Args:
+  k:
+    The number of elements to select from each sublist. Must be positive.
+  axis:
+    The axis to select the elements from. Only the last axis, i.e.,
+    ``-1`` or ``self.num_axes - 1``, is supported at present.
+
+Returns:
+  Return a tuple containing two ragged tensors:
+
+    - values, with the same dtype as ``self``
+    - indexes, with dtype ``torch.int32``. They are the indexes
+      of the selected elements into ``self.values``, i.e.,
+      ``values.values == self.values[indexes.values.long()]``.
+)doc";
+
 static constexpr const char *kRaggedCatDoc = R"doc(
 Concatenate a list of ragged tensor over a specified axis.
 
@@ -1946,6 +2051,119 @@ Returns:
    and structure as ``self``.
 )doc";
 
+static constexpr const char *kRaggedAnyToNumpyDoc = R"doc(
+Return the values and row splits of this tensor as NumPy arrays.
+
+No data is copied; the returned arrays share the underlying memory
+with ``self``.
+
+Caution:
+  ``self`` has to be on CPU.
+
+>>> import k2.ragged as k2r
+>>> a = k2r.RaggedTensor([[1, 2], [], [3]])
+>>> values, row_splits = a.to_numpy()
+>>> values
+array([1, 2, 3], dtype=int32)
+>>> row_splits
+[array([0, 2, 2, 3], dtype=int32)]
+>>> values[0] = 10
+>>> a
+RaggedTensor([[10, 2],
+              [],
+              [3]], dtype=torch.int32)
+
+Returns:
+  Return a tuple ``(values, row_splits)``, where ``values`` is a 1-D NumPy
+  array and ``row_splits`` is a list of 1-D NumPy arrays with dtype
+  ``int32``; ``row_splits[i]`` is ``self.shape.row_splits(i + 1)``.
+)doc";
+
+static constexpr const char *kRaggedAnyIterNumpyDoc = R"doc(
+Return an iterator over the sublists of the last axis of this tensor.
+
+Each sublist is returned as a 1-D NumPy array that is a view of
+``self.values``, so no Python objects are created for the individual
+elements. If ``self.num_axes > 2``, the sublists of all rows of the
+previous axes are visited in order, e.g., for a tensor with axes
+``[utt][path][token]``, it iterates over all paths.
+
+Caution:
+  ``self`` has to be on CPU.
+
+>>> import k2.ragged as k2r
+>>> a = k2r.RaggedTensor([ [[1, 2], []], [[3]] ])
+>>> for s in a.iter_numpy():
+...   print(s)
+...
+[1 2]
+[]
+[3]
+
+Returns:
+  Return an iterator yielding 1-D NumPy arrays.
+)doc";
+
+static constexpr const char *kRaggedAnyDlpackDoc = R"doc(
+Export ``self.values`` via DLPack. No data is copied.
+
+It allows the values of a ragged tensor to be consumed by other
+frameworks, e.g., ``numpy.from_dlpack(a)`` or ``torch.from_dlpack(a)``.
+Use ``self.shape`` to access the structure of the tensor.
+
+>>> import numpy as np
+>>> import k2.ragged as k2r
+>>> a = k2r.RaggedTensor([[1.5], [2.5, 3]])
+>>> np.from_dlpack(a)
+array([1.5, 2.5, 3. ], dtype=float32)
+
+Args:
+  stream:
+    See the documentation of ``torch.Tensor.__dlpack__``.
+Returns:
+  Return a PyCapsule containing the DLPack tensor.
+)doc";
+
+static constexpr const char *kRaggedAnyDlpackDeviceDoc = R"doc(
+Return the DLPack device of ``self.values``. Used by ``from_dlpack()``.
+)doc";
+
+static constexpr const char *kRaggedAnyFromNumpyDoc = R"doc(
+Create a ragged tensor from NumPy arrays.
+
+No data is copied for ``values``; the returned tensor shares the
+underlying memory with it. ``row_splits`` is shared as well if its dtype
+is ``int32``; otherwise, it is converted to ``int32``.
+
+>>> import numpy as np
+>>> import k2.ragged as k2r
+>>> values = np.array([1, 2, 3], dtype=np.float32)
+>>> a = k2r.from_numpy(values, np.array([0, 2, 2, 3]))
+>>> a
+RaggedTensor([[1, 2],
+              [],
+              [3]], dtype=torch.float32)
+>>> values[0] = 10
+>>> a
+RaggedTensor([[10, 2],
+              [],
+              [3]], dtype=torch.float32)
+>>> k2r.from_numpy(values, [np.array([0, 1, 3]), np.array([0, 2, 2, 3])])
+RaggedTensor([[[10, 2]],
+              [[],
+               [3]]], dtype=torch.float32)
+
+Args:
+  values:
+    A 1-D contiguous NumPy array with dtype ``int32``, ``float32`` or
+    ``float64``. A ``ValueError`` is raised otherwise.
+  row_splits:
+    A 1-D NumPy array, or a list of them for tensors with more than 2 axes.
+    ``row_splits[i]`` is the row splits of axis ``i + 1``.
+Returns:
+  Return a ragged tensor on CPU.
+)doc";
+
 static constexpr const char *kRaggedAnySortDoc = R"doc(
 Sort a ragged tensor over the last axis **in-place**.
 
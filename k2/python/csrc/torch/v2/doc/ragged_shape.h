@@ -203,6 +203,23 @@ Returns:
   Return the row splits of the given ``axis``.
 )doc";
 
+static constexpr const char *kRaggedShapeToNumpyDoc = R"doc(
+Return the row splits of all axes as NumPy arrays.
+
+Caution:
+  ``self`` has to be on CPU. The returned arrays share the underlying
+  memory with ``self``, so do not modify them.
+
+>>> import k2.ragged as k2r
+>>> shape = k2r.RaggedShape('[ [[x] [] [x x]] [[x x x]] ]')
+>>> shape.to_numpy()
+[array([0, 3, 4], dtype=int32), array([0, 1, 1, 3, 6], dtype=int32)]
+
+Returns:
+  Return a list of 1-D NumPy arrays with dtype ``int32``. ``ans[i]`` is
+  the row splits of axis ``i + 1``, i.e., ``self.row_splits(i + 1)``.
+)doc";
+
 static constexpr const char *kRaggedShapeTotSizesDoc = R"doc(
 Return total sizes of every axis in a tuple.
 
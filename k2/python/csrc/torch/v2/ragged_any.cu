@@ -26,6 +26,7 @@
 #include <utility>
 #include <vector>
 
+#include "k2/csrc/array_ops.h"
 #include "k2/csrc/ragged_ops.h"
 #include "k2/csrc/torch_util.h"
 #include "k2/python/csrc/torch/v2/autograd/index_and_sum.h"
@@ -554,6 +555,83 @@ torch::Tensor RaggedAny::Min(
   return {};
 }
 
+torch::Tensor RaggedAny::ArgMin(
+    py::object initial_value /*=py::none()*/) /*const*/ {
+  K2_CHECK((bool)initial_value);
+
+  DeviceGuard guard(any.Context());
+  int32_t last_axis = any.NumAxes() - 1;
+  const Array1<int32_t> &row_splits_array = any.RowSplits(last_axis);
+  int32_t num_rows = row_splits_array.Dim() - 1;
+
+  Array1<int32_t> indexes(any.Context(), num_rows);
+
+  Dtype t = any.GetDtype();
+  FOR_REAL_AND_INT32_TYPES(t, T, {
+    T v = initial_value.is_none() ? std::numeric_limits<T>::max()
+                                  : initial_value.cast<T>();
+    ArgMinPerSublist<T>(any.Specialize<T>(), v, &indexes);
+  });
+
+  return ToTorch(indexes);
+}
+
+torch::Tensor RaggedAny::Mean() const {
+  DeviceGuard guard(any.Context());
+  Dtype t = any.GetDtype();
+  K2_CHECK(t == kFloatDtype || t == kDoubleDtype)
+      << "mean() supports only torch.float32 and torch.float64. Given: "
+      << TraitsOf(t).Name();
+
+  torch::Tensor sum = Sum(0);
+  torch::Tensor row_splits = ToTorch(
+      const_cast<RaggedAny *>(this)->any.RowSplits(any.NumAxes() - 1));
+  torch::Tensor sizes =
+      row_splits.slice(/*dim*/ 0, /*start*/ 1) -
+      row_splits.slice(/*dim*/ 0, /*start*/ 0, /*end*/ -1);
+  return sum / sizes.to(sum.scalar_type());
+}
+
+RaggedAny RaggedAny::CumSum() /*const*/ {
+  DeviceGuard guard(any.Context());
+  Dtype t = any.GetDtype();
+  FOR_REAL_AND_INT32_TYPES(t, T, {
+    Ragged<T> src = any.Specialize<T>();
+    Array1<T> values(src.Context(), src.NumElements());
+    CumSumPerSublist<T>(src, &values);
+    return RaggedAny(Ragged<T>(src.shape, values).Generic());
+  });
+  // Unreachable code
+  return {};
+}
+
+std::pair<RaggedAny, RaggedAny> RaggedAny::TopK(int32_t k,
+                                                int32_t axis /*=-1*/) {
+  DeviceGuard guard(any.Context());
+  int32_t num_axes = any.NumAxes();
+  if (axis < 0) axis += num_axes;
+  K2_CHECK_EQ(axis, num_axes - 1)
+      << "topk() supports only the last axis at present";
+  K2_CHECK_GT(k, 0);
+
+  Dtype t = any.GetDtype();
+  FOR_REAL_AND_INT32_TYPES(t, T, {
+    Array1<int32_t> indexes;
+    Ragged<T> values = TopkPerSublist<T>(any.Specialize<T>(), k, &indexes);
+    RaggedAny ans_indexes(Ragged<int32_t>(values.shape, indexes).Generic());
+    if (Data().requires_grad()) {
+      // Select the values with torch so that autograd works.
+      torch::Tensor value_tensor =
+          Data().index_select(0, ToTorch(indexes).to(torch::kLong));
+      return std::make_pair(RaggedAny(values.shape, value_tensor),
+                            ans_indexes);
+    }
+    return std::make_pair(RaggedAny(values.Generic()), ans_indexes);
+  });
+  // Unreachable code
+  return {};
+}
+
 RaggedAny RaggedAny::Cat(const std::vector<RaggedAny> &srcs, int32_t axis) {
   K2_CHECK_GT(srcs.size(), 0);
   DeviceGuard guard(srcs[0].any.Context());
@@ -681,6 +759,124 @@ py::list RaggedAny::ToList() /*const*/ {
   return py::none();
 }
 
+// Return a NumPy array sharing memory with the given tensor on CPU
+static py::object TensorToNumpy(torch::Tensor tensor) {
+  return py::cast(tensor.detach()).attr("numpy")();
+}
+
+py::tuple RaggedAny::ToNumpy() {
+  K2_CHECK_EQ(any.Context()->GetDeviceType(), kCpu)
+      << "Only ragged tensors on CPU can be converted to NumPy arrays. "
+      << "Please use .to('cpu') first.";
+
+  int32_t num_axes = any.NumAxes();
+  py::list row_splits(num_axes - 1);
+  for (int32_t axis = 1; axis != num_axes; ++axis) {
+    row_splits[axis - 1] = TensorToNumpy(ToTorch(any.shape.RowSplits(axis)));
+  }
+  return py::make_tuple(TensorToNumpy(Data()), row_splits);
+}
+
+namespace {
+
+// Iterates over the sublists of the last axis of a ragged tensor,
+// returning each of them as a slice of a NumPy array
+struct NumpySublistIterator {
+  py::object values;  // a 1-D NumPy array
+  torch::Tensor row_splits;  // keeps row_splits_data alive
+  const int32_t *row_splits_data;
+  int32_t i;
+
+  py::object operator*() const {
+    return values[py::slice(row_splits_data[i], row_splits_data[i + 1], 1)];
+  }
+
+  NumpySublistIterator &operator++() {
+    ++i;
+    return *this;
+  }
+
+  bool operator==(const NumpySublistIterator &other) const {
+    return i == other.i;
+  }
+};
+
+}  // namespace
+
+py::iterator RaggedAny::IterNumpy() {
+  K2_CHECK_EQ(any.Context()->GetDeviceType(), kCpu)
+      << "Only ragged tensors on CPU can be converted to NumPy arrays. "
+      << "Please use .to('cpu') first.";
+
+  torch::Tensor row_splits =
+      ToTorch(any.shape.RowSplits(any.NumAxes() - 1));
+  NumpySublistIterator begin{TensorToNumpy(Data()), row_splits,
+                             row_splits.data_ptr<int32_t>(), 0};
+  NumpySublistIterator end = begin;
+  end.i = static_cast<int32_t>(row_splits.numel()) - 1;
+  return py::make_iterator(begin, end);
+}
+
+RaggedAny RaggedAny::FromNumpy(py::object values, py::object row_splits) {
+  py::object from_numpy = py::module::import("torch").attr("from_numpy");
+  torch::Tensor values_tensor = from_numpy(values).cast<torch::Tensor>();
+  if (values_tensor.dim() != 1) {
+    throw py::value_error("Expected values to be a 1-D array. Given: " +
+                          std::to_string(values_tensor.dim()) + "-D");
+  }
+  torch::ScalarType scalar_type = values_tensor.scalar_type();
+  if (scalar_type != torch::kInt && scalar_type != torch::kFloat &&
+      scalar_type != torch::kDouble) {
+    throw py::value_error(
+        "Expected values to have dtype int32, float32 or float64. Given: " +
+        std::string(c10::toString(scalar_type)) +
+        ". Please convert it with values.astype() first.");
+  }
+  if (!values_tensor.is_contiguous()) {
+    throw py::value_error(
+        "Expected values to be contiguous, since its memory is shared. "
+        "Please use numpy.ascontiguousarray(values) first.");
+  }
+
+  py::list row_splits_list;
+  if (py::isinstance<py::list>(row_splits) ||
+      py::isinstance<py::tuple>(row_splits)) {
+    row_splits_list = py::list(row_splits);
+  } else {
+    row_splits_list.append(row_splits);
+  }
+  K2_CHECK_GT(row_splits_list.size(), 0u) << "row_splits is empty";
+
+  RaggedShape shape;
+  for (size_t i = 0; i != row_splits_list.size(); ++i) {
+    // No copy is made if it is already a contiguous int32 array
+    torch::Tensor t = from_numpy(row_splits_list[i])
+                          .cast<torch::Tensor>()
+                          .to(torch::kInt)
+                          .contiguous();
+    Array1<int32_t> array = FromTorch<int32_t>(t);
+    // Check it here since an invalid shape may otherwise only fail when the
+    // ragged tensor is used later.
+    K2_CHECK(ValidateRowSplits(array))
+        << "row_splits[" << i << "] is invalid: it should start with 0 and "
+        << "be non-decreasing. Given: " << array;
+    RaggedShape s = RaggedShape2(&array, nullptr, -1);
+    if (i != 0) {
+      K2_CHECK_EQ(shape.NumElements(), s.Dim0())
+          << "The last element of row_splits[" << (i - 1) << "] does not "
+          << "match the number of rows of row_splits[" << i << "]";
+      shape = ComposeRaggedShapes(shape, s);
+    } else {
+      shape = s;
+    }
+  }
+
+  K2_CHECK_EQ(shape.NumElements(), values_tensor.numel())
+      << "The last element of row_splits does not match the number of "
+      << "values";
+  return RaggedAny(shape, values_tensor);
+}
+
 torch::optional<torch::Tensor> RaggedAny::Sort(
     bool descending /*= false*/, bool need_new2old_indexes /*= false*/) {
   DeviceGuard guard(any.Context());
@@ -256,6 +256,34 @@ struct RaggedAny {
   // Wrapper for k2::MinPerSublist
   torch::Tensor Min(py::object initial_value) /*const*/;
 
+  /// Wrapper for k2::ArgMinPerSublist
+  torch::Tensor ArgMin(py::object initial_value = py::none()) /*const*/;
+
+  /** Compute the mean over the last axis of the ragged tensor.
+
+     @note It supports autograd. It only accepts input with dtype
+     `torch.float32` or `torch.float64`.
+
+     @return Return the mean of each sublist as a 1-D tensor. It is NaN
+     for empty sublists.
+   */
+  torch::Tensor Mean() const;
+
+  /// Wrapper for k2::CumSumPerSublist
+  RaggedAny CumSum() /*const*/;
+
+  /** Wrapper for k2::TopkPerSublist.
+
+     @note It supports autograd for the returned values.
+
+     @param k  The number of elements to select from each sublist.
+     @param axis  Must be -1 or NumAxes() - 1, i.e., the last axis.
+
+     @return Return a pair of ragged tensors (values, indexes), where
+     `indexes` contains the indexes into `this->Data()` of `values`.
+   */
+  std::pair<RaggedAny, RaggedAny> TopK(int32_t k, int32_t axis = -1);
+
   /// Wrapper for k2::Cat
   static RaggedAny Cat(const std::vector<RaggedAny> &srcs, int32_t axis);
 
@@ -277,6 +305,29 @@ struct RaggedAny {
   /// Note: You can use the return list to construct a ragged tensor.
   py::list ToList() /*const*/;
 
+  /** Return a tuple (values, row_splits) of NumPy arrays sharing memory
+      with this tensor, where `row_splits` is a list containing the
+      row_splits of axis 1, 2, ..., NumAxes() - 1. Only CPU is supported.
+   */
+  py::tuple ToNumpy();
+
+  /** Return an iterator over the sublists of the last axis. Each sublist
+      is returned as a NumPy array that shares memory with this tensor.
+      Only CPU is supported.
+   */
+  py::iterator IterNumpy();
+
+  /** Construct a ragged tensor from NumPy arrays.
+
+     @param values  A 1-D NumPy array of dtype int32, float32 or float64.
+                    The returned tensor shares memory with it.
+     @param row_splits  Either a 1-D NumPy array or a list of them, for
+                    axis 1, 2, .... They are shared with the returned
+                    tensor if their dtype is int32; otherwise, they
+                    are converted to int32.
+   */
+  static RaggedAny FromNumpy(py::object values, py::object row_splits);
+
   /// Wrapper for k2::SortSublists
   torch::optional<torch::Tensor> Sort(bool descending = false,
                                       bool need_new2old_indexes = false);
@@ -99,6 +99,22 @@ void PybindRaggedShape(py::module &m) {
       },
       py::arg("axis"), kRaggedShapeRowSplitsDoc);
 
+  shape.def(
+      "to_numpy",
+      [](RaggedShape &self) -> py::list {
+        K2_CHECK_EQ(self.Context()->GetDeviceType(), kCpu)
+            << "Only ragged shapes on CPU can be converted to NumPy arrays. "
+            << "Please use .to('cpu') first.";
+        int32_t num_axes = self.NumAxes();
+        py::list ans(num_axes - 1);
+        for (int32_t axis = 1; axis != num_axes; ++axis) {
+          ans[axis - 1] =
+              py::cast(ToTorch(self.RowSplits(axis))).attr("numpy")();
+        }
+        return ans;
+      },
+      kRaggedShapeToNumpyDoc);
+
   shape.def(
       "tot_sizes",
       [](const RaggedShape &self) -> py::tuple {
@@ -20,7 +20,15 @@ if (
         f"But you are using CUDA {torch.version.cuda} to run it."
     )
 
+from _k2 import CpuAllocatorStats
 from _k2 import DeterminizeWeightPushingType
+from _k2 import ThreadPool
+from _k2 import empty_cpu_allocator_cache
+from _k2 import get_cpu_allocator_stats
+from _k2 import get_num_threads
+from _k2 import reset_cpu_allocator_peak_stats
+from _k2 import set_cpu_allocator_cache_limit
+from _k2 import set_num_threads
 from _k2 import simple_ragged_index_select
 from _k2 import swoosh_l
 from _k2 import swoosh_l_forward
@@ -36,6 +44,7 @@ from . import autograd
 from . import autograd_utils
 from . import dense_fsa_vec
 from . import fsa
+from . import profiler
 from . import utils
 
 #
@@ -59,6 +68,7 @@ from .fsa_algo import intersect
 from .fsa_algo import intersect_device
 from .fsa_algo import invert
 from .fsa_algo import levenshtein_alignment
+from .fsa_algo import levenshtein_distance
 from .fsa_algo import levenshtein_graph
 from .fsa_algo import linear_fsa
 from .fsa_algo import linear_fsa_with_self_loops
@@ -80,6 +90,7 @@ from .mutual_information import joint_mutual_information_recursion
 from .mutual_information import mutual_information_recursion
 from .mwer_loss import MWERLoss
 from .mwer_loss import mwer_loss
+from .nbest import HypothesisCache
 from .nbest import Nbest
 
 from .online_dense_intersecter import DecodeStateInfo
@@ -90,7 +101,9 @@ from .ops import compose_arc_maps
 from .ops import index_add
 from .ops import index_fsa
 from .ops import index_select
+from .ops import index_select_multi
 
+from .rnnt_decode import RnntDecoderCache
 from .rnnt_decode import RnntDecodingConfig
 from .rnnt_decode import RnntDecodingStream
 from .rnnt_decode import RnntDecodingStreams
@@ -107,6 +120,14 @@ from .rnnt_loss import rnnt_loss_pruned
 from .rnnt_loss import rnnt_loss_simple
 from .rnnt_loss import rnnt_loss_smoothed
 
+from .rnnt_search import rnnt_greedy_search
+from .rnnt_search import rnnt_modified_beam_search
+
+from .streaming_decoder import DecodingStream
+from .streaming_decoder import PartialResult
+from .streaming_decoder import StreamingDecoder
+
+from .suffix_index import SuffixIndex
 from .symbol_table import SymbolTable
 from .utils import create_fsa_vec
 from .utils import create_sparse
@@ -120,6 +141,7 @@ from .utils import random_fsa
 from .utils import random_fsa_vec
 from _k2.version import with_cuda
 
+from .decode import LatticeBatcher
 from .decode import get_aux_labels
 from .decode import get_lattice
 from .decode import one_best_decoding
@@ -88,6 +88,10 @@ class _GetTotScoresFunction(torch.autograd.Function):
         (BackpropGetForwardScores() was added in order to compute slightly
         more difficult objective functions, that depend on the individual
         arc posteriors).
+
+        In log semiring, unless the arc posteriors are already cached, the
+        backward scores and the derivs are computed together in a single pass
+        over the arcs, without materializing the posteriors.
         """
         fsas = ctx.fsas
         log_semiring = ctx.log_semiring
@@ -108,12 +112,33 @@ class _GetTotScoresFunction(torch.autograd.Function):
             #      fsas, log_semiring, use_double_scores, unused_scores
             return None, None, None, scores_grad
         else:
-            arc_post = fsas._get_arc_post(use_double_scores, log_semiring)
+            name = 'arc_post_' + \
+                   ('double_' if use_double_scores else 'float_') + 'log'
+            if name in fsas._cache:
+                arc_post = fsas._cache[name]
+                if use_double_scores:
+                    bprop_func = _k2.get_tot_scores_double_log_backward
+                else:
+                    bprop_func = _k2.get_tot_scores_float_log_backward
+                scores_grad = bprop_func(fsas.arcs, arc_post, tot_scores_grad)
+                return None, None, None, scores_grad
+
+            # Compute the backward scores and the gradients in one pass,
+            # without the arc posteriors.
             if use_double_scores:
-                bprop_func = _k2.get_tot_scores_double_log_backward
+                func = _k2.get_tot_scores_double_log_deriv
             else:
-                bprop_func = _k2.get_tot_scores_float_log_backward
-            scores_grad = bprop_func(fsas.arcs, arc_post, tot_scores_grad)
+                func = _k2.get_tot_scores_float_log_deriv
+            scores_grad, backward_scores = func(
+                fsas.arcs,
+                state_batches=fsas._get_state_batches(),
+                leaving_arc_batches=fsas._get_leaving_arc_batches(),
+                forward_scores=fsas._get_forward_scores(
+                    use_double_scores, log_semiring),
+                tot_scores_grad=tot_scores_grad)
+            name = 'backward_scores_' + \
+                   ('double_' if use_double_scores else 'float_') + 'log'
+            fsas._cache.setdefault(name, backward_scores)
             return None, None, None, scores_grad
 
 
@@ -361,7 +386,8 @@ class _IntersectDensePrunedFunction(torch.autograd.Function):
                 unused_scores_a: torch.Tensor,
                 unused_scores_b: torch.Tensor,
                 seqframe_idx_name: Optional[str] = None,
-                frame_idx_name: Optional[str] = None) -> torch.Tensor:
+                frame_idx_name: Optional[str] = None,
+                lattice_chunk_frames: int = 0) -> torch.Tensor:
         '''Intersect array of FSAs on CPU/GPU.
 
         Args:
@@ -407,6 +433,10 @@ class _IntersectDensePrunedFunction(torch.autograd.Function):
           frame_idx_name:
             If set (e.g. to 'frame', an attribute in the output will be created
             that contains the frame-index within the corresponding sequence.
+          lattice_chunk_frames:
+            If positive, the output is formatted in pieces of at least this
+            many frames as soon as pruning can no longer change them, which
+            bounds the working memory for long sequences. 0 to disable.
         Returns:
            Return `out_fsa[0].scores`.
         '''
@@ -418,9 +448,10 @@ class _IntersectDensePrunedFunction(torch.autograd.Function):
             search_beam=search_beam,
             output_beam=output_beam,
             min_active_states=min_active_states,
-            max_active_states=max_active_states)
+            max_active_states=max_active_states,
+            lattice_chunk_frames=lattice_chunk_frames)
 
-        out_fsa[0] = Fsa(ragged_arc)
+        out_fsa[0] = Fsa._create_trusted(ragged_arc)
 
         for name, a_value in a_fsas.named_tensor_attr(include_scores=False):
             if isinstance(a_value, torch.Tensor):
@@ -496,7 +527,8 @@ class _IntersectDensePrunedFunction(torch.autograd.Function):
             grad_a,  # unused_scores_a
             grad_b,  # unused_scores_b
             None,  # seqframe_idx_name
-            None  # frame_idx_name
+            None,  # frame_idx_name
+            None  # lattice_chunk_frames
         )
 
 
@@ -567,7 +599,7 @@ class _IntersectDenseFunction(torch.autograd.Function):
             max_states=max_states,
             max_arcs=max_arcs)
 
-        out_fsa[0] = Fsa(ragged_arc)
+        out_fsa[0] = Fsa._create_trusted(ragged_arc)
 
         for name, a_value in a_fsas.named_tensor_attr(include_scores=False):
             if isinstance(a_value, torch.Tensor):
@@ -663,7 +695,8 @@ def intersect_dense_pruned(a_fsas: Fsa,
                            min_active_states: int,
                            max_active_states: int,
                            seqframe_idx_name: Optional[str] = None,
-                           frame_idx_name: Optional[str] = None) -> Fsa:
+                           frame_idx_name: Optional[str] = None,
+                           lattice_chunk_frames: int = 0) -> Fsa:
     '''Intersect array of FSAs on CPU/GPU.
 
     Caution:
@@ -702,6 +735,13 @@ def intersect_dense_pruned(a_fsas: Fsa,
       frame_idx_name:
         If set (e.g. to 'frame', an attribute in the output will be created
         that contains the frame-index within the corresponding sequence.
+      lattice_chunk_frames:
+        If positive, e.g. 200, the frames whose arcs can no longer be changed
+        by pruning are formatted into the output lattice in pieces of at least
+        this many frames and their intermediate data is released, so the
+        working memory of the search stays roughly constant for very long
+        sequences instead of growing with their length. The result is the
+        same as with 0 (the default), which keeps every frame until the end.
 
     Returns:
       The result of the intersection.
@@ -729,7 +769,7 @@ def intersect_dense_pruned(a_fsas: Fsa,
                                         output_beam, min_active_states,
                                         max_active_states, a_fsas.scores,
                                         b_fsas.scores, seqframe_idx_name,
-                                        frame_idx_name)
+                                        frame_idx_name, lattice_chunk_frames)
     return out_fsa[0]
 
 
@@ -779,9 +819,49 @@ def intersect_dense(a_fsas: Fsa,
         If set (e.g. to 'frame', an attribute in the output will be created
         that contains the frame-index within the corresponding sequence.
 
+    Note:
+      The sequences in `b_fsas` are intersected in order of decreasing
+      duration. If they are not sorted that way, or `a_to_b_map` is not
+      non-decreasing, the rows of `b_fsas` and the FSAs of `a_fsas` are
+      reordered internally, which costs a copy of them and of the result.
+
     Returns:
       The result of the intersection (pruned to `output_beam`; this pruning
-      is exact, it uses forward and backward scores.
+      is exact, it uses forward and backward scores. Its i-th FSA
+      corresponds to the i-th FSA of `a_fsas`.
+    '''
+    out_fsa, a_order = _intersect_dense_sorted(
+        a_fsas=a_fsas,
+        b_fsas=b_fsas,
+        output_beam=output_beam,
+        max_states=max_states,
+        max_arcs=max_arcs,
+        a_to_b_map=a_to_b_map,
+        seqframe_idx_name=seqframe_idx_name,
+        frame_idx_name=frame_idx_name)
+    if a_order is not None:
+        indexes = a_order.argsort().to(torch.int32).to(out_fsa.device)
+        out_fsa = k2.index_fsa(out_fsa, indexes)
+    return out_fsa
+
+
+def _intersect_dense_sorted(
+        a_fsas: Fsa,
+        b_fsas: DenseFsaVec,
+        output_beam: float,
+        max_states: int = 15000000,
+        max_arcs: int = 1073741824,
+        a_to_b_map: Optional[torch.Tensor] = None,
+        seqframe_idx_name: Optional[str] = None,
+        frame_idx_name: Optional[str] = None
+) -> Tuple[Fsa, Optional[torch.Tensor]]:
+    '''The same as :func:`intersect_dense`, except that the FSAs of the
+    result are in the order they were intersected.
+
+    Returns:
+      Return a tuple (out_fsa, a_order). The i-th FSA of `out_fsa` corresponds
+      to the `a_order[i]`-th FSA of `a_fsas`. `a_order` is a 1-D CPU tensor of
+      dtype torch.int64, or None if the FSAs are in their original order.
     '''
     # Possible values for _k2.build_type are [Release, Debug]
     if _k2.version.build_type == 'Debug':
@@ -798,6 +878,28 @@ def intersect_dense(a_fsas: Fsa,
         # (-1 is to exclude the column with -inf)
         assert a_fsas.labels.max() < b_fsas.scores.shape[1] - 1
 
+    b_fsas, seq_order, row_map = b_fsas._sort_by_duration()
+
+    a_order = None
+    if seq_order is not None or a_to_b_map is not None:
+        # map from FSA-index in a to sequence-index in the sorted b
+        if a_to_b_map is None:
+            new_map = torch.arange(b_fsas.dim0())
+        else:
+            new_map = a_to_b_map.cpu().to(torch.int64)
+        if seq_order is not None:
+            new_map = seq_order.argsort()[new_map]
+
+        n = new_map.numel()
+        if n > 1 and not bool((new_map[:-1] <= new_map[1:]).all()):
+            # _k2.intersect_dense requires a_to_b_map to be non-decreasing.
+            a_order = (new_map * n + torch.arange(n)).argsort()
+            a_fsas = k2.index_fsa(
+                a_fsas,
+                a_order.to(torch.int32).to(a_fsas.device))
+            new_map = new_map[a_order]
+        a_to_b_map = new_map.to(torch.int32).to(a_fsas.device)
+
     out_fsa = [0]
 
     # the following return value is discarded since it is already contained
@@ -806,4 +908,9 @@ def intersect_dense(a_fsas: Fsa,
                                   max_states, max_arcs,
                                   a_fsas.scores, b_fsas.scores, a_to_b_map,
                                   seqframe_idx_name, frame_idx_name)
-    return out_fsa[0]
+    if seqframe_idx_name is not None and row_map is not None:
+        # map the rows of the sorted b_fsas back to the rows of the original
+        seqframe_idx = getattr(out_fsa[0], seqframe_idx_name)
+        seqframe_idx = row_map[seqframe_idx.to(torch.int64)]
+        setattr(out_fsa[0], seqframe_idx_name, seqframe_idx.to(torch.int32))
+    return out_fsa[0], a_order
@@ -0,0 +1,5 @@
+from .benchmark import compare
+from .benchmark import list_benchmarks
+from .benchmark import register
+from .benchmark import run_benchmark
+from .benchmark import run_benchmarks
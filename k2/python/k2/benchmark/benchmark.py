@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+#
+# Copyright      2026  Xiaomi Corp.
+#
+# See ../../../../LICENSE for clarification regarding multiple authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Benchmarks of the Python API of k2 on synthetic workloads.
+#
+# Usage:
+#
+#   # Run all benchmarks on CPU and save the results
+#   python3 -m k2.benchmark --output baseline.json
+#
+#   # After changing k2, run them again and compare with the saved results;
+#   # it exits with status 1 if any benchmark became slower by more than 10%
+#   python3 -m k2.benchmark --baseline baseline.json --threshold 0.1
+#
+#   # Run only some of the benchmarks, with smaller workloads
+#   python3 -m k2.benchmark --filter 'ctc|rnnt' --scale 0.25
+#
+#   # Compare the Swoosh activations with the same functions written with
+#   # torch.nn.functional, whose benchmarks have the suffix `_torch`
+#   python3 -m k2.benchmark --filter swoosh
+#
+# See `python3 -m k2.benchmark --help` for more options.
+
+import argparse
+import collections
+import datetime
+import json
+import re
+import statistics
+import sys
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import torch
+import _k2
+import k2
+
+# Map from the name of a benchmark to a function that sets up its workload
+# and returns the function to be timed. It is called as
+# `setup(device, scale)`; see `register()`.
+_BENCHMARKS = collections.OrderedDict()
+
+
+def register(name: str):
+    '''A decorator to register a benchmark.
+
+    The decorated function is called as `setup(device, scale)`, where
+    `scale` scales the size of the workload (e.g., the number of
+    sequences and frames), and returns a function without arguments that
+    runs the operation to benchmark once. The setup is not timed.
+    '''
+
+    def decorator(setup: Callable[[torch.device, float], Callable[[], Any]]):
+        assert name not in _BENCHMARKS, name
+        _BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+def _scaled(n: int, scale: float) -> int:
+    return max(1, int(n * scale))
+
+
+def _random_log_probs(num_seqs: int, num_frames: int, num_classes: int,
+                      device: torch.device) -> torch.Tensor:
+    '''Return log-probs of shape (num_seqs, num_frames, num_classes) that
+    look like the output of a trained model, i.e., each frame has a peak.'''
+    logits = torch.randn(num_seqs, num_frames, num_classes, device=device)
+    peaks = torch.randint(0, num_classes, (num_seqs, num_frames), device=device)
+    logits += 10 * torch.nn.functional.one_hot(peaks, num_classes)
+    return logits.log_softmax(-1)
+
+
+def _dense_fsa_vec(log_probs: torch.Tensor) -> k2.DenseFsaVec:
+    num_seqs, num_frames = log_probs.shape[:2]
+    supervision_segments = torch.tensor([[i, 0, num_frames]
+                                         for i in range(num_seqs)],
+                                        dtype=torch.int32)
+    return k2.DenseFsaVec(log_probs, supervision_segments)
+
+
+@register('intersect_dense_pruned')
+def _intersect_dense_pruned(device: torch.device, scale: float):
+    num_classes = 500
+    decoding_graph = k2.ctc_topo(num_classes - 1, device=device)
+    log_probs = _random_log_probs(_scaled(8, scale), _scaled(200, scale),
+                                  num_classes, device)
+    dense_fsa_vec = _dense_fsa_vec(log_probs)
+    return lambda: k2.intersect_dense_pruned(decoding_graph,
+                                             dense_fsa_vec,
+                                             search_beam=20,
+                                             output_beam=8,
+                                             min_active_states=30,
+                                             max_active_states=10000)
+
+
+def _decoding_lattice(device: torch.device, scale: float) -> k2.Fsa:
+    '''Return a lattice from the workload of the intersect_dense_pruned
+    benchmark.'''
+    return _intersect_dense_pruned(device, scale)()
+
+
+@register('ctc_loss')
+def _ctc_loss(device: torch.device, scale: float):
+    num_classes = 500
+    num_seqs, num_frames = _scaled(8, scale), _scaled(200, scale)
+    num_symbols = max(1, num_frames // 4)
+    targets = torch.randint(1, num_classes, (num_seqs, num_symbols)).tolist()
+    decoding_graph = k2.ctc_graph(targets, device=device)
+    log_probs = _random_log_probs(num_seqs, num_frames, num_classes, device)
+    log_probs.requires_grad_(True)
+
+    def run():
+        loss = k2.ctc_loss(decoding_graph,
+                           _dense_fsa_vec(log_probs),
+                           reduction='sum')
+        loss.backward()
+
+    return run
+
+
+@register('rnnt_loss_pruned')
+def _rnnt_loss_pruned(device: torch.device, scale: float):
+    num_classes, s_range = 500, 5
+    B, T = _scaled(4, scale), _scaled(100, scale)
+    S = max(1, T // 4)
+    am = torch.randn(B, T, num_classes, device=device, requires_grad=True)
+    lm = torch.randn(B, S + 1, num_classes, device=device, requires_grad=True)
+    symbols = torch.randint(1, num_classes, (B, S), device=device)
+    boundary = torch.tensor([[0, 0, S, T]] * B,
+                            dtype=torch.int64,
+                            device=device)
+
+    def run():
+        simple_loss, (px_grad, py_grad) = k2.rnnt_loss_smoothed(
+            lm=lm,
+            am=am,
+            symbols=symbols,
+            termination_symbol=0,
+            boundary=boundary,
+            return_grad=True)
+        ranges = k2.get_rnnt_prune_ranges(px_grad, py_grad, boundary,
+                                          s_range)
+        am_pruned, lm_pruned = k2.do_rnnt_pruning(am, lm, ranges)
+        logits = am_pruned + lm_pruned
+        pruned_loss = k2.rnnt_loss_pruned(logits,
+                                          symbols,
+                                          ranges,
+                                          termination_symbol=0,
+                                          boundary=boundary)
+        (simple_loss + pruned_loss).backward()
+
+    return run
+
+
+@register('shortest_path')
+def _shortest_path(device: torch.device, scale: float):
+    lattice = _decoding_lattice(device, scale)
+    return lambda: k2.shortest_path(lattice, use_double_scores=True)
+
+
+@register('nbest_from_lattice')
+def _nbest_from_lattice(device: torch.device, scale: float):
+    lattice = _decoding_lattice(device, scale)
+    return lambda: k2.Nbest.from_lattice(lattice, num_paths=100)
+
+
+@register('rnnt_format_output')
+def _rnnt_format_output(device: torch.device, scale: float):
+    vocab_size, num_frames = 500, _scaled(100, scale)
+    graph = k2.trivial_graph(vocab_size - 1, device=device)
+    streams = k2.RnntDecodingStreams(
+        [k2.RnntDecodingStream(graph) for _ in range(_scaled(8, scale))],
+        k2.RnntDecodingConfig(vocab_size=vocab_size,
+                              decoder_history_len=2,
+                              beam=4.0,
+                              max_states=32,
+                              max_contexts=8))
+    for _ in range(num_frames):
+        _, contexts = streams.get_contexts()
+        log_probs = torch.randn(contexts.shape[0], vocab_size,
+                                device=device).log_softmax(-1)
+        streams.advance(log_probs)
+    streams.terminate_and_flush_to_streams()
+    num_frames = [num_frames] * streams.num_streams
+    return lambda: streams.format_output(num_frames)
+
+
+@register('determinize')
+def _determinize(device: torch.device, scale: float):
+    # determinize() works only on CPU
+    fsas = k2.random_fsa_vec(min_num_fsas=_scaled(50, scale),
+                             max_num_fsas=_scaled(50, scale),
+                             acyclic=True,
+                             max_symbol=20,
+                             min_num_arcs=50,
+                             max_num_arcs=200)
+    fsas = k2.connect(fsas)
+    return lambda: k2.determinize(fsas)
+
+
+@register('compose')
+def _compose(device: torch.device, scale: float):
+    # compose() with treat_epsilons_specially=True works only on CPU
+    num_classes = 50
+    ctc_topo = k2.arc_sort(k2.ctc_topo(num_classes - 1))
+    fsas = k2.random_fsa_vec(min_num_fsas=_scaled(50, scale),
+                             max_num_fsas=_scaled(50, scale),
+                             acyclic=True,
+                             max_symbol=num_classes - 1,
+                             min_num_arcs=50,
+                             max_num_arcs=200)
+    fsas = k2.arc_sort(fsas)
+    return lambda: k2.compose(ctc_topo, fsas)
+
+
+def _linear_fsas(scale: float) -> List[k2.Fsa]:
+    '''Return small linear FSAs with random labels, as built in decoding
+    loops.'''
+    lengths = torch.randint(1, 21, (_scaled(2000, scale),)).tolist()
+    return [k2.linear_fsa(torch.randint(1, 501, (n,)).tolist())
+            for n in lengths]
+
+
+# The benchmarks below measure the overhead of the Python code that creates
+# Fsa objects, so they run on CPU.
+
+
+@register('fsa_construction')
+def _fsa_construction(device: torch.device, scale: float):
+    arcs = [fsa.arcs for fsa in _linear_fsas(scale)]
+
+    def run():
+        for a in arcs:
+            k2.Fsa(a)
+
+    return run
+
+
+@register('fsa_construction_trusted')
+def _fsa_construction_trusted(device: torch.device, scale: float):
+    # It is how the outputs of k2 algorithms are created; it does not check
+    # the properties of the arcs.
+    arcs = [fsa.arcs for fsa in _linear_fsas(scale)]
+
+    def run():
+        for a in arcs:
+            k2.Fsa._create_trusted(a)
+
+    return run
+
+
+@register('fsa_set_scores')
+def _fsa_set_scores(device: torch.device, scale: float):
+    fsa_vecs = [k2.create_fsa_vec([fsa]) for fsa in _linear_fsas(scale)]
+    scores = [torch.rand(fsa.num_arcs) for fsa in fsa_vecs]
+
+    def run():
+        # Assigning the scores invalidates the cached total scores
+        for fsa, s in zip(fsa_vecs, scores):
+            fsa._get_tot_scores(use_double_scores=False, log_semiring=True)
+            fsa.scores = s
+
+    return run
+
+
+@register('fsa_unary_op')
+def _fsa_unary_op(device: torch.device, scale: float):
+    fsas = _linear_fsas(scale)
+    for fsa in fsas:
+        fsa.aux_labels = fsa.labels.clone()
+
+    def run():
+        for fsa in fsas:
+            k2.add_epsilon_self_loops(fsa)
+
+    return run
+
+
+@register('create_fsa_vec')
+def _create_fsa_vec(device: torch.device, scale: float):
+    fsas = _linear_fsas(scale)
+    for fsa in fsas:
+        fsa.aux_labels = fsa.labels.clone()
+    return lambda: k2.create_fsa_vec(fsas)
+
+
+@register('cat_fsa_vecs')
+def _cat_fsa_vecs(device: torch.device, scale: float):
+    fsa_vecs = [k2.create_fsa_vec([fsa]) for fsa in _linear_fsas(scale)]
+    return lambda: k2.cat(fsa_vecs)
+
+
+def _torch_swoosh_l(x: torch.Tensor) -> torch.Tensor:
+    if x.dtype == torch.float16 and x.device.type == 'cpu':
+        # softplus does not support float16 on CPU
+        return _torch_swoosh_l(x.float()).to(x.dtype)
+    return torch.nn.functional.softplus(x - 4) - 0.08 * x - 0.035
+
+
+def _torch_swoosh_l_forward_and_deriv(x: torch.Tensor):
+    if x.dtype == torch.float16 and x.device.type == 'cpu':
+        y, deriv = _torch_swoosh_l_forward_and_deriv(x.float())
+        return y.to(x.dtype), deriv.to(x.dtype)
+    return _torch_swoosh_l(x), torch.sigmoid(x - 4) - 0.08
+
+
+def _swoosh_setup(func: Callable[[torch.Tensor], Any], dtype: torch.dtype,
+                  backward: bool):
+    '''Return the setup of a benchmark that runs `func` on a tensor with
+    the given dtype, and the backward pass from its output if `backward` is
+    True.'''
+
+    def setup(device: torch.device, scale: float):
+        x = torch.randn(_scaled(4000000, scale), device=device) * 4
+        x = x.to(dtype)
+        if not backward:
+            return lambda: func(x)
+        x.requires_grad_(True)
+        y_grad = torch.rand_like(x)
+        return lambda: func(x).backward(y_grad)
+
+    return setup
+
+
+def _register_swoosh() -> None:
+    '''Register the benchmarks of the Swoosh activations of Zipformer.
+    Each of them is compared with the same function written with
+    torch.nn.functional, which has the suffix `_torch` in its name.'''
+    for dtype in (torch.float32, torch.bfloat16, torch.float16):
+        for name, k2_func, torch_func, backward in (
+            ('swoosh_l_forward', k2.swoosh_l_forward, _torch_swoosh_l, False),
+            ('swoosh_l_forward_and_deriv', k2.swoosh_l_forward_and_deriv,
+             _torch_swoosh_l_forward_and_deriv, False),
+            ('swoosh_l', k2.swoosh_l, _torch_swoosh_l, True),
+        ):
+            name += '_' + str(dtype).split('.')[-1]
+            register(name)(_swoosh_setup(k2_func, dtype, backward))
+            register(name + '_torch')(_swoosh_setup(torch_func, dtype,
+                                                    backward))
+
+
+_register_swoosh()
+
+
+def _synchronize(device: torch.device) -> None:
+    if device.type == 'cuda':
+        torch.cuda.synchronize(device)
+
+
+def run_benchmark(name: str,
+                  device: torch.device,
+                  scale: float = 1.0,
+                  num_iters: int = 10,
+                  num_warmup: int = 2,
+                  seed: int = 0) -> Dict[str, Any]:
+    '''Run a registered benchmark.
+
+    Args:
+      name:
+        Name of the benchmark, see `list_benchmarks()`.
+      device:
+        The device to run on. Benchmarks of CPU-only operations always
+        run on CPU.
+      scale:
+        It scales the size of the workload.
+      num_iters:
+        Number of timed runs.
+      num_warmup:
+        Number of runs before the timed runs.
+      seed:
+        The seed of the random number generator of PyTorch used to
+        generate the workload.
+    Returns:
+      A dict with the wall time of the runs in milliseconds
+      (`mean_ms`, `median_ms`, `min_ms` and `max_ms`) and the peak memory
+      in bytes allocated during the timed runs (`peak_memory_bytes`).
+      For CPU, it counts only the memory allocated by k2; the memory of
+      tensors allocated by PyTorch is not included.
+    '''
+    assert num_iters > 0, num_iters
+    torch.manual_seed(seed)
+    run = _BENCHMARKS[name](device, scale)
+    for _ in range(num_warmup):
+        run()
+    _synchronize(device)
+
+    if device.type == 'cuda':
+        torch.cuda.reset_peak_memory_stats(device)
+        memory_before = torch.cuda.memory_allocated(device)
+    _k2.reset_cpu_allocator_peak_stats()
+    cpu_memory_before = _k2.get_cpu_allocator_stats().allocated_bytes
+
+    times = []
+    for _ in range(num_iters):
+        start = time.perf_counter()
+        run()
+        _synchronize(device)
+        times.append((time.perf_counter() - start) * 1000)
+
+    if device.type == 'cuda':
+        peak_memory = torch.cuda.max_memory_allocated(device) - memory_before
+    else:
+        peak_memory = (_k2.get_cpu_allocator_stats().peak_allocated_bytes -
+                       cpu_memory_before)
+
+    return {
+        'mean_ms': statistics.mean(times),
+        'median_ms': statistics.median(times),
+        'min_ms': min(times),
+        'max_ms': max(times),
+        'num_iters': num_iters,
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def list_benchmarks() -> List[str]:
+    '''Return the names of the registered benchmarks.'''
+    return list(_BENCHMARKS.keys())
+
+
+def run_benchmarks(device: torch.device = torch.device('cpu'),
+                   pattern: Optional[str] = None,
+                   scale: float = 1.0,
+                   num_iters: int = 10,
+                   num_warmup: int = 2,
+                   seed: int = 0,
+                   verbose: bool = False) -> Dict[str, Any]:
+    '''Run the registered benchmarks whose names match `pattern`.
+
+    See `run_benchmark()` for the meaning of the arguments.
+
+    Returns:
+      A dict that can be saved as JSON, with the information about the
+      environment in `metadata` and a dict from the name of each benchmark
+      to its results in `results`.
+    '''
+    device = torch.device(device)
+    results = collections.OrderedDict()
+    for name in list_benchmarks():
+        if pattern is not None and re.search(pattern, name) is None:
+            continue
+        results[name] = run_benchmark(name,
+                                      device,
+                                      scale=scale,
+                                      num_iters=num_iters,
+                                      num_warmup=num_warmup,
+                                      seed=seed)
+        if verbose:
+            print(f'{name}: {results[name]["median_ms"]:.3f} ms',
+                  file=sys.stderr)
+
+    metadata = {
+        'k2_version': _k2.version.__version__,
+        'k2_git_sha1': _k2.version.git_sha1,
+        'torch_version': torch.__version__,
+        'device': str(device),
+        'num_threads': k2.get_num_threads(),
+        'scale': scale,
+        'seed': seed,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+    return {'metadata': metadata, 'results': results}
+
+
+def compare(results: Dict[str, Any],
+            baseline: Dict[str, Any],
+            threshold: float = 0.1) -> List[Dict[str, Any]]:
+    '''Compare the results of `run_benchmarks()` with a baseline.
+
+    Args:
+      results:
+        The return value of `run_benchmarks()`.
+      baseline:
+        The return value of `run_benchmarks()` for the baseline, e.g.,
+        loaded from a JSON file.
+      threshold:
+        A benchmark is a regression if its median time is more than
+        `1 + threshold` times the baseline, and an improvement if it is
+        less than `1 - threshold` times the baseline.
+    Returns:
+      A list with a dict for each benchmark in both `results` and
+      `baseline`, with the keys `name`, `baseline_ms`, `current_ms`,
+      `ratio`, `memory_ratio` and `status`, where `status` is one of
+      `regression`, `improvement` and `ok`.
+    '''
+    ans = []
+    for name, current in results['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = current['median_ms'] / max(base['median_ms'], 1e-9)
+        if base['peak_memory_bytes'] > 0:
+            memory_ratio = (current['peak_memory_bytes'] /
+                            base['peak_memory_bytes'])
+        else:
+            memory_ratio = None
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 - threshold:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        ans.append({
+            'name': name,
+            'baseline_ms': base['median_ms'],
+            'current_ms': current['median_ms'],
+            'ratio': ratio,
+            'memory_ratio': memory_ratio,
+            'status': status,
+        })
+    return ans
+
+
+def _format_bytes(num_bytes: int) -> str:
+    return f'{num_bytes / 1024 / 1024:.2f} MB'
+
+
+def _print_results(results: Dict[str, Any]) -> None:
+    width = max([len('name')] + [len(n) for n in results['results']])
+    print(f'{"name":<{width}} {"median (ms)":>12} {"min (ms)":>12} '
+          f'{"peak memory":>14}')
+    for name, r in results['results'].items():
+        print(f'{name:<{width}} {r["median_ms"]:>12.3f} {r["min_ms"]:>12.3f} '
+              f'{_format_bytes(r["peak_memory_bytes"]):>14}')
+
+
+def _print_comparison(comparison: List[Dict[str, Any]]) -> None:
+    width = max([len('name')] + [len(c['name']) for c in comparison])
+    print(f'{"name":<{width}} {"baseline (ms)":>14} {"current (ms)":>14} '
+          f'{"ratio":>8} {"memory ratio":>13}  status')
+    for c in comparison:
+        memory_ratio = ('-' if c['memory_ratio'] is None else
+                        f'{c["memory_ratio"]:.2f}')
+        print(f'{c["name"]:<{width}} {c["baseline_ms"]:>14.3f} '
+              f'{c["current_ms"]:>14.3f} {c["ratio"]:>8.2f} '
+              f'{memory_ratio:>13}  {c["status"]}')
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        prog='python3 -m k2.benchmark',
+        description='Benchmark the Python API of k2 on synthetic workloads.')
+    parser.add_argument('--device',
+                        type=str,
+                        default='cpu',
+                        help='The device to run on, e.g., cpu or cuda:0')
+    parser.add_argument('--filter',
+                        type=str,
+                        default=None,
+                        help='Run only benchmarks whose names match this '
+                        'regular expression')
+    parser.add_argument('--scale',
+                        type=float,
+                        default=1.0,
+                        help='Scale the size of the workloads')
+    parser.add_argument('--num-iters',
+                        type=int,
+                        default=10,
+                        help='Number of timed runs of each benchmark')
+    parser.add_argument('--num-warmup',
+                        type=int,
+                        default=2,
+                        help='Number of runs before the timed runs')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output',
+                        type=str,
+                        default=None,
+                        help='Save the results to this JSON file')
+    parser.add_argument('--baseline',
+                        type=str,
+                        default=None,
+                        help='Compare with the results in this JSON file, '
+                        'which was saved with --output')
+    parser.add_argument('--threshold',
+                        type=float,
+                        default=0.1,
+                        help='With --baseline, a benchmark that is slower '
+                        'than the baseline by more than this fraction is a '
+                        'regression')
+    parser.add_argument('--list',
+                        action='store_true',
+                        help='List the benchmarks and exit')
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    if args.list:
+        print('\n'.join(list_benchmarks()))
+        return
+
+    results = run_benchmarks(device=torch.device(args.device),
+                             pattern=args.filter,
+                             scale=args.scale,
+                             num_iters=args.num_iters,
+                             num_warmup=args.num_warmup,
+                             seed=args.seed,
+                             verbose=True)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline is None:
+        _print_results(results)
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    comparison = compare(results, baseline, args.threshold)
+    _print_comparison(comparison)
+    if any(c['status'] == 'regression' for c in comparison):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
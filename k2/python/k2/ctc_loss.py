@@ -5,17 +5,73 @@ try:
 except ImportError:
     from typing_extensions import Literal  # for python < 3.8
 
+from typing import List
 from typing import Optional
+from typing import Union
 
 import torch
 import torch.nn as nn
+import _k2
+import k2
 
-from .autograd import intersect_dense
+from .autograd import _intersect_dense_sorted
 from .dense_fsa_vec import DenseFsaVec
 from .fsa import Fsa
 from .ragged import RaggedTensor
 
 
+class _DenseCtcFunction(torch.autograd.Function):
+
+    @staticmethod
+    def forward(ctx, symbols: RaggedTensor, dense_fsa_vec: DenseFsaVec,
+                modified: bool, delay_penalty: float, use_double_scores: bool,
+                unused_scores: torch.Tensor) -> torch.Tensor:
+        """Compute the total scores of the CTC graphs of `symbols` with
+        `dense_fsa_vec` by the alpha/beta recursion, without building the
+        lattice.
+
+        Args:
+          symbols:
+            A ragged tensor with 2 axes [seq][symbol] on CPU, containing the
+            target symbols of each sequence.
+          dense_fsa_vec:
+            The neural network output on CPU.
+          modified:
+            True to use the modified CTC topology; see :func:`k2.ctc_graph`.
+          delay_penalty:
+            See :class:`CtcLoss`.
+          use_double_scores:
+            True to use double precision floating point in computing
+            the total scores. False to use single precision.
+          unused_scores:
+            It equals to `dense_fsa_vec.scores` and its sole purpose is for
+            back propagation.
+        Returns:
+          Return the total scores, a 1-D tensor with dim equal to the number
+          of sequences.
+        """
+        need_grad = ctx.needs_input_grad[5]
+        tot_scores, grad = _k2.dense_ctc_forward_backward(
+            symbols=symbols,
+            dense_fsas=dense_fsa_vec.dense_fsa_vec,
+            modified=modified,
+            delay_penalty=delay_penalty,
+            use_double_scores=use_double_scores,
+            need_grad=need_grad)
+        if need_grad:
+            row_ids = dense_fsa_vec.dense_fsa_vec.shape().row_ids(1)
+            ctx.save_for_backward(grad, row_ids)
+        return tot_scores
+
+    @staticmethod
+    def backward(ctx, tot_scores_grad: torch.Tensor):
+        grad, row_ids = ctx.saved_tensors
+        # the gradient of each row is scaled by the gradient of the total score
+        # of its sequence
+        scale = tot_scores_grad.to(grad.dtype)[row_ids.long()].unsqueeze(1)
+        return None, None, None, None, None, grad * scale
+
+
 class CtcLoss(nn.Module):
     """Ctc Loss computation in k2. It produces the same output as `torch.CtcLoss`
     if given the same input.
@@ -30,6 +86,17 @@ class CtcLoss(nn.Module):
     We assume that the blank label is always 0. The arguments `reduction` and
     `target_lengths` have the same meaning as their counterparts in
     `torch.CtcLoss`.
+
+    If the decoding graph is a plain CTC graph, i.e., the output of
+    :func:`k2.ctc_graph`, pass the target symbols instead of the graph. On CPU,
+    the loss is then computed by the alpha/beta recursion over the
+    `2 * num_symbols + 1` states of each sequence, in parallel over sequences,
+    without building the lattice; the result is the same as intersecting with
+    `k2.ctc_graph(targets)` without pruning. On CUDA, the CTC graphs are built
+    and the general path is used.
+
+    The supervision segments of the `dense_fsa_vec` need not be sorted by
+    decreasing duration; the losses are always returned in their order.
     """
 
     def __init__(
@@ -61,17 +128,21 @@ class CtcLoss(nn.Module):
 
     def forward(
         self,
-        decoding_graph: Fsa,
+        decoding_graph: Union[Fsa, RaggedTensor, List[List[int]]],
         dense_fsa_vec: DenseFsaVec,
         delay_penalty: float = 0.0,
         target_lengths: Optional[torch.Tensor] = None,
+        modified: bool = False,
     ) -> torch.Tensor:
         """Compute the CTC loss given a decoding graph and a dense fsa vector.
 
         Args:
           decoding_graph:
             An FsaVec. It can be the composition result of a CTC topology
-            and a transcript.
+            and a transcript. It can also be the target symbols of each
+            sequence, either a list of list-of-integers or a
+            :class:`k2.RaggedTensor` with 2 axes, which stands for
+            `k2.ctc_graph(decoding_graph, modified)`; see the class docstring.
           dense_fsa_vec:
             It represents the neural network output. Refer to the help
             information in :class:`k2.DenseFsaVec`.
@@ -85,11 +156,29 @@ class CtcLoss(nn.Module):
             Used only when `reduction` is `mean`. It is a 1-D tensor of batch
             size representing lengths of the targets, e.g., number of phones or
             number of word pieces in a sentence.
+          modified:
+            Used only when `decoding_graph` contains the target symbols.
+            True to use the modified CTC topology; see :func:`k2.ctc_graph`.
         Returns:
           If `reduction` is `none`, return a 1-D tensor with size equal to batch
           size. If `reduction` is `mean` or `sum`, return a scalar.
         """
-        lattice = intersect_dense(
+        if not isinstance(decoding_graph, Fsa):
+            symbols = decoding_graph
+            if not isinstance(symbols, RaggedTensor):
+                symbols = RaggedTensor(symbols)
+            symbols = symbols.to(dense_fsa_vec.device)
+            if dense_fsa_vec.device.type == "cpu":
+                tot_scores = _DenseCtcFunction.apply(
+                    symbols, dense_fsa_vec, modified, delay_penalty,
+                    self.use_double_scores, dense_fsa_vec.scores)
+                return self._reduce(tot_scores, target_lengths)
+            decoding_graph = k2.ctc_graph(symbols, modified=modified)
+
+        # The FSAs of the lattice may be in a different order than those of
+        # decoding_graph, if the sequences of dense_fsa_vec are not sorted by
+        # decreasing duration; only the total scores are put back in order.
+        lattice, order = _intersect_dense_sorted(
             a_fsas=decoding_graph,
             b_fsas=dense_fsa_vec,
             output_beam=self.output_beam,
@@ -101,7 +190,10 @@ class CtcLoss(nn.Module):
                 lattice.arcs.shape().remove_axis(1), lattice.frame_idx
             )
             # duration in DenseFsaVec is on CPU
-            duration = dense_fsa_vec.duration.to(frame_idx.device)
+            duration = dense_fsa_vec.duration
+            if order is not None:
+                duration = duration[order]
+            duration = duration.to(frame_idx.device)
 
             # add: offset = frame_idx + alpha * value
             offset = frame_idx.add(value=duration >> 1, alpha=-1)
@@ -138,6 +230,15 @@ class CtcLoss(nn.Module):
         tot_scores = lattice.get_tot_scores(
             log_semiring=True, use_double_scores=self.use_double_scores
         )
+        if order is not None:
+            tot_scores = tot_scores[order.argsort().to(tot_scores.device)]
+        return self._reduce(tot_scores, target_lengths)
+
+    def _reduce(
+        self,
+        tot_scores: torch.Tensor,
+        target_lengths: Optional[torch.Tensor] = None,
+    ) -> torch.Tensor:
         loss = -1 * tot_scores
         loss = loss.to(torch.float32)
 
@@ -152,20 +253,25 @@ class CtcLoss(nn.Module):
 
 
 def ctc_loss(
-    decoding_graph: Fsa,
+    decoding_graph: Union[Fsa, RaggedTensor, List[List[int]]],
     dense_fsa_vec: DenseFsaVec,
     output_beam: float = 10,
     delay_penalty: float = 0.0,
     reduction: Literal["none", "mean", "sum"] = "sum",
     use_double_scores: bool = True,
     target_lengths: Optional[torch.Tensor] = None,
+    modified: bool = False,
 ) -> torch.Tensor:
     """Compute the CTC loss given a decoding graph and a dense fsa vector.
 
     Args:
       decoding_graph:
         An FsaVec. It can be the composition result of a ctc topology
-        and a transcript.
+        and a transcript. It can also be the target symbols of each sequence,
+        either a list of list-of-integers or a :class:`k2.RaggedTensor` with
+        2 axes, which stands for `k2.ctc_graph(decoding_graph, modified)` and
+        is computed without building the lattice on CPU; `output_beam` is not
+        used in that case. See :class:`CtcLoss`.
       dense_fsa_vec:
         It represents the neural network output. Refer to the help information
         in :class:`k2.DenseFsaVec`.
@@ -190,6 +296,9 @@ def ctc_loss(
         Used only when `reduction` is `mean`. It is a 1-D tensor of batch
         size representing lengths of the targets, e.g., number of phones or
         number of word pieces in a sentence.
+      modified:
+        Used only when `decoding_graph` contains the target symbols.
+        True to use the modified CTC topology; see :func:`k2.ctc_graph`.
     Returns:
       If `reduction` is `none`, return a 1-D tensor with size equal to batch
       size. If `reduction` is `mean` or `sum`, return a scalar.
@@ -205,4 +314,5 @@ def ctc_loss(
         dense_fsa_vec=dense_fsa_vec,
         delay_penalty=delay_penalty,
         target_lengths=target_lengths,
+        modified=modified,
     )
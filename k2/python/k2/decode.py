@@ -3,7 +3,13 @@
 This file contains various functions for CTC decoding.
 """
 
+import bisect
+import threading
+import time
+from concurrent.futures import Future
 from typing import List
+from typing import Optional
+from typing import Sequence
 
 import torch
 
@@ -11,6 +17,7 @@ from .autograd import intersect_dense_pruned
 from .dense_fsa_vec import DenseFsaVec
 from .fsa import Fsa
 from .fsa_algo import shortest_path
+from .ops import index_fsa
 from .ragged import RaggedTensor
 
 
@@ -148,3 +155,213 @@ def get_aux_labels(best_paths: Fsa) -> List[List[int]]:
 
     assert aux_labels.num_axes == 2
     return aux_labels.tolist()
+
+
+class _LatticeRequest(object):
+
+    def __init__(self, log_prob: torch.Tensor, arrival_time: float):
+        self.log_prob = log_prob
+        self.arrival_time = arrival_time
+        self.future = Future()
+
+
+class LatticeBatcher(object):
+    """Collect decoding requests of different lengths into batches
+    for :func:`get_lattice`.
+
+    It is intended for decoding servers, in which requests arrive one
+    by one from several threads. Instead of decoding each of them on its own,
+    or padding all of them to the longest one, requests are put into buckets
+    by their number of frames. A bucket is decoded as one batch as soon as
+    it reaches the frame budget ``max_frames`` (counted after padding to the
+    longest request of the batch), or when its oldest request has waited for
+    ``max_wait_ms`` milliseconds. The lattice of each request is returned
+    through a :class:`concurrent.futures.Future`.
+
+    Usage::
+
+      with k2.LatticeBatcher(H, max_frames=20000, max_wait_ms=10) as batcher:
+          # possibly from different threads
+          future = batcher.submit(log_prob)  # log_prob: (T, C)
+          lattice = future.result()
+
+    Batches are decoded one at a time in a background thread; use
+    :func:`k2.set_num_threads` to control the threads used within each
+    batch.
+    """
+
+    def __init__(self,
+                 decoding_graph: Fsa,
+                 search_beam: float = 20,
+                 output_beam: float = 8,
+                 min_active_states: int = 30,
+                 max_active_states: int = 10000,
+                 subsampling_factor: int = 1,
+                 max_frames: int = 20000,
+                 max_wait_ms: float = 10,
+                 bucket_boundaries: Sequence[int] = (100, 200, 400, 800,
+                                                     1600)):
+        """
+        Args:
+          decoding_graph:
+            The decoding graph; see :func:`get_lattice`.
+          search_beam:
+            See :func:`get_lattice`.
+          output_beam:
+            See :func:`get_lattice`.
+          min_active_states:
+            See :func:`get_lattice`.
+          max_active_states:
+            See :func:`get_lattice`.
+          subsampling_factor:
+            See :func:`get_lattice`.
+          max_frames:
+            The maximum number of frames of a batch, i.e., the number of
+            requests in it times the number of frames of the longest one. A
+            request longer than this is decoded on its own.
+          max_wait_ms:
+            The maximum time in milliseconds that a request waits for its
+            bucket to fill up before the bucket is decoded anyway.
+          bucket_boundaries:
+            Increasing numbers of frames that separate the buckets. A request
+            with ``T`` frames goes to bucket
+            ``bisect.bisect_left(bucket_boundaries, T)``, i.e., there are
+            ``len(bucket_boundaries) + 1`` buckets.
+        """
+        assert max_frames > 0, max_frames
+        assert max_wait_ms >= 0, max_wait_ms
+        assert list(bucket_boundaries) == sorted(bucket_boundaries), \
+            bucket_boundaries
+
+        self.decoding_graph = decoding_graph
+        self.search_beam = search_beam
+        self.output_beam = output_beam
+        self.min_active_states = min_active_states
+        self.max_active_states = max_active_states
+        self.subsampling_factor = subsampling_factor
+        self.max_frames = max_frames
+        self.max_wait = max_wait_ms / 1000.0
+        self.bucket_boundaries = list(bucket_boundaries)
+
+        self._buckets = [[] for _ in range(len(self.bucket_boundaries) + 1)]
+        self._cond = threading.Condition()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, log_prob: torch.Tensor) -> Future:
+        """Submit a request.
+
+        Args:
+          log_prob:
+            Output from a log_softmax layer of shape ``(T, C)`` for a single
+            utterance, without padding.
+        Returns:
+          A future whose result is the lattice of this request, an FsaVec
+          with a single FSA, as returned by :func:`get_lattice`.
+        """
+        assert log_prob.ndim == 2, log_prob.shape
+        request = _LatticeRequest(log_prob, time.monotonic())
+        index = bisect.bisect_left(self.bucket_boundaries, log_prob.size(0))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('submit() called after close()')
+            self._buckets[index].append(request)
+            self._cond.notify()
+        return request.future
+
+    def close(self) -> None:
+        """Decode the pending requests without waiting any further and stop
+        the background thread. It is called on exiting a ``with``
+        statement."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+
+    def __enter__(self) -> 'LatticeBatcher':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _num_frames(self, batch: List[_LatticeRequest]) -> int:
+        return len(batch) * max(r.log_prob.size(0) for r in batch)
+
+    def _next_batch(self) -> Optional[List[_LatticeRequest]]:
+        """Remove the next batch to decode from the buckets, if any is
+        ready. Must be called with ``self._cond`` held.
+
+        Buckets whose oldest request has timed out are served first, and
+        among them, or else among the full buckets, the one whose oldest
+        request is the oldest, so that a bucket that keeps filling up
+        can't delay the requests of other buckets beyond ``max_wait_ms``
+        (plus the time to decode the batches ahead of them)."""
+        now = time.monotonic()
+        best = None
+        best_key = None
+        for bucket in self._buckets:
+            if len(bucket) == 0:
+                continue
+            timed_out = (self._closed
+                         or now - bucket[0].arrival_time >= self.max_wait)
+            if not (timed_out
+                    or self._num_frames(bucket) >= self.max_frames):
+                continue
+            key = (not timed_out, bucket[0].arrival_time)
+            if best_key is None or key < best_key:
+                best = bucket
+                best_key = key
+        if best is None:
+            return None
+        # Take the oldest requests that fit into the frame budget, but
+        # at least one.
+        n = 1
+        while (n < len(best) and
+               self._num_frames(best[:n + 1]) <= self.max_frames):
+            n += 1
+        batch = best[:n]
+        del best[:n]
+        return batch
+
+    def _timeout(self) -> Optional[float]:
+        """Return the time until the oldest pending request times out, or
+        None if there are no pending requests."""
+        arrival_times = [b[0].arrival_time for b in self._buckets if b]
+        if len(arrival_times) == 0:
+            return None
+        return max(0.0, min(arrival_times) + self.max_wait - time.monotonic())
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                batch = self._next_batch()
+                while batch is None:
+                    if self._closed:
+                        return
+                    self._cond.wait(self._timeout())
+                    batch = self._next_batch()
+            self._decode(batch)
+
+    def _decode(self, batch: List[_LatticeRequest]) -> None:
+        try:
+            log_prob = torch.nn.utils.rnn.pad_sequence(
+                [r.log_prob for r in batch], batch_first=True)
+            log_prob_len = torch.tensor([r.log_prob.size(0) for r in batch],
+                                        dtype=torch.int32)
+            lattice = get_lattice(log_prob,
+                                  log_prob_len,
+                                  self.decoding_graph,
+                                  search_beam=self.search_beam,
+                                  output_beam=self.output_beam,
+                                  min_active_states=self.min_active_states,
+                                  max_active_states=self.max_active_states,
+                                  subsampling_factor=self.subsampling_factor)
+        except Exception as e:
+            for r in batch:
+                r.future.set_exception(e)
+            return
+        for i, r in enumerate(batch):
+            indexes = torch.tensor([i], dtype=torch.int32,
+                                   device=lattice.device)
+            r.future.set_result(index_fsa(lattice, indexes))
@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import Optional
+from typing import Tuple
 from typing import Union
 
 import torch
@@ -64,19 +66,13 @@ class DenseFsaVec(object):
               - `0 <= start_frame < T`
               - `duration > 0`
 
-            Caution:
-              If the resulting dense fsa vec is used as an input to
-              `k2.intersect_dense`, then the last column, i.e., the duration
-              column, has to be sorted in **decreasing** order.
-              That is, the first supervision_segment (the first row) has the
-              largest duration.
-              Otherwise, you don't need to sort the last column.
-
-              `k2.intersect_dense` is often used in the training stage, so
-              you should usually sort dense fsa vecs by its duration
-              in training. `k2.intersect_dense_pruned` is usually used in the
-              decoding stage, so you don't need to sort dense fsa vecs in
-              decoding.
+            Note:
+              `k2.intersect_dense` processes the sequences in order of
+              **decreasing** duration. If the last column, i.e., the duration
+              column, is not sorted in decreasing order, it sorts a copy of
+              the rows internally and returns the results in the original
+              order, so sorting the segments beforehand (as is usually done
+              in training) only saves that copy.
           allow_truncate:
             If not zero, it truncates at most this number of frames from
             duration in case start_frame + duration > T.
@@ -155,6 +151,52 @@ class DenseFsaVec(object):
             self._duration = duration.cpu()
         return self._duration
 
+    def _sort_by_duration(
+        self
+    ) -> Tuple['DenseFsaVec', Optional[torch.Tensor], Optional[torch.Tensor]]:
+        '''Return a DenseFsaVec with the sequences sorted by decreasing
+        duration, as required by `_k2.intersect_dense`.
+
+        Note:
+          It is intended for internal use. Users will normally not use it.
+
+        Returns:
+          Return a tuple (ans, seq_order, row_map). If the sequences are
+          already sorted, it is (self, None, None) and nothing is copied.
+          Otherwise, `seq_order` is a 1-D CPU tensor of dtype torch.int64,
+          where `seq_order[i]` is the index in `self` of the i-th sequence of
+          `ans` (ties keep their original order), and `row_map` is a 1-D
+          tensor of dtype torch.int64 on `self.device`, where `row_map[j]`
+          is the index of the row of `self.scores` copied to row j of
+          `ans.scores`. The copy supports autograd.
+        '''
+        duration = self.duration
+        n = duration.numel()
+        if n < 2 or bool((duration[:-1] >= duration[1:]).all()):
+            return self, None, None
+
+        # Sort by decreasing duration; the index breaks ties so that the sort
+        # is stable.
+        key = -duration.to(torch.int64) * n + torch.arange(n)
+        seq_order = key.argsort()
+
+        row_splits = self.dense_fsa_vec.shape().row_splits(1).cpu().to(
+            torch.int64)
+        # + 1 for the final row
+        sizes = duration.to(torch.int64)[seq_order] + 1
+        new_row_splits = torch.zeros(n + 1, dtype=torch.int64)
+        new_row_splits[1:] = sizes.cumsum(0)
+        offsets = row_splits[:-1][seq_order] - new_row_splits[:-1]
+        row_map = torch.arange(int(new_row_splits[-1])) + \
+            offsets.repeat_interleave(sizes)
+        row_map = row_map.to(self.device)
+
+        scores = self.scores.index_select(0, row_map)
+        dense_fsa_vec = _k2.DenseFsaVec(
+            scores, new_row_splits.to(torch.int32).to(self.device))
+        return (DenseFsaVec._from_dense_fsa_vec(dense_fsa_vec, scores),
+                seq_order, row_map)
+
     @classmethod
     def _from_dense_fsa_vec(cls, dense_fsa_vec: _k2.DenseFsaVec,
                             scores: torch.Tensor) -> 'DenseFsaVec':
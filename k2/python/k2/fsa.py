@@ -25,7 +25,6 @@ from typing import Tuple
 from typing import Union
 
 import os
-import re
 import shutil
 import torch
 
@@ -36,6 +35,16 @@ import _k2
 from _k2 import RaggedArc
 from k2 import fsa_properties
 
+# Keys of `Fsa._cache` whose values depend on `Fsa.scores`. They are
+# removed by `Fsa._invalidate_cache_()` when the scores are re-assigned.
+_SCORE_DEPENDENT_CACHE_KEYS = frozenset([
+    prefix + precision + semiring
+    for prefix in ('forward_scores_', 'backward_scores_', 'tot_scores_',
+                   'arc_post_', 'arc_cdf_')
+    for precision in ('double_', 'float_')
+    for semiring in ('log', 'tropical')
+] + ['entering_arcs'])
+
 
 class Fsa(object):
     '''This class represents a single fsa or a vector of fsas.
@@ -160,6 +169,24 @@ class Fsa(object):
             arcs: RaggedArc = _k2.fsa_from_tensor(arcs)
         assert isinstance(arcs, RaggedArc)
 
+        self._init_arcs_(arcs, properties)
+        if aux_labels is not None:
+            if isinstance(aux_labels, torch.Tensor):
+                self.aux_labels = aux_labels.to(torch.int32)
+            else:
+                # ragged tensor
+                self.aux_labels = aux_labels
+        # Access the properties field (it's a @property, i.e. it has a
+        # getter) which sets up the properties and also checks that
+        # the FSA is valid.
+        _ = self.properties
+
+    def _init_arcs_(self, arcs: RaggedArc, properties: Optional[int]) -> None:
+        '''Set up `arcs` and the real attributes of this object.
+
+        Intended for internal use only, by :func:`__init__` and
+        :func:`_create_trusted`. It does not check the validity of `arcs`.
+        '''
         # Accessing self.__dict__ bypasses __setattr__.
         # Here we are setting self.arcs and self._properties.
         self.__dict__['arcs'] = arcs
@@ -221,23 +248,42 @@ class Fsa(object):
         for name in ['_tensor_attr', '_non_tensor_attr', '_cache']:
             self.__dict__[name] = dict()
 
-        self._tensor_attr['scores'] = _k2.as_float(self.arcs.values()[:, -1])
-        self._tensor_attr["labels"] = self.arcs.values()[:, 2]
+        values = arcs.values()
+        self._tensor_attr['scores'] = _k2.as_float(values[:, -1])
+        self._tensor_attr["labels"] = values[:, 2]
         # The attribute "fsa.labels_version" is used to check whether
         # "fsa.labels" has been inappropriately modified,
         # by comparing "fsa.labels_version" and "fsa.labels._version".
         # See https://github.com/k2-fsa/k2/pull/1140 for details.
         self.labels_version = self._tensor_attr["labels"]._version
-        if aux_labels is not None:
-            if isinstance(aux_labels, torch.Tensor):
-                self.aux_labels = aux_labels.to(torch.int32)
-            else:
-                # ragged tensor
-                self.aux_labels = aux_labels
-        # Access the properties field (it's a @property, i.e. it has a
-        # getter) which sets up the properties and also checks that
-        # the FSA is valid.
-        _ = self.properties
+
+    @classmethod
+    def _create_trusted(cls,
+                        arcs: RaggedArc,
+                        properties: Optional[int] = None) -> 'Fsa':
+        '''Create an Fsa from arcs that are known to be valid, e.g., the
+        raw output of a C++ algorithm in k2.
+
+        Intended for internal use only. Unlike :func:`__init__`, the
+        properties are not computed here, so the validity check is skipped;
+        if `properties` is None, they will be computed (and checked) the
+        first time :attr:`properties` is accessed.
+
+        Args:
+          arcs:
+            A `_k2.RaggedArc` with 2 or 3 axes.
+          properties:
+            The properties of `arcs` if known, e.g., as inherited from the
+            source FSA(s) of an operation that does not change them.
+            They are not checked.
+
+        Returns:
+          An instance of Fsa.
+        '''
+        assert isinstance(arcs, RaggedArc)
+        ans = cls.__new__(cls)
+        ans._init_arcs_(arcs, properties)
+        return ans
 
     def _invalidate_cache_(self, scores_only: bool = True) -> None:
         '''Intended for internal use only so its
@@ -254,23 +300,17 @@ class Fsa(object):
             to scores. If False, the whole cache is invalidated.
 
         '''
+        cache = self.__dict__['_cache']
+        if not cache:
+            return
+
         if scores_only is False:
             self.__dict__['_cache'] = dict()
         else:
-            pattern = re.compile(r'score|arc_cdf|arc_post')
-            to_remove = []
-
-            for key in self.__dict__['_cache']:
-                if pattern.search(key):
-                    to_remove.append(key)
-
-            if 'entering_arcs' in self.__dict__['_cache']:
-                # We also need to remove "entering_arcs"
-                # since it may be set in get_forward_scores()
-                to_remove.append('entering_arcs')
-
-            for key in to_remove:
-                del self.__dict__['_cache'][key]
+            # Note: it also removes "entering_arcs" since it may be set in
+            # get_forward_scores()
+            for key in _SCORE_DEPENDENT_CACHE_KEYS.intersection(cache):
+                del cache[key]
 
     def to_str(self, openfst: bool = False) -> str:
         extra_labels = []
@@ -296,7 +336,7 @@ class Fsa(object):
                     extra_labels=[x[start:end] for x in extra_labels],
                     ragged_labels=[x[start:end] for x in ragged_labels])
         ans += 'properties_str = ' + _k2.fsa_properties_as_str(
-            self._properties) + '.'
+            self.properties) + '.'
         for name, value in self.named_tensor_attr(include_scores=False):
             sep = '\n'
             ans += f'{sep}{name}: {value}'
@@ -1027,7 +1067,7 @@ class Fsa(object):
         ragged_arc, start = self.arcs.index(0, i)
         end = start + ragged_arc.values().shape[0]
 
-        out_fsa = Fsa(ragged_arc)
+        out_fsa = Fsa._create_trusted(ragged_arc)
         for name, value in self.named_tensor_attr(include_scores=False):
             if isinstance(value, torch.Tensor):
                 setattr(out_fsa, name, value[start:end])
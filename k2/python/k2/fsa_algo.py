@@ -1069,22 +1069,13 @@ def expand_ragged_attributes(fsas: Fsa,
 
     # The rest of this function is a modified version of
     # `fsa_from_unary_function_tensor()`.
-    dest = Fsa(dest_arcs)
+    dest = Fsa._create_trusted(dest_arcs)
 
     # Handle the non-ragged attributes, and ragged attributes that
     # we're not linearizing.
-    for name, value in fsas.named_tensor_attr(include_scores=False):
-        if isinstance(value, torch.Tensor):
-            filler = float(fsas.get_filler(name))
-            new_value = index_select(value, arc_map, default_value=filler)
-            setattr(dest, name, new_value)
-        elif name not in ragged_attribute_names:
-            assert isinstance(value, k2.RaggedTensor)
-            assert value.dtype == torch.int32
-            new_value, _ = value.index(arc_map,
-                                       axis=0,
-                                       need_value_indexes=False)
-            setattr(dest, name, new_value)
+    for name, new_value in k2.utils._index_tensor_attr(
+            fsas, arc_map, skip=tuple(ragged_attribute_names)).items():
+        setattr(dest, name, new_value)
 
     # Handle the attributes that were ragged but are now linear
     for name, value in zip(ragged_attribute_names, dest_labels):
@@ -1375,23 +1366,102 @@ def levenshtein_graph(
     return fsa
 
 
+def _prepare_levenshtein_inputs(
+    refs: Union[k2.RaggedTensor, List[List[int]]],
+    hyps: Union[k2.RaggedTensor, List[List[int]]],
+    hyp_to_ref_map: torch.Tensor,
+) -> Tuple[k2.RaggedTensor, k2.RaggedTensor, torch.Tensor]:
+    '''Move the inputs of :func:`levenshtein_distance` to CPU, which is the
+    only device supported by `_k2.levenshtein_distance`.'''
+    if not isinstance(refs, k2.RaggedTensor):
+        refs = k2.RaggedTensor(refs, dtype=torch.int32)
+    if not isinstance(hyps, k2.RaggedTensor):
+        hyps = k2.RaggedTensor(hyps, dtype=torch.int32)
+    hyp_to_ref_map = hyp_to_ref_map.to(device='cpu', dtype=torch.int32)
+    return refs.to('cpu'), hyps.to('cpu'), hyp_to_ref_map
+
+
+def levenshtein_distance(
+        refs: Union[k2.RaggedTensor, List[List[int]]],
+        hyps: Union[k2.RaggedTensor, List[List[int]]],
+        hyp_to_ref_map: torch.Tensor,
+        band: Optional[int] = None,
+) -> torch.Tensor:
+    '''Compute the levenshtein distance between each hyp and its
+    corresponding ref.
+
+    It gives the same result as
+    ``-levenshtein_alignment(...).get_tot_scores(True, False)``, but is much
+    faster since it uses dynamic programming on the symbol sequences directly
+    instead of intersecting levenshtein graphs. The computation is done on
+    CPU, with the hyps processed by multiple threads.
+
+    Args:
+      refs:
+        The reference sequences. Either a list-of-list of integers, or a
+        :class:`k2.RaggedTensor` with 2 axes and dtype torch.int32.
+      hyps:
+        The hypothesis sequences, of the same type as `refs`.
+      hyp_to_ref_map:
+        A 1-D torch.Tensor mapping the index of each hyp to the index of
+        the ref it is compared with. `hyp_to_ref_map.shape[0]` must equal the
+        number of hyps.
+      band:
+        If not None, only alignments in which the difference between the
+        number of ref symbols and hyp symbols consumed stays within
+        ``max(band, abs(len(ref) - len(hyp)))`` are considered. The result is
+        exact if the distance does not exceed `band`, and an upper bound
+        otherwise. It reduces the cost from O(len(ref) * len(hyp)) to
+        O(band * len(ref)).
+    Returns:
+      Return a 1-D torch.Tensor with dtype torch.int32 on the same device as
+      `hyp_to_ref_map`, containing the distance of each hyp.
+
+    Examples:
+      >>> k2.levenshtein_distance(
+              refs=[[1, 2, 4]],
+              hyps=[[1, 2, 3], [1, 3, 3, 2]],
+              hyp_to_ref_map=torch.tensor([0, 0], dtype=torch.int32))
+      tensor([1, 3], dtype=torch.int32)
+    '''
+    device = hyp_to_ref_map.device
+    refs, hyps, hyp_to_ref_map = _prepare_levenshtein_inputs(
+        refs, hyps, hyp_to_ref_map)
+    distances, _, _, _ = _k2.levenshtein_distance(refs,
+                                                  hyps,
+                                                  hyp_to_ref_map,
+                                                  band=band or 0,
+                                                  need_alignment=False)
+    return distances.to(device)
+
+
 def levenshtein_alignment(
-        refs: Fsa,
-        hyps: Fsa,
+        refs: Union[Fsa, k2.RaggedTensor, List[List[int]]],
+        hyps: Union[Fsa, k2.RaggedTensor, List[List[int]]],
         hyp_to_ref_map: torch.Tensor,
         sorted_match_ref: bool = False,
+        band: Optional[int] = None,
 ) -> Fsa:
     '''Get the levenshtein alignment of two FsaVecs
 
     This function supports both CPU and GPU. But it is very slow on CPU.
 
+    If `refs` and `hyps` are symbol sequences instead of levenshtein graphs,
+    the alignment is computed on CPU with dynamic programming, which is much
+    faster; see :func:`levenshtein_distance`. The scores and attributes of
+    the returned FsaVec are the same, though the alignment may differ when
+    there are several alignments with the same score.
+
     Args:
       refs:
         An FsaVec (must have 3 axes, i.e., `len(refs.shape) == 3`. It is the
-        output Fsa of the :func:`levenshtein_graph`.
+        output Fsa of the :func:`levenshtein_graph`. It can also be a
+        list-of-list of integers or a :class:`k2.RaggedTensor` containing the
+        symbol sequences.
       hyps:
         An FsaVec (must have 3 axes) on the same device as `refs`. It is the
-        output Fsa of the :func:`levenshtein_graph`.
+        output Fsa of the :func:`levenshtein_graph`. It has to be symbol
+        sequences if `refs` is.
       hyp_to_ref_map:
         A 1-D torch.Tensor with dtype torch.int32 on the same device
         as `refs`. Map from FSA-id in `hpys` to the corresponding
@@ -1405,7 +1475,10 @@ def levenshtein_alignment(
       sorted_match_ref:
         If true, the arcs of refs must be sorted by label (checked by
         calling code via properties), and we'll use a matching approach
-        that requires this.
+        that requires this. Unused if `refs` contains symbol sequences.
+      band:
+        See :func:`levenshtein_distance`. It can be used only if `refs`
+        contains symbol sequences.
 
     Returns:
       Returns an FsaVec containing the alignment information and satisfing
@@ -1432,6 +1505,19 @@ def levenshtein_alignment(
               use_double_scores=False, log_semiring=False))
       tensor([1., 3.])
     '''
+    if not isinstance(refs, Fsa):
+        assert not isinstance(hyps, Fsa)
+        device = hyp_to_ref_map.device
+        refs, hyps, hyp_to_ref_map = _prepare_levenshtein_inputs(
+            refs, hyps, hyp_to_ref_map)
+        _, arcs, ref_labels, hyp_labels = _k2.levenshtein_distance(
+            refs, hyps, hyp_to_ref_map, band=band or 0, need_alignment=True)
+        alignment = Fsa(arcs)
+        alignment.ref_labels = ref_labels
+        alignment.hyp_labels = hyp_labels
+        return alignment.to(device)
+
+    assert band is None, 'band is supported only for symbol sequences'
     assert hasattr(refs, "aux_labels")
     assert hasattr(hyps, "aux_labels")
 
@@ -5,7 +5,7 @@
 # See https://github.com/k2-fsa/snowfall/issues/232 for more details
 #
 import logging
-from typing import List, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import torch
 import _k2
@@ -62,6 +62,55 @@ def _get_texts(
         return aux_labels.tolist()
 
 
+# Multiplier of the polynomial hash of word sequences. It is odd so that
+# multiplying by it is a bijection modulo 2**64.
+_HASH_BASE = 0x100000001B3
+
+
+def _to_int64(x: int) -> int:
+    '''Convert a Python integer to a signed 64-bit integer, wrapping around
+    like integer overflow in torch.int64 does.'''
+    x &= (1 << 64) - 1
+    return x - (1 << 64) if x >= (1 << 63) else x
+
+
+def hash_word_seqs(word_seqs: k2.RaggedTensor) -> torch.Tensor:
+    '''Compute a 64-bit hash for each word sequence.
+
+    The hash depends only on the words of a sequence, so it is the same across
+    Nbest objects, batches and devices, and can be used as a key to cache
+    per-hypothesis results.
+
+    Args:
+      word_seqs:
+        A ragged tensor with 2 axes [path][word_id] and dtype torch.int32.
+    Returns:
+      Return a 1-D torch.Tensor with dtype torch.int64 on the same device as
+      `word_seqs`, with one hash per sequence.
+    '''
+    assert word_seqs.num_axes == 2, word_seqs.num_axes
+    device = word_seqs.device
+    row_splits = word_seqs.shape.row_splits(1).long()
+    row_ids = word_seqs.shape.row_ids(1).long()
+    lengths = row_splits[1:] - row_splits[:-1]
+
+    max_len = int(lengths.max()) if lengths.numel() > 0 else 0
+    powers = [1]
+    for _ in range(max_len):
+        powers.append(powers[-1] * _HASH_BASE)
+    powers = torch.tensor([_to_int64(p) for p in powers],
+                          dtype=torch.int64,
+                          device=device)
+
+    # pos[i] is the position of the i-th word within its sequence
+    pos = torch.arange(row_ids.numel(), device=device) - row_splits[row_ids]
+    # Add 1 so that word 0 contributes to the hash. Overflow wraps around.
+    terms = (word_seqs.values.long() + 1) * powers[pos + 1]
+    hashes = lengths.clone()
+    hashes.index_add_(0, row_ids, terms)
+    return hashes
+
+
 class Nbest(object):
     '''
     An Nbest object contains two fields:
@@ -75,21 +124,31 @@ class Nbest(object):
     the number of utterances, which is also the number of rows in the
     supervision_segments. `shape.tot_size(1)` contains the number
     of paths, which is also the number of FSAs in `fsa`.
+
+    Optionally, the field `word_seqs` is a ragged tensor with axes
+    [path][word_id] containing the word sequence of each path. If it is
+    None, it is computed from `fsa.aux_labels` on demand.
     '''
 
     def __init__(self,
                  fsa: k2.Fsa,
                  shape: k2.RaggedShape,
-                 kept_path: k2.RaggedTensor = None) -> None:
+                 kept_path: k2.RaggedTensor = None,
+                 word_seqs: Optional[k2.RaggedTensor] = None) -> None:
         assert len(fsa.shape) == 3, f'fsa.shape: {fsa.shape}'
         assert shape.num_axes == 2, f'num_axes: {shape.num_axes}'
 
         assert fsa.shape[0] == shape.tot_size(1), \
                 f'{fsa.shape[0]} vs {shape.tot_size(1)}'
+        if word_seqs is not None:
+            assert word_seqs.dim0 == shape.tot_size(1), \
+                    f'{word_seqs.dim0} vs {shape.tot_size(1)}'
 
         self.fsa = fsa
         self.shape = shape
         self.kept_path = kept_path
+        self.word_seqs = word_seqs
+        self._hyp_hashes = None
 
     def __str__(self):
         s = 'Nbest('
@@ -154,7 +213,11 @@ class Nbest(object):
         #
         # `new2old` is a 1-D torch.Tensor mapping from the output path index
         # to the input path index.
-        _, _, new2old = word_seq.unique(
+        #
+        # `unique_word_seq` has axes [utt][path][word_id] and is kept
+        # in the returned Nbest so that it need not be recomputed from the
+        # aux_labels of the paths.
+        unique_word_seq, _, new2old = word_seq.unique(
             need_num_repeats=False, need_new2old_indexes=True
         )
 
@@ -195,7 +258,61 @@ class Nbest(object):
         # Detailed in k2/python/k2/ops.py.
         fsa.scores = k2.index_select(lattice.scores,
                                      kept_path.values.to(lattice.scores.device))
-        return Nbest(fsa=fsa, shape=utt_to_path_shape, kept_path=kept_path)
+        return Nbest(fsa=fsa,
+                     shape=utt_to_path_shape,
+                     kept_path=kept_path,
+                     word_seqs=unique_word_seq.remove_axis(0))
+
+    def get_word_seqs(self) -> k2.RaggedTensor:
+        '''Return a ragged tensor with axes [path][word_id] containing the
+        word sequence of each path, without 0s and -1s.'''
+        if self.word_seqs is None:
+            self.word_seqs = _get_texts(self.fsa, return_ragged=True)
+        return self.word_seqs
+
+    @property
+    def hyp_hashes(self) -> torch.Tensor:
+        '''A 1-D torch.Tensor with dtype torch.int64 containing the hash of
+        the word sequence of each path. See :func:`hash_word_seqs`.'''
+        if self._hyp_hashes is None:
+            self._hyp_hashes = hash_word_seqs(self.get_word_seqs())
+        return self._hyp_hashes
+
+    def index(self, indexes: torch.Tensor) -> 'Nbest':
+        '''Select a subset of the paths in this Nbest.
+
+        Args:
+          indexes:
+            A 1-D torch.Tensor with dtype torch.int32 or torch.int64
+            containing the indexes of the selected paths. It must be sorted
+            so that the utterance of each path is non-decreasing.
+        Returns:
+          Return a new Nbest containing the selected paths. The number of
+          utterances is the same as that of `self`.
+        '''
+        indexes = indexes.to(device=self.fsa.device, dtype=torch.int32)
+        row_ids = self.shape.row_ids(1).to(self.fsa.device).long()
+        num_paths = torch.bincount(row_ids[indexes.long()],
+                                   minlength=self.shape.dim0)
+        row_splits = torch.zeros(self.shape.dim0 + 1,
+                                 dtype=torch.int32,
+                                 device=self.fsa.device)
+        torch.cumsum(num_paths, dim=0, out=row_splits[1:])
+        shape = k2.ragged.create_ragged_shape2(row_splits=row_splits,
+                                               cached_tot_size=indexes.numel())
+
+        word_seqs = None
+        if self.word_seqs is not None:
+            word_seqs, _ = self.word_seqs.index(
+                indexes.to(self.word_seqs.device),
+                axis=0,
+                need_value_indexes=False)
+        ans = Nbest(fsa=k2.index_fsa(self.fsa, indexes),
+                    shape=shape,
+                    word_seqs=word_seqs)
+        if self._hyp_hashes is not None:
+            ans._hyp_hashes = self._hyp_hashes[indexes.long()]
+        return ans
 
     def intersect(self, lats: Fsa) -> 'Nbest':
         '''Intersect this Nbest object with a lattice and get 1-best
@@ -269,21 +386,24 @@ class Nbest(object):
         '''
         ragged_scores = self.total_scores()
 
-        # indexes contains idx01's for self.shape
-        # ragged_scores.values()[indexes] is sorted
-        # Note: ragged_scores is changed **in-place**
-        indexes = ragged_scores.sort_(descending=True,
-                                      need_new2old_indexes=True)
-
-        ragged_indexes = k2.RaggedTensor(self.shape, indexes)
+        # ragged_indexes contains idx01's for self.shape of the top-k
+        # paths of each utterance, sorted by their tot_scores.
+        _, ragged_indexes = ragged_scores.topk(k)
 
         padded_indexes = ragged_indexes.pad(mode='replicate', padding_value=-1)
         assert torch.ge(padded_indexes, 0).all(), \
                 'Some utterances contain empty ' \
                 f'n-best: {self.shape.row_splits(1)}'
 
+        if 0 < padded_indexes.size(1) < k:
+            # All utterances have less than k paths
+            num_repeats = k - padded_indexes.size(1)
+            padded_indexes = torch.cat(
+                [padded_indexes, padded_indexes[:, -1:].repeat(1, num_repeats)],
+                dim=1)
+
         # Select the idx01's of top-k paths of each utterance
-        top_k_indexes = padded_indexes[:, :k].flatten().contiguous()
+        top_k_indexes = padded_indexes.flatten().contiguous()
 
         top_k_fsas = k2.index_fsa(self.fsa, top_k_indexes)
 
@@ -293,8 +413,92 @@ class Nbest(object):
 
     def build_levenshtein_graphs(self) -> k2.Fsa:
         """Return an FsaVec with axes [utt][state][arc]."""
-        word_ids = _get_texts(self.fsa, return_ragged=True)
-        return k2.levenshtein_graph(word_ids)
+        return k2.levenshtein_graph(self.get_word_seqs())
+
+
+class HypothesisCache(object):
+    '''Cache per-hypothesis scores across rescoring passes, keyed by
+    :attr:`Nbest.hyp_hashes`, so that hypotheses already seen are not
+    rescored again.
+
+    CAUTION:
+      The key depends only on the word sequence. Scores that also depend on
+      the utterance, e.g., attention rescoring scores, must not be shared
+      across batches; use a new cache for each batch in that case.
+
+    Usage::
+
+        cache = k2.HypothesisCache()
+        lm_scores = cache.get_or_compute(nbest, compute_lm_scores)
+    '''
+
+    def __init__(self) -> None:
+        self._scores: Dict[int, float] = dict()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def clear(self) -> None:
+        self._scores.clear()
+
+    def lookup(self, nbest: Nbest) -> Tuple[torch.Tensor, torch.Tensor]:
+        '''Look up the cached scores of the paths of an Nbest.
+
+        Returns:
+          Return a tuple (scores, found), both 1-D torch.Tensors on the same
+          device as `nbest.fsa`. `found` is a torch.bool tensor indicating
+          whether each path is in the cache. `scores` has dtype
+          torch.float64 and contains the cached scores; its entries for paths
+          not found are 0.
+        '''
+        hashes = nbest.hyp_hashes.tolist()
+        found = [h in self._scores for h in hashes]
+        scores = [self._scores.get(h, 0.0) for h in hashes]
+        device = nbest.fsa.device
+        return (torch.tensor(scores, dtype=torch.float64, device=device),
+                torch.tensor(found, dtype=torch.bool, device=device))
+
+    def update(self, nbest: Nbest, scores: torch.Tensor) -> None:
+        '''Add the scores of the paths of an Nbest to the cache.
+
+        Args:
+          nbest:
+            The Nbest object.
+          scores:
+            A 1-D torch.Tensor with one score per path of `nbest`.
+        '''
+        assert scores.shape == (nbest.shape.tot_size(1),), scores.shape
+        self._scores.update(
+            zip(nbest.hyp_hashes.tolist(),
+                scores.detach().double().tolist()))
+
+    def get_or_compute(self, nbest: Nbest,
+                       compute: Callable[[Nbest], torch.Tensor]
+                      ) -> torch.Tensor:  # noqa
+        '''Return the scores of the paths of an Nbest, calling `compute`
+        only for the paths not in the cache.
+
+        Args:
+          nbest:
+            The Nbest object.
+          compute:
+            A function that takes an Nbest and returns a 1-D torch.Tensor
+            containing the score of each of its paths. It is called with
+            the subset of `nbest` returned by :func:`Nbest.index` containing
+            only the paths not in the cache. It is not called if all paths
+            are in the cache.
+        Returns:
+          Return a 1-D torch.Tensor with dtype torch.float64 containing the
+          score of each path of `nbest`. Scores are detached from autograd.
+        '''
+        scores, found = self.lookup(nbest)
+        missing = torch.nonzero(~found).squeeze(1)
+        if missing.numel() > 0:
+            sub_nbest = nbest.index(missing)
+            sub_scores = compute(sub_nbest).detach().to(scores)
+            self.update(sub_nbest, sub_scores)
+            scores[missing] = sub_scores
+        return scores
 
 
 def whole_lattice_rescoring(lats: Fsa, G_with_epsilon_loops: Fsa) -> Fsa:
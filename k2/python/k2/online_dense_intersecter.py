@@ -15,6 +15,7 @@
 # limitations under the License.
 
 from typing import List
+from typing import Optional
 from typing import Tuple
 
 import k2
@@ -101,10 +102,19 @@ class OnlineDenseIntersecter(object):
             min_active_states,
             max_active_states,
         )
+        # The output labels of the arcs of the decoding graph on CPU, used by
+        # partial_results()
+        if hasattr(self.decoding_graph, "aux_labels"):
+            self._output_labels = self.decoding_graph.aux_labels.to("cpu")
+        else:
+            self._output_labels = self.decoding_graph.labels.to("cpu")
 
     def decode(
-        self, dense_fsas: DenseFsaVec, decode_states: List[DecodeStateInfo]
-    ) -> Tuple[Fsa, List[DecodeStateInfo]]:
+        self,
+        dense_fsas: DenseFsaVec,
+        decode_states: List[DecodeStateInfo],
+        need_lattice: bool = True,
+    ) -> Tuple[Optional[Fsa], List[DecodeStateInfo]]:
         """Does intersection/composition for current chunk of nnet_output(given
         by a DenseFsaVec), sequences in every chunk may come from different
         sources.
@@ -119,16 +129,66 @@ class OnlineDenseIntersecter(object):
             corresponding position in current batch.
             For a new sequence(i.e. has no history states), just put ``None``
             at the corresponding position.
+          need_lattice:
+            If False, the output lattices are not generated, whose cost grows
+            with the number of frames decoded so far. Use
+            :func:`partial_results` to get the partial results in that case,
+            and generate the lattice only at the end of the sequences.
         Return:
           Return a tuple containing an Fsa and a List of new decoding states.
           The Fsa which has 3 axes(i.e. (batch, state, arc)) contains the output
-          lattices. See the example in the constructor to get more info about
-          how to use the list of new decoding states.
+          lattices; it is None if ``need_lattice`` is False. See the example in
+          the constructor to get more info about how to use the list of new
+          decoding states.
         """
         ragged_arc, arc_map, new_decode_states = self.intersecter.decode(
-            dense_fsas.dense_fsa_vec, decode_states
+            dense_fsas.dense_fsa_vec, decode_states, need_lattice
         )
+        if not need_lattice:
+            return None, new_decode_states
         out_fsa = k2.utils.fsa_from_unary_function_tensor(
             self.decoding_graph, ragged_arc, arc_map
         )
         return out_fsa, new_decode_states
+
+    def partial_results(
+        self, decode_states: List[DecodeStateInfo]
+    ) -> Tuple[List[List[int]], List[int]]:
+        """Get the best partial results of the given sequences.
+
+        It traces back the best path from the most recent frame of each
+        sequence without generating the lattice, and only as far as the frame
+        at which all surviving partial paths met during the previous call, so
+        its cost does not grow with the number of frames decoded.
+
+        Args:
+          decode_states:
+            The decoding states of the sequences, as returned by
+            :func:`decode`. CAUTION: They are updated in-place.
+        Return:
+          Return a tuple (results, num_stable), where ``results[i]`` contains
+          the output labels, i.e. ``aux_labels`` (or ``labels`` if the
+          decoding graph has no ``aux_labels``) without 0s and -1s, on the best
+          path of the i-th sequence. The first ``num_stable[i]`` labels of
+          ``results[i]`` will not change as more frames are decoded.
+        """
+        results = []
+        num_stable = []
+        for state in decode_states:
+            arcs, num_stable_arcs = state.partial_best_path()
+            if isinstance(self._output_labels, torch.Tensor):
+                labels = self._output_labels[arcs.long()]
+                results.append(labels[labels > 0].tolist())
+                num_stable.append(
+                    int((labels[:num_stable_arcs] > 0).sum().item())
+                )
+            else:
+                labels, _ = self._output_labels.index(
+                    arcs, axis=0, need_value_indexes=False
+                )
+                labels = labels.remove_values_leq(0)
+                results.append(labels.values.tolist())
+                num_stable.append(
+                    int(labels.shape.row_splits(1)[num_stable_arcs])
+                )
+        return results, num_stable
@@ -16,11 +16,13 @@
 # limitations under the License.
 
 from typing import List
+from typing import Optional
 from typing import Tuple
 from typing import Union
 import torch
 import k2
 import _k2
+from . import fsa_properties
 from .fsa import Fsa
 
 
@@ -28,12 +30,13 @@ class _IndexSelectFunction(torch.autograd.Function):
 
     @staticmethod
     def forward(ctx, src: torch.Tensor, index: torch.Tensor,
-                default_value: float) -> torch.Tensor:
+                default_value: float,
+                out: Optional[torch.Tensor]) -> torch.Tensor:
         '''Returns a new tensor which indexes the input tensor along dimension 0
         using the entries in `index`.
 
         If the entry in `index` is -1, then the corresponding entry in the
-        returned tensor is 0.
+        returned tensor is `default_value`.
 
         Caution:
           `index.dtype == torch.int32` and `index.ndim == 1`.
@@ -45,11 +48,13 @@ class _IndexSelectFunction(torch.autograd.Function):
           index:
             1-D tensor of dtype torch.int32 containing the indexes.
             If an entry is -1, the corresponding entry in the returned value
-            is 0. The elements of `index` should be in the range
-            `[-1..src.shape[0]-1]`.
+            is `default_value`. The elements of `index` should be in the
+            range `[-1..src.shape[0]-1]`.
           default_value:
-            Used only when `src` is a 1-D tensor. It sets ans[i] to
-            default_value if index[i] is -1.
+            It sets all elements of ans[i] to default_value if index[i]
+            is -1.
+          out:
+            If not None, the result is written to it and it is returned.
 
         Returns:
           A tensor with shape (index.numel(), *src.shape[1:]) and dtype the
@@ -58,10 +63,12 @@ class _IndexSelectFunction(torch.autograd.Function):
           (index.shape[0], src.shape[1]).
           Will satisfy `ans[i] == src[index[i]]` if `src.ndim == 1`,
           or `ans[i,j] == src[index[i],j]` if `src.ndim == 2`, except for
-          entries where `index[i] == -1` which will be zero.
+          entries where `index[i] == -1` which will be `default_value`.
         '''
         ctx.save_for_backward(src, index)
-        return _k2.index_select(src, index, default_value)
+        if out is not None:
+            ctx.mark_dirty(out)
+        return _k2.index_select(src, index, default_value, out)
 
     @staticmethod
     def backward(ctx, out_grad) -> Tuple[torch.Tensor, None]:
@@ -75,19 +82,21 @@ class _IndexSelectFunction(torch.autograd.Function):
         return (
             ans,  # src
             None,  # index
-            None  # default_value
+            None,  # default_value
+            None  # out
         )
 
 
 # put index_select here instead of in `autograd.py` to break circular import
 def index_select(src: torch.Tensor,
                  index: torch.Tensor,
-                 default_value: float = 0) -> torch.Tensor:
+                 default_value: float = 0,
+                 out: Optional[torch.Tensor] = None) -> torch.Tensor:
     '''Returns a new tensor which indexes the input tensor along dimension 0
     using the entries in `index`.
 
     If the entry in `index` is -1, then the corresponding entry in the
-    returned tensor is 0.
+    returned tensor is `default_value`.
 
     Caution:
       `index.dtype == torch.int32` and `index.ndim == 1`.
@@ -99,11 +108,15 @@ def index_select(src: torch.Tensor,
       index:
         1-D tensor of dtype `torch.int32` containing the indexes.
         If an entry is -1, the corresponding entry in the returned value
-        is 0. The elements of `index` should be in the range
+        is `default_value`. The elements of `index` should be in the range
         `[-1..src.shape[0]-1]`.
       default_value:
-        Used only when `src` is a 1-D tensor. It sets ans[i] to default_value
-        if index[i] is -1.
+        It sets all elements of ans[i] to default_value if index[i] is -1.
+      out:
+        Optional. If not None, the result is written to it instead of to a
+        newly allocated tensor, and `out` is returned. It must have the same
+        dtype and device as `src` and shape ``(index.numel(),
+        *src.shape[1:])``; if it is 1-D, it has to be contiguous.
 
     Returns:
       A tensor with shape ``(index.numel(), *src.shape[1:])`` and dtype the
@@ -112,12 +125,98 @@ def index_select(src: torch.Tensor,
       `(index.shape[0], src.shape[1])`.
       Will satisfy `ans[i] == src[index[i]]` if `src.ndim == 1`,
       or `ans[i, j] == src[index[i], j]` if `src.ndim == 2`, except for
-      entries where `index[i] == -1` which will be zero.
+      entries where `index[i] == -1` which will be `default_value`.
     '''
-    ans = _IndexSelectFunction.apply(src, index, default_value)
+    ans = _IndexSelectFunction.apply(src, index, default_value, out)
     return ans
 
 
+class _IndexSelectMultiFunction(torch.autograd.Function):
+
+    @staticmethod
+    def forward(ctx, index: torch.Tensor, default_values: List[float],
+                *srcs: torch.Tensor) -> Tuple[torch.Tensor, ...]:
+        '''Index a list of 1-D tensors with the same `index`.
+
+        See :func:`index_select_multi` for the meaning of the arguments.
+        '''
+        ans = _k2.index_select_multi(list(srcs), index, default_values)
+        ctx.save_for_backward(index)
+        ctx.src_shapes = [src.shape for src in srcs]
+        ctx.mark_non_differentiable(
+            *[a for a in ans if not a.dtype.is_floating_point])
+        return tuple(ans)
+
+    @staticmethod
+    def backward(ctx, *out_grads) -> Tuple[Optional[torch.Tensor], ...]:
+        index, = ctx.saved_tensors
+        ans = []
+        for i, (shape, out_grad) in enumerate(zip(ctx.src_shapes,
+                                                  out_grads)):
+            if not ctx.needs_input_grad[i + 2]:
+                ans.append(None)
+                continue
+            src_grad = torch.zeros(shape,
+                                   dtype=out_grad.dtype,
+                                   device=out_grad.device,
+                                   requires_grad=False)
+            _k2.index_add(index, out_grad, src_grad)
+            ans.append(src_grad)
+        return (
+            None,  # index
+            None,  # default_values
+            *ans  # srcs
+        )
+
+
+def index_select_multi(
+        srcs: List[torch.Tensor],
+        index: torch.Tensor,
+        default_values: Optional[List[float]] = None
+) -> List[torch.Tensor]:  # noqa
+    '''Index a list of 1-D tensors with the same `index`.
+
+    It is equivalent to::
+
+        [index_select(src, index, d) for src, d in zip(srcs, default_values)]
+
+    but all tensors are indexed in a single pass over `index` (tensors with
+    the same dtype share a single kernel launch on CUDA), which saves the
+    overhead of indexing them one by one, e.g., when propagating the
+    attributes of an FSA through an arc map.
+
+    Caution:
+      `index.dtype == torch.int32` and `index.ndim == 1`.
+
+    Args:
+      srcs:
+        A list of 1-D tensors. Supported dtypes are `torch.int32`,
+        `torch.int64`, `torch.float32`, and `torch.float64`; they may differ
+        between tensors. Autograd is supported for floating point tensors.
+      index:
+        1-D tensor of dtype `torch.int32` containing the indexes.
+        The elements of `index` should be in the range
+        `[-1..srcs[k].shape[0]-1]`.
+      default_values:
+        Optional. If not None, `default_values[k]` is the value of
+        `ans[k][i]` if `index[i]` is -1. If None, it defaults to 0 for
+        all tensors.
+
+    Returns:
+      A list of tensors with `len(ans) == len(srcs)`, where `ans[k]` has the
+      same dtype as `srcs[k]` and shape `(index.numel(),)`.
+    '''
+    if default_values is None:
+        default_values = [0.0] * len(srcs)
+    assert len(default_values) == len(srcs)
+    if len(srcs) == 0:
+        return []
+
+    default_values = [float(d) for d in default_values]
+    ans = _IndexSelectMultiFunction.apply(index, default_values, *srcs)
+    return list(ans)
+
+
 def index_add(index: torch.Tensor, value: torch.Tensor,
               in_out: torch.Tensor) -> None:
     '''It implements in_out[index[i]] += value[i].
@@ -174,7 +273,7 @@ def index_fsa(src: Fsa, indexes: torch.Tensor) -> Fsa:
                                           axis=0,
                                           indexes=indexes,
                                           need_value_indexes=True)
-    out_fsa = Fsa(ragged_arc)
+    out_fsa = Fsa._create_trusted(ragged_arc)
 
     for name, value in src.named_tensor_attr():
         if isinstance(value, torch.Tensor):
@@ -195,6 +294,27 @@ def index_fsa(src: Fsa, indexes: torch.Tensor) -> Fsa:
     return out_fsa
 
 
+def _and_properties(fsas: List[Fsa]) -> Optional[int]:
+    '''Return the properties of the FsaVec that concatenates `fsas`.
+
+    The properties of an FsaVec are the bitwise AND of the properties of
+    its FSAs, so they can be inherited without checking the FsaVec again.
+
+    Args:
+      fsas:
+        A list of Fsa or FsaVec.
+    Returns:
+      Return None if the properties of some element of `fsas` have not
+      been computed yet.
+    '''
+    ans = fsa_properties.ALL
+    for fsa in fsas:
+        if fsa.__dict__['_properties'] is None:
+            return None
+        ans &= fsa.properties
+    return ans
+
+
 def cat(srcs: List[Fsa]) -> Fsa:
     '''Concatenate a list of FsaVec into a single FsaVec.
 
@@ -213,36 +333,85 @@ def cat(srcs: List[Fsa]) -> Fsa:
     for src in srcs:
         assert len(src.shape) == 3, f'Expect an FsaVec. Given: {src.shape}'
 
-    src_ragged_arcs = [fsa.arcs for fsa in srcs]
+    common_tensor_attributes = set.intersection(
+        *[set(src._tensor_attr.keys()) for src in srcs])
+    # Keep the order of the first FsaVec
+    names = [
+        name for name in srcs[0]._tensor_attr.keys()
+        if name in common_tensor_attributes
+    ]
+
+    tensor_names, tensor_attrs, ragged_names, ragged_attrs = \
+            _collect_tensor_attrs(srcs, names)
+
+    ans_ragged_arcs, tensor_values, ragged_values = \
+            _k2.cat_fsa_vec_with_attrs([src.arcs for src in srcs],
+                                       tensor_attrs, ragged_attrs)
+    out_fsa = Fsa._create_trusted(ans_ragged_arcs,
+                                  properties=_and_properties(srcs))
+    _set_tensor_attrs(out_fsa, tensor_names, tensor_values, ragged_names,
+                      ragged_values)
 
-    ans_ragged_arcs = _k2.cat(src_ragged_arcs, axis=0)
-    out_fsa = Fsa(ans_ragged_arcs)
+    for src in srcs:
+        for name, value in src.named_non_tensor_attr():
+            if not hasattr(out_fsa, name):
+                setattr(out_fsa, name, value)
 
-    common_tensor_attributes = (
-        set(dict(src.named_tensor_attr()).keys()) for src in srcs)
+    return out_fsa
 
-    common_tensor_attributes = set.intersection(
-        *list(common_tensor_attributes))
 
-    for name in common_tensor_attributes:
-        # We assume that the type of the attributes among
-        # FsaVecs are the same if they share the same name.
-        values = [getattr(src, name) for src in srcs]
+def _collect_tensor_attrs(
+    srcs: List[Fsa], names: List[str]
+) -> Tuple[List[str], List[List[torch.Tensor]], List[str],
+           List[List[k2.RaggedTensor]]]:  # noqa
+    '''Collect the values of the given tensor attributes of `srcs`, so that
+    they can be concatenated by a single call to
+    `_k2.create_fsa_vec_with_attrs()` or `_k2.cat_fsa_vec_with_attrs()`.
+
+    `labels` is skipped since it is part of the arcs. `scores` is skipped
+    unless some of the inputs require grad, since it is also part of the
+    arcs and is concatenated along with them.
+
+    We assume that an attribute with the same name has the same type
+    in all `srcs`; for tensor attributes, the shapes of the values differ
+    only in shape[0].
+
+    Returns:
+      Return a tuple (tensor_names, tensor_attrs, ragged_names, ragged_attrs),
+      where `tensor_attrs[i][j]` is the value of the attribute
+      `tensor_names[i]` of `srcs[j]`; similarly for ragged attributes.
+    '''
+    tensor_names = []
+    tensor_attrs = []
+    ragged_names = []
+    ragged_attrs = []
+    for name in names:
+        if name == 'labels':
+            continue
+        values = [src._tensor_attr[name] for src in srcs]
         if isinstance(values[0], torch.Tensor):
-            # NOTE: We assume the shape of elements in values
-            # differ only in shape[0].
-            value = torch.cat(values)
+            if name == 'scores' and not any(v.requires_grad for v in values):
+                continue
+            tensor_names.append(name)
+            tensor_attrs.append(values)
         else:
             assert isinstance(values[0], k2.RaggedTensor)
-            value = k2.ragged.cat(values, axis=0)
-        setattr(out_fsa, name, value)
+            ragged_names.append(name)
+            ragged_attrs.append(values)
+    return tensor_names, tensor_attrs, ragged_names, ragged_attrs
 
-    for src in srcs:
-        for name, value in src.named_non_tensor_attr():
-            if not hasattr(out_fsa, name):
-                setattr(out_fsa, name, value)
 
-    return out_fsa
+def _set_tensor_attrs(fsa: Fsa, tensor_names: List[str],
+                      tensor_values: List[torch.Tensor],
+                      ragged_names: List[str],
+                      ragged_values: List[k2.RaggedTensor]) -> None:
+    '''Set the tensor attributes concatenated from the values returned by
+    :func:`_collect_tensor_attrs`.
+    '''
+    for name, value in zip(tensor_names, tensor_values):
+        setattr(fsa, name, value)
+    for name, value in zip(ragged_names, ragged_values):
+        setattr(fsa, name, value)
 
 
 def compose_arc_maps(step1_arc_map: torch.Tensor,
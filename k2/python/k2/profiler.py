@@ -0,0 +1,318 @@
+# Copyright      2026  Xiaomi Corp.
+#
+# See ../../../LICENSE for clarification regarding multiple authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# An opt-in profiler for the native (i.e., C++) operations of k2.
+#
+# Usage:
+#
+#   with k2.profiler.record() as prof:
+#       lattice = k2.intersect_dense_pruned(...)
+#       best_path = k2.shortest_path(lattice, use_double_scores=True)
+#   print(prof.table())
+#   prof.export_chrome_trace('trace.json')
+#
+# While any thread is recording, the functions of the `_k2` extension module,
+# as well as the methods of some of its classes, are replaced by wrappers
+# that measure them. They are restored when the last recording stops, so there
+# is no overhead at all when the profiler is not used. The wrappers record
+# only the calls made by the threads that are recording; the calls of other
+# threads pass through, with a small overhead.
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import types
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+import torch
+import _k2
+
+# The methods of these classes are also profiled
+_PROFILED_CLASSES = ('OnlineDenseIntersecter', 'RnntDecodingStreams')
+
+# Functions that are not profiled, e.g., the ones used by the profiler itself
+_EXCLUDED_FUNCTIONS = frozenset([
+    'empty_cpu_allocator_cache',
+    'get_cpu_allocator_stats',
+    'reset_cpu_allocator_peak_stats',
+    'set_cpu_allocator_cache_limit',
+])
+
+# Protects the statistics of the profiles
+_lock = threading.Lock()
+
+# Protects _num_recordings and _patched
+_patch_lock = threading.Lock()
+# Number of recordings in progress (in all threads)
+_num_recordings = 0
+# (owner, name, original) of the patched functions while
+# _num_recordings > 0
+_patched = []  # type: List[tuple]
+
+# `_thread_state.profile` is the profile recorded by the current thread, if
+# any.
+_thread_state = threading.local()
+
+
+def _current_profile() -> Optional['Profile']:
+    return getattr(_thread_state, 'profile', None)
+
+
+class OpStats(object):
+    '''Accumulated statistics of a native operation.'''
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        # wall time in seconds
+        self.total_time = 0.0
+        self.max_time = 0.0
+        # Total number of arcs of the FSAs passed to/returned by this op
+        self.num_input_arcs = 0
+        self.num_output_arcs = 0
+        # Number of allocations and bytes allocated by the CPU allocator
+        # of k2 during this op. See k2.get_cpu_allocator_stats().
+        # The allocator counts for the whole process, so allocations made by
+        # other threads while this op runs are included too.
+        self.num_allocs = 0
+        self.allocated_bytes = 0
+
+    @property
+    def avg_time(self) -> float:
+        return self.total_time / max(self.count, 1)
+
+
+class Profile(object):
+    '''Results of :func:`record`.'''
+
+    def __init__(self, sync_cuda: bool = False):
+        # See :func:`record`
+        self.sync_cuda = sync_cuda
+        self.ops = dict()  # type: Dict[str, OpStats]
+        self.events = []  # type: List[Dict[str, Any]]
+        self.start_time = time.perf_counter()
+
+    def _add(self, name: str, start: float, elapsed: float,
+             num_input_arcs: int, num_output_arcs: int, num_allocs: int,
+             allocated_bytes: int) -> None:
+        with _lock:
+            op = self.ops.get(name)
+            if op is None:
+                op = OpStats(name)
+                self.ops[name] = op
+            op.count += 1
+            op.total_time += elapsed
+            op.max_time = max(op.max_time, elapsed)
+            op.num_input_arcs += num_input_arcs
+            op.num_output_arcs += num_output_arcs
+            op.num_allocs += num_allocs
+            op.allocated_bytes += allocated_bytes
+
+            self.events.append({
+                'name': name,
+                'ph': 'X',
+                'ts': (start - self.start_time) * 1e6,
+                'dur': elapsed * 1e6,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': {
+                    'num_input_arcs': num_input_arcs,
+                    'num_output_arcs': num_output_arcs,
+                    'num_allocs': num_allocs,
+                    'allocated_bytes': allocated_bytes,
+                },
+            })
+
+    def table(self, sort_by: str = 'total_time',
+              row_limit: Optional[int] = None) -> str:
+        '''Return a table of the statistics of each op as a string.
+
+        Args:
+          sort_by:
+            An attribute of :class:`OpStats` that the rows are sorted by,
+            in descending order.
+          row_limit:
+            If not None, show at most this number of rows.
+        '''
+        ops = sorted(self.ops.values(),
+                     key=lambda op: getattr(op, sort_by),
+                     reverse=True)
+        if row_limit is not None:
+            ops = ops[:row_limit]
+
+        header = (f'{"name":<40} {"count":>8} {"total(ms)":>12} '
+                  f'{"avg(ms)":>10} {"max(ms)":>10} {"in_arcs":>12} '
+                  f'{"out_arcs":>12} {"allocs":>10} {"alloc_bytes":>14}')
+        lines = [header, '-' * len(header)]
+        for op in ops:
+            lines.append(f'{op.name:<40} {op.count:>8} '
+                         f'{op.total_time * 1000:>12.3f} '
+                         f'{op.avg_time * 1000:>10.3f} '
+                         f'{op.max_time * 1000:>10.3f} '
+                         f'{op.num_input_arcs:>12} {op.num_output_arcs:>12} '
+                         f'{op.num_allocs:>10} {op.allocated_bytes:>14}')
+        lines.append('Note: allocs and alloc_bytes also include the '
+                     'allocations of other threads during each op.')
+        return '\n'.join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        '''Return the recorded calls in the Chrome trace event format, which
+        can be viewed in chrome://tracing or https://ui.perfetto.dev.
+        '''
+        return {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, filename: str) -> None:
+        '''Save :func:`chrome_trace` to a JSON file.'''
+        with open(filename, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def __str__(self) -> str:
+        return self.table()
+
+
+def _num_arcs(obj: Any) -> int:
+    '''Return the total number of arcs in `obj`, which may be a
+    `_k2.RaggedArc` or a tuple/list containing them.'''
+    if isinstance(obj, _k2.RaggedArc):
+        return obj.num_elements()
+    if isinstance(obj, (tuple, list)):
+        return sum(_num_arcs(o) for o in obj)
+    return 0
+
+
+def _wrap(name: str, func):
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _current_profile()
+        if profile is None:
+            return func(*args, **kwargs)
+
+        num_input_arcs = _num_arcs(args) + _num_arcs(list(kwargs.values()))
+        stats = _k2.get_cpu_allocator_stats()
+        start = time.perf_counter()
+        ans = func(*args, **kwargs)
+        if profile.sync_cuda:
+            torch.cuda.synchronize()
+        elapsed = time.perf_counter() - start
+        end_stats = _k2.get_cpu_allocator_stats()
+
+        profile._add(
+            name,
+            start=start,
+            elapsed=elapsed,
+            num_input_arcs=num_input_arcs,
+            num_output_arcs=_num_arcs(ans),
+            num_allocs=end_stats.num_allocs - stats.num_allocs,
+            allocated_bytes=(end_stats.total_allocated_bytes -
+                             stats.total_allocated_bytes))
+        return ans
+
+    return wrapper
+
+
+def _patch() -> List[tuple]:
+    '''Replace the functions of `_k2` with profiling wrappers.
+    Return a list of (owner, name, original) for restoring them.'''
+    patched = []
+    for name in dir(_k2):
+        value = getattr(_k2, name)
+        if (isinstance(value, types.BuiltinFunctionType) and
+                not name.startswith('_') and name not in _EXCLUDED_FUNCTIONS):
+            patched.append((_k2, name, value))
+            setattr(_k2, name, _wrap(name, value))
+
+    for class_name in _PROFILED_CLASSES:
+        cls = getattr(_k2, class_name)
+        for name, value in list(vars(cls).items()):
+            if name.startswith('_') or not callable(value):
+                continue
+            patched.append((cls, name, value))
+            setattr(cls, name, _wrap(f'{class_name}.{name}', value))
+    return patched
+
+
+def _start_recording() -> None:
+    '''Patch the functions of `_k2` if no other recording has done it.'''
+    global _num_recordings, _patched
+    with _patch_lock:
+        if _num_recordings == 0:
+            _patched = _patch()
+        _num_recordings += 1
+
+
+def _stop_recording() -> None:
+    '''Restore the functions of `_k2` when the last recording stops.'''
+    global _num_recordings, _patched
+    with _patch_lock:
+        _num_recordings -= 1
+        if _num_recordings == 0:
+            for owner, name, value in _patched:
+                setattr(owner, name, value)
+            _patched = []
+
+
+@contextlib.contextmanager
+def record(sync_cuda: bool = False) -> Iterator[Profile]:
+    '''A context manager that profiles the native operations of k2 that are
+    invoked within it.
+
+    For each operation, it collects the number of calls, the wall time,
+    the number of arcs of the input and output FSAs, and the number of
+    allocations and bytes allocated by the CPU allocator of k2.
+
+    Only the operations invoked by the current thread are profiled. Other
+    threads can record at the same time with their own ``record()``.
+
+    Caution:
+      While recording, the functions of ``_k2`` are replaced by wrappers for
+      the whole process (see the comment at the top of this file), so code
+      that compares them by identity may see the wrappers. Operations that
+      the current thread runs on other threads, e.g., with an executor, are
+      not profiled. Recordings cannot be nested in a thread.
+
+      The numbers of allocations and bytes allocated are read from the
+      statistics of the CPU allocator of k2, which are process-wide: if
+      other threads run k2 operations at the same time, their allocations
+      are also counted for the op being profiled.
+
+    Args:
+      sync_cuda:
+        If True, invoke `torch.cuda.synchronize()` after each operation, so
+        that the wall time includes the CUDA kernels launched by it.
+        It has to be True to get meaningful timing on CUDA.
+    Returns:
+      Yield a :class:`Profile`, which contains the results when
+      the context manager exits.
+    '''
+    if _current_profile() is not None:
+        raise RuntimeError('k2.profiler.record() cannot be nested')
+
+    profile = Profile(sync_cuda)
+    _start_recording()
+    _thread_state.profile = profile
+    try:
+        yield profile
+    finally:
+        _thread_state.profile = None
+        _stop_recording()
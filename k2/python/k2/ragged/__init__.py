@@ -4,6 +4,7 @@ from _k2.ragged import RaggedTensor
 from _k2.ragged import cat
 from _k2.ragged import create_ragged_shape2
 from _k2.ragged import create_ragged_tensor
+from _k2.ragged import from_numpy
 from _k2.ragged import index
 from _k2.ragged import index_and_sum
 from _k2.ragged import random_ragged_shape
@@ -14,7 +14,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import OrderedDict
 from typing import List
+from typing import Optional
 from typing import Tuple
 
 import k2
@@ -57,6 +59,230 @@ class RnntDecodingStream(object):
         """
         return f"{self.stream}, device : {self.device}\n"
 
+    def to_bytes(self) -> bytes:
+        """Serialize the decoding state of this stream into a compact binary
+        string, which does not include the decoding graph.
+
+        It can be used to move the stream to another process, where it is
+        restored with :meth:`from_bytes`. Call
+        :meth:`RnntDecodingStreams.terminate_and_flush_to_streams` first if
+        the stream is being decoded.
+        """
+        return self.stream.serialize()
+
+    @staticmethod
+    def from_bytes(fsa: Fsa, data: bytes) -> "RnntDecodingStream":
+        """Restore a stream serialized by :meth:`to_bytes`.
+
+        Args:
+          fsa:
+            The decoding graph the stream was decoded with. The returned
+            stream is on the same device as it.
+          data:
+            The return value of :meth:`to_bytes`.
+        """
+        ans = RnntDecodingStream.__new__(RnntDecodingStream)
+        ans.fsa = fsa
+        ans.stream = _k2.deserialize_rnnt_decoding_stream(fsa.arcs, data)
+        ans.device = fsa.device
+        return ans
+
+    def __getstate__(self) -> dict:
+        # The decoding graph is pickled as well; use to_bytes() to avoid
+        # that if the receiver already has it.
+        return {
+            "fsa": self.fsa.to("cpu").as_dict(),
+            "device": str(self.device),
+            "stream": self.to_bytes(),
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        fsa = Fsa.from_dict(state["fsa"]).to(state["device"])
+        self.fsa = fsa
+        self.stream = _k2.deserialize_rnnt_decoding_stream(
+            fsa.arcs, state["stream"]
+        )
+        self.device = fsa.device
+
+
+class RnntDecoderCache(object):
+    """An LRU cache from decoder contexts to the outputs of the decoder
+    network, for decoding with a stateless decoder.
+
+    The contexts returned by :meth:`RnntDecodingStreams.get_contexts` repeat
+    a lot from frame to frame and across streams. With this cache, only the
+    contexts that are not cached need to be evaluated by the decoder network.
+
+    Usage::
+
+        cache = k2.RnntDecoderCache(max_bytes=64 << 20)
+        for t in range(num_frames):
+            shape, contexts = streams.get_contexts()
+            new_contexts, index = cache.query(contexts)
+            new_decoder_out = model.decoder(new_contexts.to(torch.int64))
+            decoder_out = cache.update(new_decoder_out, index)
+            # decoder_out[i] is the decoder output of contexts[i]
+
+    A cache can be shared by :class:`RnntDecodingStreams` objects that are
+    created for different chunks, as long as the decoder network is the same.
+
+    Caution:
+      The cached outputs are detached, so it is for decoding only.
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20) -> None:
+        """
+        Args:
+          max_bytes:
+            The maximum number of bytes of the cached decoder outputs. The
+            least recently used entries are evicted when it is exceeded.
+            Note that the contexts of the current frame are never evicted,
+            so the cache may grow beyond it if a single frame has more unique
+            contexts than the cache can hold.
+        """
+        assert max_bytes >= 0, max_bytes
+        self.max_bytes = max_bytes
+        # Map from a context to the row of self._table containing its
+        # decoder output, in least recently used order.
+        self._slots = OrderedDict()
+        self._num_slots = 0
+        # The maximum number of entries. It is known after the first
+        # call to update(), since it depends on the size of an output.
+        self._capacity = None
+        self._table = None
+        # Rows of self._table for the new contexts returned by the last
+        # call to query()
+        self._new_slots = None
+        # Number of unique contexts of each query that are found/not found
+        # in the cache.
+        self.num_hits = 0
+        self.num_misses = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        self._slots.clear()
+        self._num_slots = 0
+        self._table = None
+        self._new_slots = None
+
+    def _allocate_slot(self, used: dict) -> int:
+        if self._capacity is not None and len(self._slots) >= self._capacity:
+            lru_context = next(iter(self._slots), None)
+            if lru_context is not None and lru_context not in used:
+                return self._slots.pop(lru_context)
+        slot = self._num_slots
+        self._num_slots += 1
+        return slot
+
+    def query(self, contexts: Tensor) -> Tuple[Tensor, Tensor]:
+        """Look up the given contexts in the cache.
+
+        It must be followed by a call to :meth:`update` with the decoder
+        outputs of the returned new contexts.
+
+        Args:
+          contexts:
+            A 2-D tensor of shape [tot_contexts][decoder_history_len], e.g.,
+            the one returned by :meth:`RnntDecodingStreams.get_contexts`.
+        Returns:
+          Return a tuple containing:
+
+          - new_contexts: A 2-D tensor of shape
+            [num_new_contexts][decoder_history_len] containing the unique
+            contexts that are not in the cache. It has the same dtype and
+            device as `contexts`.
+          - index: A 1-D tensor of shape (tot_contexts,) with dtype
+            torch.int64, which is to be passed to :meth:`update`.
+        """
+        assert contexts.ndim == 2, contexts.shape
+        assert self._new_slots is None, "update() was not called"
+
+        # Map from the contexts of this frame to their slots. The slots of
+        # new contexts are allocated after checking all contexts so that
+        # no contexts of this frame are evicted.
+        used = dict()
+        new_contexts = []
+        slots = []
+        for context in map(tuple, contexts.tolist()):
+            slot = used.get(context)
+            if slot is None:
+                slot = self._slots.get(context)
+                if slot is not None:
+                    self._slots.move_to_end(context)
+                    self.num_hits += 1
+                else:
+                    new_contexts.append(context)
+                    self.num_misses += 1
+                    slot = -len(new_contexts)
+                used[context] = slot
+            slots.append(slot)
+
+        new_slots = []
+        for context in new_contexts:
+            slot = self._allocate_slot(used)
+            self._slots[context] = slot
+            new_slots.append(slot)
+
+        if new_contexts:
+            slots = [new_slots[-s - 1] if s < 0 else s for s in slots]
+
+        device = contexts.device
+        self._new_slots = torch.tensor(new_slots,
+                                       dtype=torch.int64,
+                                       device=device)
+        index = torch.tensor(slots, dtype=torch.int64, device=device)
+        new_contexts = torch.tensor(new_contexts,
+                                    dtype=contexts.dtype,
+                                    device=device).reshape(
+                                        -1, contexts.size(1))
+        return new_contexts, index
+
+    def update(self, new_decoder_out: Tensor, index: Tensor) -> Tensor:
+        """Add the decoder outputs of the new contexts returned by the last
+        call to :meth:`query` to the cache, and return the decoder outputs of
+        all contexts passed to it.
+
+        Args:
+          new_decoder_out:
+            A tensor whose ``new_decoder_out[i]`` is the decoder output of
+            ``new_contexts[i]``, where `new_contexts` is returned by the last
+            call to :meth:`query`.
+          index:
+            The index returned by the last call to :meth:`query`.
+        Returns:
+          Return a tensor whose ``ans[i]`` is the decoder output of
+          ``contexts[i]``, where `contexts` is the one passed to the last
+          call to :meth:`query`.
+        """
+        assert self._new_slots is not None, "query() was not called"
+        new_slots = self._new_slots
+        self._new_slots = None
+        assert new_decoder_out.size(0) == new_slots.numel(), (
+            new_decoder_out.shape, new_slots.shape)
+
+        if self._table is None:
+            if new_slots.numel() == 0:
+                # Nothing is cached, so `index` is empty
+                return new_decoder_out
+            row_bytes = (new_decoder_out[0].numel() *
+                         new_decoder_out.element_size())
+            self._capacity = max(1, self.max_bytes // max(row_bytes, 1))
+            self._table = new_decoder_out.new_empty(
+                (max(self._capacity, self._num_slots),) +
+                new_decoder_out.shape[1:])
+        elif self._num_slots > self._table.size(0):
+            self._table = torch.cat([
+                self._table,
+                self._table.new_empty((self._num_slots - self._table.size(0),) +
+                                      self._table.shape[1:])
+            ])
+
+        self._table.index_copy_(0, new_slots, new_decoder_out.detach())
+        return self._table.index_select(0, index)
+
 
 class RnntDecodingStreams(object):
     """See https://github.com/k2-fsa/icefall/blob/master/egs/librispeech/ASR/pruned_transducer_stateless/beam_search.py  # noqa
@@ -64,7 +290,10 @@ class RnntDecodingStreams(object):
     """
 
     def __init__(
-        self, src_streams: List[RnntDecodingStream], config: RnntDecodingConfig
+        self,
+        src_streams: List[RnntDecodingStream],
+        config: RnntDecodingConfig,
+        decoder_cache: Optional[RnntDecoderCache] = None,
     ) -> None:
         """
         Combines multiple RnntDecodingStream objects to create a
@@ -78,6 +307,9 @@ class RnntDecodingStreams(object):
             A configuration object which contains decoding parameters like
             `vocab-size`, `decoder_history_len`, `beam`, `max_states`,
             `max_contexts` etc.
+          decoder_cache:
+            Optional. If not None, it is used by :meth:`get_new_contexts`
+            to avoid evaluating the decoder network on cached contexts.
 
         Returns:
           Return a RnntDecodingStreams object.
@@ -88,6 +320,7 @@ class RnntDecodingStreams(object):
         self.device = self.src_streams[0].device
         streams = [x.stream for x in self.src_streams]
         self.streams = _k2.RnntDecodingStreams(streams, config)
+        self.decoder_cache = decoder_cache
 
     def __str__(self) -> str:
         """Return a string representation of this object
@@ -121,6 +354,41 @@ class RnntDecodingStreams(object):
         """
         return self.streams.get_contexts()
 
+    def get_new_contexts(self) -> Tuple[RaggedShape, Tensor, Tensor]:
+        """
+        Like :meth:`get_contexts`, but only return the contexts whose decoder
+        outputs are not in `self.decoder_cache`. It requires that a decoder
+        cache is passed to the constructor.
+
+        Usage::
+
+            shape, new_contexts, index = streams.get_new_contexts()
+            new_decoder_out = model.decoder(new_contexts.to(torch.int64))
+            decoder_out = streams.decoder_cache.update(new_decoder_out, index)
+
+        where `decoder_out[i]` is the decoder output of the i-th context
+        returned by :meth:`get_contexts`.
+
+        Returns:
+          Return a three-element tuple containing:
+
+          shape:
+            A RaggedShape with 2 axes, representing [stream][context].
+
+          new_contexts:
+            A tensor of shape [num_new_contexts][decoder_history_len]
+            containing the unique contexts that are not cached.
+            Its dtype is torch.int32.
+
+          index:
+            A 1-D tensor of shape (tot_contexts,) with dtype torch.int64,
+            to be passed to :meth:`RnntDecoderCache.update`.
+        """
+        assert self.decoder_cache is not None, "No decoder cache is given"
+        shape, contexts = self.streams.get_contexts()
+        new_contexts, index = self.decoder_cache.query(contexts)
+        return shape, new_contexts, index
+
     def advance(self, logprobs: Tensor) -> None:
         """
         Advance decoding streams by one frame.
@@ -183,7 +451,7 @@ class RnntDecodingStreams(object):
         ragged_arcs, out_map = self.streams.format_output(
             num_frames, allow_partial
         )
-        fsa = Fsa(ragged_arcs)
+        fsa = Fsa._create_trusted(ragged_arcs)
 
         # propagate attributes
         tensor_attr_info = dict()
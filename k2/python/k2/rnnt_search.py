@@ -0,0 +1,428 @@
+# Copyright      2026  Xiaomi Corp.
+#
+# See ../../../LICENSE for clarification regarding multiple authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Batched greedy search and modified beam search for transducer models.
+#
+# They are the Python counterparts of GreedySearch() and ModifiedBeamSearch()
+# in k2/torch/csrc/beam_search.cu and accept the same kind of model, i.e., a
+# module with the following attributes (see pruned_transducer_stateless2/
+# model.py in icefall):
+#
+#   - model.decoder, with attributes `blank_id`, `context_size` and
+#     optionally `unk_id`. It is invoked as `decoder(y, need_pad=False)`,
+#     where `y` has shape (N, context_size) and dtype torch.int64.
+#   - model.joiner, with submodules `encoder_proj` and `decoder_proj`. It is
+#     invoked as `joiner(encoder_out, decoder_out, project_input=False)`.
+
+from typing import List
+from typing import Tuple
+
+import torch
+
+from .ragged import RaggedShape
+from .ragged import RaggedTensor
+from .ragged import create_ragged_shape2
+
+# Used to hash token sequences. See also HypothesisArena in
+# k2/torch/csrc/hypothesis.h
+_HASH_MULTIPLIER = 1000003
+# Multiplier of a second hash of token sequences, which is computed
+# differently (FNV-style: xor, then multiply) to make it independent of the
+# first one.
+_HASH_MULTIPLIER2 = 6364136223846793005
+
+
+def _get_model_info(model: torch.nn.Module) -> Tuple[int, int, int]:
+    '''Return (blank_id, unk_id, context_size) of the model.'''
+    decoder = model.decoder
+    blank_id = int(decoder.blank_id)
+    unk_id = int(getattr(decoder, 'unk_id', blank_id))
+    context_size = int(decoder.context_size)
+    return blank_id, unk_id, context_size
+
+
+def _run_decoder(model: torch.nn.Module,
+                 decoder_input: torch.Tensor) -> torch.Tensor:
+    '''Run the decoder and the decoder projection of the joiner on the given
+    contexts. Identical contexts are run through the decoder only once.
+
+    Args:
+      model:
+        The transducer model.
+      decoder_input:
+        A 2-D tensor of shape (N, context_size) with dtype torch.int64.
+    Returns:
+      Return a tensor of shape (N, 1, joiner_dim).
+    '''
+    unique_input, inverse = torch.unique(decoder_input,
+                                         dim=0,
+                                         return_inverse=True)
+    decoder_out = model.decoder(unique_input, need_pad=False)
+    decoder_out = model.joiner.decoder_proj(decoder_out)
+    return decoder_out.index_select(0, inverse)
+
+
+def _run_joiner(model: torch.nn.Module, encoder_out: torch.Tensor,
+                decoder_out: torch.Tensor) -> torch.Tensor:
+    '''
+    Args:
+      encoder_out:
+        Projected encoder output of shape (N, joiner_dim).
+      decoder_out:
+        Projected decoder output of shape (N, 1, joiner_dim).
+    Returns:
+      Return the logits of shape (N, vocab_size).
+    '''
+    logits = model.joiner(encoder_out.unsqueeze(1).unsqueeze(1),
+                          decoder_out.unsqueeze(1),
+                          project_input=False)
+    # logits' shape is (N, 1, 1, vocab_size)
+    return logits.squeeze(1).squeeze(1)
+
+
+@torch.no_grad()
+def rnnt_greedy_search(model: torch.nn.Module, encoder_out: torch.Tensor,
+                       encoder_out_lens: torch.Tensor) -> List[List[int]]:
+    '''Greedy search for transducer models, limiting the maximum number of
+    symbols per frame to one. All utterances are decoded together.
+
+    Args:
+      model:
+        The transducer model. See the comments at the beginning of this file
+        for the attributes it should have.
+      encoder_out:
+        Output from the encoder network. Its shape is
+        (batch_size, T, encoder_out_dim).
+      encoder_out_lens:
+        A 1-D tensor of shape (batch_size,) with dtype torch.int64 containing
+        the number of valid frames of each utterance in `encoder_out`.
+    Returns:
+      Return a list-of-list of token IDs containing the decoding results.
+      ans[i] is the result of the i-th utterance in `encoder_out`.
+    '''
+    assert encoder_out.ndim == 3, encoder_out.shape
+    assert encoder_out_lens.ndim == 1, encoder_out_lens.shape
+
+    blank_id, unk_id, context_size = _get_model_info(model)
+
+    packed_encoder_out = torch.nn.utils.rnn.pack_padded_sequence(
+        input=encoder_out,
+        lengths=encoder_out_lens.cpu(),
+        batch_first=True,
+        enforce_sorted=False)
+    projected_encoder_out = model.joiner.encoder_proj(packed_encoder_out.data)
+    batch_sizes = packed_encoder_out.batch_sizes.tolist()
+
+    device = encoder_out.device
+    batch_size = batch_sizes[0]
+    hyps = [[] for _ in range(batch_size)]
+
+    decoder_input = torch.full((batch_size, context_size),
+                               blank_id,
+                               dtype=torch.int64,
+                               device=device)
+    decoder_out = _run_decoder(model, decoder_input)
+
+    offset = 0
+    for cur_batch_size in batch_sizes:
+        start = offset
+        end = offset + cur_batch_size
+        offset = end
+
+        decoder_input = decoder_input[:cur_batch_size]
+        decoder_out = decoder_out[:cur_batch_size]
+
+        logits = _run_joiner(model, projected_encoder_out[start:end],
+                             decoder_out)
+        tokens = logits.argmax(dim=-1)
+        emitted = (tokens != blank_id) & (tokens != unk_id)
+
+        emitted_indexes = emitted.nonzero().squeeze(1)
+        if emitted_indexes.numel() == 0:
+            continue
+
+        emitted_tokens = tokens[emitted_indexes]
+        for i, token in zip(emitted_indexes.tolist(),
+                            emitted_tokens.tolist()):
+            hyps[i].append(token)
+
+        # Only the decoder output of the utterances that emitted a
+        # symbol changes.
+        decoder_input = decoder_input.clone()
+        decoder_input[emitted_indexes] = torch.cat(
+            [decoder_input[emitted_indexes, 1:],
+             emitted_tokens.unsqueeze(1)],
+            dim=1)
+        decoder_out = decoder_out.clone()
+        decoder_out[emitted_indexes] = _run_decoder(
+            model, decoder_input[emitted_indexes])
+
+    unsorted_indices = packed_encoder_out.unsorted_indices.tolist()
+    return [hyps[i] for i in unsorted_indices]
+
+
+def _get_best_hyps(shape: RaggedShape, log_probs: torch.Tensor,
+                   lengths: torch.Tensor) -> torch.Tensor:
+    '''Return the index of the most probable hypothesis of each utterance,
+    normalized by the length of the hypothesis.
+
+    Args:
+      shape:
+        A ragged shape with axes [utt][hyp].
+      log_probs:
+        A 1-D tensor containing the log_prob of each hypothesis.
+      lengths:
+        A 1-D tensor containing the number of tokens of each hypothesis.
+    Returns:
+      Return a 1-D tensor of shape (shape.dim0,) with dtype torch.int64.
+    '''
+    scores = RaggedTensor(shape, log_probs / lengths.to(log_probs.dtype))
+    return scores.argmax().to(torch.int64)
+
+
+def _merge_hyps(
+    shape: RaggedShape, log_probs: torch.Tensor, keys: torch.Tensor
+) -> Tuple[RaggedShape, torch.Tensor, torch.Tensor]:
+    '''Merge hypotheses of the same utterance whose keys are identical.
+    The log_prob of the merged hypothesis is the logsumexp of the log_probs
+    of the merged ones.
+
+    The token sequences are not compared, so the keys should identify them:
+    :func:`rnnt_modified_beam_search` uses two independent 64-bit hashes of
+    the token sequence, its length and its last `context_size` tokens.
+    Different token sequences agreeing on all of these would be merged, but
+    that requires a collision of both hashes.
+
+    Args:
+      shape:
+        A ragged shape with axes [utt][hyp].
+      log_probs:
+        A 1-D tensor containing the log_prob of each hypothesis.
+      keys:
+        A 2-D tensor with dtype torch.int64. keys[i] is the key of the
+        i-th hypothesis.
+    Returns:
+      Return a tuple (new_shape, new_log_probs, kept), where `kept` contains
+      the indexes of the hypotheses that represent the merged ones.
+    '''
+    utt = shape.row_ids(1).to(torch.int64)
+    keys, inverse, counts = torch.unique(torch.cat([utt.unsqueeze(1), keys],
+                                                   dim=1),
+                                         dim=0,
+                                         return_inverse=True,
+                                         return_counts=True)
+    # Sort the hypotheses by their new index so that the merged ones
+    # are consecutive. Note that `keys` is sorted by utterance.
+    order = torch.sort(inverse, stable=True)[1]
+    group_splits = torch.zeros(keys.size(0) + 1,
+                               dtype=torch.int32,
+                               device=log_probs.device)
+    group_splits[1:] = counts.cumsum(0)
+    groups = create_ragged_shape2(row_splits=group_splits,
+                                  cached_tot_size=log_probs.numel())
+    new_log_probs = RaggedTensor(groups, log_probs[order]).logsumexp()
+    kept = order[group_splits[:-1].to(torch.int64)]
+
+    new_row_splits = torch.zeros(shape.dim0 + 1,
+                                 dtype=torch.int32,
+                                 device=log_probs.device)
+    new_row_splits[1:] = torch.bincount(keys[:, 0],
+                                        minlength=shape.dim0).cumsum(0)
+    new_shape = create_ragged_shape2(row_splits=new_row_splits,
+                                     cached_tot_size=keys.size(0))
+    return new_shape, new_log_probs, kept
+
+
+@torch.no_grad()
+def rnnt_modified_beam_search(model: torch.nn.Module,
+                              encoder_out: torch.Tensor,
+                              encoder_out_lens: torch.Tensor,
+                              num_active_paths: int = 4) -> List[List[int]]:
+    '''Modified beam search for transducer models, limiting the maximum
+    number of symbols per frame to one.
+
+    The active hypotheses of all utterances are represented by a ragged shape
+    with axes [utt][hyp] and per-hypothesis tensors, so each frame is
+    processed with a constant number of tensor operations, no matter how
+    many utterances there are:
+
+      - Each unique decoder context (i.e., the last `context_size` tokens
+        of a hypothesis) is run through the decoder only once.
+      - The top `num_active_paths` hypotheses of each utterance are selected
+        with :func:`RaggedTensor.topk`.
+      - Hypotheses with identical token sequences are merged with
+        :func:`RaggedTensor.logsumexp`. They are identified by two
+        independent hashes of the sequences, checked against their lengths
+        and contexts; see :func:`_merge_hyps`.
+
+    Args:
+      model:
+        The transducer model. See the comments at the beginning of this file
+        for the attributes it should have.
+      encoder_out:
+        Output from the encoder network. Its shape is
+        (batch_size, T, encoder_out_dim).
+      encoder_out_lens:
+        A 1-D tensor of shape (batch_size,) with dtype torch.int64 containing
+        the number of valid frames of each utterance in `encoder_out`.
+      num_active_paths:
+        Number of active paths of each utterance during decoding.
+    Returns:
+      Return a list-of-list of token IDs containing the decoding results.
+      ans[i] is the result of the i-th utterance in `encoder_out`.
+    '''
+    assert encoder_out.ndim == 3, encoder_out.shape
+    assert encoder_out_lens.ndim == 1, encoder_out_lens.shape
+    assert num_active_paths > 0, num_active_paths
+
+    blank_id, unk_id, context_size = _get_model_info(model)
+
+    packed_encoder_out = torch.nn.utils.rnn.pack_padded_sequence(
+        input=encoder_out,
+        lengths=encoder_out_lens.cpu(),
+        batch_first=True,
+        enforce_sorted=False)
+    projected_encoder_out = model.joiner.encoder_proj(packed_encoder_out.data)
+    batch_sizes = packed_encoder_out.batch_sizes.tolist()
+
+    device = encoder_out.device
+    batch_size = batch_sizes[0]
+
+    # The active hypotheses, with axes [utt][hyp]. Initially each utterance
+    # has a single hypothesis containing `context_size` blanks.
+    row_splits = torch.arange(batch_size + 1,
+                              dtype=torch.int32,
+                              device=device)
+    shape = create_ragged_shape2(row_splits=row_splits,
+                                 cached_tot_size=batch_size)
+    contexts = torch.full((batch_size, context_size),
+                          blank_id,
+                          dtype=torch.int64,
+                          device=device)
+    log_probs = torch.zeros(batch_size, dtype=torch.float32, device=device)
+    # lengths include the initial blanks, as in the C++ version
+    lengths = torch.full((batch_size,),
+                         context_size,
+                         dtype=torch.int64,
+                         device=device)
+    hashes = torch.zeros(batch_size, dtype=torch.int64, device=device)
+    hashes2 = torch.zeros(batch_size, dtype=torch.int64, device=device)
+
+    # Back pointers of each frame. parents[t][i] is the index of the previous
+    # hypothesis of the i-th hypothesis after frame t, and tokens[t][i] is
+    # the token it appended, or -1 if it appended nothing.
+    parents = []
+    tokens = []
+
+    # best[utt] is (t, i), meaning that the result of utt is the i-th
+    # hypothesis after frame t.
+    best = [None] * batch_size
+
+    offset = 0
+    for t, cur_batch_size in enumerate(batch_sizes):
+        start = offset
+        end = offset + cur_batch_size
+        offset = end
+
+        if cur_batch_size < shape.dim0:
+            # Some utterances are finished. Since the utterances are sorted
+            # by length, they are the last ones.
+            best_hyps = _get_best_hyps(shape, log_probs, lengths).tolist()
+            for utt in range(cur_batch_size, shape.dim0):
+                best[utt] = (t - 1, best_hyps[utt])
+            num_hyps = int(row_splits[cur_batch_size])
+            row_splits = row_splits[:cur_batch_size + 1]
+            shape = create_ragged_shape2(row_splits=row_splits,
+                                         cached_tot_size=num_hyps)
+            contexts = contexts[:num_hyps]
+            log_probs = log_probs[:num_hyps]
+            lengths = lengths[:num_hyps]
+            hashes = hashes[:num_hyps]
+            hashes2 = hashes2[:num_hyps]
+
+        hyp_utt = shape.row_ids(1).to(torch.int64)
+        decoder_out = _run_decoder(model, contexts)
+        cur_encoder_out = projected_encoder_out[start:end].index_select(
+            0, hyp_utt)
+        logits = _run_joiner(model, cur_encoder_out, decoder_out)
+        # logits' shape is (num_hyps, vocab_size)
+
+        vocab_size = logits.size(1)
+        new_log_probs = logits.log_softmax(dim=-1).to(torch.float32)
+        new_log_probs += log_probs.unsqueeze(1)
+
+        # Select the top-k of each utterance, i.e., of each sublist of the
+        # ragged tensor with axes [utt][hyp*vocab_size]
+        ragged_log_probs = RaggedTensor(
+            create_ragged_shape2(row_splits=row_splits * vocab_size,
+                                 cached_tot_size=new_log_probs.numel()),
+            new_log_probs.reshape(-1))
+        topk_log_probs, topk_indexes = ragged_log_probs.topk(num_active_paths)
+
+        # topk_indexes contains indexes into new_log_probs.reshape(-1)
+        topk_indexes = topk_indexes.values.to(torch.int64)
+        parent = torch.div(topk_indexes, vocab_size, rounding_mode='floor')
+        token = topk_indexes % vocab_size
+        emitted = (token != blank_id) & (token != unk_id)
+
+        shape = topk_log_probs.shape
+        log_probs = topk_log_probs.values
+        hashes = torch.where(emitted,
+                             hashes[parent] * _HASH_MULTIPLIER + token + 1,
+                             hashes[parent])
+        hashes2 = torch.where(
+            emitted, (hashes2[parent] ^ (token + 1)) * _HASH_MULTIPLIER2,
+            hashes2[parent])
+        contexts = contexts[parent]
+        contexts = torch.where(
+            emitted.unsqueeze(1),
+            torch.cat([contexts[:, 1:], token.unsqueeze(1)], dim=1),
+            contexts)
+        lengths = lengths[parent] + emitted
+
+        keys = torch.cat(
+            [torch.stack([hashes, hashes2, lengths], dim=1), contexts], dim=1)
+        shape, log_probs, kept = _merge_hyps(shape, log_probs, keys)
+        row_splits = shape.row_splits(1)
+        parent = parent[kept]
+        token = token[kept]
+        emitted = emitted[kept]
+        hashes = hashes[kept]
+        hashes2 = hashes2[kept]
+        contexts = contexts[kept]
+        lengths = lengths[kept]
+        parents.append(parent)
+        tokens.append(torch.where(emitted, token, -1))
+
+    best_hyps = _get_best_hyps(shape, log_probs, lengths).tolist()
+    for utt in range(shape.dim0):
+        best[utt] = (len(batch_sizes) - 1, best_hyps[utt])
+
+    parents = [p.tolist() for p in parents]
+    tokens = [p.tolist() for p in tokens]
+
+    ans = []
+    for utt in packed_encoder_out.unsorted_indices.tolist():
+        t, i = best[utt]
+        hyp = []
+        while t >= 0:
+            if tokens[t][i] != -1:
+                hyp.append(tokens[t][i])
+            i = parents[t][i]
+            t -= 1
+        hyp.reverse()
+        ans.append(hyp)
+    return ans
@@ -0,0 +1,297 @@
+# Copyright      2026  Xiaomi Corp.
+#
+# See ../../../LICENSE for clarification regarding multiple authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+import collections
+from concurrent.futures import Executor
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+import torch
+
+from _k2 import DecodeStateInfo
+from .dense_fsa_vec import DenseFsaVec
+from .fsa import Fsa
+from .online_dense_intersecter import OnlineDenseIntersecter
+from .ops import index_fsa
+
+
+class PartialResult(NamedTuple):
+    # The output labels on the best path decoded so far, without 0s and -1s;
+    # see :func:`OnlineDenseIntersecter.partial_results`.
+    labels: List[int]
+    # The first ``num_stable`` labels won't change any more.
+    num_stable: int
+    # The lattice of the frames decoded so far (with a single FSA), if it was
+    # requested; else None.
+    lattice: Optional[Fsa]
+
+
+class DecodingStream(object):
+    """A stream (e.g., the audio of a connection) decoded by a
+    :class:`StreamingDecoder`. Create it with
+    :func:`StreamingDecoder.new_stream`."""
+
+    def __init__(self, decoder: 'StreamingDecoder'):
+        self.decoder = decoder
+        # The decoding state after the chunks decoded so far, None before the
+        # first chunk.
+        self.decode_state: Optional[DecodeStateInfo] = None
+        # If not None, why the stream can't be decoded any more, e.g., since
+        # one of its chunks was cancelled before it was decoded.
+        self.failure: Optional[str] = None
+
+    async def feed(self,
+                   chunk: torch.Tensor,
+                   need_lattice: bool = False) -> PartialResult:
+        """Decode the next chunk of this stream.
+
+        Args:
+          chunk:
+            The neural-net output (log-probs) of the chunk, of shape
+            ``(T, C)``.
+          need_lattice:
+            True to also return the lattice of all the frames decoded so far,
+            e.g., for the last chunk.
+        Returns:
+          The partial result after this chunk. Chunks of the same stream are
+          decoded in the order of the calls.
+
+        Caution:
+          If a chunk is cancelled (e.g., with its task) before it is decoded,
+          or if decoding it fails, the later chunks of the stream can't be
+          decoded: they raise a RuntimeError.
+        """
+        assert chunk.ndim == 2, chunk.shape
+        return await self.decoder._enqueue(self, chunk, need_lattice)
+
+
+class StreamingDecoder(object):
+    """An asyncio front-end of :class:`OnlineDenseIntersecter`.
+
+    Each connection feeds the chunks of its own stream with ``await
+    stream.feed(chunk)``. The chunks that are ready are decoded in batches of
+    up to ``num_streams`` streams on an executor, so the event loop is not
+    blocked, and the decoding states of the streams are kept here. Only
+    chunks with the same number of frames are decoded in the same batch, so
+    the streams should use a fixed chunk size.
+
+    Usage::
+
+      decoder = k2.StreamingDecoder(H, num_streams=32, search_beam=20,
+                                    output_beam=8, min_active_states=30,
+                                    max_active_states=10000)
+
+      async def handle_connection(chunks):
+          stream = decoder.new_stream()
+          async for chunk in chunks:
+              result = await stream.feed(chunk)
+              send(result.labels)
+
+    Batches are decoded one at a time, since the intersecters are not
+    thread-safe.
+    """
+
+    def __init__(self,
+                 decoding_graph: Fsa,
+                 num_streams: int,
+                 search_beam: float,
+                 output_beam: float,
+                 min_active_states: int,
+                 max_active_states: int,
+                 max_wait_ms: float = 5,
+                 executor: Optional[Executor] = None):
+        """
+        Args:
+          decoding_graph:
+            The decoding graph, see :class:`OnlineDenseIntersecter`.
+          num_streams:
+            The maximum number of streams decoded in a batch.
+          search_beam:
+            See :class:`OnlineDenseIntersecter`.
+          output_beam:
+            See :class:`OnlineDenseIntersecter`.
+          min_active_states:
+            See :class:`OnlineDenseIntersecter`.
+          max_active_states:
+            See :class:`OnlineDenseIntersecter`.
+          max_wait_ms:
+            After a chunk becomes ready, how long to wait in milliseconds for
+            other streams to become ready if the batch is not full.
+          executor:
+            The executor to decode on, see
+            :func:`asyncio.loop.run_in_executor`. None for the default
+            executor of the event loop.
+        """
+        assert num_streams > 0, num_streams
+        assert max_wait_ms >= 0, max_wait_ms
+
+        self.decoding_graph = decoding_graph
+        self.num_streams = num_streams
+        self.search_beam = search_beam
+        self.output_beam = output_beam
+        self.min_active_states = min_active_states
+        self.max_active_states = max_active_states
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+
+        # An OnlineDenseIntersecter decodes a fixed number of streams at a
+        # time; this maps from a batch size to the intersecter for it.
+        self._intersecters = dict()
+
+        # Elements are (stream, chunk, need_lattice, future)
+        self._pending = collections.deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def new_stream(self) -> DecodingStream:
+        """Return a new stream to decode."""
+        return DecodingStream(self)
+
+    async def close(self) -> None:
+        """Stop the background task. The chunks that are not decoded yet are
+        cancelled."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._pending:
+            self._pending.popleft()[-1].cancel()
+
+    async def _enqueue(self, stream: DecodingStream, chunk: torch.Tensor,
+                       need_lattice: bool) -> PartialResult:
+        if stream.failure is not None:
+            raise RuntimeError(stream.failure)
+        loop = asyncio.get_running_loop()
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        self._pending.append((stream, chunk, need_lattice, future))
+        self._wakeup.set()
+        return await future
+
+    def _take_batch(self) -> list:
+        """Remove up to num_streams pending chunks of different streams
+        from self._pending, the oldest first.
+
+        All chunks in a batch have the same number of frames as the oldest
+        one, since the decoding state of a stream whose chunk is shorter than
+        the others in the batch can't be used to decode its next chunk.
+
+        If a chunk was cancelled, the later chunks of its stream are failed,
+        since they can't be decoded without it.
+        """
+        batch = []
+        streams = set()
+        num_frames = None
+        remaining = collections.deque()
+        for item in self._pending:
+            stream, chunk, future = item[0], item[1], item[-1]
+            if future.cancelled():
+                stream.failure = ('A previous chunk of the stream was '
+                                  'cancelled before it was decoded')
+                continue
+            if stream.failure is not None:
+                if not future.done():
+                    future.set_exception(RuntimeError(stream.failure))
+                continue
+            if num_frames is None:
+                num_frames = chunk.size(0)
+            if (len(batch) < self.num_streams and
+                    id(stream) not in streams and
+                    chunk.size(0) == num_frames):
+                batch.append(item)
+            else:
+                remaining.append(item)
+            # Only the oldest pending chunk of a stream can be decoded.
+            streams.add(id(stream))
+        self._pending = remaining
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self.max_wait > 0 and len(self._pending) < self.num_streams:
+                # Wait for other streams to become ready.
+                await asyncio.sleep(self.max_wait)
+            batch = self._take_batch()
+            while batch:
+                await self._decode(loop, batch)
+                batch = self._take_batch()
+
+    def _get_intersecter(self, batch_size: int) -> OnlineDenseIntersecter:
+        intersecter = self._intersecters.get(batch_size)
+        if intersecter is None:
+            intersecter = OnlineDenseIntersecter(
+                decoding_graph=self.decoding_graph,
+                num_streams=batch_size,
+                search_beam=self.search_beam,
+                output_beam=self.output_beam,
+                min_active_states=self.min_active_states,
+                max_active_states=self.max_active_states)
+            self._intersecters[batch_size] = intersecter
+        return intersecter
+
+    def _decode_batch(self, chunks: List[torch.Tensor],
+                      decode_states: List[Optional[DecodeStateInfo]],
+                      need_lattice: bool):
+        intersecter = self._get_intersecter(len(chunks))
+        log_prob = torch.nn.utils.rnn.pad_sequence(chunks, batch_first=True)
+        supervision_segments = torch.tensor(
+            [[i, 0, c.size(0)] for i, c in enumerate(chunks)],
+            dtype=torch.int32)
+        dense_fsa_vec = DenseFsaVec(log_prob, supervision_segments)
+        lattice, new_decode_states = intersecter.decode(
+            dense_fsa_vec, decode_states, need_lattice=need_lattice)
+        labels, num_stable = intersecter.partial_results(new_decode_states)
+        return lattice, new_decode_states, labels, num_stable
+
+    async def _decode(self, loop: asyncio.AbstractEventLoop,
+                      batch: list) -> None:
+        streams = [item[0] for item in batch]
+        need_lattice = any(item[2] for item in batch)
+        try:
+            lattice, new_decode_states, labels, num_stable = \
+                await loop.run_in_executor(
+                    self.executor, self._decode_batch,
+                    [item[1] for item in batch],
+                    [s.decode_state for s in streams], need_lattice)
+        except Exception as e:
+            for item in batch:
+                item[0].failure = f'Failed to decode a previous chunk: {e}'
+                if not item[-1].done():
+                    item[-1].set_exception(e)
+            return
+
+        for i, (stream, _, want_lattice, future) in enumerate(batch):
+            stream.decode_state = new_decode_states[i]
+            this_lattice = None
+            if want_lattice:
+                indexes = torch.tensor([i],
+                                       dtype=torch.int32,
+                                       device=lattice.device)
+                this_lattice = index_fsa(lattice, indexes)
+            if not future.done():
+                future.set_result(
+                    PartialResult(labels[i], num_stable[i], this_lattice))
@@ -0,0 +1,142 @@
+# Copyright      2026  Xiaomi Corp.
+#
+# See ../../../LICENSE for clarification regarding multiple authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import List
+from typing import Tuple
+from typing import Union
+
+import torch
+import _k2
+
+from .ragged import RaggedTensor
+
+
+def _to_ragged(ngrams: Union[RaggedTensor, List[List[int]]]
+              ) -> RaggedTensor:  # noqa
+    if isinstance(ngrams, list):
+        return RaggedTensor(ngrams, dtype=torch.int32)
+    assert ngrams.num_axes == 2, ngrams.num_axes
+    assert ngrams.dtype == torch.int32, ngrams.dtype
+    return ngrams.to('cpu')
+
+
+class SuffixIndex(object):
+    '''An index over a corpus of token sequences that answers n-gram queries,
+    i.e., the number of occurrences of n-grams, their positions, and the
+    longest n-gram ending at each position of a hypothesis.
+
+    It is based on a suffix array that is built only once, so it is much
+    cheaper than :func:`k2.get_best_matching_stats` when the same corpus is
+    queried repeatedly. Its memory usage does not depend on the range of
+    token values. N-grams never match across the boundaries of sequences.
+
+    CAUTION:
+      It runs on CPU only. Inputs on CUDA are moved to CPU.
+
+    Usage::
+
+        index = k2.SuffixIndex(k2.RaggedTensor([[1, 2, 3], [2, 3, 4]]))
+        index.count([[2, 3], [4]])  # tensor([2, 1], dtype=torch.int32)
+        index.save('index.pt')
+        index = k2.SuffixIndex.load('index.pt')
+    '''
+
+    def __init__(self, corpus: Union[RaggedTensor, List[List[int]]],
+                 _suffix_array: torch.Tensor = None) -> None:
+        '''
+        Args:
+          corpus:
+            A ragged tensor with 2 axes [seq][token] and dtype torch.int32,
+            or a list-of-list of token IDs. Tokens may have any value.
+        '''
+        corpus = _to_ragged(corpus)
+        if _suffix_array is None:
+            self.index = _k2.SuffixIndex(corpus)
+        else:
+            self.index = _k2.SuffixIndex(corpus, _suffix_array)
+
+    @property
+    def corpus(self) -> RaggedTensor:
+        '''The corpus that this index was built from.'''
+        return self.index.corpus
+
+    def count(self, ngrams: Union[RaggedTensor, List[List[int]]]
+             ) -> torch.Tensor:  # noqa
+        '''Count the number of occurrences of n-grams in the corpus.
+
+        Args:
+          ngrams:
+            A ragged tensor with 2 axes [ngram][token] and dtype torch.int32,
+            or a list-of-list of token IDs.
+        Returns:
+          Return a 1-D tensor with dtype torch.int32 whose i-th element is the
+          number of occurrences of the i-th n-gram. For empty n-grams, it is
+          the number of tokens in the corpus.
+        '''
+        return self.index.count(_to_ragged(ngrams))
+
+    def find(self, ngrams: Union[RaggedTensor, List[List[int]]]
+            ) -> RaggedTensor:  # noqa
+        '''Find the occurrences of n-grams in the corpus.
+
+        Args:
+          ngrams:
+            A ragged tensor with 2 axes [ngram][token] and dtype torch.int32,
+            or a list-of-list of token IDs. Empty n-grams are not allowed.
+        Returns:
+          Return a ragged tensor with 2 axes [ngram][occurrence] containing
+          the positions where the n-grams start, in increasing order.
+          Positions are indexes into ``self.corpus.values``; use
+          ``self.corpus.shape.row_ids(1)`` to get the sequence indexes.
+        '''
+        return self.index.find(_to_ragged(ngrams))
+
+    def longest_match(self,
+                      queries: Union[RaggedTensor, List[List[int]]],
+                      max_order: int = 0) -> Tuple[torch.Tensor, torch.Tensor]:
+        '''For each token of each query, find the longest n-gram ending at it
+        that occurs in the corpus, i.e., the longest matching left context.
+
+        Args:
+          queries:
+            A ragged tensor with 2 axes [query][token] and dtype torch.int32,
+            or a list-of-list of token IDs.
+          max_order:
+            If positive, the returned lengths are at most ``max_order``.
+        Returns:
+          Return a tuple (lengths, counts) of 1-D tensors with dtype
+          torch.int32, with one element per token of the queries.
+          lengths[i] is the length of the longest n-gram ending at the i-th
+          token that occurs in the corpus, and counts[i] is the number of
+          its occurrences. Both are 0 if the token does not occur in the
+          corpus.
+        '''
+        return self.index.longest_match(_to_ragged(queries), max_order)
+
+    def save(self, filename: str) -> None:
+        '''Save the index to a file, which can be loaded with :func:`load`.'''
+        torch.save(
+            {
+                'corpus': self.corpus,
+                'suffix_array': self.index.suffix_array,
+            }, filename)
+
+    @staticmethod
+    def load(filename: str) -> 'SuffixIndex':
+        '''Load an index saved by :func:`save` without rebuilding the
+        suffix array.'''
+        state = torch.load(filename)
+        return SuffixIndex(state['corpus'], _suffix_array=state['suffix_array'])
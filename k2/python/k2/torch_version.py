@@ -0,0 +1,17 @@
+# Auto generated by the toplevel CMakeLists.txt.
+#
+# DO NOT EDIT.
+
+# The torch version used to build k2. We will check it against the torch version
+# that is used to run k2. If they are not the same, `import k2` will throw.
+#
+# Some example values are:
+# - 1.10.0+cu102
+# - 1.5.0+cpu
+k2_torch_version = "2.0.1+cu117"
+
+# The CUDA version used to build k2.
+# Note: It is an empty string if you used a CPU version of PyTorch to build k2
+#
+# An example value is "10.2".
+k2_torch_cuda_version = ""
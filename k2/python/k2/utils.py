@@ -15,6 +15,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import Dict
 from typing import Optional
 from typing import Tuple
 from typing import Union
@@ -22,12 +23,19 @@ from typing import Union
 import torch
 
 from .fsa import Fsa
+from .ops import _collect_tensor_attrs
+from .ops import _set_tensor_attrs
 from .ops import index_select
+from .ops import index_select_multi
 from .symbol_table import SymbolTable
 import k2
 import k2.ragged
 import _k2
 
+# dtypes supported by k2.index_select_multi()
+_INDEX_SELECT_MULTI_DTYPES = (torch.int32, torch.int64, torch.float32,
+                              torch.float64)
+
 
 def to_str(fsa: Fsa, openfst: bool = False) -> str:
     '''Convert an Fsa to a string.  This version prints out all integer
@@ -266,43 +274,25 @@ def create_fsa_vec(fsas):
     Returns:
       An instance of :class:`Fsa` that represents a FsaVec.
     '''
-    ragged_arc_list = list()
     for fsa in fsas:
         assert len(fsa.shape) == 2
-        ragged_arc_list.append(fsa.arcs)
-
-    ragged_arcs = _k2.create_fsa_vec(ragged_arc_list)
-    fsa_vec = Fsa(ragged_arcs)
-
-    tensor_attr_names = set(
-        name for name, _ in fsa.named_tensor_attr() for fsa in fsas)
-    for name in tensor_attr_names:
-        values = []
-        for fsa in fsas:
-            values.append(getattr(fsa, name))
-        if isinstance(values[0], torch.Tensor):
-            value = torch.cat(values)
-        else:
-            assert isinstance(values[0], k2.RaggedTensor)
-            value = k2.ragged.cat(values, axis=0)
-        setattr(fsa_vec, name, value)
 
-    non_tensor_attr_names = set()
-    for fsa in fsas:
-        for name, _ in fsa.named_non_tensor_attr():
-            non_tensor_attr_names.add(name)
+    tensor_names, tensor_attrs, ragged_names, ragged_attrs = \
+            _collect_tensor_attrs(fsas, list(fsas[0]._tensor_attr.keys()))
 
-    for name in non_tensor_attr_names:
-        if name == 'properties':
-            continue
+    ragged_arcs, tensor_values, ragged_values = \
+            _k2.create_fsa_vec_with_attrs([fsa.arcs for fsa in fsas],
+                                          tensor_attrs, ragged_attrs)
+    fsa_vec = Fsa._create_trusted(ragged_arcs)
+    _set_tensor_attrs(fsa_vec, tensor_names, tensor_values, ragged_names,
+                      ragged_values)
 
-        for fsa in fsas:
-            value = getattr(fsa, name, None)
-            if value is not None:
-                if hasattr(fsa_vec, name):
-                    assert getattr(fsa_vec, name) == value
-                else:
-                    setattr(fsa_vec, name, value)
+    for fsa in fsas:
+        for name, value in fsa._non_tensor_attr.items():
+            if name in fsa_vec._non_tensor_attr:
+                assert fsa_vec._non_tensor_attr[name] == value
+            else:
+                setattr(fsa_vec, name, value)
     return fsa_vec
 
 
@@ -420,6 +410,65 @@ def create_sparse(rows: torch.Tensor,
                                        requires_grad=values.requires_grad)
 
 
+def _index_tensor_attr(
+        src: Fsa,
+        arc_map: torch.Tensor,
+        include_scores: bool = False,
+        skip: Tuple[str, ...] = ()
+) -> Dict[str, Union[torch.Tensor, k2.RaggedTensor]]:  # noqa
+    '''Index the tensor attributes of `src` with `arc_map`.
+
+    The 1-D tensor attributes are indexed together with
+    :func:`k2.index_select_multi`, i.e., in a single pass over `arc_map`,
+    instead of one :func:`k2.index_select` per attribute. Autograd is
+    supported for floating point attributes.
+
+    Args:
+      src:
+        The source Fsa.
+      arc_map:
+        A 1-D tensor of dtype torch.int32 containing arc indexes into `src`,
+        or -1. Attribute values corresponding to -1 are set to the filler of
+        the attribute (see :func:`Fsa.get_filler`); for ragged attributes,
+        they are empty lists.
+      include_scores:
+        True to also index `src.scores`.
+      skip:
+        Names of attributes that are not indexed.
+    Returns:
+      Return a dict mapping attribute names to indexed values, in the same
+      order as :func:`Fsa.named_tensor_attr`.
+    '''
+    ans = dict()
+    names = []
+    values = []
+    fillers = []
+    for name, value in src.named_tensor_attr(include_scores=include_scores):
+        if name in skip:
+            continue
+        if isinstance(value, torch.Tensor):
+            filler = float(src.get_filler(name))
+            if value.ndim == 1 and value.dtype in _INDEX_SELECT_MULTI_DTYPES:
+                ans[name] = None  # placeholder to keep the order
+                names.append(name)
+                values.append(value)
+                fillers.append(filler)
+            else:
+                ans[name] = index_select(value, arc_map, default_value=filler)
+        else:
+            assert isinstance(value, k2.RaggedTensor)
+            # Only integer types ragged attributes are supported now
+            assert value.dtype == torch.int32
+            ans[name], _ = value.index(arc_map,
+                                       axis=0,
+                                       need_value_indexes=False)
+
+    new_values = index_select_multi(values, arc_map, fillers)
+    for name, new_value in zip(names, new_values):
+        ans[name] = new_value
+    return ans
+
+
 def fsa_from_unary_function_tensor(src: Fsa, dest_arcs: _k2.RaggedArc,
                                    arc_map: torch.Tensor) -> Fsa:
     '''Create an Fsa object, including autograd logic and propagating
@@ -441,21 +490,10 @@ def fsa_from_unary_function_tensor(src: Fsa, dest_arcs: _k2.RaggedArc,
       Returns the resulting Fsa, with properties propagated appropriately, and
       autograd handled.
     '''
-    dest = Fsa(dest_arcs)
+    dest = Fsa._create_trusted(dest_arcs)
 
-    for name, value in src.named_tensor_attr(include_scores=False):
-        if isinstance(value, torch.Tensor):
-            filler = float(src.get_filler(name))
-            new_value = index_select(value, arc_map, default_value=filler)
-            setattr(dest, name, new_value)
-        else:
-            assert isinstance(value, k2.RaggedTensor)
-            # Only integer types ragged attributes are supported now
-            assert value.dtype == torch.int32
-            new_value, _ = value.index(arc_map,
-                                       axis=0,
-                                       need_value_indexes=False)
-            setattr(dest, name, new_value)
+    for name, new_value in _index_tensor_attr(src, arc_map).items():
+        setattr(dest, name, new_value)
 
     for name, value in src.named_non_tensor_attr():
         setattr(dest, name, value)
@@ -494,7 +532,7 @@ def fsa_from_unary_function_ragged(src: Fsa,
         Returns the resulting Fsa, with properties propagated appropriately, and
         autograd handled.
     '''
-    dest = Fsa(dest_arcs)
+    dest = Fsa._create_trusted(dest_arcs)
 
     for name, value in src.named_tensor_attr(include_scores=False):
         if remove_filler and isinstance(value, torch.Tensor) and \
@@ -581,54 +619,34 @@ def fsa_from_binary_function_tensor(a_fsa: Fsa, b_fsa: Fsa,
       autograd handled.
     '''
 
-    out_fsa = Fsa(dest_arcs)
+    out_fsa = Fsa._create_trusted(dest_arcs)
+
+    # we include 'scores' in the attributes; this enables the
+    # autograd to work.
+    a_values = _index_tensor_attr(a_fsa, a_arc_map, include_scores=True)
+    b_values = _index_tensor_attr(b_fsa, b_arc_map, include_scores=True)
 
-    for name, a_value in a_fsa.named_tensor_attr():
-        # we include 'scores' in the attributes; this enables the
-        # autograd to work.
-        filler = float(a_fsa.get_filler(name))
-        if hasattr(b_fsa, name):
+    for name, value in a_values.items():
+        if name in b_values:
             # Both a_fsa and b_fsa have this attribute.
             # We only support attributes with dtype `torch.float32`.
             # Other kinds of attributes are discarded.
-            if a_value.dtype != torch.float32:
+            if value.dtype != torch.float32:
                 raise AttributeError("We don't support propagating two "
                                      "attributes with the same name that are "
                                      "not real-valued, in intersection: " +
                                      name)
-            b_value = getattr(b_fsa, name)
+            b_value = b_values[name]
             assert b_value.dtype == torch.float32
             # The following will actually overwrite `scores` with the same
             # value it had before; but this enables the autograd to work since
             # we do it using torch mechanisms.
-            value = index_select(a_value, a_arc_map, default_value=filler) \
-                    + index_select(b_value, b_arc_map, default_value=filler)
-            setattr(out_fsa, name, value)
-        else:
-            # only a_fsa has this attribute, copy it via arc_map
-            if isinstance(a_value, torch.Tensor):
-                value = index_select(a_value, a_arc_map, default_value=filler)
-            else:
-                assert isinstance(a_value, k2.RaggedTensor)
-                assert a_value.dtype == torch.int32
-
-                value, _ = a_value.index(a_arc_map,
-                                         axis=0,
-                                         need_value_indexes=False)
-            setattr(out_fsa, name, value)
-
-    for name, b_value in b_fsa.named_tensor_attr():
-        if not hasattr(out_fsa, name):
-            if isinstance(b_value, torch.Tensor):
-                filler = float(b_fsa.get_filler(name))
-                value = index_select(b_value, b_arc_map, default_value=filler)
-            else:
-                assert isinstance(b_value, k2.RaggedTensor)
-                assert b_value.dtype == torch.int32
+            value = value + b_value
+        # else only a_fsa has this attribute, it has been copied via arc_map
+        setattr(out_fsa, name, value)
 
-                value, _ = b_value.index(b_arc_map,
-                                         axis=0,
-                                         need_value_indexes=False)
+    for name, value in b_values.items():
+        if name not in a_values:
             setattr(out_fsa, name, value)
 
     for name, a_value in a_fsa.named_non_tensor_attr():
@@ -69,6 +69,24 @@ class TestAddEpsilonSelfLoops(unittest.TestCase):
                 fsa.scores.grad,
                 torch.tensor([1., 2., 4., 6., 8.], device=device))
 
+    def test_float_attribute_with_filler(self):
+        s = '''
+            0 1 1 0.1
+            0 2 1 0.2
+            1 2 2 0.3
+            2 3 -1 0.4
+            3
+        '''
+        for device in self.devices:
+            fsa = k2.Fsa.from_str(s).to(device)
+            fsa.foo = torch.tensor([1., 2., 3., 4.], device=device)
+            # 0.1 is not exactly representable as float32
+            fsa.foo_filler = 0.1
+            new_fsa = k2.add_epsilon_self_loops(fsa)
+            expected = torch.tensor([0.1, 1., 2., 0.1, 3., 0.1, 4.],
+                                    device=device)
+            assert torch.equal(new_fsa.foo, expected)
+
     def test_two_fsas(self):
         s1 = '''
             0 1 1 0.1
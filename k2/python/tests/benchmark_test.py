@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+#
+# Copyright      2026  Xiaomi Corp.
+#
+# See ../../../LICENSE for clarification regarding multiple authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# To run this single test, use
+#
+#  ctest --verbose -R benchmark_test_py
+
+import copy
+import json
+import unittest
+
+import k2.benchmark
+import torch
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_run_benchmarks(self):
+        names = k2.benchmark.list_benchmarks()
+        for name in ('intersect_dense_pruned', 'ctc_loss', 'rnnt_loss_pruned',
+                     'shortest_path', 'nbest_from_lattice',
+                     'rnnt_format_output', 'determinize', 'compose',
+                     'fsa_construction', 'fsa_construction_trusted',
+                     'swoosh_l_float32', 'swoosh_l_float32_torch'):
+            self.assertIn(name, names)
+
+        results = k2.benchmark.run_benchmarks(torch.device('cpu'),
+                                              scale=0.05,
+                                              num_iters=2,
+                                              num_warmup=1)
+        self.assertEqual(list(results['results'].keys()), names)
+        for r in results['results'].values():
+            self.assertEqual(r['num_iters'], 2)
+            self.assertLessEqual(r['min_ms'], r['median_ms'])
+            self.assertLessEqual(r['median_ms'], r['max_ms'])
+            self.assertGreaterEqual(r['peak_memory_bytes'], 0)
+        self.assertEqual(results['metadata']['device'], 'cpu')
+        # It must be serializable as JSON
+        json.loads(json.dumps(results))
+
+    def test_filter(self):
+        results = k2.benchmark.run_benchmarks(torch.device('cpu'),
+                                              pattern='^compose$',
+                                              scale=0.05,
+                                              num_iters=1,
+                                              num_warmup=0)
+        self.assertEqual(list(results['results'].keys()), ['compose'])
+
+    def test_compare(self):
+        baseline = {
+            'metadata': {},
+            'results': {
+                'a': {
+                    'median_ms': 10.0,
+                    'peak_memory_bytes': 100
+                },
+                'b': {
+                    'median_ms': 10.0,
+                    'peak_memory_bytes': 0
+                },
+                'c': {
+                    'median_ms': 10.0,
+                    'peak_memory_bytes': 100
+                },
+            }
+        }
+        results = copy.deepcopy(baseline)
+        results['results']['a']['median_ms'] = 12.0
+        results['results']['a']['peak_memory_bytes'] = 200
+        results['results']['b']['median_ms'] = 8.0
+        results['results']['c']['median_ms'] = 10.5
+        results['results']['d'] = {'median_ms': 1.0, 'peak_memory_bytes': 0}
+
+        comparison = k2.benchmark.compare(results, baseline, threshold=0.1)
+        self.assertEqual([c['name'] for c in comparison], ['a', 'b', 'c'])
+        self.assertEqual([c['status'] for c in comparison],
+                         ['regression', 'improvement', 'ok'])
+        self.assertAlmostEqual(comparison[0]['ratio'], 1.2)
+        self.assertAlmostEqual(comparison[0]['memory_ratio'], 2.0)
+        self.assertIsNone(comparison[1]['memory_ratio'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -93,6 +93,15 @@ class TestCat(unittest.TestCase):
             assert not hasattr(fsa_vec, 'ragged_tensor_attr2')
             assert not hasattr(fsa_vec, 'ragged_tensor_attr3')
 
+            fsa_vec1.scores.requires_grad_(True)
+            fsa_vec2.scores.requires_grad_(True)
+            fsa_vec = k2.cat([fsa_vec1, fsa_vec2])
+            assert fsa_vec.properties == fsa_vec1.properties
+            scale = torch.arange(6, dtype=torch.float32, device=device)
+            (fsa_vec.scores * scale).sum().backward()
+            assert torch.allclose(fsa_vec1.scores.grad, scale[:3])
+            assert torch.allclose(fsa_vec2.scores.grad, scale[3:])
+
 
 if __name__ == '__main__':
     unittest.main()
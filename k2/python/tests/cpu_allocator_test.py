@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+#
+# Copyright      2026  Xiaomi Corp.
+#
+# See ../../../LICENSE for clarification regarding multiple authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# To run this single test, use
+#
+#  ctest --verbose -R cpu_allocator_test_py
+
+import unittest
+
+import k2
+import torch
+
+
+class TestCpuAllocator(unittest.TestCase):
+
+    def test_stats(self):
+        k2.set_cpu_allocator_cache_limit(1 << 20)
+        k2.empty_cpu_allocator_cache()
+        k2.reset_cpu_allocator_peak_stats()
+        before = k2.get_cpu_allocator_stats()
+        self.assertEqual(before.cached_bytes, 0)
+        self.assertEqual(before.cache_limit_bytes, 1 << 20)
+
+        fsa = k2.linear_fsa([1, 2, 3])
+        for _ in range(3):
+            k2.arc_sort(k2.add_epsilon_self_loops(fsa))
+
+        stats = k2.get_cpu_allocator_stats()
+        self.assertGreater(stats.num_allocs, before.num_allocs)
+        self.assertGreater(stats.num_cache_hits, before.num_cache_hits)
+        self.assertGreater(stats.peak_allocated_bytes, 0)
+        self.assertGreaterEqual(stats.peak_allocated_bytes,
+                                stats.allocated_bytes)
+        self.assertLessEqual(stats.cached_bytes, 1 << 20)
+        self.assertIn('num_cache_hits', str(stats))
+
+        k2.empty_cpu_allocator_cache()
+        self.assertEqual(k2.get_cpu_allocator_stats().cached_bytes, 0)
+
+        # Disable caching
+        k2.set_cpu_allocator_cache_limit(0)
+        before = k2.get_cpu_allocator_stats()
+        k2.arc_sort(k2.add_epsilon_self_loops(fsa))
+        stats = k2.get_cpu_allocator_stats()
+        self.assertEqual(stats.num_cache_hits, before.num_cache_hits)
+        self.assertEqual(stats.cached_bytes, 0)
+
+        k2.set_cpu_allocator_cache_limit(128 << 20)
+
+    def test_tensor_memory(self):
+        # Memory shared with torch tensors is released correctly
+        before = k2.get_cpu_allocator_stats()
+        fsa = k2.linear_fsa([1, 2, 3])
+        scores = fsa.scores.clone()
+        del fsa
+        after = k2.get_cpu_allocator_stats()
+        self.assertEqual(after.allocated_bytes, before.allocated_bytes)
+        self.assertEqual(scores.numel(), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -440,6 +440,93 @@ class TestCtcLoss(unittest.TestCase):
                                   k2_activation_2.grad,
                                   atol=1e-2)
 
+    def test_dense_ctc(self):
+        # Pass the targets instead of k2.ctc_graph(targets)
+        for modified in [False, True]:
+            for delay_penalty in [0.0, 0.5, -0.5]:
+                T = [30, 22, 10]
+                C = 6
+                activations = torch.rand(len(T), max(T), C)
+                log_probs = activations.log_softmax(dim=-1)
+                supervision_segments = torch.tensor(
+                    [[i, 0, t] for i, t in enumerate(T)], dtype=torch.int32)
+                # the last one has too few frames
+                targets = [[1, 2, 2, 3], [5, 5, 1, 3], [4, 1, 1, 2] * 3]
+
+                scores1 = log_probs.detach().clone().requires_grad_(True)
+                dense_fsa_vec = k2.DenseFsaVec(scores1, supervision_segments)
+                graph = k2.ctc_graph(targets, modified=modified)
+                expected = k2.ctc_loss(graph,
+                                       dense_fsa_vec,
+                                       output_beam=1000,
+                                       delay_penalty=delay_penalty,
+                                       reduction='none')
+
+                scores2 = log_probs.detach().clone().requires_grad_(True)
+                dense_fsa_vec = k2.DenseFsaVec(scores2, supervision_segments)
+                loss = k2.ctc_loss(k2.RaggedTensor(targets),
+                                   dense_fsa_vec,
+                                   delay_penalty=delay_penalty,
+                                   reduction='none',
+                                   modified=modified)
+                assert torch.allclose(loss, expected)
+                assert loss[2] == float('inf')
+
+                # exclude the infinite loss from the gradients
+                weight = torch.tensor([1.0, 2.0, 0.0])
+                (expected * weight).sum().backward()
+                (loss * weight).sum().backward()
+                assert torch.allclose(scores1.grad, scores2.grad, atol=1e-5)
+
+                # use_double_scores=False
+                dense_fsa_vec = k2.DenseFsaVec(log_probs,
+                                               supervision_segments)
+                loss_float = k2.ctc_loss(targets,
+                                         dense_fsa_vec,
+                                         delay_penalty=delay_penalty,
+                                         reduction='none',
+                                         use_double_scores=False,
+                                         modified=modified)
+                assert torch.allclose(loss_float, expected)
+
+    def test_unsorted_segments(self):
+        # The supervision segments need not be sorted by decreasing duration
+        for device in self.devices:
+            for delay_penalty in [0.0, 0.5]:
+                T = [10, 30, 22]
+                log_probs = torch.rand(len(T), max(T), 6,
+                                       device=device).log_softmax(-1)
+                supervision_segments = torch.tensor(
+                    [[i, 0, t] for i, t in enumerate(T)], dtype=torch.int32)
+                targets = [[1, 2], [5, 5, 1, 3], [4, 1, 1, 2]]
+                graph = k2.ctc_graph(targets, device=device)
+
+                losses = []
+                for i in range(2):
+                    dense_fsa_vec = k2.DenseFsaVec(log_probs,
+                                                   supervision_segments)
+                    # targets use the dense CTC path on CPU
+                    loss = k2.ctc_loss(graph if i == 0 else targets,
+                                       dense_fsa_vec,
+                                       output_beam=1000,
+                                       delay_penalty=delay_penalty,
+                                       reduction='none')
+                    losses.append(loss)
+                assert torch.allclose(losses[0], losses[1])
+
+                # compare with the sorted ones
+                order = [1, 2, 0]
+                dense_fsa_vec = k2.DenseFsaVec(log_probs,
+                                               supervision_segments[order])
+                loss = k2.ctc_loss(k2.index_fsa(
+                    graph, torch.tensor(order, dtype=torch.int32,
+                                        device=device)),
+                                   dense_fsa_vec,
+                                   output_beam=1000,
+                                   delay_penalty=delay_penalty,
+                                   reduction='none')
+                assert torch.allclose(losses[0][order], loss)
+
 
 if __name__ == '__main__':
     torch.manual_seed(20210109)
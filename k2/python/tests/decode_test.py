@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+#
+# Copyright      2026  Xiaomi Corp.
+#
+# See ../../../LICENSE for clarification regarding multiple authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# To run this single test, use
+#
+#  ctest --verbose -R decode_test_py
+
+import threading
+import time
+import unittest
+
+import k2
+import torch
+
+
+class TestLatticeBatcher(unittest.TestCase):
+
+    def test_batcher(self):
+        H = k2.ctc_topo(4)
+        lengths = [5, 150, 30, 160, 7, 500, 40, 120]
+        log_probs = [torch.randn(n, 5).log_softmax(dim=-1) for n in lengths]
+
+        expected = []
+        for log_prob in log_probs:
+            lattice = k2.get_lattice(log_prob.unsqueeze(0),
+                                     torch.tensor([log_prob.size(0)]), H)
+            expected.append(lattice.get_tot_scores(True, True))
+
+        futures = [None] * len(log_probs)
+        with k2.LatticeBatcher(H,
+                               max_frames=400,
+                               max_wait_ms=50,
+                               bucket_boundaries=[50, 200]) as batcher:
+
+            def submit(i):
+                futures[i] = batcher.submit(log_probs[i])
+
+            threads = [
+                threading.Thread(target=submit, args=(i,))
+                for i in range(len(log_probs))
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            for i, future in enumerate(futures):
+                lattice = future.result(timeout=60)
+                self.assertEqual(lattice.shape[0], 1)
+                scores = lattice.get_tot_scores(True, True)
+                self.assertTrue(torch.allclose(scores, expected[i]))
+
+        with self.assertRaises(RuntimeError):
+            batcher.submit(log_probs[0])
+
+    def test_batch_order(self):
+        H = k2.ctc_topo(4)
+        with k2.LatticeBatcher(H,
+                               max_frames=100,
+                               max_wait_ms=1000,
+                               bucket_boundaries=[50, 200]) as batcher:
+            # Holding the lock keeps the background thread from taking
+            # the requests.
+            with batcher._cond:
+                now = time.monotonic()
+
+                def request(num_frames, age):
+                    log_prob = torch.randn(num_frames, 5).log_softmax(dim=-1)
+                    return k2.decode._LatticeRequest(log_prob, now - age)
+
+                # bucket 0 is full, bucket 1 has timed out and bucket 2 is
+                # full with an older request than bucket 0.
+                batcher._buckets[0].extend(request(40, 0.1) for _ in range(3))
+                batcher._buckets[1].append(request(60, 2))
+                batcher._buckets[2].append(request(300, 0.5))
+
+                sizes = []
+                batch = batcher._next_batch()
+                while batch is not None:
+                    sizes.append([r.log_prob.size(0) for r in batch])
+                    batch = batcher._next_batch()
+                self.assertEqual(sizes, [[60], [300], [40, 40]])
+                # The last request of bucket 0 is neither full nor timed out
+                self.assertEqual(len(batcher._buckets[0]), 1)
+                batcher._buckets[0].clear()
+
+    def test_error(self):
+        # Errors are reported through the futures
+        with k2.LatticeBatcher(None, max_wait_ms=0) as batcher:
+            future = batcher.submit(torch.randn(10, 5).log_softmax(dim=-1))
+            with self.assertRaises(AttributeError):
+                future.result(timeout=60)
+
+
+if __name__ == '__main__':
+    unittest.main()
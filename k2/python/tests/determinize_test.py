@@ -86,6 +86,24 @@ class TestDeterminize(unittest.TestCase):
         self.assertTrue(
             k2.is_rand_equivalent(fsa, dest_log, log_semiring, delta=1e-3))
 
+    def test_fsa_vec(self):
+        fsas = k2.random_fsa_vec(min_num_fsas=5,
+                                 max_num_fsas=5,
+                                 acyclic=True,
+                                 max_symbol=20,
+                                 min_num_arcs=50,
+                                 max_num_arcs=200)
+        fsas = k2.arc_sort(k2.connect(k2.remove_epsilon(fsas)))
+        dest = k2.determinize(fsas)
+        self.assertEqual(dest.shape[0], fsas.shape[0])
+        log_semiring = False
+        for i in range(fsas.shape[0]):
+            self.assertTrue(
+                k2.is_rand_equivalent(fsas[i],
+                                      dest[i],
+                                      log_semiring,
+                                      delta=1e-3))
+
 
 # TODO(fangjun): add more tests to test autograd use simple cases
 
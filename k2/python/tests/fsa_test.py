@@ -1018,6 +1018,32 @@ class TestFsa(unittest.TestCase):
         assert fsa.aux_labels == k2.RaggedTensor(
             '[ [ 1 0 2 ] [ 3 5 ] [ 5 8 9 ] ]')
 
+        fsa1.attr = torch.tensor([1, 2], dtype=torch.int32)
+        fsa2.attr = torch.tensor([3], dtype=torch.int32)
+        fsa1.attr2d = torch.tensor([[1, 2], [3, 4]])
+        fsa2.attr2d = torch.tensor([[5, 6]])
+        fsa1.symbols = 'symbols'
+        fsa2.symbols = 'symbols'
+        fsa2.name = 'fsa2'
+        fsa = k2.create_fsa_vec([fsa1, fsa2])
+        assert torch.all(
+            torch.eq(fsa.attr, torch.tensor([1, 2, 3], dtype=torch.int32)))
+        assert torch.all(
+            torch.eq(fsa.attr2d, torch.tensor([[1, 2], [3, 4], [5, 6]])))
+        assert torch.all(torch.eq(fsa.labels, torch.tensor([1, -1, -1])))
+        assert torch.allclose(fsa.scores, torch.tensor([0.1, 0.2, 10]))
+        assert fsa.symbols == 'symbols'
+        assert fsa.name == 'fsa2'
+        assert fsa.scores.requires_grad is False
+
+        fsa1.scores.requires_grad_(True)
+        fsa2.scores.requires_grad_(True)
+        fsa = k2.create_fsa_vec([fsa1, fsa2])
+        assert torch.allclose(fsa.scores, torch.tensor([0.1, 0.2, 10]))
+        (fsa.scores * torch.tensor([1., 2., 3.])).sum().backward()
+        assert torch.allclose(fsa1.scores.grad, torch.tensor([1., 2.]))
+        assert torch.allclose(fsa2.scores.grad, torch.tensor([3.]))
+
     def test_index_fsa(self):
         for device in self.devices:
             s1 = '''
@@ -1177,6 +1203,67 @@ class TestFsa(unittest.TestCase):
         assert 'forward_scores_double_log' not in fsa._cache
         assert 'state_batches' in fsa._cache
 
+        fsa.get_tot_scores(False, False)
+        assert 'entering_arcs' in fsa._cache
+        assert 'tot_scores_float_tropical' in fsa._cache
+
+        fsa._invalidate_cache_()
+        assert 'entering_arcs' not in fsa._cache
+        assert 'tot_scores_float_tropical' not in fsa._cache
+        assert 'state_batches' in fsa._cache
+
+        fsa._invalidate_cache_(scores_only=False)
+        assert len(fsa._cache) == 0
+
+    def test_create_trusted(self):
+        s = '''
+            0 1 1 0.1
+            1 2 -1 0.2
+            2
+        '''
+        fsa = k2.Fsa.from_str(s)
+        trusted = k2.Fsa._create_trusted(fsa.arcs)
+        assert trusted._properties is None
+        assert trusted.properties == fsa.properties
+        assert trusted._properties == fsa.properties
+
+        trusted = k2.Fsa._create_trusted(fsa.arcs, properties=fsa.properties)
+        assert trusted._properties == fsa.properties
+
+        # An invalid FSA is detected the first time properties are accessed
+        arcs = fsa.arcs.clone()
+        arcs.values()[0, 2] = -1  # -1 on a non-final arc
+        invalid = k2.Fsa._create_trusted(arcs)
+        with self.assertRaises(ValueError):
+            invalid.properties
+
+    def test_fsa_vec_properties(self):
+        s1 = '''
+            0 1 1 0.1
+            1 2 -1 0.2
+            2
+        '''
+        s2 = '''
+            0 1 0 0.1
+            0 1 2 0.1
+            1 2 -1 0.2
+            2
+        '''
+        fsa1 = k2.Fsa.from_str(s1)
+        fsa2 = k2.Fsa.from_str(s2)
+        fsa_vec1 = k2.create_fsa_vec([fsa1, fsa2])
+        expected = _k2.get_fsa_vec_basic_properties(fsa_vec1.arcs)
+        assert fsa_vec1.properties == expected
+        assert expected == fsa1.properties & fsa2.properties
+
+        fsa_vec2 = k2.create_fsa_vec([fsa1])
+        fsa_vec2.properties
+
+        # k2.cat() inherits the properties of its inputs
+        fsa_vec = k2.cat([fsa_vec1, fsa_vec2])
+        expected = _k2.get_fsa_vec_basic_properties(fsa_vec.arcs)
+        assert fsa_vec._properties == expected
+
     def test_modify_fsa_label(self):
         s = """
             0 1 1 0.1
@@ -323,6 +323,52 @@ class TestGetTotScores(unittest.TestCase):
             assert torch.allclose(fsa2.scores.grad,
                                   scale[1] * expected_grad_fsa2)
 
+    def test_log_fused_backward(self):
+        # The gradients computed together with the backward scores are the
+        # same as those from the arc posteriors.
+        for device in self.devices:
+            for use_double_scores in [True, False]:
+                fsa_vec = k2.random_fsa_vec(min_num_fsas=2,
+                                            max_num_fsas=10,
+                                            acyclic=True,
+                                            max_symbol=10,
+                                            min_num_arcs=2,
+                                            max_num_arcs=100).to(device)
+                fsa_vec.scores = torch.rand_like(fsa_vec.scores)
+                fsa_vec1 = fsa_vec.detach().requires_grad_(True)
+                fsa_vec2 = fsa_vec.detach().requires_grad_(True)
+                scale = torch.rand(fsa_vec.shape[0], device=device)
+
+                tot_scores = fsa_vec1.get_tot_scores(
+                    log_semiring=True, use_double_scores=use_double_scores)
+                (tot_scores * scale.to(tot_scores)).sum().backward()
+
+                # The arc posteriors are cached, so they are used in backward
+                arc_post = fsa_vec2._get_arc_post(
+                    use_double_scores=use_double_scores, log_semiring=True)
+                tot_scores = fsa_vec2.get_tot_scores(
+                    log_semiring=True, use_double_scores=use_double_scores)
+                (tot_scores * scale.to(tot_scores)).sum().backward()
+
+                fsa_idx = fsa_vec.arcs.shape().row_ids(2).long()
+                fsa_idx = fsa_vec.arcs.shape().row_ids(1).long()[fsa_idx]
+                expected = arc_post.exp() * scale.to(arc_post)[fsa_idx]
+
+                assert torch.allclose(fsa_vec1.scores.grad,
+                                      fsa_vec2.scores.grad,
+                                      atol=1e-5)
+                assert torch.allclose(fsa_vec1.scores.grad,
+                                      expected.float(),
+                                      atol=1e-5)
+                # The backward scores are cached
+                backward_scores = fsa_vec1._get_backward_scores(
+                    use_double_scores=use_double_scores, log_semiring=True)
+                assert torch.allclose(
+                    backward_scores,
+                    fsa_vec2._get_backward_scores(
+                        use_double_scores=use_double_scores,
+                        log_semiring=True))
+
 
 if __name__ == '__main__':
     unittest.main()
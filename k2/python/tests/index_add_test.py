@@ -204,6 +204,35 @@ class TestIndexAdd(unittest.TestCase):
                 saved.index_add_(0, index.to(torch.int64) + 1, value)
                 assert torch.all(torch.eq(src, saved[1:]))
 
+    def test_multithreaded(self):
+        # Large enough to split the indexes into chunks on CPU
+        num_threads = k2.get_num_threads()
+        try:
+            for n in [1, 4]:
+                k2.set_num_threads(n)
+                for dtype in [torch.int32, torch.float32, torch.float64]:
+                    for shape in [(1000,), (300, 5)]:
+                        src = torch.randint(-1000, 1000, shape, dtype=dtype)
+                        if len(shape) == 2:
+                            # non-contiguous
+                            src = src.t().contiguous().t()
+                        index = torch.randint(-1,
+                                              shape[0],
+                                              size=(50000,),
+                                              dtype=torch.int32)
+                        value = torch.randint(-1000,
+                                              1000,
+                                              (50000,) + shape[1:],
+                                              dtype=dtype)
+                        saved = src.clone()
+                        k2.index_add(index, value, src)
+
+                        saved = torch.cat([torch.zeros_like(saved[:1]), saved])
+                        saved.index_add_(0, index.to(torch.int64) + 1, value)
+                        assert torch.all(torch.eq(src, saved[1:]))
+        finally:
+            k2.set_num_threads(num_threads)
+
 
 if __name__ == '__main__':
     unittest.main()
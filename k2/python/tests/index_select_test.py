@@ -355,6 +355,81 @@ class TestIndexSelect(unittest.TestCase):
                 assert torch.allclose(c, expected)
                 assert torch.allclose(a.grad, new_a.grad)
 
+    def test_default_value_and_out(self):
+        for device in self.devices:
+            index = torch.tensor([2, -1, 0, 3, -1, 2],
+                                 dtype=torch.int32,
+                                 device=device)
+            for dtype in [torch.int32, torch.int64, torch.float32,
+                          torch.float64]:
+                src_2d = torch.arange(12, device=device).reshape(4, 3)
+                for src in [src_2d[:, 0].contiguous(), src_2d]:
+                    src = src.to(dtype)
+                    padded_src = torch.cat(
+                        [torch.full_like(src[:1], -2), src])
+                    expected = padded_src.index_select(
+                        0, (index + 1).to(torch.int64))
+
+                    ans = k2.index_select(src, index, default_value=-2)
+                    assert torch.equal(ans, expected)
+
+                    out = torch.empty_like(expected)
+                    ans = k2.index_select(src, index, -2, out=out)
+                    assert ans.data_ptr() == out.data_ptr()
+                    assert torch.equal(out, expected)
+
+            src = torch.rand(4, 3, device=device, requires_grad=True)
+            out = torch.empty(index.numel(), 3, device=device)
+            ans = k2.index_select(src, index, out=out)
+            ans.sum().backward()
+            expected = torch.zeros_like(src)
+            k2.index_add(index, torch.ones_like(out), expected)
+            assert torch.allclose(src.grad, expected)
+
+    def test_multi(self):
+        for device in self.devices:
+            index = torch.tensor([2, -1, 0, 3, -1, 2],
+                                 dtype=torch.int32,
+                                 device=device)
+            srcs = [
+                torch.tensor([1, 2, 3, 4], dtype=torch.int32, device=device),
+                torch.tensor([5, 6, 7, 8], dtype=torch.int64, device=device),
+                torch.rand(4, dtype=torch.float32, device=device),
+                torch.rand(4, dtype=torch.float64, device=device),
+                torch.rand(8, dtype=torch.float32, device=device)[::2],
+            ]
+            srcs[2].requires_grad_(True)
+            srcs[4].requires_grad_(True)
+            default_values = [-1, 0, float('-inf'), 2.5, 0]
+            ans = k2.index_select_multi(srcs, index, default_values)
+            self.assertEqual(len(ans), len(srcs))
+            for src, d, a in zip(srcs, default_values, ans):
+                expected = k2.index_select(src.detach(),
+                                           index,
+                                           default_value=d)
+                self.assertEqual(a.dtype, src.dtype)
+                self.assertTrue(torch.equal(a.detach(), expected))
+
+            scale = torch.arange(index.numel(), device=device)
+            (ans[2].masked_fill(index == -1, 0) * scale +
+             ans[4] * scale).sum().backward()
+            for src in (srcs[2], srcs[4]):
+                expected = torch.zeros_like(src)
+                k2.index_add(index, scale.to(src.dtype), expected)
+                self.assertTrue(torch.allclose(src.grad, expected))
+
+            # 0.1 is not exactly representable as float32
+            ans = k2.index_select_multi(srcs[2:3], index, [0.1])
+            expected = k2.index_select(srcs[2].detach(),
+                                       index,
+                                       default_value=0.1)
+            self.assertTrue(torch.equal(ans[0].detach(), expected))
+
+            empty = torch.tensor([], dtype=torch.int32, device=device)
+            ans = k2.index_select_multi(srcs, empty)
+            self.assertTrue(all(a.numel() == 0 for a in ans))
+            self.assertEqual(k2.index_select_multi([], index), [])
+
 
 class TestSimpleRaggedIndexSelect(unittest.TestCase):
 
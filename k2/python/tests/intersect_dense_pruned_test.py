@@ -281,6 +281,52 @@ class TestIntersectDensePruned(unittest.TestCase):
                                             use_double_scores=False)
             scores.sum().backward()
 
+    def test_lattice_chunk_frames(self):
+        for device in self.devices:
+            for shared_graph in [True, False]:
+                graph = k2.arc_sort(k2.ctc_topo(4)).to(device)
+                graph = k2.create_fsa_vec([graph] if shared_graph else
+                                          [graph.clone() for _ in range(3)])
+                log_prob = torch.randn((3, 300, 5), device=device)
+                log_prob = log_prob.log_softmax(dim=-1)
+                # A sequence that ends within the first chunk, one that ends
+                # in the middle and one that ends in the last chunk.
+                supervision_segments = torch.tensor(
+                    [[0, 0, 300], [1, 10, 137], [2, 5, 15]],
+                    dtype=torch.int32)
+
+                results = []
+                for lattice_chunk_frames in [0, 1, 40, 100]:
+                    log_prob.requires_grad_(True)
+                    log_prob.grad = None
+                    dense_fsa_vec = k2.DenseFsaVec(log_prob,
+                                                   supervision_segments)
+                    out_fsa = k2.intersect_dense_pruned(
+                        graph,
+                        dense_fsa_vec,
+                        search_beam=8,
+                        output_beam=4,
+                        min_active_states=1,
+                        max_active_states=20,
+                        seqframe_idx_name='seqframe',
+                        lattice_chunk_frames=lattice_chunk_frames)
+                    scores = out_fsa.get_tot_scores(log_semiring=True,
+                                                    use_double_scores=True)
+                    scores.sum().backward()
+                    results.append((out_fsa, log_prob.grad.clone()))
+
+                expected, expected_grad = results[0]
+                for out_fsa, grad in results[1:]:
+                    assert torch.equal(out_fsa.arcs.shape().row_splits(1),
+                                       expected.arcs.shape().row_splits(1))
+                    assert torch.equal(out_fsa.arcs.shape().row_splits(2),
+                                       expected.arcs.shape().row_splits(2))
+                    assert torch.equal(out_fsa.arcs.values(),
+                                       expected.arcs.values())
+                    assert torch.equal(out_fsa.seqframe, expected.seqframe)
+                    assert torch.equal(out_fsa.scores, expected.scores)
+                    assert torch.equal(grad, expected_grad)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -318,6 +318,46 @@ class TestIntersectDense(unittest.TestCase):
                                             use_double_scores=False)
             scores.sum().backward()
 
+    def test_unsorted(self):
+        # The sequences of the DenseFsaVec are not sorted by decreasing
+        # duration, and a_to_b_map is not non-decreasing.
+        for device in self.devices:
+            graphs = k2.ctc_graph([[1, 2], [2], [3, 1], [1]], device=device)
+            log_probs = torch.rand(3, 6, 4, device=device).log_softmax(-1)
+            supervision_segments = torch.tensor(
+                [[0, 0, 3], [1, 1, 5], [2, 0, 4]], dtype=torch.int32)
+            a_to_b_map = torch.tensor([2, 0, 1, 1],
+                                      dtype=torch.int32,
+                                      device=device)
+            # The same sequences sorted by hand
+            order = [1, 2, 0]
+
+            results = []
+            for segments, b_map in [
+                (supervision_segments, a_to_b_map),
+                (supervision_segments[order],
+                 torch.tensor([1, 2, 0, 0], dtype=torch.int32, device=device))
+            ]:
+                scores = log_probs.detach().clone().requires_grad_(True)
+                dense_fsa_vec = k2.DenseFsaVec(scores, segments)
+                out_fsa = k2.intersect_dense(graphs,
+                                             dense_fsa_vec,
+                                             output_beam=1000,
+                                             a_to_b_map=b_map,
+                                             seqframe_idx_name='seqframe',
+                                             frame_idx_name='frame')
+                tot_scores = out_fsa.get_tot_scores(log_semiring=True,
+                                                    use_double_scores=True)
+                tot_scores.sum().backward()
+                # the frames of each arc, given by its row in `scores`
+                rows = dense_fsa_vec.scores[out_fsa.seqframe.long(), 1:]
+                results.append((tot_scores, out_fsa.frame, rows, scores.grad))
+
+            assert torch.allclose(results[0][0], results[1][0])
+            assert torch.all(torch.eq(results[0][1], results[1][1]))
+            assert torch.allclose(results[0][2], results[1][2])
+            assert torch.allclose(results[0][3], results[1][3])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -124,6 +124,79 @@ class TestLevenshteinDistance(unittest.TestCase):
             )
             assert torch.allclose(distance.to("cpu"), distance_refs)
 
+    def test_symbol_sequences(self):
+        for device in self.devices:
+            refs_vec = [[1, 2, 3, 4, 5]]
+            hyps_vec = [[1, 2, 3, 3, 5], [1, 2, 4, 5], [1, 2, 3, 4, 5, 6]]
+            hyp_to_ref_map = torch.tensor(
+                [0, 0, 0], dtype=torch.int32, device=device
+            )
+            alignment = k2.levenshtein_alignment(
+                k2.RaggedTensor(refs_vec, device=device),
+                k2.RaggedTensor(hyps_vec, device=device),
+                hyp_to_ref_map=hyp_to_ref_map,
+            )
+            assert alignment.device == device
+            assert alignment.labels.tolist() == [
+                1, 2, 3, 0, 5, -1, 1, 2, 0, 4, 5, -1, 1, 2, 3, 4, 5, 0, -1
+            ]
+            assert alignment.ref_labels.tolist() == [
+                1, 2, 3, 4, 5, -1, 1, 2, 3, 4, 5, -1, 1, 2, 3, 4, 5, 0, -1
+            ]
+            assert alignment.hyp_labels.tolist() == [
+                1, 2, 3, 3, 5, -1, 1, 2, 0, 4, 5, -1, 1, 2, 3, 4, 5, 6, -1
+            ]
+
+            distances = k2.levenshtein_distance(
+                refs_vec, hyps_vec, hyp_to_ref_map
+            )
+            assert distances.device == device
+            assert distances.tolist() == [1, 1, 1]
+
+    def test_native_distance(self):
+        random.seed(20261019)
+        refs_vec = [
+            [random.randint(1, 5) for _ in range(random.randint(0, 20))]
+            for _ in range(5)
+        ]
+        hyp_to_ref = [random.randint(0, 4) for _ in range(50)]
+        hyps_vec = [
+            [s for s in refs_vec[r] if random.random() > 0.2]
+            + [random.randint(1, 5) for _ in range(random.randint(0, 3))]
+            for r in hyp_to_ref
+        ]
+        hyp_to_ref_map = torch.tensor(hyp_to_ref, dtype=torch.int32)
+        expected = [
+            levenshtein_distance(refs_vec[r], hyp)
+            for r, hyp in zip(hyp_to_ref, hyps_vec)
+        ]
+
+        distances = k2.levenshtein_distance(refs_vec, hyps_vec, hyp_to_ref_map)
+        assert distances.tolist() == expected
+
+        # The same distances as the FSA-based alignment
+        alignment = k2.levenshtein_alignment(
+            k2.levenshtein_graph(refs_vec),
+            k2.levenshtein_graph(hyps_vec),
+            hyp_to_ref_map=hyp_to_ref_map,
+        )
+        tot_scores = alignment.get_tot_scores(True, False)
+        assert (-tot_scores).round().int().tolist() == expected
+
+        alignment = k2.levenshtein_alignment(
+            refs_vec, hyps_vec, hyp_to_ref_map=hyp_to_ref_map
+        )
+        assert torch.allclose(alignment.get_tot_scores(True, False), tot_scores)
+
+        band = 2
+        banded = k2.levenshtein_distance(
+            refs_vec, hyps_vec, hyp_to_ref_map, band=band
+        ).tolist()
+        for d, e in zip(banded, expected):
+            assert d >= e
+            if e <= band:
+                assert d == e
+
 
 if __name__ == "__main__":
     unittest.main()
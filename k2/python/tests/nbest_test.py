@@ -103,6 +103,68 @@ class TestNbest(unittest.TestCase):
         expected_shape = k2.RaggedShape('[ [x x x x] [x x x x] [x x x x] ]')
         assert nbest4.shape == expected_shape
 
+    def test_from_lattice_word_seqs(self):
+        s = '''
+            0 1 1 10 0.1
+            0 1 2 20 0.2
+            1 2 3 0 0.3
+            1 2 4 30 0.4
+            2 3 -1 -1 0
+            3
+        '''
+        for device in self.devices:
+            fsa = k2.Fsa.from_str(s, acceptor=False).to(device)
+            lattice = k2.create_fsa_vec([fsa, fsa.clone()])
+            nbest = k2.Nbest.from_lattice(lattice, num_paths=20)
+            assert nbest.word_seqs is not None
+            expected = k2.nbest._get_texts(nbest.fsa, return_ragged=True)
+            assert nbest.word_seqs == expected
+
+            hashes = nbest.hyp_hashes
+            assert hashes.dtype == torch.int64
+            assert hashes.device == device
+            words = nbest.word_seqs.tolist()
+            for i in range(len(words)):
+                for j in range(len(words)):
+                    assert (hashes[i] == hashes[j]) == (words[i] == words[j])
+
+    def test_hash_word_seqs(self):
+        word_seqs = k2.RaggedTensor([[1, 2], [2, 1], [], [0], [1, 2], [1]])
+        hashes = k2.nbest.hash_word_seqs(word_seqs).tolist()
+        assert hashes[0] == hashes[4]
+        assert len(set(hashes)) == 5
+
+    def test_index_and_cache(self):
+        fsa = k2.linear_fsa([[1], [2], [3], [4], [5]])
+        fsa.aux_labels = fsa.labels.clone()
+        shape = k2.RaggedShape('[ [x x] [x x x] ]')
+        nbest = k2.Nbest(fsa, shape)
+
+        sub = nbest.index(torch.tensor([1, 4]))
+        assert sub.shape == k2.RaggedShape('[ [x] [x] ]')
+        assert sub.get_word_seqs().tolist() == [[2], [5]]
+
+        num_computed = []
+
+        def compute(nbest: k2.Nbest) -> torch.Tensor:
+            word_seqs = nbest.get_word_seqs()
+            num_computed.append(word_seqs.dim0)
+            return word_seqs.sum().float() * 10
+
+        cache = k2.HypothesisCache()
+        scores = cache.get_or_compute(sub, compute)
+        assert scores.tolist() == [20, 50]
+        assert num_computed == [2]
+
+        scores = cache.get_or_compute(nbest, compute)
+        assert scores.tolist() == [10, 20, 30, 40, 50]
+        assert num_computed == [2, 3]
+        assert len(cache) == 5
+
+        scores = cache.get_or_compute(nbest, compute)
+        assert scores.tolist() == [10, 20, 30, 40, 50]
+        assert num_computed == [2, 3]
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -20,6 +20,7 @@
 #
 #  ctest --verbose -R online_dense_intersecter_test_py
 
+import pickle
 import unittest
 
 import k2
@@ -76,6 +77,114 @@ class TestOnlineDenseIntersecter(unittest.TestCase):
                 )
                 print(ofsa)
 
+    def test_partial_results(self):
+        for device in self.devices:
+            vocab_size = 10
+            num_streams = 2
+            decoding_graph = k2.ctc_topo(vocab_size - 1, device=device)
+            decoding_graph = k2.Fsa.from_fsas([decoding_graph])
+
+            intersector = k2.OnlineDenseIntersecter(
+                decoding_graph=decoding_graph,
+                num_streams=num_streams,
+                search_beam=10,
+                output_beam=5,
+                min_active_states=1,
+                max_active_states=100,
+            )
+
+            num_chunks = 6
+            chunk_size = 5
+            decode_states = [None] * num_streams
+            stable_prefixes = [[] for _ in range(num_streams)]
+            for i in range(num_chunks):
+                logits = torch.randn(
+                    (num_streams, chunk_size, vocab_size), device=device
+                )
+                # Make the best path unambiguous
+                logits += 5 * torch.nn.functional.one_hot(
+                    torch.randint(0, vocab_size, (num_streams, chunk_size)),
+                    vocab_size,
+                ).to(device)
+                supervision_segments = torch.tensor(
+                    [[i, 0, chunk_size] for i in range(num_streams)],
+                    dtype=torch.int32,
+                )
+                dense_fsa_vec = k2.DenseFsaVec(
+                    logits.log_softmax(-1), supervision_segments
+                )
+                need_lattice = i % 2 == 1
+                ofsa, decode_states = intersector.decode(
+                    dense_fsa_vec, decode_states, need_lattice=need_lattice
+                )
+                assert (ofsa is None) != need_lattice
+
+                results, num_stable = intersector.partial_results(
+                    decode_states
+                )
+                for s in range(num_streams):
+                    prefix = stable_prefixes[s]
+                    assert results[s][: len(prefix)] == prefix
+                    assert num_stable[s] >= len(prefix)
+                    stable_prefixes[s] = results[s][: num_stable[s]]
+
+                if need_lattice:
+                    best_path = k2.shortest_path(ofsa, use_double_scores=True)
+                    expected = k2.nbest._get_texts(best_path)
+                    assert results == expected, (results, expected)
+
+    def test_pickle_decode_states(self):
+        for device in self.devices:
+            vocab_size = 10
+            num_streams = 2
+            decoding_graph = k2.ctc_topo(vocab_size - 1, device=device)
+            decoding_graph = k2.Fsa.from_fsas([decoding_graph])
+            intersector = k2.OnlineDenseIntersecter(
+                decoding_graph=decoding_graph,
+                num_streams=num_streams,
+                search_beam=10,
+                output_beam=5,
+                min_active_states=1,
+                max_active_states=100,
+            )
+
+            chunk_size = 5
+            supervision_segments = torch.tensor(
+                [[i, 0, chunk_size] for i in range(num_streams)],
+                dtype=torch.int32,
+            )
+            chunks = [
+                k2.DenseFsaVec(
+                    torch.randn(
+                        (num_streams, chunk_size, vocab_size), device=device
+                    ).log_softmax(-1),
+                    supervision_segments,
+                )
+                for _ in range(4)
+            ]
+
+            decode_states = [None] * num_streams
+            for chunk in chunks[:2]:
+                _, decode_states = intersector.decode(
+                    chunk, decode_states, need_lattice=False
+                )
+            intersector.partial_results(decode_states)
+
+            data = pickle.dumps(decode_states)
+            restored = pickle.loads(data)
+            assert pickle.dumps(restored) == data
+
+            results = []
+            for states in [decode_states, restored]:
+                for chunk in chunks[2:]:
+                    ofsa, states = intersector.decode(chunk, states)
+                results.append((ofsa, intersector.partial_results(states)))
+
+            (ofsa, partial), (restored_ofsa, restored_partial) = results
+            assert torch.equal(ofsa.arcs.values(), restored_ofsa.arcs.values())
+            assert torch.equal(ofsa.scores, restored_ofsa.scores)
+            assert partial == restored_partial
+
 
 if __name__ == "__main__":
     unittest.main()
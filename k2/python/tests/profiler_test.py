@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+#
+# Copyright      2026  Xiaomi Corp.
+#
+# See ../../../LICENSE for clarification regarding multiple authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# To run this single test, use
+#
+#  ctest --verbose -R profiler_test_py
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import k2
+import _k2
+import torch
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_record(self):
+        intersect = _k2.intersect
+        a = k2.linear_fsa([1, 2, 3])
+        b = k2.arc_sort(k2.add_epsilon_self_loops(k2.linear_fsa([1, 2, 3])))
+        with k2.profiler.record() as prof:
+            c = k2.intersect(a, b, treat_epsilons_specially=True)
+            k2.shortest_path(k2.create_fsa_vec([a]), use_double_scores=True)
+            k2.intersect(a, b, treat_epsilons_specially=True)
+
+        # functions are restored
+        self.assertIs(_k2.intersect, intersect)
+
+        op = prof.ops['intersect']
+        self.assertEqual(op.count, 2)
+        self.assertEqual(op.num_input_arcs, 2 * (a.num_arcs + b.num_arcs))
+        self.assertEqual(op.num_output_arcs, 2 * c.num_arcs)
+        self.assertGreater(op.total_time, 0)
+        self.assertGreater(op.num_allocs, 0)
+        self.assertGreater(op.allocated_bytes, 0)
+        self.assertIn('shortest_path', prof.ops)
+        self.assertIn('intersect', prof.table())
+
+        # no recording outside of the context manager
+        k2.intersect(a, b, treat_epsilons_specially=True)
+        self.assertEqual(prof.ops['intersect'].count, 2)
+
+        trace = prof.chrome_trace()
+        events = [e for e in trace['traceEvents'] if e['name'] == 'intersect']
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0]['ph'], 'X')
+        self.assertEqual(events[0]['args']['num_output_arcs'], c.num_arcs)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'trace.json')
+            prof.export_chrome_trace(filename)
+            with open(filename) as f:
+                self.assertEqual(len(json.load(f)['traceEvents']),
+                                 len(trace['traceEvents']))
+
+    def test_nested(self):
+        with k2.profiler.record():
+            with self.assertRaises(RuntimeError):
+                with k2.profiler.record():
+                    pass
+
+    def test_threads(self):
+        intersect = _k2.intersect
+        a = k2.linear_fsa([1, 2, 3])
+        b = k2.arc_sort(k2.add_epsilon_self_loops(k2.linear_fsa([1, 2, 3])))
+        num_threads = 4
+        # All threads are recording when they invoke intersect, and the
+        # first ones stop recording while the others are still recording.
+        started = threading.Barrier(num_threads)
+        profiles = [None] * num_threads
+
+        def run(i):
+            with k2.profiler.record() as prof:
+                started.wait()
+                for _ in range(i + 1):
+                    k2.intersect(a, b, treat_epsilons_specially=True)
+            profiles[i] = prof
+
+        threads = [
+            threading.Thread(target=run, args=(i,))
+            for i in range(num_threads)
+        ]
+        for t in threads:
+            t.start()
+        # This thread is not recording
+        k2.intersect(a, b, treat_epsilons_specially=True)
+        for t in threads:
+            t.join()
+
+        # Each profile contains only the calls of its own thread
+        for i, prof in enumerate(profiles):
+            self.assertEqual(prof.ops['intersect'].count, i + 1)
+        self.assertIs(_k2.intersect, intersect)
+
+    def test_methods(self):
+        format_output = _k2.RnntDecodingStreams.format_output
+        with k2.profiler.record():
+            self.assertIsNot(_k2.RnntDecodingStreams.format_output,
+                             format_output)
+        self.assertIs(_k2.RnntDecodingStreams.format_output, format_output)
+
+
+if __name__ == '__main__':
+    unittest.main()
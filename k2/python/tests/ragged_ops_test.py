@@ -641,6 +641,109 @@ class TestRaggedOps(unittest.TestCase):
                 expected = torch.tensor([3, 0, 0, 5, 10], device=device)
                 assert torch.all(torch.eq(indexes, expected))
 
+    def test_argmin_per_sublist(self):
+        for device in self.devices:
+            for dtype in self.dtypes:
+                src = k2.RaggedTensor(
+                    [[[3, 2, 1], [0, -1], []], [[2, 5, 2], [1, 10, 9, 8]]],
+                    dtype=dtype).to(device)
+                indexes = src.argmin()
+                # -1 for an empty sublist; the last one of equal elements
+                # is chosen
+                expected = torch.tensor([2, 4, -1, 7, 8], device=device)
+                assert torch.all(torch.eq(indexes, expected))
+
+                indexes = src.argmin(initial_value=0)
+                expected = torch.tensor([-1, 4, -1, -1, -1], device=device)
+                assert torch.all(torch.eq(indexes, expected))
+
+    def test_mean_per_sublist(self):
+        for device in self.devices:
+            for dtype in [torch.float32, torch.float64]:
+                src = k2.RaggedTensor([[1, 2, 3], [], [4, 6], [-1]],
+                                      dtype=dtype).to(device)
+                src.requires_grad_(True)
+                mean = src.mean()
+                expected = torch.tensor([2, float('nan'), 5, -1],
+                                        dtype=dtype,
+                                        device=device)
+                assert torch.allclose(mean, expected, equal_nan=True)
+
+                mean[[0, 2, 3]].sum().backward()
+                expected_grad = torch.tensor(
+                    [1 / 3, 1 / 3, 1 / 3, 1 / 2, 1 / 2, 1],
+                    dtype=dtype,
+                    device=device)
+                assert torch.allclose(src.grad, expected_grad)
+
+    def test_cumsum_per_sublist(self):
+        for device in self.devices:
+            for dtype in self.dtypes:
+                src = k2.RaggedTensor([[[1, 2, 3], []], [[4], [5, 6]]],
+                                      dtype=dtype).to(device)
+                expected = k2.RaggedTensor([[[1, 3, 6], []], [[4], [5, 11]]],
+                                           dtype=dtype).to(device)
+                assert src.cumsum() == expected
+
+        # a large one, which is processed by multiple threads on CPU
+        src = k2.RaggedTensor(
+            [[random.randint(-5, 5) for _ in range(random.randint(0, 100))]
+             for _ in range(1000)])
+        ans = src.cumsum()
+        for device in self.devices:
+            assert src.to(device).cumsum().to('cpu') == ans
+        for s, a in zip(src.tolist(), ans.tolist()):
+            assert torch.equal(
+                torch.tensor(s, dtype=torch.int32).cumsum(0).to(torch.int32),
+                torch.tensor(a, dtype=torch.int32))
+
+    def test_topk_per_sublist(self):
+        for device in self.devices:
+            for dtype in self.dtypes:
+                src = k2.RaggedTensor([[[1, 5, 3, 5], []], [[4], [2, 6]]],
+                                      dtype=dtype).to(device)
+                values, indexes = src.topk(2)
+                expected_values = k2.RaggedTensor(
+                    [[[5, 5], []], [[4], [6, 2]]], dtype=dtype).to(device)
+                expected_indexes = k2.RaggedTensor(
+                    [[[1, 3], []], [[4], [6, 5]]]).to(device)
+                assert values == expected_values
+                assert indexes == expected_indexes
+
+                values, indexes = src.topk(10, axis=2)
+                assert values.shape == src.shape
+                assert torch.all(
+                    torch.eq(values.values,
+                             src.values[indexes.values.long()]))
+
+        # a large one, which is processed by multiple threads on CPU
+        src = k2.RaggedTensor(
+            [[random.random() for _ in range(random.randint(0, 100))]
+             for _ in range(1000)])
+        values, indexes = src.topk(5)
+        for s, v, i, begin in zip(src.tolist(), values.tolist(),
+                                  indexes.tolist(),
+                                  src.shape.row_splits(1).tolist()):
+            expected = torch.tensor(s).topk(min(5, len(s)))
+            assert torch.equal(torch.tensor(v), expected.values)
+            assert torch.equal(
+                torch.tensor(i, dtype=torch.int64) - begin, expected.indices)
+        for device in self.devices:
+            assert src.to(device).topk(5)[1].to('cpu') == indexes
+
+    def test_topk_per_sublist_with_grad(self):
+        for device in self.devices:
+            src = k2.RaggedTensor([[1, 5, 3], [4]],
+                                  dtype=torch.float32).to(device)
+            src.requires_grad_(True)
+            values, _ = src.topk(2)
+            (values.values * torch.tensor([1., 2., 3.],
+                                          device=device)).sum().backward()
+            expected_grad = torch.tensor([0, 1, 2, 3],
+                                         dtype=torch.float32,
+                                         device=device)
+            assert torch.allclose(src.grad, expected_grad)
+
     def test_sort_sublist_ascending(self):
         for device in self.devices:
             for dtype in self.dtypes:
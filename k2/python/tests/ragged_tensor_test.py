@@ -29,6 +29,11 @@ import k2.ragged as k2r
 
 import torch
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 class TestRaggedTensor(unittest.TestCase):
     @classmethod
@@ -466,6 +471,101 @@ class TestRaggedTensor(unittest.TestCase):
                 assert a.tot_size(1) == 8
                 assert a.tot_size(2) == 10
 
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_to_numpy(self):
+        for dtype in self.dtypes:
+            a = k2r.RaggedTensor("[ [[1 2 3] [] [5 8]] [[] [1 5]] ]",
+                                 dtype=dtype)
+            values, row_splits = a.to_numpy()
+            assert values.tolist() == [1, 2, 3, 5, 8, 1, 5]
+            assert len(row_splits) == 2
+            assert row_splits[0].tolist() == [0, 3, 5]
+            assert row_splits[1].tolist() == [0, 3, 3, 5, 5, 7]
+
+            shape_row_splits = a.shape.to_numpy()
+            assert [r.tolist() for r in shape_row_splits] == [
+                r.tolist() for r in row_splits
+            ]
+
+            # memory is shared
+            values[0] = 10
+            assert a.values[0] == 10
+            a.values[1] = 20
+            assert values[1] == 20
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_iter_numpy(self):
+        for dtype in self.dtypes:
+            a = k2r.RaggedTensor("[ [[1 2 3] [] [5 8]] [[] [1 5]] ]",
+                                 dtype=dtype)
+            sublists = list(a.iter_numpy())
+            assert [s.tolist() for s in sublists] == [[1, 2, 3], [], [5, 8],
+                                                      [], [1, 5]]
+            sublists[0][0] = 10
+            assert a.values[0] == 10
+
+            b = k2r.RaggedTensor("[ [] [1] ]", dtype=dtype)
+            assert [s.tolist() for s in b.iter_numpy()] == [[], [1]]
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_from_numpy(self):
+        values = np.array([1, 2, 3, 5], dtype=np.float32)
+        row_splits = np.array([0, 2, 2, 4], dtype=np.int32)
+        a = k2r.from_numpy(values, row_splits)
+        assert a == k2r.RaggedTensor("[[1 2] [] [3 5]]", dtype=torch.float32)
+
+        # memory is shared
+        values[0] = 10
+        assert a.values[0] == 10
+        row_splits_back = a.shape.to_numpy()[0]
+        row_splits_back[1] = 1
+        assert row_splits[1] == 1
+
+        # row_splits with dtype int64 are converted
+        a = k2r.from_numpy(values, [
+            np.array([0, 1, 3]),
+            np.array([0, 2, 2, 4]),
+        ])
+        assert a == k2r.RaggedTensor("[ [[10 2]] [[] [3 5]] ]",
+                                     dtype=torch.float32)
+
+        with self.assertRaises(RuntimeError):
+            k2r.from_numpy(values, np.array([0, 2, 3]))
+
+        # invalid row_splits are rejected at construction time
+        invalid_row_splits = [
+            np.array([0, 3, 2, 4]),  # decreasing
+            np.array([1, 2, 4]),  # not starting with 0
+            np.array([], dtype=np.int32),  # empty
+            [np.array([0, 1, 2]), np.array([0, 2, 2, 4])],  # mismatch
+        ]
+        for row_splits in invalid_row_splits:
+            with self.assertRaises(RuntimeError):
+                k2r.from_numpy(values, row_splits)
+
+        row_splits = np.array([0, 2, 2, 4], dtype=np.int32)
+        invalid_values = [
+            np.array([1, 2, 3, 5]),  # int64
+            np.arange(8, dtype=np.float32)[::2],  # non-contiguous
+            np.zeros((2, 2), dtype=np.float32),  # 2-D
+        ]
+        for values in invalid_values:
+            with self.assertRaises(ValueError):
+                k2r.from_numpy(values, row_splits)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_dlpack(self):
+        for dtype in self.dtypes:
+            a = k2r.RaggedTensor("[ [1 2 3] [] [5 8] ]", dtype=dtype)
+            b = torch.from_dlpack(a)
+            assert torch.equal(b, a.values)
+            b[0] = 10
+            assert a.values[0] == 10
+
+            if hasattr(np, "from_dlpack"):
+                c = np.from_dlpack(a)
+                assert c.tolist() == [10, 2, 3, 5, 8]
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -20,6 +20,7 @@
 #
 #  ctest --verbose -R rnnt_decode_test_py
 
+import pickle
 import unittest
 
 import k2
@@ -73,6 +74,106 @@ class TestRnntDecode(unittest.TestCase):
             ofsa = streams.format_output([3, 4, 5])
             print(ofsa)
 
+    def test_decoder_cache(self):
+        for device in self.devices:
+            embedding = torch.nn.Embedding(10, 4).to(device)
+
+            def decoder(contexts):
+                # (N, 2) -> (N, 1, 4)
+                return embedding(contexts.to(torch.int64)).sum(
+                    dim=1, keepdim=True
+                )
+
+            # Room for 3 outputs only, so that entries are evicted
+            cache = k2.RnntDecoderCache(max_bytes=3 * 4 * 4)
+            contexts = torch.tensor(
+                [[0, 0], [0, 1], [0, 0]], dtype=torch.int32, device=device
+            )
+            new_contexts, index = cache.query(contexts)
+            self.assertEqual(new_contexts.tolist(), [[0, 0], [0, 1]])
+            with torch.no_grad():
+                decoder_out = cache.update(decoder(new_contexts), index)
+                assert torch.allclose(decoder_out, decoder(contexts))
+            self.assertEqual(len(cache), 2)
+
+            contexts = torch.tensor(
+                [[1, 2], [0, 1], [2, 3]], dtype=torch.int32, device=device
+            )
+            new_contexts, index = cache.query(contexts)
+            self.assertEqual(new_contexts.tolist(), [[1, 2], [2, 3]])
+            with torch.no_grad():
+                decoder_out = cache.update(decoder(new_contexts), index)
+                assert torch.allclose(decoder_out, decoder(contexts))
+            # [0, 0] is the least recently used one and is evicted
+            self.assertEqual(len(cache), 3)
+            # hits and misses are counted for unique contexts of each frame
+            self.assertEqual(cache.num_hits, 1)
+            self.assertEqual(cache.num_misses, 4)
+
+            graph = k2.ctc_topo(9, device=device)
+            config = k2.RnntDecodingConfig(10, 2, 3.0, 3, 3)
+            cache = k2.RnntDecoderCache()
+            num_new_contexts = 0
+            num_contexts = 0
+            for chunk in range(2):
+                streams = k2.RnntDecodingStreams(
+                    [k2.RnntDecodingStream(graph) for _ in range(3)],
+                    config,
+                    decoder_cache=cache,
+                )
+                for i in range(5):
+                    _, contexts = streams.get_contexts()
+                    shape, new_contexts, index = streams.get_new_contexts()
+                    self.assertEqual(index.numel(), shape.tot_size(1))
+                    with torch.no_grad():
+                        decoder_out = cache.update(
+                            decoder(new_contexts), index
+                        )
+                        assert torch.allclose(decoder_out, decoder(contexts))
+                    num_new_contexts += new_contexts.size(0)
+                    num_contexts += contexts.size(0)
+                    logprobs = torch.randn(
+                        (contexts.shape[0], 10),
+                        dtype=torch.float32,
+                        device=device,
+                    )
+                    streams.advance(logprobs)
+            assert num_new_contexts < num_contexts
+
+    def test_serialization(self):
+        for device in self.devices:
+            graph = k2.ctc_topo(9, device=device)
+            config = k2.RnntDecodingConfig(10, 2, 3.0, 3, 3)
+            torch.manual_seed(20261019)
+            logprobs = [
+                torch.randn((100, 10), device=device).log_softmax(-1)
+                for _ in range(6)
+            ]
+
+            def decode(streams_list, frames):
+                streams = k2.RnntDecodingStreams(streams_list, config)
+                for t in frames:
+                    _, contexts = streams.get_contexts()
+                    streams.advance(logprobs[t][: contexts.shape[0]])
+                streams.terminate_and_flush_to_streams()
+                return streams
+
+            stream = k2.RnntDecodingStream(graph)
+            decode([stream], range(3))
+
+            data = stream.to_bytes()
+            restored = k2.RnntDecodingStream.from_bytes(graph, data)
+            assert restored.to_bytes() == data
+            pickled = pickle.loads(pickle.dumps(stream))
+            assert pickled.device == device
+            assert pickled.to_bytes() == data
+
+            expected = decode([stream], range(3, 6)).format_output([6])
+            for s in [restored, pickled]:
+                ofsa = decode([s], range(3, 6)).format_output([6])
+                assert torch.equal(ofsa.arcs.values(), expected.arcs.values())
+                assert torch.equal(ofsa.scores, expected.scores)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+#
+# Copyright      2026  Xiaomi Corp.
+#
+# See ../../../LICENSE for clarification regarding multiple authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# To run this single test, use
+#
+#  ctest --verbose -R rnnt_search_test_py
+
+import math
+import unittest
+
+import k2
+import torch
+
+
+class Decoder(torch.nn.Module):
+
+    def __init__(self, vocab_size: int, dim: int, context_size: int):
+        super().__init__()
+        self.blank_id = 0
+        self.context_size = context_size
+        self.embedding = torch.nn.Embedding(vocab_size, dim)
+        self.num_calls = 0
+        self.num_contexts = 0
+
+    def forward(self, y: torch.Tensor, need_pad: bool = True) -> torch.Tensor:
+        assert need_pad is False
+        self.num_calls += 1
+        self.num_contexts += y.size(0)
+        # (N, context_size, dim) -> (N, 1, dim)
+        return self.embedding(y).tanh().sum(dim=1, keepdim=True)
+
+
+class Joiner(torch.nn.Module):
+
+    def __init__(self, encoder_dim: int, decoder_dim: int, joiner_dim: int,
+                 vocab_size: int):
+        super().__init__()
+        self.encoder_proj = torch.nn.Linear(encoder_dim, joiner_dim)
+        self.decoder_proj = torch.nn.Linear(decoder_dim, joiner_dim)
+        self.output_linear = torch.nn.Linear(joiner_dim, vocab_size)
+
+    def forward(self,
+                encoder_out: torch.Tensor,
+                decoder_out: torch.Tensor,
+                project_input: bool = True) -> torch.Tensor:
+        assert project_input is False
+        return self.output_linear(torch.tanh(encoder_out + decoder_out))
+
+
+class Transducer(torch.nn.Module):
+
+    def __init__(self, vocab_size: int = 10, context_size: int = 2):
+        super().__init__()
+        self.decoder = Decoder(vocab_size, 16, context_size)
+        self.joiner = Joiner(8, 16, 12, vocab_size)
+
+
+def _log_probs(model, encoder_out, ys):
+    '''Log-probs of the next token given the frame and the hypothesis.'''
+    context_size = model.decoder.context_size
+    context = torch.tensor([ys[-context_size:]])
+    decoder_out = model.joiner.decoder_proj(
+        model.decoder(context, need_pad=False))
+    encoder_out = model.joiner.encoder_proj(encoder_out)
+    logits = model.joiner(encoder_out.reshape(1, 1, 1, -1),
+                          decoder_out.unsqueeze(1),
+                          project_input=False)
+    return logits.reshape(-1).log_softmax(-1).tolist()
+
+
+def _greedy_search(model, encoder_out):
+    '''A reference implementation for a single utterance.'''
+    ys = [0] * model.decoder.context_size
+    for t in range(encoder_out.size(0)):
+        log_probs = _log_probs(model, encoder_out[t], ys)
+        token = max(range(len(log_probs)), key=lambda i: log_probs[i])
+        if token != 0:
+            ys.append(token)
+    return ys[model.decoder.context_size:]
+
+
+def _modified_beam_search(model, encoder_out, num_active_paths):
+    '''A reference implementation for a single utterance.'''
+    hyps = {tuple([0] * model.decoder.context_size): 0.0}
+    for t in range(encoder_out.size(0)):
+        candidates = []
+        for ys, log_prob in hyps.items():
+            log_probs = _log_probs(model, encoder_out[t], list(ys))
+            for token, p in enumerate(log_probs):
+                new_ys = ys if token == 0 else ys + (token,)
+                candidates.append((log_prob + p, new_ys))
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        hyps = dict()
+        for log_prob, ys in candidates[:num_active_paths]:
+            if ys in hyps:
+                m = max(hyps[ys], log_prob)
+                log_prob = m + math.log(
+                    math.exp(hyps[ys] - m) + math.exp(log_prob - m))
+            hyps[ys] = log_prob
+    ys = max(hyps, key=lambda ys: hyps[ys] / len(ys))
+    return list(ys[model.decoder.context_size:])
+
+
+class TestRnntSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        torch.manual_seed(20260101)
+        cls.model = Transducer()
+        cls.encoder_out = torch.rand(5, 20, 8) * 4
+        cls.encoder_out_lens = torch.tensor([12, 20, 3, 20, 7])
+
+    def test_greedy_search(self):
+        with torch.no_grad():
+            expected = [
+                _greedy_search(self.model, self.encoder_out[i, :n])
+                for i, n in enumerate(self.encoder_out_lens.tolist())
+            ]
+        hyps = k2.rnnt_greedy_search(self.model, self.encoder_out,
+                                     self.encoder_out_lens)
+        self.assertEqual(hyps, expected)
+        self.assertTrue(any(len(h) > 0 for h in hyps))
+
+    def test_modified_beam_search(self):
+        for num_active_paths in [1, 4, 8]:
+            with torch.no_grad():
+                expected = [
+                    _modified_beam_search(self.model,
+                                          self.encoder_out[i, :n],
+                                          num_active_paths)
+                    for i, n in enumerate(self.encoder_out_lens.tolist())
+                ]
+            hyps = k2.rnnt_modified_beam_search(
+                self.model,
+                self.encoder_out,
+                self.encoder_out_lens,
+                num_active_paths=num_active_paths)
+            self.assertEqual(hyps, expected)
+
+        # It is the same as greedy search if there is only one active path
+        hyps = k2.rnnt_modified_beam_search(self.model,
+                                            self.encoder_out,
+                                            self.encoder_out_lens,
+                                            num_active_paths=1)
+        self.assertEqual(
+            hyps,
+            k2.rnnt_greedy_search(self.model, self.encoder_out,
+                                  self.encoder_out_lens))
+
+    def test_dedupe_decoder_contexts(self):
+        decoder = self.model.decoder
+        decoder.num_calls = 0
+        decoder.num_contexts = 0
+        k2.rnnt_modified_beam_search(self.model,
+                                     self.encoder_out,
+                                     self.encoder_out_lens,
+                                     num_active_paths=4)
+        # The decoder is invoked once per frame, and the initial context
+        # (all blanks) is shared by all utterances
+        self.assertEqual(decoder.num_calls, 20)
+        num_hyps_upper_bound = 4 * sum(self.encoder_out_lens.tolist())
+        self.assertLess(decoder.num_contexts, num_hyps_upper_bound)
+
+    def test_merge_hyps(self):
+        # utt 0 has 3 hyps, utt 1 has 2 hyps
+        shape = k2.ragged.create_ragged_shape2(
+            row_splits=torch.tensor([0, 3, 5], dtype=torch.int32))
+        log_probs = torch.tensor([-1.0, -2.0, -3.0, -4.0, -5.0])
+        # Hyps 0 and 2 have the same keys. Hyp 1 has the same first hash
+        # (e.g., a collision) but a different second one, so it is kept.
+        # Hyps 3 and 4 have the same keys but different utterances from the
+        # others.
+        keys = torch.tensor([[7, 1, 2], [7, 2, 2], [7, 1, 2], [7, 1, 2],
+                             [7, 1, 2]])
+        new_shape, new_log_probs, kept = k2.rnnt_search._merge_hyps(
+            shape, log_probs, keys)
+        self.assertEqual(new_shape.row_splits(1).tolist(), [0, 2, 3])
+        self.assertEqual(kept.tolist(), [0, 1, 3])
+        expected = torch.tensor([
+            math.log(math.exp(-1) + math.exp(-3)), -2.0,
+            math.log(math.exp(-4) + math.exp(-5))
+        ])
+        self.assertTrue(torch.allclose(new_log_probs, expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
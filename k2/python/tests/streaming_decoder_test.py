@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+#
+# Copyright      2026  Xiaomi Corp.
+#
+# See ../../../LICENSE for clarification regarding multiple authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# To run this single test, use
+#
+#  ctest --verbose -R streaming_decoder_test_py
+
+import asyncio
+import unittest
+
+import k2
+import torch
+
+
+class TestStreamingDecoder(unittest.TestCase):
+
+    def test_streaming_decoder(self):
+        vocab_size = 10
+        decoding_graph = k2.Fsa.from_fsas([k2.ctc_topo(vocab_size - 1)])
+
+        # Each stream has a different number of chunks of 5 frames, except
+        # that the last chunk may be shorter or longer.
+        all_chunks = []
+        for num_chunks in [3, 1, 5]:
+            chunks = []
+            for i in range(num_chunks):
+                chunk_size = 5
+                if i + 1 == num_chunks:
+                    chunk_size = torch.randint(3, 8, (1,)).item()
+                logits = torch.randn(chunk_size, vocab_size)
+                logits += 5 * torch.nn.functional.one_hot(
+                    torch.randint(0, vocab_size, (chunk_size,)), vocab_size)
+                chunks.append(logits.log_softmax(-1))
+            all_chunks.append(chunks)
+
+        # Decode each stream on its own.
+        intersecter = k2.OnlineDenseIntersecter(decoding_graph=decoding_graph,
+                                                num_streams=1,
+                                                search_beam=10,
+                                                output_beam=5,
+                                                min_active_states=1,
+                                                max_active_states=100)
+        expected = []
+        for chunks in all_chunks:
+            decode_state = None
+            for chunk in chunks:
+                dense_fsa_vec = k2.DenseFsaVec(
+                    chunk.unsqueeze(0),
+                    torch.tensor([[0, 0, chunk.size(0)]], dtype=torch.int32))
+                _, (decode_state,) = intersecter.decode(dense_fsa_vec,
+                                                        [decode_state],
+                                                        need_lattice=False)
+            expected.append(intersecter.partial_results([decode_state])[0][0])
+
+        decoder = k2.StreamingDecoder(decoding_graph,
+                                      num_streams=2,
+                                      search_beam=10,
+                                      output_beam=5,
+                                      min_active_states=1,
+                                      max_active_states=100,
+                                      max_wait_ms=1)
+
+        async def run_stream(chunks):
+            stream = decoder.new_stream()
+            for i, chunk in enumerate(chunks):
+                result = await stream.feed(chunk,
+                                           need_lattice=i + 1 == len(chunks))
+                assert result.num_stable <= len(result.labels)
+            return result
+
+        async def main():
+            results = await asyncio.gather(
+                *[run_stream(chunks) for chunks in all_chunks])
+            await decoder.close()
+            return results
+
+        loop = asyncio.new_event_loop()
+        try:
+            results = loop.run_until_complete(main())
+        finally:
+            loop.close()
+
+        # The streams were decoded in batches
+        assert 2 in decoder._intersecters
+
+        for result, labels in zip(results, expected):
+            assert result.labels == labels, (result.labels, labels)
+            assert result.lattice.shape[0] == 1
+            best_path = k2.shortest_path(result.lattice, True)
+            assert k2.nbest._get_texts(best_path) == [labels]
+
+    def test_cancelled_chunk(self):
+        vocab_size = 10
+        decoding_graph = k2.Fsa.from_fsas([k2.ctc_topo(vocab_size - 1)])
+        decoder = k2.StreamingDecoder(decoding_graph,
+                                      num_streams=2,
+                                      search_beam=10,
+                                      output_beam=5,
+                                      min_active_states=1,
+                                      max_active_states=100,
+                                      max_wait_ms=50)
+        chunks = [
+            torch.randn(5, vocab_size).log_softmax(-1) for _ in range(3)
+        ]
+
+        async def main():
+            stream = decoder.new_stream()
+            other_stream = decoder.new_stream()
+            tasks = [
+                asyncio.ensure_future(stream.feed(chunk)) for chunk in chunks
+            ]
+            other_task = asyncio.ensure_future(other_stream.feed(chunks[0]))
+            # Let the chunks be enqueued, and cancel the first one before
+            # the decoder takes it.
+            await asyncio.sleep(0)
+            tasks[0].cancel()
+
+            for task in tasks[1:]:
+                with self.assertRaises(RuntimeError):
+                    await task
+            with self.assertRaises(RuntimeError):
+                await stream.feed(chunks[0])
+
+            # Other streams are not affected.
+            result = await other_task
+            assert result.num_stable <= len(result.labels)
+            await decoder.close()
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(main())
+        finally:
+            loop.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
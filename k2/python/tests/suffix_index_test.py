@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+#
+# Copyright      2026  Xiaomi Corp.
+#
+# See ../../../LICENSE for clarification regarding multiple authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# To run this single test, use
+#
+#  ctest --verbose -R suffix_index_test_py
+
+import os
+import random
+import tempfile
+import unittest
+
+import k2
+import torch
+
+
+def _find(corpus, ngram):
+    '''Brute-force version of SuffixIndex.find() for a single n-gram.'''
+    ans = []
+    offset = 0
+    for seq in corpus:
+        for i in range(len(seq) - len(ngram) + 1):
+            if seq[i:i + len(ngram)] == ngram:
+                ans.append(offset + i)
+        offset += len(seq)
+    return ans
+
+
+class TestSuffixIndex(unittest.TestCase):
+
+    def test_simple(self):
+        corpus = [[1, 2, 3, -1], [2, 3, 1000000, -1], [], [3]]
+        index = k2.SuffixIndex(k2.RaggedTensor(corpus))
+        assert index.corpus == k2.RaggedTensor(corpus)
+
+        counts = index.count([[2, 3], [3], [1, 2, 3, -1, 2], [5], [-1]])
+        assert counts.tolist() == [2, 3, 0, 0, 2]
+
+        positions = index.find([[2, 3], [3], [5]])
+        assert positions == k2.RaggedTensor([[1, 4], [2, 5, 8], []])
+
+        lengths, counts = index.longest_match(
+            k2.RaggedTensor([[5, 2, 3, 1000000], [3, -1]]))
+        assert lengths.tolist() == [0, 1, 2, 3, 1, 2]
+        assert counts.tolist() == [0, 2, 2, 1, 3, 1]
+
+        lengths, _ = index.longest_match([[5, 2, 3, 1000000]], max_order=2)
+        assert lengths.tolist() == [0, 1, 2, 2]
+
+    def test_random(self):
+        random.seed(20260101)
+        corpus = [[random.randint(-1, 5)
+                   for _ in range(random.randint(0, 20))]
+                  for _ in range(50)]
+        ngrams = [[random.randint(-2, 6)
+                   for _ in range(random.randint(1, 4))]
+                  for _ in range(100)]
+        index = k2.SuffixIndex(corpus)
+
+        counts = index.count(ngrams).tolist()
+        positions = index.find(ngrams).tolist()
+        for ngram, count, pos in zip(ngrams, counts, positions):
+            expected = _find(corpus, ngram)
+            assert count == len(expected)
+            assert pos == expected
+
+    def test_save_and_load(self):
+        corpus = k2.RaggedTensor([[1, 2, 3], [2, 3, 4], [3]])
+        index = k2.SuffixIndex(corpus)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'index.pt')
+            index.save(filename)
+            index2 = k2.SuffixIndex.load(filename)
+
+        assert index2.corpus == corpus
+        assert torch.equal(index2.index.suffix_array,
+                           index.index.suffix_array)
+        queries = [[2, 3], [3], [1, 4]]
+        assert torch.equal(index2.count(queries), index.count(queries))
+        assert index2.find(queries) == index.find(queries)
+
+
+if __name__ == '__main__':
+    unittest.main()
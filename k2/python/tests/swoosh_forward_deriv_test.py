@@ -142,6 +142,59 @@ class TestSwooshL(unittest.TestCase):
                         (torch_deriv - k2_deriv).abs().max(),
                     )
 
+    def test_large_inputs(self):
+        # It covers several blocks and tasks of the CPU kernels, and inputs
+        # for which exp() overflows or underflows.
+        for device in self.devices:
+            x = torch.randn(100003, device=device) * 30
+            x[:4] = torch.tensor([-200.0, 200.0, -1e30, 1e30])
+            for k2_func, torch_func in [
+                (k2.swoosh_l_forward_and_deriv, SwooshLForwardAndDeriv),
+                (k2.swoosh_r_forward_and_deriv, SwooshRForwardAndDeriv),
+            ]:
+                torch_y, torch_deriv = torch_func(x.double())
+                k2_y, k2_deriv = k2_func(x)
+                assert torch.allclose(
+                    torch_y.float(), k2_y, rtol=1e-5, atol=1e-6
+                ), (device, (torch_y - k2_y).abs().max())
+                assert torch.allclose(
+                    torch_deriv.float(), k2_deriv, atol=1e-6
+                ), (device, (torch_deriv - k2_deriv).abs().max())
+
+    def test_half_and_bfloat16(self):
+        for device in self.devices:
+            for dtype, tol in [(torch.float16, 2e-3), (torch.bfloat16, 2e-2)]:
+                x = (torch.randn(1000, device=device) * 5).to(dtype)
+                for k2_forward, k2_forward_and_deriv, torch_func in [
+                    (
+                        k2.swoosh_l_forward,
+                        k2.swoosh_l_forward_and_deriv,
+                        SwooshLForwardAndDeriv,
+                    ),
+                    (
+                        k2.swoosh_r_forward,
+                        k2.swoosh_r_forward_and_deriv,
+                        SwooshRForwardAndDeriv,
+                    ),
+                ]:
+                    torch_y, torch_deriv = torch_func(x.float())
+                    k2_y = k2_forward(x)
+                    assert k2_y.dtype == dtype, (k2_y.dtype, dtype)
+                    assert torch.allclose(
+                        torch_y, k2_y.float(), rtol=tol, atol=tol
+                    ), (device, dtype, (torch_y - k2_y.float()).abs().max())
+
+                    k2_y, k2_deriv = k2_forward_and_deriv(x)
+                    assert k2_y.dtype == dtype, (k2_y.dtype, dtype)
+                    assert k2_deriv.dtype == dtype, (k2_deriv.dtype, dtype)
+                    assert torch.allclose(
+                        torch_y, k2_y.float(), rtol=tol, atol=tol
+                    ), (device, dtype, (torch_y - k2_y.float()).abs().max())
+                    assert torch.allclose(
+                        torch_deriv, k2_deriv.float(), rtol=tol, atol=tol
+                    ), (device, dtype,
+                        (torch_deriv - k2_deriv.float()).abs().max())
+
 
 if __name__ == "__main__":
     torch.manual_seed(20230126)
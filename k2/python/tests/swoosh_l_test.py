@@ -148,6 +148,36 @@ class TestSwooshL(unittest.TestCase):
                         (torch_x.grad - k2_x.grad).abs().max()
                     )
 
+    def test_half_and_bfloat16(self):
+        for device in self.devices:
+            for dtype, tol in [(torch.float16, 2e-3), (torch.bfloat16, 2e-2)]:
+                for dropout in [0, 0.5]:
+                    x = (torch.randn(5000, device=device) * 5).to(dtype)
+                    x.requires_grad = True
+                    y = k2.swoosh_l(x, dropout_prob=dropout)
+                    assert y.dtype == dtype, (y.dtype, dtype)
+
+                    w = torch.rand_like(y)
+                    (y * w).sum().backward()
+                    assert x.grad.dtype == dtype, (x.grad.dtype, dtype)
+
+                    torch_x = x.detach().float().requires_grad_(True)
+                    torch_y = torch.nn.functional.softplus(torch_x - 4)
+                    torch_y = torch_y - 0.08 * torch_x - 0.035
+                    # Use the elements that are kept by the dropout of k2
+                    mask = (y != 0).float()
+                    torch_y = torch_y * mask / (1 - dropout)
+                    (torch_y * w.float()).sum().backward()
+
+                    assert torch.allclose(
+                        torch_y, y.float(), rtol=tol, atol=tol
+                    ), (device, dtype, (torch_y - y.float()).abs().max())
+                    grad_tol = tol + 1.05 / 255.0 / (1 - dropout)
+                    assert torch.allclose(
+                        torch_x.grad, x.grad.float(), atol=grad_tol
+                    ), (device, dtype,
+                        (torch_x.grad - x.grad.float()).abs().max())
+
 
 if __name__ == "__main__":
     torch.manual_seed(20230116)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+#
+# Copyright      2026  Xiaomi Corp.
+#
+# See ../../../LICENSE for clarification regarding multiple authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# To run this single test, use
+#
+#  ctest --verbose -R thread_pool_test_py
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import k2
+import torch
+
+
+def _intersect(graph: k2.Fsa, dense_fsa_vec: k2.DenseFsaVec) -> k2.Fsa:
+    lattice = k2.intersect_dense_pruned(graph,
+                                        dense_fsa_vec,
+                                        search_beam=20,
+                                        output_beam=8,
+                                        min_active_states=1,
+                                        max_active_states=10000)
+    return k2.connect(lattice)
+
+
+def _assert_equal(a: k2.Fsa, b: k2.Fsa) -> None:
+    assert torch.equal(a.arcs.values(), b.arcs.values())
+    assert torch.equal(a.scores, b.scores)
+
+
+class TestThreadPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.num_threads = k2.get_num_threads()
+
+    def tearDown(self):
+        k2.set_num_threads(self.num_threads)
+
+    def test_set_num_threads(self):
+        graph = k2.create_fsa_vec([k2.arc_sort(k2.ctc_topo(4))])
+        log_prob = torch.randn(8, 100, 5).log_softmax(dim=-1)
+        supervision_segments = torch.tensor(
+            [[i, 0, 100 - i] for i in range(8)], dtype=torch.int32)
+        dense_fsa_vec = k2.DenseFsaVec(log_prob, supervision_segments)
+
+        results = []
+        for n in [1, 4]:
+            k2.set_num_threads(n)
+            self.assertEqual(k2.get_num_threads(), n)
+            results.append(_intersect(graph, dense_fsa_vec))
+        _assert_equal(results[0], results[1])
+
+    def test_large(self):
+        # Each frame has about 8 * 101 * 102 arcs, which is more than twice
+        # internal::kMinElementsPerTask, so the per-arc operations of
+        # intersect_dense_pruned run in parallel.
+        max_token = 100
+        graph = k2.create_fsa_vec([k2.arc_sort(k2.ctc_topo(max_token))] * 8)
+        log_prob = torch.randn(8, 20, max_token + 1).log_softmax(dim=-1)
+        supervision_segments = torch.tensor(
+            [[i, 0, 20 - i] for i in range(8)], dtype=torch.int32)
+        dense_fsa_vec = k2.DenseFsaVec(log_prob, supervision_segments)
+
+        k2.set_num_threads(1)
+        expected = _intersect(graph, dense_fsa_vec)
+        self.assertGreater(expected.num_arcs, 0)
+
+        k2.set_num_threads(4)
+        _assert_equal(_intersect(graph, dense_fsa_vec), expected)
+
+        pool = k2.ThreadPool(3)
+        self.assertEqual(pool.num_threads, 3)
+        with pool:
+            self.assertEqual(k2.get_num_threads(), 3)
+            with k2.ThreadPool(2):
+                self.assertEqual(k2.get_num_threads(), 2)
+            self.assertEqual(k2.get_num_threads(), 3)
+            _assert_equal(_intersect(graph, dense_fsa_vec), expected)
+        self.assertEqual(k2.get_num_threads(), 4)
+
+    def test_set_num_threads_while_running(self):
+        max_token = 100
+        graph = k2.create_fsa_vec([k2.arc_sort(k2.ctc_topo(max_token))] * 8)
+        log_prob = torch.randn(8, 10, max_token + 1).log_softmax(dim=-1)
+        supervision_segments = torch.tensor(
+            [[i, 0, 10 - i] for i in range(8)], dtype=torch.int32)
+        dense_fsa_vec = k2.DenseFsaVec(log_prob, supervision_segments)
+        expected = _intersect(graph, dense_fsa_vec)
+
+        # The pool used by the decoding threads is replaced while they are
+        # running.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(_intersect, graph, dense_fsa_vec)
+                for _ in range(6)
+            ]
+            for n in [3, 1, 4, 2]:
+                k2.set_num_threads(n)
+            for f in futures:
+                _assert_equal(f.result(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
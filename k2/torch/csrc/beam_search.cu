@@ -21,6 +21,8 @@
 
 #include <algorithm>
 #include <deque>
+#include <limits>
+#include <tuple>
 #include <utility>
 #include <vector>
 
@@ -33,15 +35,6 @@
 
 namespace k2 {
 
-static inline torch::Tensor FloorDivide(torch::Tensor a, int32_t b) {
-#if K2_TORCH_VERSION_MAJOR > 1 || \
-    (K2_TORCH_VERSION_MAJOR == 1 && K2_TORCH_VERSION_MINOR > 7)
-  return torch::div(a, b, /*rounding_mode*/ "trunc");
-#else
-  return torch::floor_divide(a, b);
-#endif
-}
-
 /**
  * Construct the decoder input from the current hypothesis.
  *
@@ -62,8 +55,9 @@ static void BuildDecoderInput(const std::vector<std::vector<int32_t>> &hyps,
   }
 }
 
-static torch::Tensor BuildDecoderInput(const std::vector<Hypothesis> hyps,
-                                       int32_t context_size) {
+static torch::Tensor BuildDecoderInput(
+    const HypothesisArena &arena, const std::vector<ArenaHypothesis> &hyps,
+    int32_t context_size) {
   int32_t num_hyps = hyps.size();
   torch::Tensor decoder_input =
       torch::empty({num_hyps, context_size},
@@ -72,16 +66,44 @@ static torch::Tensor BuildDecoderInput(const std::vector<Hypothesis> hyps,
 
   int64_t *p = decoder_input.data_ptr<int64_t>();
   for (const auto &h : hyps) {
-    auto start = h.ys.end() - context_size;
-    auto end = h.ys.end();
-
-    std::copy(start, end, p);
+    arena.GetLastTokens(h.node, context_size, p);
     p += context_size;
   }
 
   return decoder_input;
 }
 
+/** Run the decoder network and the decoder projection of the joiner on
+ * the given contexts. Identical contexts, which are common since hypotheses
+ * share their last tokens, are run through the decoder only once.
+ *
+ * @param decoder  The decoder network.
+ * @param decoder_proj  The decoder projection of the joiner.
+ * @param decoder_input A 2-D tensor of shape (num_hyps, context_size) with
+ *                      dtype torch::kLong. It must be on CPU.
+ * @param device  The device of the model.
+ * @return Return a tensor of shape (num_hyps, 1, joiner_dim) on `device`.
+ */
+static torch::Tensor RunDecoder(torch::jit::Module &decoder,
+                                torch::jit::Module &decoder_proj,
+                                const torch::Tensor &decoder_input,
+                                torch::Device device) {
+  torch::Tensor unique_input, inverse;
+  std::tie(unique_input, inverse, std::ignore) =
+      torch::unique_dim(decoder_input, /*dim*/ 0, /*sorted*/ false,
+                        /*return_inverse*/ true);
+
+  auto decoder_out =
+      decoder
+          .run_method("forward", unique_input.to(device), /*need_pad*/ false)
+          .toTensor();
+  decoder_out = decoder_proj.run_method("forward", decoder_out).toTensor();
+
+  // Map the outputs back to the hypotheses. Note that we have to do it even
+  // if there are no duplicates since torch::unique_dim() sorts the rows.
+  return decoder_out.index_select(/*dim*/ 0, inverse.to(device));
+}
+
 /** Return a ragged shape with axes [utt][num_hyps].
  *
  * @param hyps hyps.size() == batch_size. Each entry contains the active
@@ -89,7 +111,7 @@ static torch::Tensor BuildDecoderInput(const std::vector<Hypothesis> hyps,
  * @return Return a ragged shape with 2 axes [utt][num_hyps]. Note that the
  *         shape is on CPU.
  */
-static RaggedShape GetHypsShape(const std::vector<Hypotheses> &hyps) {
+static RaggedShape GetHypsShape(const std::vector<ArenaHypotheses> &hyps) {
   int32_t num_utt = hyps.size();
   Array1<int32_t> row_splits(GetCpuContext(), num_utt + 1);
   int32_t *row_splits_data = row_splits.Data();
@@ -146,10 +168,7 @@ std::vector<std::vector<int32_t>> GreedySearch(
                   torch::dtype(torch::kLong)
                       .memory_format(torch::MemoryFormat::Contiguous));
   auto decoder_out =
-      decoder
-          .run_method("forward", decoder_input.to(device), /*need_pad*/ false)
-          .toTensor();
-  decoder_out = decoder_proj.run_method("forward", decoder_out).toTensor();
+      RunDecoder(decoder, decoder_proj, decoder_input, device);
   // decoder_out's shape is (batch_size, 1, joiner_dim)
 
   using torch::indexing::Slice;
@@ -192,11 +211,7 @@ std::vector<std::vector<int32_t>> GreedySearch(
         decoder_input = decoder_input.index({Slice(0, cur_batch_size)});
       }
       BuildDecoderInput(hyps, &decoder_input);
-      decoder_out = decoder
-                        .run_method("forward", decoder_input.to(device),
-                                    /*need_pad*/ false)
-                        .toTensor();
-      decoder_out = decoder_proj.run_method("forward", decoder_out).toTensor();
+      decoder_out = RunDecoder(decoder, decoder_proj, decoder_input, device);
     }
   }
 
@@ -249,11 +264,16 @@ std::vector<std::vector<int32_t>> ModifiedBeamSearch(
   torch::Device device = encoder_out.device();
 
   std::vector<int32_t> blanks(context_size, blank_id);
-  Hypotheses blank_hyp({{blanks, 0}});
 
-  std::deque<Hypotheses> finalized;
-  std::vector<Hypotheses> cur(batch_size, blank_hyp);
-  std::vector<Hypothesis> prev;
+  // All token sequences are stored in the arena; a hypothesis refers to
+  // its sequence by a node index.
+  HypothesisArena arena;
+  ArenaHypotheses blank_hyp(&arena);
+  blank_hyp.Add(arena.Extend(HypothesisArena::kRoot, blanks), 0);
+
+  std::deque<ArenaHypotheses> finalized;
+  std::vector<ArenaHypotheses> cur(batch_size, blank_hyp);
+  std::vector<ArenaHypothesis> prev;
 
   using torch::indexing::Slice;
   auto batch_sizes_acc = packed_seq.batch_sizes().accessor<int64_t, 1>();
@@ -280,32 +300,32 @@ std::vector<std::vector<int32_t>> ModifiedBeamSearch(
     // Due to merging paths with identical token sequences,
     // not all utterances have "num_acitve_paths" paths.
     auto hyps_shape = GetHypsShape(cur);
+    int32_t num_hyps = hyps_shape.TotSize(1);
 
     prev.clear();
-    prev.reserve(hyps_shape.TotSize(1));
-    for (auto &hyps : cur) {
-      for (auto &h : hyps) {
-        prev.push_back(std::move(h.second));
-      }
+    prev.reserve(num_hyps);
+    int32_t max_num_hyps = 0;
+    for (const auto &hyps : cur) {
+      max_num_hyps = std::max(max_num_hyps, hyps.Size());
+      prev.insert(prev.end(), hyps.begin(), hyps.end());
     }
     cur.clear();
     cur.reserve(cur_batch_size);
 
     torch::Tensor ys_log_probs =
-        torch::empty({hyps_shape.TotSize(1), 1}, torch::dtype(torch::kFloat));
+        torch::empty({num_hyps, 1}, torch::dtype(torch::kFloat));
 
     auto ys_log_probs_acc = ys_log_probs.accessor<float, 2>();
     for (int32_t k = 0; k != prev.size(); ++k) {
       ys_log_probs_acc[k][0] = prev[k].log_prob;
     }
 
-    auto decoder_input = BuildDecoderInput(prev, context_size).to(device);
+    auto decoder_input = BuildDecoderInput(arena, prev, context_size);
 
+    // Hypotheses of an utterance often share their last tokens, so
+    // the decoder runs only once for each unique context.
     auto decoder_out =
-        decoder.run_method("forward", decoder_input, /*need_pad*/ false)
-            .toTensor();
-
-    decoder_out = decoder_proj.run_method("forward", decoder_out).toTensor();
+        RunDecoder(decoder, decoder_proj, decoder_input, device);
     // decoder_out is of shape (num_hyps, 1, joiner_dim)
 
     auto row_ids = hyps_shape.RowIds(1);
@@ -331,41 +351,55 @@ std::vector<std::vector<int32_t>> ModifiedBeamSearch(
     log_probs.add_(ys_log_probs);
 
     int32_t vocab_size = log_probs.size(1);
-    log_probs = log_probs.reshape(-1);
     auto row_splits = hyps_shape.RowSplits(1);
     const int32_t *row_splits_data = row_splits.Data();
+    const int32_t *row_ids_data = row_ids.Data();
+
+    // Select the top-k of all utterances at once. To do that, we pad the
+    // hyps of each utterance to max_num_hyps with -inf, so that log_probs
+    // can be reshaped to (cur_batch_size, max_num_hyps * vocab_size).
+    if (num_hyps != cur_batch_size * max_num_hyps) {
+      torch::Tensor dest_rows = torch::empty({num_hyps}, torch::kLong);
+      int64_t *dest_rows_data = dest_rows.data_ptr<int64_t>();
+      for (int32_t k = 0; k != num_hyps; ++k) {
+        int32_t utt = row_ids_data[k];
+        dest_rows_data[k] = utt * max_num_hyps + k - row_splits_data[utt];
+      }
+      log_probs =
+          torch::full({cur_batch_size * max_num_hyps, vocab_size},
+                      -std::numeric_limits<float>::infinity(), torch::kFloat)
+              .index_copy_(0, dest_rows, log_probs);
+    }
+    log_probs = log_probs.reshape({cur_batch_size, max_num_hyps * vocab_size});
 
-    for (int32_t k = 0; k != cur_batch_size; ++k) {
-      int32_t start = row_splits_data[k];
-      int32_t end = row_splits_data[k + 1];
+    int32_t k = std::min<int32_t>(num_acitve_paths, max_num_hyps * vocab_size);
+    torch::Tensor values, indexes;
+    std::tie(values, indexes) = log_probs.topk(/*k*/ k, /*dim*/ 1,
+                                               /*largest*/ true,
+                                               /*sorted*/ true);
 
-      torch::Tensor values, indexes;
-      std::tie(values, indexes) =
-          log_probs.slice(/*dim*/ 0, start * vocab_size, end * vocab_size)
-              .topk(/*k*/ num_acitve_paths, /*dim*/ 0,
-                    /*largest*/ true, /*sorted*/ true);
+    auto values_acc = values.accessor<float, 2>();
+    auto indexes_acc = indexes.accessor<int64_t, 2>();
 
-      auto topk_hyp_indexes = FloorDivide(indexes, vocab_size);
-      auto topk_token_indexes = torch::remainder(indexes, vocab_size);
+    for (int32_t utt = 0; utt != cur_batch_size; ++utt) {
+      int32_t start = row_splits_data[utt];
+      int32_t this_num_hyps = row_splits_data[utt + 1] - start;
 
-      auto values_acc = values.accessor<float, 1>();
-      auto topk_hyp_indexes_acc = topk_hyp_indexes.accessor<int64_t, 1>();
-      auto topk_token_indexes_acc = topk_token_indexes.accessor<int64_t, 1>();
+      ArenaHypotheses hyps(&arena);
+      for (int32_t j = 0; j != k; ++j) {
+        int32_t hyp_idx = indexes_acc[utt][j] / vocab_size;
+        if (hyp_idx >= this_num_hyps) continue;  // a padded entry
 
-      Hypotheses hyps;
-      for (int32_t j = 0; j != values.numel(); ++j) {
-        int32_t hyp_idx = topk_hyp_indexes_acc[j];
-        Hypothesis new_hyp = prev[start + hyp_idx];  // note: hyp_idx is 0 based
+        int32_t node = prev[start + hyp_idx].node;  // note: hyp_idx is 0 based
 
-        int32_t new_token = topk_token_indexes_acc[j];
+        int32_t new_token = indexes_acc[utt][j] % vocab_size;
         if (new_token != blank_id && new_token != unk_id) {
-          new_hyp.ys.push_back(new_token);
+          node = arena.Extend(node, new_token);
         }
 
         // We already added log_prob of the path to log_probs before, so
-        // we use values_acc[j] here directly.
-        new_hyp.log_prob = values_acc[j];
-        hyps.Add(std::move(new_hyp));
+        // we use values_acc[utt][j] here directly.
+        hyps.Add(node, values_acc[utt][j]);
       }
       cur.push_back(std::move(hyps));
     }
@@ -380,9 +414,10 @@ std::vector<std::vector<int32_t>> ModifiedBeamSearch(
 
   std::vector<std::vector<int32_t>> ans(batch_size);
   for (int32_t i = 0; i != batch_size; ++i) {
-    Hypothesis hyp = cur[unsorted_indices_accessor[i]].GetMostProbable(true);
-    torch::ArrayRef<int32_t> arr(hyp.ys);
-    ans[i] = arr.slice(context_size).vec();
+    ArenaHypothesis hyp =
+        cur[unsorted_indices_accessor[i]].GetMostProbable(true);
+    std::vector<int32_t> ys = arena.GetTokens(hyp.node);
+    ans[i].assign(ys.begin() + context_size, ys.end());
   }
 
   return ans;
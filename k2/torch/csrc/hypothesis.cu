@@ -19,6 +19,7 @@
 #include <algorithm>
 #include <utility>
 
+#include "k2/csrc/log.h"
 #include "k2/csrc/utils.h"
 #include "k2/torch/csrc/hypothesis.h"
 namespace k2 {
@@ -53,4 +54,68 @@ Hypothesis Hypotheses::GetMostProbable(bool length_norm) const {
   }
 }
 
+bool HypothesisArena::Equal(int32_t a, int32_t b) const {
+  if (Hash(a) != Hash(b) || Length(a) != Length(b)) return false;
+
+  // Stop at the first common ancestor, which is usually close since
+  // hypotheses share their prefixes.
+  while (a != b) {
+    const Node &na = nodes_[a];
+    const Node &nb = nodes_[b];
+    if (na.token != nb.token) return false;
+    a = na.parent;
+    b = nb.parent;
+  }
+  return true;
+}
+
+std::vector<int32_t> HypothesisArena::GetTokens(int32_t node) const {
+  std::vector<int32_t> ans(Length(node));
+  for (auto it = ans.rbegin(); it != ans.rend(); ++it) {
+    *it = nodes_[node].token;
+    node = nodes_[node].parent;
+  }
+  return ans;
+}
+
+void HypothesisArena::GetLastTokens(int32_t node, int32_t n,
+                                    int64_t *out) const {
+  K2_CHECK_GE(Length(node), n);
+  for (int32_t i = n - 1; i >= 0; --i) {
+    out[i] = nodes_[node].token;
+    node = nodes_[node].parent;
+  }
+}
+
+void ArenaHypotheses::Add(int32_t node, double log_prob) {
+  uint64_t hash = arena_->Hash(node);
+  for (int32_t i = 0; i != static_cast<int32_t>(hyps_.size()); ++i) {
+    if (hashes_[i] == hash && arena_->Equal(hyps_[i].node, node)) {
+      hyps_[i].log_prob = LogAdd<double>()(hyps_[i].log_prob, log_prob);
+      return;
+    }
+  }
+  hyps_.push_back({node, log_prob});
+  hashes_.push_back(hash);
+}
+
+ArenaHypothesis ArenaHypotheses::GetMostProbable(bool length_norm) const {
+  K2_CHECK(!hyps_.empty());
+  if (length_norm == false) {
+    return *std::max_element(
+        hyps_.begin(), hyps_.end(),
+        [](const auto &left, const auto &right) -> bool {
+          return left.log_prob < right.log_prob;
+        });
+  } else {
+    // for length_norm is true
+    return *std::max_element(
+        hyps_.begin(), hyps_.end(),
+        [this](const auto &left, const auto &right) -> bool {
+          return left.log_prob / arena_->Length(left.node) <
+                 right.log_prob / arena_->Length(right.node);
+        });
+  }
+}
+
 }  // namespace k2
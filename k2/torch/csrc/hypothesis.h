@@ -19,6 +19,7 @@
 #ifndef K2_TORCH_CSRC_HYPOTHESIS_H_
 #define K2_TORCH_CSRC_HYPOTHESIS_H_
 
+#include <cstdint>
 #include <string>
 #include <unordered_map>
 #include <utility>
@@ -108,5 +109,115 @@ class Hypotheses {
   Map hyps_dict_;
 };
 
+/* A prefix tree of token sequences, stored in a flat array (the arena).
+
+   Each node represents the token sequence from the root to it and stores
+   its last token, its parent, its length, and a rolling hash of the
+   sequence. Nodes are never removed, so a hypothesis can be represented by
+   the index of a node, and extending it by one token is O(1) without
+   copying its token sequence.
+ */
+class HypothesisArena {
+ public:
+  // The node of the empty sequence
+  static constexpr int32_t kRoot = -1;
+
+  // Return a node representing the sequence of `node` followed by `token`.
+  int32_t Extend(int32_t node, int32_t token) {
+    Node n;
+    n.token = token;
+    n.parent = node;
+    n.length = Length(node) + 1;
+    n.hash = Hash(node) * kHashMultiplier + static_cast<uint32_t>(token) + 1;
+    nodes_.push_back(n);
+    return static_cast<int32_t>(nodes_.size()) - 1;
+  }
+
+  // Return a node representing the sequence of `node` followed by `tokens`.
+  int32_t Extend(int32_t node, const std::vector<int32_t> &tokens) {
+    for (int32_t token : tokens) node = Extend(node, token);
+    return node;
+  }
+
+  // Return the rolling hash of the sequence of `node`. Two nodes with the
+  // same token sequence have the same hash.
+  uint64_t Hash(int32_t node) const {
+    return node == kRoot ? 0 : nodes_[node].hash;
+  }
+
+  // Return the number of tokens in the sequence of `node`.
+  int32_t Length(int32_t node) const {
+    return node == kRoot ? 0 : nodes_[node].length;
+  }
+
+  // Return true if the two nodes represent the same token sequence.
+  bool Equal(int32_t a, int32_t b) const;
+
+  // Return the token sequence of `node`.
+  std::vector<int32_t> GetTokens(int32_t node) const;
+
+  // Write the last `n` tokens of the sequence of `node` to `out`.
+  // Requires Length(node) >= n.
+  void GetLastTokens(int32_t node, int32_t n, int64_t *out) const;
+
+  int32_t NumNodes() const { return static_cast<int32_t>(nodes_.size()); }
+
+ private:
+  static constexpr uint64_t kHashMultiplier = 1000003;
+
+  struct Node {
+    int32_t token;
+    int32_t parent;
+    int32_t length;
+    uint64_t hash;
+  };
+  std::vector<Node> nodes_;
+};
+
+struct ArenaHypothesis {
+  // Index of the node in the HypothesisArena containing the predicted tokens
+  int32_t node;
+
+  // The total score of the tokens in log space.
+  double log_prob;
+};
+
+/* A set of hypotheses whose token sequences are stored in a HypothesisArena.
+
+   It has the same semantics as `Hypotheses`, but hypotheses are identified
+   by the rolling hash of their token sequences (verified by
+   HypothesisArena::Equal() on a match) instead of a string containing all
+   of their tokens.
+
+   The number of hypotheses is expected to be small, e.g., the number of
+   active paths in beam search, so they are kept in a vector.
+ */
+class ArenaHypotheses {
+ public:
+  explicit ArenaHypotheses(const HypothesisArena *arena) : arena_(arena) {}
+
+  // Add a hypothesis. If a hypothesis with the same token sequence already
+  // exists, its log_prob is updated with the given log_prob using log-sum-exp.
+  void Add(int32_t node, double log_prob);
+
+  // Get the hyp that has the largest log_prob.
+  // If length_norm is true, hyp's log_prob are divided by
+  // the number of its tokens before comparison.
+  ArenaHypothesis GetMostProbable(bool length_norm) const;
+
+  int32_t Size() const { return static_cast<int32_t>(hyps_.size()); }
+
+  auto begin() { return hyps_.begin(); }
+  auto end() { return hyps_.end(); }
+
+  const auto begin() const { return hyps_.begin(); }
+  const auto end() const { return hyps_.end(); }
+
+ private:
+  const HypothesisArena *arena_;  // Not owned
+  std::vector<ArenaHypothesis> hyps_;
+  std::vector<uint64_t> hashes_;  // hashes_[i] is the hash of hyps_[i]
+};
+
 }  // namespace k2
 #endif  // K2_TORCH_CSRC_HYPOTHESIS_H_
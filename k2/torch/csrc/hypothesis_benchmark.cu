@@ -0,0 +1,168 @@
+/**
+ * Copyright      2026  Xiaomi Corporation
+ *
+ * See LICENSE for clarification regarding multiple authors
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+// This file benchmarks the bookkeeping of hypotheses in modified beam search,
+// i.e., everything except for the neural network and top-k selection:
+// extending hypotheses with new tokens, merging hypotheses with identical
+// token sequences, and building the decoder input from the last tokens.
+//
+// It compares `Hypotheses`, which keys hypotheses by a string of all of their
+// tokens, with `ArenaHypotheses`, which stores tokens in a prefix tree.
+//
+// Usage:
+//
+//   ./bin/hypothesis_benchmark [num_frames] [num_active_paths]
+
+#include <chrono>  // NOLINT
+#include <cstdint>
+#include <cstdlib>
+#include <iostream>
+#include <random>
+#include <utility>
+#include <vector>
+
+#include "k2/torch/csrc/hypothesis.h"
+
+namespace k2 {
+
+static constexpr int32_t kBatchSize = 16;
+static constexpr int32_t kContextSize = 2;
+static constexpr int32_t kVocabSize = 500;
+
+struct Choice {
+  int32_t hyp_idx;
+  int32_t token;  // 0 is blank
+  float log_prob;
+};
+
+// Generate the (hyp, token) pairs chosen by top-k for each frame and stream,
+// so that both implementations do a similar amount of work. Note that the
+// order of hypotheses differs between them, so the results may differ.
+static std::vector<std::vector<Choice>> GenerateChoices(
+    int32_t num_frames, int32_t num_active_paths) {
+  std::mt19937 gen(20260101);
+  std::uniform_int_distribution<int32_t> token_dist(0, kVocabSize - 1);
+  std::uniform_real_distribution<float> prob_dist(0, 1);
+  std::vector<std::vector<Choice>> ans(num_frames * kBatchSize);
+  for (auto &choices : ans) {
+    for (int32_t j = 0; j != num_active_paths; ++j) {
+      Choice c;
+      c.hyp_idx = j / 2;
+      // 70% of the chosen tokens are blanks
+      c.token = prob_dist(gen) < 0.7 ? 0 : token_dist(gen);
+      c.log_prob = -prob_dist(gen) * 10;
+      choices.push_back(c);
+    }
+  }
+  return ans;
+}
+
+static double BenchmarkHypotheses(
+    const std::vector<std::vector<Choice>> &choices, int32_t num_frames) {
+  auto start = std::chrono::steady_clock::now();
+  std::vector<int32_t> blanks(kContextSize, 0);
+  std::vector<Hypotheses> cur(kBatchSize, Hypotheses({{blanks, 0}}));
+  std::vector<int64_t> decoder_input;
+  for (int32_t t = 0; t != num_frames; ++t) {
+    for (int32_t b = 0; b != kBatchSize; ++b) {
+      std::vector<Hypothesis> prev = cur[b].Vec();
+      decoder_input.clear();
+      for (const auto &h : prev) {
+        decoder_input.insert(decoder_input.end(), h.ys.end() - kContextSize,
+                             h.ys.end());
+      }
+
+      Hypotheses hyps;
+      for (const auto &c : choices[t * kBatchSize + b]) {
+        Hypothesis new_hyp = prev[c.hyp_idx % prev.size()];
+        if (c.token != 0) new_hyp.ys.push_back(c.token);
+        new_hyp.log_prob = c.log_prob;
+        hyps.Add(std::move(new_hyp));
+      }
+      cur[b] = std::move(hyps);
+    }
+  }
+  int64_t total_len = 0;
+  for (const auto &hyps : cur) {
+    total_len += hyps.GetMostProbable(true).ys.size();
+  }
+  auto end = std::chrono::steady_clock::now();
+  std::cout << "  total length of results: " << total_len << "\n";
+  return std::chrono::duration<double, std::milli>(end - start).count();
+}
+
+static double BenchmarkArenaHypotheses(
+    const std::vector<std::vector<Choice>> &choices, int32_t num_frames) {
+  auto start = std::chrono::steady_clock::now();
+  std::vector<int32_t> blanks(kContextSize, 0);
+  HypothesisArena arena;
+  ArenaHypotheses blank_hyp(&arena);
+  blank_hyp.Add(arena.Extend(HypothesisArena::kRoot, blanks), 0);
+  std::vector<ArenaHypotheses> cur(kBatchSize, blank_hyp);
+  std::vector<int64_t> decoder_input;
+  std::vector<ArenaHypothesis> prev;
+  for (int32_t t = 0; t != num_frames; ++t) {
+    for (int32_t b = 0; b != kBatchSize; ++b) {
+      prev.assign(cur[b].begin(), cur[b].end());
+      decoder_input.resize(prev.size() * kContextSize);
+      for (size_t i = 0; i != prev.size(); ++i) {
+        arena.GetLastTokens(prev[i].node, kContextSize,
+                            decoder_input.data() + i * kContextSize);
+      }
+
+      ArenaHypotheses hyps(&arena);
+      for (const auto &c : choices[t * kBatchSize + b]) {
+        int32_t node = prev[c.hyp_idx % prev.size()].node;
+        if (c.token != 0) node = arena.Extend(node, c.token);
+        hyps.Add(node, c.log_prob);
+      }
+      cur[b] = std::move(hyps);
+    }
+  }
+  int64_t total_len = 0;
+  for (const auto &hyps : cur) {
+    total_len += arena.GetTokens(hyps.GetMostProbable(true).node).size();
+  }
+  auto end = std::chrono::steady_clock::now();
+  std::cout << "  total length of results: " << total_len << "\n";
+  return std::chrono::duration<double, std::milli>(end - start).count();
+}
+
+}  // namespace k2
+
+int main(int argc, char *argv[]) {
+  int32_t num_frames = argc > 1 ? atoi(argv[1]) : 1000;
+  int32_t num_active_paths = argc > 2 ? atoi(argv[2]) : 8;
+
+  std::cout << "batch_size: " << k2::kBatchSize
+            << ", num_frames: " << num_frames
+            << ", num_active_paths: " << num_active_paths << "\n";
+
+  auto choices = k2::GenerateChoices(num_frames, num_active_paths);
+
+  std::cout << "Hypotheses:\n";
+  double t1 = k2::BenchmarkHypotheses(choices, num_frames);
+  std::cout << "  " << t1 << " ms\n";
+
+  std::cout << "ArenaHypotheses:\n";
+  double t2 = k2::BenchmarkArenaHypotheses(choices, num_frames);
+  std::cout << "  " << t2 << " ms\n";
+
+  std::cout << "speedup: " << t1 / t2 << "\n";
+  return 0;
+}
@@ -16,6 +16,9 @@
  * limitations under the License.
  */
 
+#include <cmath>
+#include <vector>
+
 #include "gtest/gtest.h"
 #include "k2/torch/csrc/hypothesis.h"
 
@@ -40,4 +43,52 @@ TEST(Hypotheses, ConstructorFromVector) {
   EXPECT_TRUE(hyp_vec.empty());
 }
 
+TEST(HypothesisArena, Extend) {
+  HypothesisArena arena;
+  int32_t a = arena.Extend(HypothesisArena::kRoot, {0, 0});
+  int32_t b = arena.Extend(a, 3);
+  int32_t c = arena.Extend(a, 5);
+  int32_t d = arena.Extend(HypothesisArena::kRoot, {0, 0, 3});
+
+  EXPECT_EQ(arena.NumNodes(), 7);
+  EXPECT_EQ(arena.Length(b), 3);
+  EXPECT_EQ(arena.GetTokens(b), (std::vector<int32_t>{0, 0, 3}));
+  EXPECT_EQ(arena.GetTokens(c), (std::vector<int32_t>{0, 0, 5}));
+  EXPECT_TRUE(arena.GetTokens(HypothesisArena::kRoot).empty());
+
+  EXPECT_EQ(arena.Hash(b), arena.Hash(d));
+  EXPECT_NE(arena.Hash(b), arena.Hash(c));
+  EXPECT_TRUE(arena.Equal(b, d));
+  EXPECT_FALSE(arena.Equal(b, c));
+  EXPECT_FALSE(arena.Equal(a, b));
+
+  int64_t last[2];
+  arena.GetLastTokens(c, 2, last);
+  EXPECT_EQ(last[0], 0);
+  EXPECT_EQ(last[1], 5);
+}
+
+TEST(ArenaHypotheses, Add) {
+  HypothesisArena arena;
+  int32_t a = arena.Extend(HypothesisArena::kRoot, {0, 1});
+  int32_t b = arena.Extend(a, 2);
+  int32_t c = arena.Extend(HypothesisArena::kRoot, {0, 1, 2});
+
+  ArenaHypotheses hyps(&arena);
+  hyps.Add(a, -1.5);
+  hyps.Add(b, -2.5);
+  EXPECT_EQ(hyps.Size(), 2);
+
+  // c has the same tokens as b, so it is merged with b
+  hyps.Add(c, -2.5);
+  EXPECT_EQ(hyps.Size(), 2);
+  EXPECT_NEAR(hyps.GetMostProbable(false).log_prob, -1.5, 1e-6);
+  EXPECT_EQ(hyps.GetMostProbable(false).node, a);
+
+  // (-2.5 + log(2)) / 3 is larger than -1.5 / 2
+  ArenaHypothesis best = hyps.GetMostProbable(true);
+  EXPECT_EQ(best.node, b);
+  EXPECT_NEAR(best.log_prob, -2.5 + std::log(2.0), 1e-6);
+}
+
 }  // namespace k2
@@ -244,11 +244,12 @@ setuptools.setup(
     url="https://github.com/k2-fsa/k2",
     package_dir={
         "k2": "k2/python/k2",
+        "k2.benchmark": "k2/python/k2/benchmark",
         "k2.ragged": "k2/python/k2/ragged",
         "k2.sparse": "k2/python/k2/sparse",
         "k2.version": "k2/python/k2/version",
     },
-    packages=["k2", "k2.ragged", "k2.sparse", "k2.version"],
+    packages=["k2", "k2.benchmark", "k2.ragged", "k2.sparse", "k2.version"],
     install_requires=install_requires,
     extras_require={"dev": dev_requirements},
     ext_modules=[cmake_extension("_k2")],